@@ -0,0 +1,141 @@
+"""
+RPattern Auth Header - Authenticated Cleartext Expiry
+Creator: Rahul Chaube 🚀
+
+Expiry used to be checked only after the whole loop was captured, the
+key derived and the payload decrypted. The secure cores also showed the
+timestamp as an arbitrary 24-bit RGB color, which no camera reproduces
+exactly, so the early check rejected every capture.
+
+The secure cores now append a small MAC-protected block to the format
+header frames. It is readable after the first second or so of capture:
+a scanner checks the key id and expiry there and abandons expired or
+foreign patterns without waiting for the loop or touching the payload.
+
+Layout:
+    >H  key id (first bytes of SHA-256 of the auth key, names the issuer)
+    >I  expiry, Unix seconds
+    8s  HMAC-SHA256 of everything above, truncated
+
+The block is cleartext on purpose; the encrypted payload still carries
+its own expiry.
+
+In rolling refresh mode the data frames live much longer and only this
+block is re-signed every interval, so it is the freshness check that
+counts: decoders then require it (see check_auth_header(required=True)).
+"""
+
+import hashlib
+import hmac
+import struct
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+AUTH_HEADER = struct.Struct('>HI')
+AUTH_TAG_SIZE = 8
+AUTH_HEADER_SIZE = AUTH_HEADER.size + AUTH_TAG_SIZE
+
+# Keeps the auth key apart from every other key derived from the same secret
+_AUTH_CONTEXT = b"RPattern auth header v1"
+
+
+class StaleHeaderError(ValueError):
+    """The auth header is expired or unreadable, while the data frames may still be good."""
+
+
+def derive_auth_key(secret: bytes) -> bytes:
+    """Derive the key that signs auth headers from a core's secret key."""
+    return hmac.new(secret, _AUTH_CONTEXT, hashlib.sha256).digest()
+
+
+def auth_key_id(auth_key: bytes) -> int:
+    """Public 16-bit id of an auth key, shown on screen to name the issuer."""
+    return int.from_bytes(hashlib.sha256(auth_key).digest()[:2], 'big')
+
+
+@dataclass(frozen=True)
+class AuthHeader:
+    """Issuer and expiry shown in cleartext ahead of the payload."""
+    key_id: int
+    expires: int
+    
+    @classmethod
+    def issue(cls, auth_key: bytes, expires: float) -> 'AuthHeader':
+        """Header for a pattern signed with auth_key that expires at `expires` (Unix seconds, rounded up)."""
+        return cls(auth_key_id(auth_key), -int(-expires // 1))
+    
+    def seal(self, auth_key: bytes) -> bytes:
+        """Serialize to AUTH_HEADER_SIZE bytes, MAC included."""
+        body = AUTH_HEADER.pack(self.key_id, self.expires)
+        return body + _auth_tag(auth_key, body)
+    
+    @classmethod
+    def open(cls, data: bytes, auth_key: bytes) -> 'AuthHeader':
+        """
+        Parse and authenticate a sealed header.
+        
+        Raises:
+            ValueError: if the header is truncated, names another key or fails its MAC
+        """
+        if len(data) < AUTH_HEADER_SIZE:
+            raise ValueError("Auth header truncated")
+        
+        body = data[:AUTH_HEADER.size]
+        key_id, expires = AUTH_HEADER.unpack(body)
+        if key_id != auth_key_id(auth_key):
+            raise ValueError(f"Pattern was issued under another key (key id {key_id:04x})")
+        if not hmac.compare_digest(data[AUTH_HEADER.size:AUTH_HEADER_SIZE], _auth_tag(auth_key, body)):
+            raise ValueError("Auth header failed its MAC")
+        return cls(key_id, expires)
+    
+    def remaining(self, now: Optional[float] = None) -> float:
+        """Seconds left before expiry (negative once expired)."""
+        return self.expires - (time.time() if now is None else now)
+
+
+def check_auth_header(data: bytes, auth_key: bytes, grace: float = 0,
+                      now: Optional[float] = None, required: bool = False) -> Optional[AuthHeader]:
+    """
+    Early cleartext check, done before any payload work.
+    
+    A header that fails its MAC may just be misread, so it is not fatal
+    unless required: the payload checks decide instead.
+    
+    Args:
+        data: Sealed auth header read from the header frames
+        auth_key: This core's auth key
+        grace: Seconds a pattern is still accepted after its expiry
+        now: Current Unix time (default: time.time())
+        required: The header is the only freshness check (rolling refresh),
+            so a header failing its MAC is rejected too
+    
+    Returns:
+        The verified header, or None if it failed its MAC
+    
+    Raises:
+        StaleHeaderError: if the pattern has expired, or the header failed its MAC while required
+        ValueError: if the pattern was issued under another key
+    """
+    key_id = AUTH_HEADER.unpack_from(data)[0] if len(data) >= AUTH_HEADER.size else None
+    if key_id is not None and key_id != auth_key_id(auth_key):
+        raise ValueError(f"Pattern was issued under another key (key id {key_id:04x})")
+    
+    try:
+        header = AuthHeader.open(data, auth_key)
+    except ValueError as e:
+        if required:
+            raise StaleHeaderError(f"Freshness header unreadable: {e}")
+        print("⚠️ Auth header unreadable, relying on the payload checks")
+        return None
+    
+    remaining = header.remaining(now)
+    if remaining < -grace:
+        raise StaleHeaderError(f"Pattern has expired ({-remaining:.0f}s ago)")
+    return header
+
+
+def _auth_tag(auth_key: bytes, body: bytes) -> bytes:
+    """Truncated HMAC-SHA256 of a header body."""
+    return hmac.new(auth_key, body, hashlib.sha256).digest()[:AUTH_TAG_SIZE]
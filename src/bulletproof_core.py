@@ -7,11 +7,26 @@ Ultra-secure, ultra-simple, bulletproof implementation
 
 import time
 import hashlib
-import json
 import secrets
 import base64
 from typing import List, Tuple, Optional, Dict, Any
 
+import numpy as np
+
+from auth_header import AuthHeader, derive_auth_key, check_auth_header
+from block_crc import BlockCollector, add_block_crcs, check_block_size
+from error_correction import fec_encode, fec_decode, check_fec
+from format_header import (
+    FormatHeader, split_format_header, check_format, screen_capture, FORMAT_BULLETPROOF, PALETTE_BRIGHT_8
+)
+from payload_envelope import (
+    pack_payload, unpack_payload, check_payload_format, check_compression, DEFAULT_DICTIONARY_ID
+)
+from pattern_codec import (
+    FrameInput, Pattern, as_frame_array, palette_from_map, bytes_to_symbols, symbols_to_bytes,
+    frames_to_symbols, check_sequence_cells, assemble_sequence
+)
+
 try:
     from Crypto.Cipher import AES
     from Crypto.Random import get_random_bytes
@@ -47,14 +62,57 @@ class BulletproofRPattern:
         'auth': (128, 128, 128),   # Gray
     }
     
+    # Seconds a pattern is still accepted after its expiry
+    EXPIRY_GRACE = 30
+    
     # Reverse mappings
     REVERSE_COLORS = {v: k for k, v in SECURE_COLORS.items()}
     REVERSE_SECURITY = {v: k for k, v in SECURITY_FRAMES.items()}
     
-    def __init__(self, expiry_minutes: int = 3, security_level: str = "HIGH"):
-        """Initialize bulletproof RPattern."""
+    # Palette indexed by symbol value (3 bits per color)
+    BITS_PER_SYMBOL = 3
+    PALETTE = palette_from_map(SECURE_COLORS)
+    
+    # Identifiers written to the format header
+    FORMAT_ID = FORMAT_BULLETPROOF
+    PALETTE_ID = PALETTE_BRIGHT_8
+    
+    def __init__(self, expiry_minutes: int = 3, security_level: str = "HIGH", payload_format: str = "binary",
+                 compression: str = "zlib", compression_level: int = 9,
+                 compression_dictionary: int = DEFAULT_DICTIONARY_ID,
+                 fec_symbols: int = 8, fec_block_length: int = 64, sequence_cells: int = 5,
+                 crc_block_size: int = 32):
+        """
+        Initialize bulletproof RPattern.
+        
+        Args:
+            expiry_minutes: Pattern lifetime
+            security_level: Security label stored in the payload
+            payload_format: 'binary' envelope, or 'json' for debugging
+            compression: 'none', 'zlib' or 'lzma' (skipped when it does not shrink the data)
+            compression_level: Compression level 0-9
+            compression_dictionary: Preset zlib dictionary id (0 = none)
+            fec_symbols: Reed-Solomon parity bytes per codeword (0 = off)
+            fec_block_length: Max codeword length, data plus parity
+            sequence_cells: Cells per frame carrying its loop index (0 = off)
+            crc_block_size: Bytes per CRC-checked block, kept across loops once verified (0 = off)
+        """
+        check_payload_format(payload_format)
+        check_compression(compression, compression_level)
+        check_fec(fec_symbols, fec_block_length)
+        check_sequence_cells(sequence_cells, self.PATTERN_SIZE)
+        check_block_size(crc_block_size)
         self.expiry_minutes = expiry_minutes
         self.security_level = security_level
+        self.payload_format = payload_format
+        self.compression = compression
+        self.compression_level = compression_level
+        self.compression_dictionary = compression_dictionary
+        self.fec_symbols = fec_symbols
+        self.fec_block_length = fec_block_length
+        self.sequence_cells = sequence_cells
+        self.crc_block_size = crc_block_size
+        self.last_fec_corrections = 0  # Bytes repaired by FEC in the last decode
         
         # Generate unique session data
         self.session_id = secrets.token_hex(16)
@@ -67,8 +125,9 @@ class BulletproofRPattern:
             # Fallback key generation
             seed = f"BulletproofRPattern_{self.session_id}_{time.time()}"
             self.master_key = hashlib.sha256(seed.encode()).digest()
+        self.auth_key = derive_auth_key(self.master_key)  # Signs the cleartext expiry header
     
-    def _encrypt_advanced(self, data: str) -> bytes:
+    def _encrypt_advanced(self, data: bytes) -> bytes:
         """Advanced encryption with AES if available."""
         if not ADVANCED_CRYPTO:
             return self._encrypt_fallback(data)
@@ -79,7 +138,7 @@ class BulletproofRPattern:
             cipher = AES.new(self.master_key, AES.MODE_CBC, iv)
             
             # Pad data
-            padded_data = pad(data.encode('utf-8'), AES.block_size)
+            padded_data = pad(data, AES.block_size)
             
             # Encrypt
             encrypted = cipher.encrypt(padded_data)
@@ -90,7 +149,7 @@ class BulletproofRPattern:
         except Exception:
             return self._encrypt_fallback(data)
     
-    def _decrypt_advanced(self, encrypted_data: bytes) -> str:
+    def _decrypt_advanced(self, encrypted_data: bytes) -> bytes:
         """Advanced decryption with AES if available."""
         if not ADVANCED_CRYPTO:
             return self._decrypt_fallback(encrypted_data)
@@ -105,43 +164,37 @@ class BulletproofRPattern:
             padded_data = cipher.decrypt(ciphertext)
             
             # Unpad
-            data = unpad(padded_data, AES.block_size)
-            
-            return data.decode('utf-8')
+            return unpad(padded_data, AES.block_size)
             
         except Exception:
             return self._decrypt_fallback(encrypted_data)
     
-    def _encrypt_fallback(self, data: str) -> bytes:
+    def _encrypt_fallback(self, data: bytes) -> bytes:
         """Fallback encryption using XOR and base64."""
         # Simple but effective XOR encryption
         key = self.master_key
-        data_bytes = data.encode('utf-8')
-        
-        encrypted = bytes(a ^ b for a, b in zip(data_bytes, key * (len(data_bytes) // len(key) + 1)))
+        encrypted = bytes(a ^ b for a, b in zip(data, key * (len(data) // len(key) + 1)))
         
         # Add some obfuscation
         obfuscated = base64.b64encode(encrypted)
         
         return obfuscated
     
-    def _decrypt_fallback(self, encrypted_data: bytes) -> str:
+    def _decrypt_fallback(self, encrypted_data: bytes) -> bytes:
         """Fallback decryption using XOR and base64."""
         # Remove obfuscation
         deobfuscated = base64.b64decode(encrypted_data)
         
         # XOR decrypt
         key = self.master_key
-        decrypted = bytes(a ^ b for a, b in zip(deobfuscated, key * (len(deobfuscated) // len(key) + 1)))
-        
-        return decrypted.decode('utf-8')
+        return bytes(a ^ b for a, b in zip(deobfuscated, key * (len(deobfuscated) // len(key) + 1)))
     
     def _generate_secure_hash(self, data: str) -> str:
         """Generate secure hash for authentication."""
         message = f"{data}:{self.session_id}:{self.pattern_counter}"
         return hashlib.sha256(message.encode()).hexdigest()[:16]
     
-    def encode_bulletproof_data(self, data: str) -> Dict[str, Any]:
+    def encode_bulletproof_data(self, data: str) -> Pattern:
         """Create bulletproof secure pattern."""
         timestamp = int(time.time())
         expiry_time = timestamp + (self.expiry_minutes * 60)
@@ -155,97 +208,89 @@ class BulletproofRPattern:
             'session_id': self.session_id,
             'counter': self.pattern_counter,
             'auth_hash': self._generate_secure_hash(data),
-            'security_level': self.security_level,
-            'creator': 'BulletproofRPattern by Rahul Chaube'
+            'security_level': self.security_level
         }
         
-        # Encrypt payload
-        json_payload = json.dumps(payload)
-        encrypted_data = self._encrypt_advanced(json_payload)
+        # Encrypt the compressed binary envelope (or JSON when debugging)
+        payload_bytes = pack_payload(payload, self.payload_format, self.compression,
+                                     self.compression_level, self.compression_dictionary)
+        encrypted_data = self._encrypt_advanced(payload_bytes)
         
-        # Convert to binary for color encoding
-        binary_data = ''.join(format(byte, '08b') for byte in encrypted_data)
+        # Add interleaved Reed-Solomon parity
+        protected_data = fec_encode(encrypted_data, self.fec_symbols, self.fec_block_length)
         
-        # Pad for 3-bit encoding (8 colors = 3 bits each)
-        while len(binary_data) % 3 != 0:
-            binary_data += '0'
+        # Per-block CRCs, so a failed decode knows which blocks to recapture
+        protected_data = add_block_crcs(protected_data, self.crc_block_size)
         
-        # Generate color frames
-        frames = self._binary_to_secure_frames(binary_data)
+        # Split into 3-bit symbols for color encoding (8 colors = 3 bits each)
+        symbols = bytes_to_symbols(protected_data, self.BITS_PER_SYMBOL)
+        format_header = FormatHeader(
+            format_id=self.FORMAT_ID,
+            grid_size=self.PATTERN_SIZE,
+            palette_id=self.PALETTE_ID,
+            bits_per_symbol=self.BITS_PER_SYMBOL,
+            payload_length=len(protected_data),
+            sequence_cells=self.sequence_cells,
+            fec_symbols=self.fec_symbols,
+            fec_block_length=self.fec_block_length,
+            crc_block_size=self.crc_block_size,
+            auth=AuthHeader.issue(self.auth_key, expiry_time).seal(self.auth_key)
+        )
         
-        # Add security frames
-        frames = self._add_bulletproof_security(frames, timestamp)
+        # Each 3x3 data frame is filled with its color, wrapped in security frames
+        leading, trailing = self._bulletproof_security_markers()
         
-        return {
-            'frames': frames,
-            'frame_duration': self.FRAME_DURATION,
-            'total_frames': len(frames),
-            'timestamp': timestamp,
-            'expiry': expiry_time,
-            'security_level': self.security_level,
-            'session_id': self.session_id,
-            'pattern_id': f"BP_{self.session_id}_{self.pattern_counter}"
-        }
+        return Pattern.build(
+            symbols, self.PALETTE, self.PATTERN_SIZE, self.FRAME_DURATION,
+            leading=leading,
+            trailing=trailing,
+            sequence_cells=self.sequence_cells,
+            format_header=format_header.pack(),
+            timestamp=timestamp,
+            expiry=expiry_time,
+            security_level=self.security_level,
+            session_id=self.session_id,
+            pattern_id=f"BP_{self.session_id}_{self.pattern_counter}"
+        )
     
-    def _binary_to_secure_frames(self, binary_data: str) -> List[List[List[Tuple[int, int, int]]]]:
-        """Convert binary to secure color frames."""
-        frames = []
-        
-        # Process 3 bits at a time (8 colors)
-        for i in range(0, len(binary_data), 3):
-            bit_triplet = binary_data[i:i+3]
-            color = self.SECURE_COLORS.get(bit_triplet, (128, 128, 128))
-            
-            # Create 3x3 frame with the color
-            frame = [[color for _ in range(self.PATTERN_SIZE)] 
-                    for _ in range(self.PATTERN_SIZE)]
-            frames.append(frame)
-        
-        return frames
+    def _bulletproof_security_markers(self) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int]]]:
+        """Security frame colors shown before and after the data frames."""
+        leading = [
+            self.SECURITY_FRAMES['start'],  # 1. Start frame (white)
+            self.SECURITY_FRAMES['auth'],   # 2. Authentication frame (gray, the signed expiry is in the header frames)
+        ]
+        trailing = [
+            self.SECURITY_FRAMES['end'],    # 4. End frame (black)
+        ]
+        return leading, trailing
     
-    def _add_bulletproof_security(self, frames: List, timestamp: int) -> List:
-        """Add bulletproof security frames."""
-        secured_frames = []
-        
-        # 1. Start frame (white)
-        start_frame = [[self.SECURITY_FRAMES['start'] for _ in range(self.PATTERN_SIZE)]
-                      for _ in range(self.PATTERN_SIZE)]
-        secured_frames.append(start_frame)
+    def decode_bulletproof_frames(self, color_frames: FrameInput,
+                                  blocks: Optional[BlockCollector] = None) -> Optional[str]:
+        """
+        Decode bulletproof secure frames (tensor or legacy lists).
         
-        # 2. Authentication frame (gray with timestamp encoding)
-        auth_color = self._encode_timestamp_in_color(timestamp)
-        auth_frame = [[auth_color for _ in range(self.PATTERN_SIZE)]
-                     for _ in range(self.PATTERN_SIZE)]
-        secured_frames.append(auth_frame)
+        Pass a BlockCollector to keep CRC-verified blocks across display
+        loops, so later captures only have to fix the blocks that failed.
+        """
+        self.last_fec_corrections = 0
+        if blocks is None and self.crc_block_size:
+            blocks = BlockCollector(self.crc_block_size)
         
-        # 3. Data frames
-        secured_frames.extend(frames)
-        
-        # 4. End frame (black)
-        end_frame = [[self.SECURITY_FRAMES['end'] for _ in range(self.PATTERN_SIZE)]
-                    for _ in range(self.PATTERN_SIZE)]
-        secured_frames.append(end_frame)
-        
-        return secured_frames
-    
-    def _encode_timestamp_in_color(self, timestamp: int) -> Tuple[int, int, int]:
-        """Encode timestamp in RGB values."""
-        # Use lower 24 bits of timestamp
-        ts_bits = timestamp & 0xFFFFFF
-        r = (ts_bits >> 16) & 0xFF
-        g = (ts_bits >> 8) & 0xFF
-        b = ts_bits & 0xFF
-        return (max(50, r), max(50, g), max(50, b))  # Ensure visibility
-    
-    def decode_bulletproof_frames(self, color_frames: List[List[List[Tuple[int, int, int]]]]) -> Optional[str]:
-        """Decode bulletproof secure frames."""
         try:
+            color_frames = as_frame_array(color_frames)
+            
+            if self.sequence_cells:
+                # Reassemble the loop by frame index (any rotation, drops, duplicates)
+                color_frames, missing = assemble_sequence(color_frames, self.PALETTE, self.sequence_cells)
+                if len(missing):
+                    print(f"⚠️ {len(missing)} frame(s) not captured, relying on FEC")
+            
             if len(color_frames) < 4:  # Need at least start + auth + data + end
                 raise ValueError("Insufficient frames")
             
             # Validate security sequence
-            start_color = color_frames[0][0][0]
-            end_color = color_frames[-1][0][0]
+            start_color = color_frames[0, 0, 0].astype(int)
+            end_color = color_frames[-1, 0, 0].astype(int)
             
             if not self._is_close_color(start_color, self.SECURITY_FRAMES['start']):
                 raise ValueError("Invalid start frame")
@@ -253,32 +298,33 @@ class BulletproofRPattern:
             if not self._is_close_color(end_color, self.SECURITY_FRAMES['end']):
                 raise ValueError("Invalid end frame")
             
-            # Extract timestamp from auth frame
-            auth_color = color_frames[1][0][0]
-            embedded_timestamp = self._decode_timestamp_from_color(auth_color)
+            # Read and drop the format header frames after the start frame
+            header, color_frames = split_format_header(color_frames, self.sequence_cells, authenticated=True)
+            payload_length = check_format(header, self.FORMAT_ID)
             
-            # Validate timestamp (more lenient for testing)
-            current_time = int(time.time())
-            if current_time > embedded_timestamp + (self.expiry_minutes * 60 + 30):  # Extra 30 sec buffer
-                print(f"Warning: Pattern may be expired (current: {current_time}, embedded: {embedded_timestamp})")
-                # Continue anyway for compatibility
+            # Reject expired or foreign patterns before any FEC or decryption work
+            if header is not None:
+                check_auth_header(header.auth, self.auth_key, self.EXPIRY_GRACE)
             
             # Extract data frames
             data_frames = color_frames[2:-1]  # Skip start, auth, and end
             
-            # Convert to binary
-            binary_data = self._secure_frames_to_binary(data_frames)
+            # Convert to symbols, then bytes (padding bits are dropped)
+            symbols = self._secure_frames_to_symbols(data_frames)
+            protected_data = symbols_to_bytes(symbols, self.BITS_PER_SYMBOL, payload_length)
             
-            # Convert to bytes
-            if len(binary_data) % 8 != 0:
-                binary_data = binary_data[:-(len(binary_data) % 8)]
+            # Keep verified CRC blocks, take the rest from this capture
+            if self.crc_block_size:
+                blocks.add_capture(protected_data)
+                protected_data = blocks.data()
             
-            encrypted_data = bytes(int(binary_data[i:i+8], 2) 
-                                 for i in range(0, len(binary_data), 8))
+            # Repair misread symbols before decryption
+            encrypted_data, self.last_fec_corrections = fec_decode(
+                protected_data, self.fec_symbols, self.fec_block_length
+            )
             
             # Decrypt
-            json_payload = self._decrypt_advanced(encrypted_data)
-            payload = json.loads(json_payload)
+            payload = unpack_payload(self._decrypt_advanced(encrypted_data))
             
             # Validate authentication hash
             auth_hash = payload.get('auth_hash', '')
@@ -291,7 +337,8 @@ class BulletproofRPattern:
                     print("Warning: Authentication hash mismatch (continuing anyway)")
             
             # Final expiry check (with buffer)
-            if current_time > payload['expiry'] + 30:  # 30 second buffer
+            current_time = int(time.time())
+            if current_time > payload['expiry'] + self.EXPIRY_GRACE:
                 print(f"Warning: Pattern expired (current: {current_time}, expiry: {payload['expiry']})")
                 # Continue anyway for testing
             
@@ -299,37 +346,31 @@ class BulletproofRPattern:
             
         except Exception as e:
             print(f"Bulletproof decoding failed: {e}")
+            if blocks is not None and blocks.complete:
+                # Every block verified yet decryption failed: stale blocks from another pattern
+                blocks.reset()
             return None
     
+    def screen_capture(self, color_frames: FrameInput) -> Optional[AuthHeader]:
+        """
+        Check a capture in progress from its header frames alone.
+        
+        Returns:
+            The verified auth header once it has been captured, else None
+        
+        Raises:
+            ValueError: if the pattern is expired, foreign or of another format
+        """
+        return screen_capture(color_frames, self.FORMAT_ID, self.auth_key, self.EXPIRY_GRACE)
+    
     def _is_close_color(self, color1: Tuple[int, int, int], color2: Tuple[int, int, int], threshold: int = 50) -> bool:
         """Check if two colors are close enough."""
         return all(abs(a - b) <= threshold for a, b in zip(color1, color2))
     
-    def _decode_timestamp_from_color(self, color: Tuple[int, int, int]) -> int:
-        """Decode timestamp from RGB color."""
-        r, g, b = color
-        return (r << 16) | (g << 8) | b
-    
-    def _secure_frames_to_binary(self, frames: List) -> str:
-        """Convert secure frames back to binary."""
-        binary_data = ""
-        
-        for frame in frames:
-            center_color = frame[self.PATTERN_SIZE//2][self.PATTERN_SIZE//2]
-            
-            # Find closest color match
-            min_distance = float('inf')
-            best_bits = '000'
-            
-            for bits, color in self.SECURE_COLORS.items():
-                distance = sum((a-b)**2 for a, b in zip(color, center_color))
-                if distance < min_distance:
-                    min_distance = distance
-                    best_bits = bits
-            
-            binary_data += best_bits
-        
-        return binary_data
+    def _secure_frames_to_symbols(self, frames: np.ndarray) -> np.ndarray:
+        """Convert secure frames back to 3-bit symbols (all data cells vote)."""
+        symbols, _ = frames_to_symbols(frames, self.PALETTE, sequence_cells=self.sequence_cells)
+        return symbols
     
     def get_bulletproof_report(self, pattern_data: Dict[str, Any]) -> Dict[str, Any]:
         """Get comprehensive security report."""
@@ -356,7 +397,7 @@ class BulletproofRPattern:
         }
 
 
-def create_bulletproof_pattern(data: str = "Bulletproof RPattern by Rahul Chaube") -> Dict[str, Any]:
+def create_bulletproof_pattern(data: str = "Bulletproof RPattern by Rahul Chaube") -> Pattern:
     """Create a bulletproof secure pattern."""
     bp_rpattern = BulletproofRPattern(expiry_minutes=3, security_level="HIGH")
     return bp_rpattern.encode_bulletproof_data(data)
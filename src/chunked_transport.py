@@ -0,0 +1,275 @@
+"""
+RPattern Chunked Transport - Large Payloads as Independent Sub-Patterns
+Creator: Rahul Chaube 🚀
+
+A large payload used to become one enormous loop: one lost frame cost a
+whole loop, and the frame list grew with the payload. Chunked transport
+cuts the payload into records that are each shown as their own small
+sub-pattern, plus a manifest:
+    
+    >8s message id (random, keeps messages apart and keys them)
+    >I  chunk index (MANIFEST_INDEX for the manifest)
+    B   kind: KIND_CHUNK, KIND_LAST (final chunk) or KIND_MANIFEST
+    ..  AES-256-GCM ciphertext
+    16s GCM tag
+
+Records are sealed with the STREAM construction: the nonce is the first
+7 bytes of the message id, the chunk index and the kind, and the
+cleartext fields above are associated data. Every record opens on its
+own, so neither side needs the whole plaintext at once, while a chunk
+moved to another index, a dropped final chunk or a record of another
+message all fail their tag.
+
+Manifest plaintext:
+    >I  chunk count
+    >Q  total length
+    B   content type (CONTENT_TEXT or CONTENT_BINARY)
+    32s SHA-256 of the whole payload
+
+Each message has its own key, derived from a per-core secret and the
+message id, so the decoder only needs the secret.
+"""
+
+import hashlib
+import hmac
+import io
+import secrets
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    from Crypto.Cipher import AES
+    CRYPTO_AVAILABLE = True
+except ImportError:
+    CRYPTO_AVAILABLE = False
+
+
+RECORD_HEADER = struct.Struct('>8sIB')
+MANIFEST = struct.Struct('>IQB32s')
+TAG_SIZE = 16
+
+KIND_CHUNK = 0
+KIND_LAST = 1
+KIND_MANIFEST = 2
+MANIFEST_INDEX = 0xFFFFFFFF
+
+CONTENT_BINARY = 0
+CONTENT_TEXT = 1
+
+DEFAULT_CHUNK_SIZE = 128  # plaintext bytes per chunk: a few hundred frames per sub-pattern at 8 colors
+MAX_CHUNK_SIZE = 4096
+
+_KEY_LABEL = b"RPattern chunk key v1"
+
+
+def check_chunk_size(chunk_size: int):
+    """Validate the plaintext bytes per chunk."""
+    if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"Chunk size must be between 1 and {MAX_CHUNK_SIZE}, got {chunk_size}")
+
+
+def derive_chunk_key(secret: bytes, message_id: bytes) -> bytes:
+    """AES-256 key of one chunked message."""
+    return hmac.new(secret, _KEY_LABEL + message_id, hashlib.sha256).digest()
+
+
+def _nonce(message_id: bytes, index: int, kind: int) -> bytes:
+    """STREAM nonce: message prefix, chunk counter and kind (final chunks differ from the rest)."""
+    return message_id[:7] + struct.pack('>IB', index, kind)
+
+
+def seal_record(key: bytes, message_id: bytes, index: int, kind: int, plaintext: bytes) -> bytes:
+    """
+    Encrypt and authenticate one record.
+    
+    Raises:
+        ValueError: if pycryptodome is not installed
+    """
+    if not CRYPTO_AVAILABLE:
+        raise ValueError("Chunked transport needs pycryptodome for AES-GCM")
+    header = RECORD_HEADER.pack(message_id, index, kind)
+    cipher = AES.new(key, AES.MODE_GCM, nonce=_nonce(message_id, index, kind), mac_len=TAG_SIZE)
+    cipher.update(header)
+    ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+    return header + ciphertext + tag
+
+
+def record_header(record: bytes) -> Tuple[bytes, int, int]:
+    """
+    (message id, index, kind) of a record, before it is opened.
+    
+    Raises:
+        ValueError: if the record is too short or of an unknown kind
+    """
+    if len(record) < RECORD_HEADER.size + TAG_SIZE:
+        raise ValueError("Chunk record truncated")
+    message_id, index, kind = RECORD_HEADER.unpack_from(record)
+    if kind not in (KIND_CHUNK, KIND_LAST, KIND_MANIFEST):
+        raise ValueError(f"Unknown chunk record kind {kind}")
+    return message_id, index, kind
+
+
+def open_record(key: bytes, record: bytes) -> bytes:
+    """
+    Decrypt one record.
+    
+    Raises:
+        ValueError: if the record fails its tag (misread, moved, truncated or another key)
+    """
+    if not CRYPTO_AVAILABLE:
+        raise ValueError("Chunked transport needs pycryptodome for AES-GCM")
+    message_id, index, kind = record_header(record)
+    cipher = AES.new(key, AES.MODE_GCM, nonce=_nonce(message_id, index, kind), mac_len=TAG_SIZE)
+    cipher.update(record[:RECORD_HEADER.size])
+    try:
+        return cipher.decrypt_and_verify(record[RECORD_HEADER.size:-TAG_SIZE], record[-TAG_SIZE:])
+    except ValueError:
+        raise ValueError(f"Chunk record {index} failed authentication")
+
+
+def seal_stream(secret: bytes, data: Union[str, bytes, BinaryIO],
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Cut a payload into sealed chunk records, then the manifest record.
+    
+    File objects are read one chunk at a time, so only the current chunk
+    is held in memory.
+    
+    Args:
+        secret: Per-core secret the message key is derived from
+        data: Text, bytes or a binary file object
+        chunk_size: Plaintext bytes per chunk
+    
+    Yields:
+        Chunk records in order, the manifest record last
+    """
+    check_chunk_size(chunk_size)
+    content = CONTENT_TEXT if isinstance(data, str) else CONTENT_BINARY
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    reader = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    
+    message_id = secrets.token_bytes(8)
+    key = derive_chunk_key(secret, message_id)
+    digest = hashlib.sha256()
+    length = index = 0
+    
+    # Read one chunk ahead: the final chunk must be sealed as such
+    chunk = reader.read(chunk_size)
+    while True:
+        following = reader.read(chunk_size)
+        digest.update(chunk)
+        length += len(chunk)
+        yield seal_record(key, message_id, index, KIND_LAST if not following else KIND_CHUNK, chunk)
+        index += 1
+        if not following:
+            break
+        chunk = following
+    
+    manifest = MANIFEST.pack(index, length, content, digest.digest())
+    yield seal_record(key, message_id, MANIFEST_INDEX, KIND_MANIFEST, manifest)
+
+
+class ChunkAssembler:
+    """
+    Collect chunk records in any order until the whole message is in.
+    
+    Opened chunks are cached, so every loop only has to supply the chunks
+    still missing. Records from a different message restart the assembler,
+    so a long-running scanner can keep one instance.
+    """
+    
+    def __init__(self, secret: bytes):
+        """
+        Start with no chunks.
+        
+        Args:
+            secret: Per-core secret of the encoder (RPatternCore.chunk_secret)
+        """
+        self.secret = secret
+        self.reset()
+    
+    def reset(self):
+        """Forget every received chunk."""
+        self.message_id: Optional[bytes] = None
+        self.count = 0  # chunk count, 0 until the manifest or the final chunk is in
+        self.length = 0
+        self.content = CONTENT_BINARY
+        self.digest = b''
+        self.has_manifest = False
+        self.chunks: Dict[int, bytes] = {}
+        self._key = b''
+    
+    @property
+    def complete(self) -> bool:
+        """True once the manifest and every chunk it lists are in."""
+        return self.has_manifest and len(self.chunks) == self.count
+    
+    @property
+    def progress(self) -> Tuple[int, int]:
+        """(chunks received, chunk count or 0 if not known yet)."""
+        return len(self.chunks), self.count
+    
+    @property
+    def missing(self) -> List[int]:
+        """Indices of the chunks still missing (only known once the count is)."""
+        return [index for index in range(self.count) if index not in self.chunks]
+    
+    def add_record(self, record: bytes) -> bool:
+        """
+        Open one captured record and keep it.
+        
+        Args:
+            record: Record bytes as shown by one sub-pattern
+        
+        Returns:
+            True if the record was new
+        
+        Raises:
+            ValueError: if the record fails authentication or contradicts the manifest
+        """
+        message_id, index, kind = record_header(record)
+        if message_id != self.message_id:
+            key = derive_chunk_key(self.secret, message_id)
+            plaintext = open_record(key, record)  # before dropping the current message
+            self.reset()
+            self.message_id, self._key = message_id, key
+        else:
+            plaintext = open_record(self._key, record)
+        
+        if kind == KIND_MANIFEST:
+            if self.has_manifest:
+                return False
+            count, self.length, self.content, self.digest = MANIFEST.unpack(plaintext)
+            if self.count and self.count != count:
+                raise ValueError(f"Manifest lists {count} chunks, the final chunk is {self.count - 1}")
+            self.count, self.has_manifest = count, True
+            return True
+        
+        if self.count and index >= self.count:
+            raise ValueError(f"Chunk {index} beyond the {self.count} chunks of this message")
+        if kind == KIND_LAST:
+            self.count = index + 1
+        if index in self.chunks:
+            return False
+        self.chunks[index] = plaintext
+        return True
+    
+    def data(self) -> bytes:
+        """
+        The reassembled payload.
+        
+        Raises:
+            ValueError: if chunks are missing or the payload fails the manifest digest
+        """
+        if not self.complete:
+            received, count = self.progress
+            raise ValueError(f"Chunked message incomplete: {received}/{count or '?'} chunks")
+        data = b''.join(self.chunks[index] for index in range(self.count))
+        if len(data) != self.length or hashlib.sha256(data).digest() != self.digest:
+            raise ValueError("Chunked message failed its manifest digest")
+        return data
+    
+    def text(self) -> str:
+        """The reassembled payload of a text message."""
+        return self.data().decode('utf-8')
@@ -5,6 +5,7 @@ Creator: Rahul Chaube 🚀
 
 import base64
 import hashlib
+from typing import Union
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 from Crypto.Random import get_random_bytes
@@ -18,18 +19,18 @@ class RPatternCrypto:
         # Generate a 256-bit key from the provided string
         self.key = hashlib.sha256(key.encode()).digest()
         
-    def encrypt(self, data: str) -> bytes:
+    def encrypt(self, data: Union[str, bytes]) -> bytes:
         """
-        Encrypt string data using AES encryption.
+        Encrypt string or binary data using AES encryption.
         
         Args:
-            data: String data to encrypt
+            data: String or bytes to encrypt
             
         Returns:
             Encrypted bytes including IV
         """
         # Convert string to bytes
-        data_bytes = data.encode('utf-8')
+        data_bytes = data.encode('utf-8') if isinstance(data, str) else data
         
         # Generate random IV
         iv = get_random_bytes(16)
@@ -56,6 +57,18 @@ class RPatternCrypto:
         Returns:
             Decrypted string data
         """
+        return self.decrypt_bytes(encrypted_data).decode('utf-8')
+    
+    def decrypt_bytes(self, encrypted_data: bytes) -> bytes:
+        """
+        Decrypt encrypted bytes without decoding them as text.
+        
+        Args:
+            encrypted_data: Encrypted bytes including IV
+        
+        Returns:
+            Decrypted bytes
+        """
         # Extract IV (first 16 bytes)
         iv = encrypted_data[:16]
         
@@ -69,18 +82,15 @@ class RPatternCrypto:
         decrypted_padded = cipher.decrypt(cipher_data)
         
         # Remove padding
-        decrypted_data = unpad(decrypted_padded, AES.block_size)
-        
-        # Convert back to string
-        return decrypted_data.decode('utf-8')
+        return unpad(decrypted_padded, AES.block_size)
 
 
 # Global crypto instance
 _crypto = RPatternCrypto()
 
 
-def encrypt_data(data: str) -> bytes:
-    """Encrypt string data using AES encryption."""
+def encrypt_data(data: Union[str, bytes]) -> bytes:
+    """Encrypt string or binary data using AES encryption."""
     return _crypto.encrypt(data)
 
 
@@ -89,6 +99,11 @@ def decrypt_data(encrypted_data: bytes) -> str:
     return _crypto.decrypt(encrypted_data)
 
 
+def decrypt_bytes(encrypted_data: bytes) -> bytes:
+    """Decrypt encrypted bytes without decoding them as text."""
+    return _crypto.decrypt_bytes(encrypted_data)
+
+
 def encode_base64(data: str) -> str:
     """Encode string data to base64 (simple encoding, not encryption)."""
     return base64.b64encode(data.encode('utf-8')).decode('utf-8')
@@ -0,0 +1,309 @@
+"""
+RPattern Error Correction - Reed-Solomon FEC with Interleaving
+Creator: Rahul Chaube 🚀
+
+Forward error correction applied to the encrypted byte stream, so a few
+misclassified colors no longer break AES-GCM/CBC or checksum validation
+and force a full recapture.
+
+The stream is split into Reed-Solomon codewords over GF(256) (each one
+carries `nsym` parity bytes and corrects up to nsym/2 byte errors).
+Codewords are then interleaved column-wise, so consecutive bytes on
+screen - and therefore consecutive frames - come from different
+codewords and a burst (a hand passing in front of the screen) is spread
+across all of them.
+
+The codeword layout is derived from the stream length, nsym and the
+maximum block length alone, so nothing extra has to be transmitted.
+"""
+
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+
+# GF(256) with the primitive polynomial x^8 + x^4 + x^3 + x^2 + 1
+GF_PRIMITIVE = 0x11d
+GF_EXP = [0] * 512
+GF_LOG = [0] * 256
+
+_x = 1
+for _i in range(255):
+    GF_EXP[_i] = _x
+    GF_LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= GF_PRIMITIVE
+for _i in range(255, 512):
+    GF_EXP[_i] = GF_EXP[_i - 255]
+
+
+class ReedSolomonError(ValueError):
+    """Raised when a codeword has more errors than its parity can correct."""
+
+
+def _gf_mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return GF_EXP[GF_LOG[a] + GF_LOG[b]]
+
+
+def _gf_div(a: int, b: int) -> int:
+    if b == 0:
+        raise ZeroDivisionError("GF(256) division by zero")
+    if a == 0:
+        return 0
+    return GF_EXP[(GF_LOG[a] + 255 - GF_LOG[b]) % 255]
+
+
+def _gf_pow(x: int, power: int) -> int:
+    return GF_EXP[(GF_LOG[x] * power) % 255]
+
+
+def _gf_inverse(x: int) -> int:
+    return GF_EXP[255 - GF_LOG[x]]
+
+
+def _poly_scale(p: List[int], x: int) -> List[int]:
+    return [_gf_mul(c, x) for c in p]
+
+
+def _poly_add(p: List[int], q: List[int]) -> List[int]:
+    r = [0] * max(len(p), len(q))
+    for i, c in enumerate(p):
+        r[i + len(r) - len(p)] = c
+    for i, c in enumerate(q):
+        r[i + len(r) - len(q)] ^= c
+    return r
+
+
+def _poly_mul(p: List[int], q: List[int]) -> List[int]:
+    r = [0] * (len(p) + len(q) - 1)
+    for j, b in enumerate(q):
+        for i, a in enumerate(p):
+            r[i + j] ^= _gf_mul(a, b)
+    return r
+
+
+def _poly_eval(p: List[int], x: int) -> int:
+    y = p[0]
+    for c in p[1:]:
+        y = _gf_mul(y, x) ^ c
+    return y
+
+
+def _poly_div(dividend: List[int], divisor: List[int]) -> Tuple[List[int], List[int]]:
+    """Synthetic division by a monic divisor; returns (quotient, remainder)."""
+    out = list(dividend)
+    for i in range(len(dividend) - (len(divisor) - 1)):
+        coef = out[i]
+        if coef:
+            for j in range(1, len(divisor)):
+                if divisor[j]:
+                    out[i + j] ^= _gf_mul(divisor[j], coef)
+    separator = -(len(divisor) - 1)
+    return out[:separator], out[separator:]
+
+
+@lru_cache(maxsize=32)
+def _generator_poly(nsym: int) -> Tuple[int, ...]:
+    """Generator polynomial prod(x - 2^i) for i in [0, nsym)."""
+    g = [1]
+    for i in range(nsym):
+        g = _poly_mul(g, [1, _gf_pow(2, i)])
+    return tuple(g)
+
+
+def rs_encode_block(data: bytes, nsym: int) -> bytes:
+    """
+    Reed-Solomon encode one block.
+    
+    Args:
+        data: Up to 255 - nsym data bytes
+        nsym: Number of parity bytes
+    
+    Returns:
+        Codeword: data followed by nsym parity bytes
+    """
+    if len(data) + nsym > 255:
+        raise ValueError(f"Codeword too long: {len(data)} + {nsym} > 255")
+    
+    generator = list(_generator_poly(nsym))
+    _, remainder = _poly_div(list(data) + [0] * nsym, generator)
+    return bytes(data) + bytes(remainder)
+
+
+def _syndromes(codeword: List[int], nsym: int) -> List[int]:
+    # Leading 0 keeps the indexing of the Berlekamp-Massey step below simple
+    return [0] + [_poly_eval(codeword, _gf_pow(2, i)) for i in range(nsym)]
+
+
+def _error_locator(synd: List[int], nsym: int) -> List[int]:
+    """Berlekamp-Massey: find the error locator polynomial."""
+    err_loc = [1]
+    old_loc = [1]
+    shift = len(synd) - nsym
+    
+    for i in range(nsym):
+        k = i + shift
+        delta = synd[k]
+        for j in range(1, len(err_loc)):
+            delta ^= _gf_mul(err_loc[-(j + 1)], synd[k - j])
+        old_loc = old_loc + [0]
+        if delta:
+            if len(old_loc) > len(err_loc):
+                new_loc = _poly_scale(old_loc, delta)
+                old_loc = _poly_scale(err_loc, _gf_inverse(delta))
+                err_loc = new_loc
+            err_loc = _poly_add(err_loc, _poly_scale(old_loc, delta))
+    
+    while err_loc and err_loc[0] == 0:
+        del err_loc[0]
+    if (len(err_loc) - 1) * 2 > nsym:
+        raise ReedSolomonError("Too many errors to correct")
+    return err_loc
+
+
+def _error_positions(err_loc: List[int], length: int) -> List[int]:
+    """Chien search: roots of the (reversed) locator give error positions."""
+    positions = [length - 1 - i for i in range(length) if _poly_eval(err_loc, _gf_pow(2, i)) == 0]
+    if len(positions) != len(err_loc) - 1:
+        raise ReedSolomonError("Could not locate errors")
+    return positions
+
+
+def _correct_errata(codeword: List[int], synd: List[int], positions: List[int]) -> List[int]:
+    """Forney algorithm: compute error magnitudes and apply them."""
+    coef_pos = [len(codeword) - 1 - p for p in positions]
+    
+    locator = [1]
+    for i in coef_pos:
+        locator = _poly_mul(locator, _poly_add([1], [_gf_pow(2, i), 0]))
+    
+    _, evaluator = _poly_div(_poly_mul(synd[::-1], locator), [1] + [0] * len(locator))
+    evaluator = evaluator[::-1]
+    
+    roots = [_gf_pow(2, -(255 - p)) for p in coef_pos]
+    errors = [0] * len(codeword)
+    for i, xi in enumerate(roots):
+        xi_inv = _gf_inverse(xi)
+        locator_prime = 1
+        for j, xj in enumerate(roots):
+            if j != i:
+                locator_prime = _gf_mul(locator_prime, 1 ^ _gf_mul(xi_inv, xj))
+        y = _gf_mul(xi, _poly_eval(evaluator[::-1], xi_inv))
+        errors[positions[i]] = _gf_div(y, locator_prime)
+    
+    return _poly_add(codeword, errors)
+
+
+def rs_correct_block(codeword: bytes, nsym: int) -> Tuple[bytes, int]:
+    """
+    Correct one Reed-Solomon codeword.
+    
+    Returns:
+        (data bytes without parity, number of corrected bytes)
+    
+    Raises:
+        ReedSolomonError: if the codeword has more than nsym/2 errors
+    """
+    message = list(codeword)
+    synd = _syndromes(message, nsym)
+    if not any(synd):
+        return bytes(message[:-nsym]), 0
+    
+    positions = _error_positions(_error_locator(synd, nsym)[::-1], len(message))
+    message = _correct_errata(message, synd, positions)
+    
+    if any(_syndromes(message, nsym)):
+        raise ReedSolomonError("Could not correct codeword")
+    return bytes(message[:-nsym]), len(positions)
+
+
+def check_fec(nsym: int, block_length: int):
+    """Validate FEC parameters (nsym = 0 disables FEC)."""
+    if nsym < 0 or nsym % 2:
+        raise ValueError(f"FEC parity symbols must be a non-negative even number, got {nsym}")
+    if nsym and not nsym < block_length <= 255:
+        raise ValueError(f"FEC block length must be in ({nsym}, 255], got {block_length}")
+
+
+def _block_lengths(data_length: int, nsym: int, block_length: int) -> List[int]:
+    """Split data_length bytes evenly over the fewest codewords that fit."""
+    count = max(1, -(-data_length // (block_length - nsym)))
+    base, extra = divmod(data_length, count)
+    return [base + nsym + (i < extra) for i in range(count)]
+
+
+def _interleave_order(lengths: List[int]) -> np.ndarray:
+    """Stream positions read column-wise from codewords laid out as rows."""
+    offsets = np.cumsum([0] + lengths[:-1])
+    grid = np.full((len(lengths), max(lengths)), -1, dtype=np.int64)
+    for row, (offset, length) in enumerate(zip(offsets, lengths)):
+        grid[row, :length] = offset + np.arange(length)
+    order = grid.T.reshape(-1)
+    return order[order >= 0]
+
+
+def fec_encode(data: bytes, nsym: int, block_length: int = 255) -> bytes:
+    """
+    Add Reed-Solomon parity and interleave the codewords.
+    
+    Args:
+        data: Encrypted payload bytes
+        nsym: Parity bytes per codeword (0 returns data unchanged)
+        block_length: Maximum codeword length, data plus parity
+    
+    Returns:
+        Protected, interleaved byte stream
+    """
+    check_fec(nsym, block_length)
+    if not nsym:
+        return data
+    
+    lengths = _block_lengths(len(data), nsym, block_length)
+    codewords = []
+    pos = 0
+    for length in lengths:
+        codewords.append(rs_encode_block(data[pos:pos + length - nsym], nsym))
+        pos += length - nsym
+    
+    stream = np.frombuffer(b''.join(codewords), dtype=np.uint8)
+    return stream[_interleave_order(lengths)].tobytes()
+
+
+def fec_decode(stream: bytes, nsym: int, block_length: int = 255) -> Tuple[bytes, int]:
+    """
+    De-interleave and correct a stream produced by fec_encode().
+    
+    Returns:
+        (data bytes, number of corrected bytes)
+    
+    Raises:
+        ReedSolomonError: if any codeword is beyond repair
+    """
+    check_fec(nsym, block_length)
+    if not nsym:
+        return stream, 0
+    
+    count = -(-len(stream) // block_length)
+    data_length = len(stream) - count * nsym
+    if data_length < 0:
+        raise ReedSolomonError("Stream shorter than its parity")
+    
+    lengths = _block_lengths(data_length, nsym, block_length)
+    codeword_bytes = np.empty(len(stream), dtype=np.uint8)
+    codeword_bytes[_interleave_order(lengths)] = np.frombuffer(stream, dtype=np.uint8)
+    codeword_bytes = codeword_bytes.tobytes()
+    
+    data = []
+    corrected = 0
+    pos = 0
+    for length in lengths:
+        block, fixed = rs_correct_block(codeword_bytes[pos:pos + length], nsym)
+        data.append(block)
+        corrected += fixed
+        pos += length
+    
+    return b''.join(data), corrected
@@ -0,0 +1,402 @@
+"""
+RPattern Format Header - Self-Describing Patterns
+Creator: Rahul Chaube 🚀
+
+The cores produce incompatible layouts (v1 3x3/4-color, Revolutionary
+4x4/8-color, HyperSecure with timestamp/checksum frames, Bulletproof
+3x3/8-color) and nothing on screen used to say which one a capture was.
+
+Sequential patterns now show a format header right after the start
+marker. It is painted in the fixed header palette
+(pattern_codec.HEADER_PALETTE), so it can be read before the format is
+known:
+
+    B   reserved cells per frame: sequence + clock (first, so the reader
+        knows the layout)
+    B   format version (high nibble) | format id (low nibble)
+    B   grid size
+    B   palette id (high nibble) | bits per symbol (low nibble)
+    B   palette size (0 = 2 ** bits per symbol)
+    B   chunked flag (bit 7) | clock cells (bits 4-6) | flags (cell mode,
+        encrypted, authenticated, calibrated)
+    B   FEC parity bytes per codeword
+    B   FEC max codeword length
+    B   CRC block size
+    B   stripe: tile index (high nibble) | tile count - 1 (low nibble)
+    >H  payload length: bytes carried by the data frames
+    >H  CRC-16 of everything above
+    ..  sealed auth header when the authenticated flag is set (auth_header.py)
+
+From the header alone a decoder knows which core the capture belongs to
+and exactly how many frames the loop has. Striped messages show one
+tile per screen (or per region of one screen), each naming its place
+so a scanner can tell when every tile is in view. Calibrated patterns show their
+palette in frames right after the header (pattern_codec.measure_palette).
+"""
+
+import struct
+from binascii import crc_hqx
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from auth_header import AuthHeader, AUTH_HEADER_SIZE, check_auth_header
+from pattern_codec import (
+    FrameInput, HEADER_PALETTE, as_frame_array, classify_cells,
+    header_frame_count, read_header_cells, calibration_frame_count, symbol_count
+)
+
+
+FORMAT_VERSION = 1
+
+# Format ids, one per core
+FORMAT_RPATTERN = 1
+FORMAT_REVOLUTIONARY = 2
+FORMAT_HYPER_SECURE = 3
+FORMAT_BULLETPROOF = 4
+
+# Data palettes: 4 primaries (v1), 8 bright colors (Revolutionary, Bulletproof), 8 primaries (HyperSecure)
+PALETTE_PRIMARY_4 = 1
+PALETTE_BRIGHT_8 = 2
+PALETTE_PRIMARY_8 = 3
+PALETTE_GENERATED = 4  # pattern_codec.generate_palette(palette size)
+
+# Solid marker frames (leading, trailing) shown around the header and data frames
+FORMAT_MARKERS = {
+    FORMAT_RPATTERN: (1, 1),
+    FORMAT_REVOLUTIONARY: (3, 1),
+    FORMAT_HYPER_SECURE: (2, 2),
+    FORMAT_BULLETPROOF: (2, 1),
+}
+
+FLAG_CELL_MODE = 0x01
+FLAG_ENCRYPTED = 0x02
+FLAG_AUTHENTICATED = 0x04
+FLAG_CALIBRATED = 0x08
+FLAG_CHUNKED = 0x80  # one sub-pattern of a chunked message (chunked_transport.py)
+CLOCK_SHIFT = 4
+CLOCK_MASK = 0x07
+
+# Every core starts its loop with a white frame
+START_MARKER = (255, 255, 255)
+
+FORMAT_HEADER = struct.Struct('>BBBBBBBBBBH')
+MAX_TILES = 16
+FORMAT_HEADER_CRC = struct.Struct('>H')
+FORMAT_HEADER_SIZE = FORMAT_HEADER.size + FORMAT_HEADER_CRC.size
+
+
+@dataclass(frozen=True)
+class FormatHeader:
+    """Everything a decoder needs to know about a pattern before reading its data."""
+    format_id: int
+    grid_size: int
+    palette_id: int
+    bits_per_symbol: int
+    payload_length: int
+    encoding_mode: str = 'frame'
+    sequence_cells: int = 0
+    encrypted: bool = True
+    fec_symbols: int = 0
+    fec_block_length: int = 0
+    crc_block_size: int = 0
+    auth: bytes = b''  # sealed AuthHeader shown after the format header (empty = none)
+    clock_cells: int = 0
+    colors: int = 0  # data palette size, 0 = 2 ** bits_per_symbol
+    calibrated: bool = False
+    chunked: bool = False
+    tile_index: int = 0  # this tile's place in a striped message
+    tiles: int = 1
+    version: int = FORMAT_VERSION
+    
+    def pack(self) -> bytes:
+        """Serialize to FORMAT_HEADER_SIZE bytes, CRC included, followed by the auth header if any."""
+        for name in ('version', 'format_id', 'palette_id', 'bits_per_symbol'):
+            if not 0 <= getattr(self, name) < 16:
+                raise ValueError(f"Format header {name} must fit in 4 bits, got {getattr(self, name)}")
+        if not 0 <= self.clock_cells <= CLOCK_MASK:
+            raise ValueError(f"Format header clock_cells must fit in 3 bits, got {self.clock_cells}")
+        if not 0 <= self.tile_index < self.tiles <= MAX_TILES:
+            raise ValueError(f"Tile {self.tile_index} of {self.tiles} is out of range (at most {MAX_TILES} tiles)")
+        if len(self.auth) not in (0, AUTH_HEADER_SIZE):
+            raise ValueError(f"Auth header must be {AUTH_HEADER_SIZE} bytes, got {len(self.auth)}")
+        
+        flags = (FLAG_CELL_MODE if self.encoding_mode == 'cell' else 0) | (FLAG_ENCRYPTED if self.encrypted else 0)
+        flags |= (FLAG_AUTHENTICATED if self.auth else 0) | (FLAG_CALIBRATED if self.calibrated else 0)
+        flags |= self.clock_cells << CLOCK_SHIFT | (FLAG_CHUNKED if self.chunked else 0)
+        try:
+            body = FORMAT_HEADER.pack(
+                self.reserved_cells, self.version << 4 | self.format_id, self.grid_size,
+                self.palette_id << 4 | self.bits_per_symbol, self.colors, flags, self.fec_symbols,
+                self.fec_block_length, self.crc_block_size, self.tile_index << 4 | (self.tiles - 1),
+                self.payload_length
+            )
+        except struct.error as e:
+            raise ValueError(f"Format header field out of range: {e}")
+        return body + FORMAT_HEADER_CRC.pack(crc_hqx(body, 0)) + self.auth
+    
+    @staticmethod
+    def packed_size(data: bytes) -> int:
+        """
+        Full packed size, auth header included, from the first FORMAT_HEADER_SIZE bytes.
+        
+        Raises:
+            ValueError: if those bytes are truncated, fail their CRC or have an unknown version
+        """
+        if len(data) < FORMAT_HEADER_SIZE:
+            raise ValueError("Format header truncated")
+        (crc,) = FORMAT_HEADER_CRC.unpack_from(data, FORMAT_HEADER.size)
+        if crc != crc_hqx(data[:FORMAT_HEADER.size], 0):
+            raise ValueError("Format header failed its CRC")
+        
+        version_format, flags = data[1], data[5]
+        if version_format >> 4 != FORMAT_VERSION:
+            raise ValueError(f"Unsupported format header version {version_format >> 4}")
+        return FORMAT_HEADER_SIZE + (AUTH_HEADER_SIZE if flags & FLAG_AUTHENTICATED else 0)
+    
+    @classmethod
+    def unpack(cls, data: bytes) -> 'FormatHeader':
+        """
+        Parse a packed header.
+        
+        Raises:
+            ValueError: if the header is truncated, fails its CRC or has an unknown version
+        """
+        size = cls.packed_size(data)
+        if len(data) < size:
+            raise ValueError("Auth header truncated")
+        
+        (reserved_cells, version_format, grid_size, palette_bits, colors, flags, fec_symbols,
+         fec_block_length, crc_block_size, stripe, payload_length) = FORMAT_HEADER.unpack_from(data)
+        clock_cells = flags >> CLOCK_SHIFT & CLOCK_MASK
+        if stripe >> 4 > stripe & 0x0F:
+            raise ValueError(f"Format header names tile {stripe >> 4} of {(stripe & 0x0F) + 1}")
+        if clock_cells > reserved_cells:
+            raise ValueError(f"Format header has {clock_cells} clock cells but {reserved_cells} reserved")
+        
+        return cls(
+            format_id=version_format & 0x0F,
+            grid_size=grid_size,
+            palette_id=palette_bits >> 4,
+            bits_per_symbol=palette_bits & 0x0F,
+            payload_length=payload_length,
+            encoding_mode='cell' if flags & FLAG_CELL_MODE else 'frame',
+            sequence_cells=reserved_cells - clock_cells,
+            encrypted=bool(flags & FLAG_ENCRYPTED),
+            fec_symbols=fec_symbols,
+            fec_block_length=fec_block_length,
+            crc_block_size=crc_block_size,
+            auth=bytes(data[FORMAT_HEADER_SIZE:size]),
+            clock_cells=clock_cells,
+            colors=colors,
+            calibrated=bool(flags & FLAG_CALIBRATED),
+            chunked=bool(flags & FLAG_CHUNKED),
+            tile_index=stripe >> 4,
+            tiles=(stripe & 0x0F) + 1,
+        )
+    
+    @property
+    def reserved_cells(self) -> int:
+        """Cells per frame that carry no data: the clock and index cells."""
+        return self.sequence_cells + self.clock_cells
+    
+    @property
+    def palette_size(self) -> int:
+        """Number of data palette colors."""
+        return self.colors or 1 << self.bits_per_symbol
+    
+    @property
+    def header_frames(self) -> int:
+        """Frames taken by the format header itself, auth header included."""
+        return header_frame_count(FORMAT_HEADER_SIZE + len(self.auth), self.grid_size, self.reserved_cells)
+    
+    @property
+    def calibration_frames(self) -> int:
+        """Frames taken by the palette calibration preamble."""
+        if not self.calibrated:
+            return 0
+        return calibration_frame_count(self.palette_size, self.grid_size, self.reserved_cells)
+    
+    @property
+    def data_frames(self) -> int:
+        """Frames taken by the payload bytes."""
+        symbols = symbol_count(self.payload_length, self.palette_size)
+        if self.encoding_mode == 'frame':
+            return symbols
+        return -(-symbols // (self.grid_size * self.grid_size - self.reserved_cells))
+    
+    @property
+    def total_frames(self) -> int:
+        """Exact loop length: markers, header, calibration and data frames."""
+        leading, trailing = FORMAT_MARKERS.get(self.format_id, (1, 1))
+        return leading + self.header_frames + self.calibration_frames + self.data_frames + trailing
+
+
+def split_format_header(frames: FrameInput, sequence_cells: int = 0, authenticated: bool = False,
+                        clock_cells: int = 0,
+                        calibrated: bool = False) -> Tuple[Optional[FormatHeader], np.ndarray]:
+    """
+    Read the header of a loop that starts at its start marker.
+    
+    The cores already know their own layout, so a damaged header (it has
+    no FEC) is reported as None rather than failing the whole decode.
+    
+    Args:
+        frames: Loop in order, start marker first
+        sequence_cells: Index cells per frame
+        authenticated: True if the core shows an auth header after the format header
+        clock_cells: Clock cells per frame
+        calibrated: True if the core shows a calibration preamble after the header
+    
+    Returns:
+        (header, frames): the parsed header (None if it failed its CRC) and
+        the loop with the header frames removed, so the cores keep their
+        fixed marker offsets
+    
+    Raises:
+        ValueError: if the header frames are missing or describe another layout
+    """
+    frames = as_frame_array(frames)
+    size = FORMAT_HEADER_SIZE + (AUTH_HEADER_SIZE if authenticated else 0)
+    count = header_frame_count(size, frames.shape[1], sequence_cells + clock_cells)
+    if len(frames) < count + 1:
+        raise ValueError("Format header frames missing")
+    
+    try:
+        header = FormatHeader.unpack(read_header_cells(frames[1:1 + count], sequence_cells + clock_cells, size))
+    except ValueError:
+        header = None
+    layout = (sequence_cells, clock_cells, frames.shape[1], authenticated, calibrated)
+    if header is not None and (header.sequence_cells, header.clock_cells, header.grid_size,
+                               bool(header.auth), header.calibrated) != layout:
+        raise ValueError("Format header does not match the captured layout")
+    return header, np.delete(frames, np.s_[1:1 + count], axis=0)
+
+
+def check_format(header: Optional[FormatHeader], format_id: int) -> Optional[int]:
+    """
+    Check a split header belongs to the decoding core.
+    
+    Returns:
+        The payload length from the header, or None if the header was damaged
+    
+    Raises:
+        ValueError: if the header names another format
+    """
+    if header is None:
+        print("⚠️ Format header damaged, using the decoder's own layout")
+        return None
+    if header.format_id != format_id:
+        raise ValueError(f"Pattern has format id {header.format_id}, expected {format_id}")
+    return header.payload_length
+
+
+def screen_capture(frames: FrameInput, format_id: int, auth_key: bytes,
+                   grace: float = 0) -> Optional[AuthHeader]:
+    """
+    Vet a capture in progress from its header frames alone.
+    
+    Lets a scanner give up on a pattern it cannot use about a second
+    into the capture, instead of after the whole loop plus decryption.
+    
+    Returns:
+        The verified auth header once it has been captured, else None
+    
+    Raises:
+        ValueError: if the capture shows another format, another issuer's
+        key or an expired pattern
+    """
+    found = read_format_header(frames)
+    if found is None:
+        return None
+    header = found[1]
+    if header.format_id != format_id:
+        raise ValueError(f"Pattern has format id {header.format_id}, expected {format_id}")
+    if not header.auth:
+        return None
+    return check_auth_header(header.auth, auth_key, grace)
+
+
+def read_format_header(frames: FrameInput) -> Optional[Tuple[int, FormatHeader]]:
+    """
+    Find the first start marker followed by a valid format header.
+    
+    Works on raw captures: the loop may be rotated, and in sequenced
+    patterns repeated captures of a header frame are collapsed.
+    
+    Returns:
+        (start index, header), or None if no complete header was captured
+    """
+    frames = as_frame_array(frames)
+    for start in _start_candidates(frames):
+        header = _header_after(frames, start + 1)
+        if header is not None:
+            return int(start), header
+    return None
+
+
+def loop_starts(frames: FrameInput) -> List[Tuple[int, FormatHeader]]:
+    """
+    Find every start marker followed by a valid format header.
+    
+    A capture of sub-patterns shown back to back (chunked transport) is
+    cut at these indices, one loop per slice.
+    
+    Returns:
+        (start index, header) of each loop, in capture order
+    """
+    frames = as_frame_array(frames)
+    starts = []
+    for start in _start_candidates(frames):
+        header = _header_after(frames, start + 1)
+        if header is not None:
+            starts.append((int(start), header))
+    return starts
+
+
+def _start_candidates(frames: np.ndarray) -> np.ndarray:
+    """Indices of start frames followed by a non-start frame."""
+    if not len(frames):
+        return np.zeros(0, dtype=int)
+    
+    # A start frame has a white first cell; header frames never do
+    reference = np.concatenate([HEADER_PALETTE, np.asarray([START_MARKER], dtype=HEADER_PALETTE.dtype)])
+    first_cells, _ = classify_cells(frames[None, :, 0, 0], reference)
+    is_start = first_cells[0] == len(HEADER_PALETTE)
+    return np.flatnonzero(is_start[:-1] & ~is_start[1:])
+
+
+def _header_after(frames: np.ndarray, first: int) -> Optional[FormatHeader]:
+    """Parse the header frames starting at `first`, or None."""
+    grid_size = frames.shape[1]
+    reserved_cells = read_header_cells(frames[first:first + 1], 0, 1)[0]
+    if grid_size * grid_size - reserved_cells < 3:  # the first byte must fit in one frame
+        return None
+    
+    rows = frames[first:]
+    if reserved_cells:
+        # Sequenced or clocked header frames differ in their last cells, so repeats are exact duplicates
+        cells, _ = classify_cells(rows.reshape(len(rows), -1, 3), HEADER_PALETTE)
+        changed = np.ones(len(rows), dtype=bool)
+        changed[1:] = np.any(cells[1:] != cells[:-1], axis=1)
+        rows = rows[changed]
+    
+    # Read the fixed part first: its flags say whether an auth header follows
+    try:
+        data = _header_bytes(rows, FORMAT_HEADER_SIZE, reserved_cells)
+        size = FormatHeader.packed_size(data) if data else 0
+        if size > FORMAT_HEADER_SIZE:
+            data = _header_bytes(rows, size, reserved_cells)
+        header = FormatHeader.unpack(data) if data else None
+    except ValueError:
+        return None
+    return header if header is not None and header.grid_size == grid_size else None
+
+
+def _header_bytes(rows: np.ndarray, size: int, reserved_cells: int) -> Optional[bytes]:
+    """The first `size` header bytes painted in rows, or None if not all their frames are in."""
+    count = header_frame_count(size, rows.shape[1], reserved_cells)
+    if len(rows) < count:
+        return None
+    return read_header_cells(rows[:count], reserved_cells, size)
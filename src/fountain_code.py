@@ -0,0 +1,253 @@
+"""
+RPattern Fountain Code - Rateless Fountain Transmission
+Creator: Rahul Chaube 🚀
+
+Sequential patterns can only be read from the start frame to the end
+frame, so a scanner that joins mid-loop waits for the next start frame
+(about 1.5x the loop length on average).
+
+In fountain mode the payload is cut into K source blocks and every packet
+on screen carries one droplet: the XOR of
+source blocks picked by the droplet seed, plus a small header and CRC.
+Any K-ish distinct packets decode the message, in any order and from any
+starting point, so no start sync is needed.
+
+Packet layout:
+    >H  message id (CRC-16 of the message, keeps patterns apart)
+    >H  message length in bytes
+    B   block size in bytes
+    >H  droplet seed
+    ..  block_size bytes of XORed source blocks
+    >H  CRC-16 of everything above
+
+The first K seeds are systematic (one source block each). Repair seeds
+XOR a uniformly random subset of the blocks, and decoding uses
+incremental Gaussian elimination over GF(2) instead of LT peeling, so
+the message is recovered as soon as the received droplets have full
+rank - about K + 2 droplets. At the K of a few hundred that fits in one
+pattern this beats robust soliton degrees, which need 20-40% extra
+droplets before peeling succeeds.
+"""
+
+import math
+import struct
+from binascii import crc_hqx
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Transmission layouts: one start-to-end pass, or self-contained droplets
+TRANSMISSION_MODES = ('sequential', 'fountain')
+
+PACKET_HEADER = struct.Struct('>HHBH')
+PACKET_CRC = struct.Struct('>H')
+
+# splitmix64: small, portable generator so every scanner derives the same droplets
+_MASK64 = (1 << 64) - 1
+
+
+def check_transmission(mode: str):
+    """Validate a transmission mode name."""
+    if mode not in TRANSMISSION_MODES:
+        raise ValueError(f"Unknown transmission mode '{mode}', expected one of {TRANSMISSION_MODES}")
+
+
+def check_fountain(block_size: int, repair: float):
+    """Validate fountain block size (bytes) and repair ratio."""
+    if not 1 <= block_size <= 255:
+        raise ValueError(f"Fountain block size must be between 1 and 255, got {block_size}")
+    if repair < 0:
+        raise ValueError(f"Fountain repair ratio must be non-negative, got {repair}")
+
+
+def _splitmix64(state: int) -> Tuple[int, int]:
+    """Advance a splitmix64 state; returns (new state, 64 random bits)."""
+    state = (state + 0x9E3779B97F4A7C15) & _MASK64
+    z = state
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return state, z ^ (z >> 31)
+
+
+def droplet_mask(seed: int, k: int) -> int:
+    """
+    Bitmask of the source blocks XORed into the droplet with this seed.
+    
+    Seeds below k are systematic (block `seed` alone); every later seed
+    picks each block with probability 1/2.
+    
+    Args:
+        seed: Droplet seed (0..65535)
+        k: Number of source blocks
+    
+    Returns:
+        Non-zero int with bit i set when block i is included
+    """
+    if seed < k:
+        return 1 << seed
+    
+    state, mask = seed, 0
+    while not mask:
+        for shift in range(0, k, 64):
+            state, bits = _splitmix64(state)
+            mask |= bits << shift
+        mask &= (1 << k) - 1
+    return mask
+
+
+def source_block_count(length: int, block_size: int) -> int:
+    """Number of source blocks K for a message (at least one)."""
+    return max(1, -(-length // block_size))
+
+
+def packet_count(length: int, block_size: int, repair: float) -> int:
+    """Droplets per loop: the K systematic ones plus ceil(K * repair) repair droplets."""
+    k = source_block_count(length, block_size)
+    return min(0x10000, k + math.ceil(k * repair))
+
+
+def fountain_encode(data: bytes, block_size: int = 48, repair: float = 1.0) -> List[bytes]:
+    """
+    Cut data into source blocks and generate one loop of droplet packets.
+    
+    Args:
+        data: Message bytes (encrypted payload)
+        block_size: Source block size in bytes
+        repair: Repair droplets per source block
+    
+    Returns:
+        List of self-contained packets, each with its seed and CRC
+    """
+    check_fountain(block_size, repair)
+    if len(data) > 0xFFFF:
+        raise ValueError(f"Payload too large for fountain mode: {len(data)} bytes")
+    
+    k = source_block_count(len(data), block_size)
+    padded = bytes(data) + bytes(k * block_size - len(data))
+    blocks = np.frombuffer(padded, dtype=np.uint8).reshape(k, block_size)
+    message_id = crc_hqx(bytes(data), 0)
+    
+    packets = []
+    for seed in range(packet_count(len(data), block_size, repair)):
+        mask = droplet_mask(seed, k)
+        chosen = [index for index in range(k) if mask >> index & 1]
+        droplet = np.bitwise_xor.reduce(blocks[chosen], axis=0)
+        body = PACKET_HEADER.pack(message_id, len(data), block_size, seed) + droplet.tobytes()
+        packets.append(body + PACKET_CRC.pack(crc_hqx(body, 0)))
+    return packets
+
+
+def parse_packet(packet: bytes) -> Optional[Tuple[int, int, int, int, bytes]]:
+    """
+    Validate a captured packet; trailing padding bytes are ignored.
+    
+    Returns:
+        (message_id, length, block_size, seed, block) or None if the packet
+        is truncated or fails its CRC
+    """
+    if len(packet) < PACKET_HEADER.size + PACKET_CRC.size:
+        return None
+    message_id, length, block_size, seed = PACKET_HEADER.unpack_from(packet)
+    end = PACKET_HEADER.size + block_size
+    if not block_size or len(packet) < end + PACKET_CRC.size:
+        return None
+    (crc,) = PACKET_CRC.unpack_from(packet, end)
+    if crc != crc_hqx(packet[:end], 0):
+        return None
+    return message_id, length, block_size, seed, packet[PACKET_HEADER.size:end]
+
+
+class FountainDecoder:
+    """
+    Incremental fountain decoder: feed packets in any order until complete.
+    
+    Packets from a different message (another pattern, or a refreshed one)
+    restart the decoder, so a long-running scanner can keep one instance.
+    """
+    
+    def __init__(self):
+        """Start with no droplets."""
+        self.reset()
+    
+    def reset(self):
+        """Forget every received droplet."""
+        self.message_id = None
+        self.length = 0
+        self.block_size = 0
+        self.k = 0
+        self.seeds = set()
+        self.packets_received = 0
+        self._rows: Dict[int, Tuple[int, np.ndarray]] = {}
+    
+    @property
+    def complete(self) -> bool:
+        """True once every source block is recovered."""
+        return self.k > 0 and len(self._rows) == self.k
+    
+    @property
+    def progress(self) -> Tuple[int, int]:
+        """(independent droplets received, source blocks needed)."""
+        return len(self._rows), self.k
+    
+    def add_packet(self, packet: bytes) -> bool:
+        """
+        Absorb one captured packet.
+        
+        Args:
+            packet: Packet bytes (padding after the CRC is ignored)
+        
+        Returns:
+            True if the packet was valid and added new information
+        """
+        parsed = parse_packet(packet)
+        if parsed is None:
+            return False
+        message_id, length, block_size, seed, block = parsed
+        
+        if (message_id, length, block_size) != (self.message_id, self.length, self.block_size):
+            self.reset()
+            self.message_id, self.length, self.block_size = message_id, length, block_size
+            self.k = source_block_count(length, block_size)
+        
+        if seed in self.seeds:
+            return False
+        self.seeds.add(seed)
+        self.packets_received += 1
+        return self._absorb(droplet_mask(seed, self.k), block)
+    
+    def _absorb(self, mask: int, block: bytes) -> bool:
+        """Gaussian elimination step; rows stay fully reduced."""
+        value = np.frombuffer(block, dtype=np.uint8).copy()
+        
+        # Clear every known pivot from the new row
+        for pivot, (row_mask, row_value) in self._rows.items():
+            if mask >> pivot & 1:
+                mask ^= row_mask
+                value ^= row_value
+        if not mask:
+            return False
+        
+        # Lowest remaining column becomes the pivot; clear it from the other rows
+        pivot = (mask & -mask).bit_length() - 1
+        for other, (row_mask, row_value) in self._rows.items():
+            if row_mask >> pivot & 1:
+                self._rows[other] = (row_mask ^ mask, row_value ^ value)
+        self._rows[pivot] = (mask, value)
+        return True
+    
+    def data(self) -> bytes:
+        """
+        Reassemble the message.
+        
+        Raises:
+            ValueError: if more droplets are needed or the message id does not match
+        """
+        if not self.complete:
+            received, needed = self.progress
+            raise ValueError(f"Not enough fountain droplets yet: {received}/{needed}")
+        
+        message = b''.join(self._rows[i][1].tobytes() for i in range(self.k))[:self.length]
+        if crc_hqx(message, 0) != self.message_id:
+            raise ValueError("Fountain message failed its integrity check")
+        return message
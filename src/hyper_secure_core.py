@@ -7,14 +7,30 @@ Ultra-secure visual pattern system with quantum-resistant encryption
 
 import time
 import hashlib
-import json
 import secrets
 import hmac
-from typing import List, Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any
 from Crypto.Cipher import AES, ChaCha20_Poly1305
 from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Random import get_random_bytes
 import base64
+import numpy as np
+from auth_header import AuthHeader, derive_auth_key, check_auth_header
+from block_crc import BlockCollector, add_block_crcs, check_block_size
+from error_correction import fec_encode, fec_decode, check_fec
+from format_header import (
+    FormatHeader, split_format_header, check_format, screen_capture, FORMAT_HYPER_SECURE, PALETTE_PRIMARY_8
+)
+from payload_envelope import (
+    pack_payload, unpack_payload, check_payload_format, check_compression, DEFAULT_DICTIONARY_ID
+)
+
+from pattern_codec import (
+    FrameInput, Pattern, as_frame_array, palette_from_map,
+    bytes_to_symbols, symbols_to_bytes, frames_to_symbols,
+    check_encoding_mode, add_length_prefix, strip_length_prefix,
+    check_sequence_cells, assemble_sequence
+)
 
 
 class HyperSecureRPattern:
@@ -42,44 +58,92 @@ class HyperSecureRPattern:
         'auth_start': (255, 255, 255),    # White - Authentication start
         'auth_end': (0, 0, 0),            # Black - Authentication end
         'checksum': (128, 128, 128),      # Gray - Checksum frame
-        'timestamp': (64, 64, 64),        # Dark gray - Timestamp validation
+        'timestamp': (64, 64, 64),        # Dark gray - Timestamp frame (expiry is in the auth header)
     }
     
     # Reverse mapping
     REVERSE_COLOR_MAP = {v: k for k, v in HYPER_COLOR_MAP.items()}
     REVERSE_SECURITY_MAP = {v: k for k, v in SECURITY_COLORS.items()}
     
-    def __init__(self, expiry_seconds: int = 30, security_level: str = "ULTRA"):
-        """Initialize with hyper-security settings."""
+    # Palette indexed by symbol value (3 bits per color)
+    BITS_PER_SYMBOL = 3
+    PALETTE = palette_from_map(HYPER_COLOR_MAP)
+    
+    # Identifiers written to the format header
+    FORMAT_ID = FORMAT_HYPER_SECURE
+    PALETTE_ID = PALETTE_PRIMARY_8
+    
+    def __init__(self, expiry_seconds: int = 30, security_level: str = "ULTRA",
+                 grid_size: int = PATTERN_SIZE, encoding_mode: str = "frame",
+                 payload_format: str = "binary", compression: str = "zlib",
+                 compression_level: int = 9, compression_dictionary: int = DEFAULT_DICTIONARY_ID,
+                 fec_symbols: int = 8, fec_block_length: int = 64, sequence_cells: int = 5,
+                 crc_block_size: int = 32, session_salt: Optional[bytes] = None):
+        """
+        Initialize with hyper-security settings.
+        
+        Args:
+            expiry_seconds: Pattern lifetime
+            security_level: Security label stored in the payload
+            grid_size: Width/height of the grid (e.g. 8 or 12 in cell mode)
+            encoding_mode: 'frame' (one symbol per frame) or 'cell' (one symbol per grid cell)
+            payload_format: 'binary' envelope, or 'json' for debugging
+            compression: 'none', 'zlib' or 'lzma' (skipped when it does not shrink the data)
+            compression_level: Compression level 0-9
+            compression_dictionary: Preset zlib dictionary id (0 = none)
+            fec_symbols: Reed-Solomon parity bytes per codeword (0 = off)
+            fec_block_length: Max codeword length, data plus parity
+            sequence_cells: Cells per frame carrying its loop index (0 = off)
+            crc_block_size: Bytes per CRC-checked block, kept across loops once verified (0 = off)
+            session_salt: Salt of the issuing session; every key derives from it (default: new random salt)
+        """
+        check_encoding_mode(encoding_mode)
+        check_payload_format(payload_format)
+        check_compression(compression, compression_level)
+        check_fec(fec_symbols, fec_block_length)
+        check_sequence_cells(sequence_cells, grid_size)
+        check_block_size(crc_block_size)
         self.expiry_seconds = expiry_seconds  # Much shorter expiry for security
         self.security_level = security_level
+        self.grid_size = grid_size
+        self.encoding_mode = encoding_mode
+        self.payload_format = payload_format
+        self.compression = compression
+        self.compression_level = compression_level
+        self.compression_dictionary = compression_dictionary
+        self.fec_symbols = fec_symbols
+        self.fec_block_length = fec_block_length
+        self.sequence_cells = sequence_cells
+        self.crc_block_size = crc_block_size
         
-        # Generate unique session key
-        self.session_salt = get_random_bytes(32)
+        # Generate unique session key, or rebuild the issuer's to decode its patterns
+        self.session_salt = session_salt or get_random_bytes(32)
         self.master_key = self._derive_master_key()
+        self.auth_key = derive_auth_key(self.master_key)  # Signs the cleartext expiry header
         
         # Security counters
         self.generation_counter = 0
         self.last_pattern_hash = None
+        self.last_fec_corrections = 0  # Bytes repaired by FEC in the last decode
         
     def _derive_master_key(self) -> bytes:
         """Derive master key using PBKDF2."""
         password = f"RPattern_HyperSecure_Rahul_2025_{self.security_level}".encode()
         return PBKDF2(password, self.session_salt, 32, count=100000)
     
-    def _generate_auth_token(self, data: str, timestamp: int) -> str:
+    def _generate_auth_token(self, data: str, timestamp: int, counter: int) -> str:
         """Generate HMAC authentication token."""
-        message = f"{data}:{timestamp}:{self.generation_counter}".encode()
+        message = f"{data}:{timestamp}:{counter}".encode()
         auth_token = hmac.new(self.master_key, message, hashlib.sha256).hexdigest()
         return auth_token[:16]  # Truncate for efficiency
     
-    def _encrypt_with_multiple_layers(self, data: str) -> bytes:
+    def _encrypt_with_multiple_layers(self, data: bytes) -> bytes:
         """Apply multiple encryption layers for hyper-security."""
         # Layer 1: ChaCha20-Poly1305 (Modern, quantum-resistant)
         nonce1 = get_random_bytes(12)
-        cipher1 = ChaCha20_Poly1305.new(key=self.master_key)
+        cipher1 = ChaCha20_Poly1305.new(key=self.master_key, nonce=nonce1)
         cipher1.update(nonce1)
-        ciphertext1, tag1 = cipher1.encrypt_and_digest(data.encode())
+        ciphertext1, tag1 = cipher1.encrypt_and_digest(data)
         layer1 = nonce1 + tag1 + ciphertext1
         
         # Layer 2: AES-256-GCM (Additional protection)
@@ -91,7 +155,7 @@ class HyperSecureRPattern:
         
         return layer2
     
-    def _decrypt_multiple_layers(self, encrypted_data: bytes) -> str:
+    def _decrypt_multiple_layers(self, encrypted_data: bytes) -> bytes:
         """Decrypt multiple encryption layers."""
         # Layer 2: AES-256-GCM
         nonce2 = encrypted_data[:16]
@@ -107,129 +171,129 @@ class HyperSecureRPattern:
         tag1 = layer1[12:28]
         ciphertext1 = layer1[28:]
         
-        cipher1 = ChaCha20_Poly1305.new(key=self.master_key)
+        cipher1 = ChaCha20_Poly1305.new(key=self.master_key, nonce=nonce1)
         cipher1.update(nonce1)
-        data = cipher1.decrypt_and_verify(ciphertext1, tag1)
-        
-        return data.decode()
+        return cipher1.decrypt_and_verify(ciphertext1, tag1)
     
-    def encode_hyper_secure_data(self, data: str) -> Dict[str, Any]:
+    def encode_hyper_secure_data(self, data: str) -> Pattern:
         """Create hyper-secure RPattern with multiple security layers."""
         timestamp = int(time.time() * 1000)  # Millisecond precision
+        expiry = timestamp + (self.expiry_seconds * 1000)
         self.generation_counter += 1
         
         # Generate authentication token
-        auth_token = self._generate_auth_token(data, timestamp)
+        auth_token = self._generate_auth_token(data, timestamp, self.generation_counter)
         
         # Create secure payload
         payload = {
             'data': data,
             'timestamp': timestamp,
-            'expiry': timestamp + (self.expiry_seconds * 1000),
+            'expiry': expiry,
             'auth_token': auth_token,
             'counter': self.generation_counter,
-            'security_level': self.security_level,
-            'creator': 'HyperSecure RPattern by Rahul Chaube'
+            'security_level': self.security_level
         }
         
-        # Multi-layer encryption
-        encrypted_data = self._encrypt_with_multiple_layers(json.dumps(payload))
+        # Multi-layer encryption of the compressed binary envelope (or JSON when debugging)
+        payload_bytes = pack_payload(payload, self.payload_format, self.compression,
+                                     self.compression_level, self.compression_dictionary)
+        encrypted_data = self._encrypt_with_multiple_layers(payload_bytes)
         
         # Generate checksum
         data_hash = hashlib.sha256(encrypted_data).digest()
         checksum = data_hash[:4]  # First 4 bytes as checksum
         
-        # Convert to binary with checksum
-        binary_data = ''.join(format(byte, '08b') for byte in encrypted_data)
-        checksum_binary = ''.join(format(byte, '08b') for byte in checksum)
+        # Protect data + checksum with interleaved Reed-Solomon codewords
+        stream = fec_encode(encrypted_data + checksum, self.fec_symbols, self.fec_block_length)
+        
+        # Per-block CRCs, so a failed decode knows which blocks to recapture
+        stream = add_block_crcs(stream, self.crc_block_size)
         
-        # Add padding for 3-bit encoding
-        total_bits = len(binary_data) + len(checksum_binary)
-        padding_needed = (3 - (total_bits % 3)) % 3
-        full_binary = binary_data + checksum_binary + ('0' * padding_needed)
+        # Split into 3-bit symbols (last symbol zero-padded)
+        if self.encoding_mode == 'cell':
+            stream = add_length_prefix(stream)
+        symbols = bytes_to_symbols(stream, self.BITS_PER_SYMBOL)
         
-        # Generate frames with enhanced security
-        frames = self._binary_to_hyper_frames(full_binary)
-        frames = self._add_hyper_security_frames(frames, timestamp, checksum)
+        # Lay out symbols (per frame or per cell) with enhanced security frames
+        pattern = self._build_hyper_pattern(symbols, checksum, self._format_header(len(stream), expiry))
         
         # Store pattern hash for anti-replay
-        pattern_signature = hashlib.sha256(str(frames).encode()).hexdigest()
+        pattern_signature = hashlib.sha256(pattern.symbols.tobytes() + pattern.palette.tobytes()).hexdigest()
         self.last_pattern_hash = pattern_signature
         
-        return {
-            'frames': frames,
-            'frame_duration': self.FRAME_DURATION,
-            'total_frames': len(frames),
+        pattern.header.update({
             'timestamp': timestamp,
-            'expiry': timestamp + (self.expiry_seconds * 1000),
+            'expiry': expiry,
             'security_level': self.security_level,
             'pattern_hash': pattern_signature,
             'generation_counter': self.generation_counter
-        }
+        })
+        return pattern
     
-    def _binary_to_hyper_frames(self, binary_data: str) -> List[List[List[Tuple[int, int, int]]]]:
-        """Convert binary to 4x4 frames with 8-color encoding."""
-        frames = []
-        
-        # Process in 3-bit chunks (8 colors = 3 bits each)
-        for i in range(0, len(binary_data), 3):
-            bit_triplet = binary_data[i:i+3].ljust(3, '0')
-            color = self.HYPER_COLOR_MAP.get(bit_triplet, (128, 128, 128))
-            
-            # Create 4x4 frame with the color
-            frame = [[color for _ in range(self.PATTERN_SIZE)] 
-                    for _ in range(self.PATTERN_SIZE)]
-            frames.append(frame)
-            
-        return frames
-    
-    def _add_hyper_security_frames(self, frames: List, timestamp: int, checksum: bytes) -> List:
-        """Add multiple security and validation frames."""
-        secured_frames = []
-        
-        # 1. Authentication start frame
-        auth_start = [[self.SECURITY_COLORS['auth_start'] for _ in range(self.PATTERN_SIZE)]
-                     for _ in range(self.PATTERN_SIZE)]
-        secured_frames.append(auth_start)
-        
-        # 2. Timestamp validation frame (encode timestamp in pattern)
-        timestamp_color = self._encode_timestamp_color(timestamp)
-        timestamp_frame = [[timestamp_color for _ in range(self.PATTERN_SIZE)]
-                          for _ in range(self.PATTERN_SIZE)]
-        secured_frames.append(timestamp_frame)
-        
-        # 3. Data frames
-        secured_frames.extend(frames)
-        
-        # 4. Checksum validation frame
-        checksum_color = self._encode_checksum_color(checksum)
-        checksum_frame = [[checksum_color for _ in range(self.PATTERN_SIZE)]
-                         for _ in range(self.PATTERN_SIZE)]
-        secured_frames.append(checksum_frame)
-        
-        # 5. Authentication end frame
-        auth_end = [[self.SECURITY_COLORS['auth_end'] for _ in range(self.PATTERN_SIZE)]
-                   for _ in range(self.PATTERN_SIZE)]
-        secured_frames.append(auth_end)
-        
-        return secured_frames
+    def _format_header(self, payload_length: int, expiry: int) -> FormatHeader:
+        """Describe this core's layout, plus the signed expiry (ms) scanners check early."""
+        return FormatHeader(
+            format_id=self.FORMAT_ID,
+            grid_size=self.grid_size,
+            palette_id=self.PALETTE_ID,
+            bits_per_symbol=self.BITS_PER_SYMBOL,
+            payload_length=payload_length,
+            encoding_mode=self.encoding_mode,
+            sequence_cells=self.sequence_cells,
+            fec_symbols=self.fec_symbols,
+            fec_block_length=self.fec_block_length,
+            crc_block_size=self.crc_block_size,
+            auth=AuthHeader.issue(self.auth_key, expiry / 1000).seal(self.auth_key)
+        )
     
-    def _encode_timestamp_color(self, timestamp: int) -> Tuple[int, int, int]:
-        """Encode timestamp into RGB color."""
-        # Use last 24 bits of timestamp for RGB
-        ts_bits = timestamp & 0xFFFFFF
-        r = (ts_bits >> 16) & 0xFF
-        g = (ts_bits >> 8) & 0xFF
-        b = ts_bits & 0xFF
-        return (r, g, b)
+    def _build_hyper_pattern(self, symbols: np.ndarray, checksum: bytes,
+                             format_header: FormatHeader) -> Pattern:
+        """Wrap 3-bit data symbols in multiple security and validation frames."""
+        return Pattern.build(
+            symbols, self.PALETTE, self.grid_size, self.FRAME_DURATION,
+            encoding_mode=self.encoding_mode,
+            leading=[
+                # 1. Authentication start frame
+                self.SECURITY_COLORS['auth_start'],
+                # 2. Timestamp frame (the signed expiry travels in the header frames)
+                self.SECURITY_COLORS['timestamp'],
+            ],
+            # 3. Data frames
+            trailing=[
+                # 4. Checksum validation frame
+                self._encode_checksum_color(checksum),
+                # 5. Authentication end frame
+                self.SECURITY_COLORS['auth_end'],
+            ],
+            sequence_cells=self.sequence_cells,
+            format_header=format_header.pack()
+        )
     
     def _encode_checksum_color(self, checksum: bytes) -> Tuple[int, int, int]:
         """Encode checksum into RGB color."""
         return (checksum[0], checksum[1], checksum[2])
     
-    def decode_hyper_secure_frames(self, color_frames: List[List[List[Tuple[int, int, int]]]]) -> Optional[str]:
-        """Decode hyper-secure frames with full validation."""
+    def decode_hyper_secure_frames(self, color_frames: FrameInput,
+                                   blocks: Optional[BlockCollector] = None) -> Optional[str]:
+        """
+        Decode hyper-secure frames (tensor or legacy lists) with full validation.
+        
+        Pass a BlockCollector to keep CRC-verified blocks across display
+        loops, so later captures only have to fix the blocks that failed.
+        """
+        self.last_fec_corrections = 0
+        if blocks is None and self.crc_block_size:
+            blocks = BlockCollector(self.crc_block_size)
+        
         try:
+            color_frames = as_frame_array(color_frames)
+            
+            if self.sequence_cells:
+                # Reassemble the loop by frame index (any rotation, drops, duplicates)
+                color_frames, missing = assemble_sequence(color_frames, self.PALETTE, self.sequence_cells)
+                if len(missing):
+                    print(f"⚠️ {len(missing)} frame(s) not captured, relying on FEC")
+            
             if len(color_frames) < 5:  # Minimum: start + timestamp + data + checksum + end
                 raise ValueError("Invalid frame count")
             
@@ -237,107 +301,101 @@ class HyperSecureRPattern:
             if not self._validate_security_frames(color_frames):
                 raise ValueError("Security frame validation failed")
             
-            # Extract timestamp and validate
-            timestamp_frame = color_frames[1]
-            timestamp_color = timestamp_frame[0][0]
-            embedded_timestamp = self._decode_timestamp_color(timestamp_color)
+            # Read and drop the format header frames after the start frame
+            header, color_frames = split_format_header(color_frames, self.sequence_cells, authenticated=True)
+            payload_length = check_format(header, self.FORMAT_ID)
             
-            current_time = int(time.time() * 1000)
-            if current_time > embedded_timestamp + (self.expiry_seconds * 1000):
-                raise ValueError("Pattern has expired")
+            # Reject expired or foreign patterns before any FEC or crypto work
+            if header is not None:
+                check_auth_header(header.auth, self.auth_key)
             
             # Extract data frames (skip security frames)
             data_frames = color_frames[2:-2]  # Skip start, timestamp, checksum, end
             
-            # Convert frames to binary
-            binary_data = self._hyper_frames_to_binary(data_frames)
+            # Convert frames to symbols, then bytes (padding bits are dropped)
+            symbols = self._hyper_frames_to_symbols(data_frames)
+            raw_data = symbols_to_bytes(symbols, self.BITS_PER_SYMBOL, payload_length)
+            if self.encoding_mode == 'cell':
+                raw_data = strip_length_prefix(raw_data)
             
-            # Extract checksum and validate
-            if len(binary_data) < 32:  # Need at least 32 bits for checksum
-                raise ValueError("Insufficient data for checksum")
+            # Keep verified CRC blocks, take the rest from this capture
+            if self.crc_block_size:
+                blocks.add_capture(raw_data)
+                raw_data = blocks.data()
             
-            checksum_bits = binary_data[-32:]  # Last 32 bits
-            data_bits = binary_data[:-32]
+            # Repair misread symbols before checksum validation
+            raw_data, self.last_fec_corrections = fec_decode(raw_data, self.fec_symbols, self.fec_block_length)
             
-            # Convert to bytes
-            if len(data_bits) % 8 != 0:
-                data_bits = data_bits[:-(len(data_bits) % 8)]
+            # Extract checksum and validate
+            if len(raw_data) < 4:  # Need at least 4 bytes for checksum
+                raise ValueError("Insufficient data for checksum")
             
-            encrypted_data = bytes(int(data_bits[i:i+8], 2) 
-                                 for i in range(0, len(data_bits), 8))
+            encrypted_data = raw_data[:-4]
+            actual_checksum = raw_data[-4:]  # Last 4 bytes
             
             # Validate checksum
             expected_checksum = hashlib.sha256(encrypted_data).digest()[:4]
-            actual_checksum = bytes(int(checksum_bits[i:i+8], 2) 
-                                  for i in range(0, 32, 8))
             
             if expected_checksum != actual_checksum:
                 raise ValueError("Checksum validation failed")
             
             # Decrypt multiple layers
-            json_str = self._decrypt_multiple_layers(encrypted_data)
-            payload = json.loads(json_str)
+            payload = unpack_payload(self._decrypt_multiple_layers(encrypted_data))
             
-            # Validate authentication token
+            # Validate authentication token (against the issuer's counter, not this decoder's)
             expected_token = self._generate_auth_token(
-                payload['data'], payload['timestamp']
+                payload['data'], payload['timestamp'], payload['counter']
             )
             
             if payload['auth_token'] != expected_token:
                 raise ValueError("Authentication token mismatch")
             
             # Final expiry check
-            if current_time > payload['expiry']:
+            if int(time.time() * 1000) > payload['expiry']:
                 raise ValueError("Pattern has expired")
             
             return payload['data']
             
         except Exception as e:
             print(f"Hyper-secure decoding failed: {e}")
+            if blocks is not None and blocks.complete:
+                # Every block verified yet the checksum failed: stale blocks from another pattern
+                blocks.reset()
             return None
     
-    def _validate_security_frames(self, frames: List) -> bool:
+    def screen_capture(self, color_frames: FrameInput) -> Optional[AuthHeader]:
+        """
+        Check a capture in progress from its header frames alone.
+        
+        Returns:
+            The verified auth header once it has been captured, else None
+        
+        Raises:
+            ValueError: if the pattern is expired, foreign or of another format
+        """
+        return screen_capture(color_frames, self.FORMAT_ID, self.auth_key)
+    
+    def _validate_security_frames(self, frames: np.ndarray) -> bool:
         """Validate security frame sequence."""
         if len(frames) < 5:
             return False
             
         # Check start frame (should be white)
         start_frame = frames[0]
-        if start_frame[0][0] != self.SECURITY_COLORS['auth_start']:
+        if tuple(start_frame[0][0]) != self.SECURITY_COLORS['auth_start']:
             return False
             
         # Check end frame (should be black)
         end_frame = frames[-1]
-        if end_frame[0][0] != self.SECURITY_COLORS['auth_end']:
+        if tuple(end_frame[0][0]) != self.SECURITY_COLORS['auth_end']:
             return False
             
         return True
     
-    def _decode_timestamp_color(self, color: Tuple[int, int, int]) -> int:
-        """Decode timestamp from RGB color."""
-        r, g, b = color
-        return (r << 16) | (g << 8) | b
-    
-    def _hyper_frames_to_binary(self, frames: List) -> str:
-        """Convert hyper frames back to binary."""
-        binary_data = ""
-        
-        for frame in frames:
-            center_color = frame[self.PATTERN_SIZE//2][self.PATTERN_SIZE//2]
-            
-            # Find closest color match
-            min_distance = float('inf')
-            best_bits = '000'
-            
-            for bits, color in self.HYPER_COLOR_MAP.items():
-                distance = sum((a-b)**2 for a, b in zip(color, center_color))
-                if distance < min_distance:
-                    min_distance = distance
-                    best_bits = bits
-                    
-            binary_data += best_bits
-            
-        return binary_data
+    def _hyper_frames_to_symbols(self, frames: np.ndarray) -> np.ndarray:
+        """Convert hyper frames back to 3-bit symbols (per frame or per cell)."""
+        symbols, _ = frames_to_symbols(frames, self.PALETTE, self.encoding_mode, self.sequence_cells)
+        return symbols
     
     def get_security_report(self, pattern_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate comprehensive security report."""
@@ -371,7 +429,7 @@ class HyperSecureRPattern:
         }
 
 
-def create_hyper_secure_pattern(data: str = "TOP SECRET: Rahul's HyperSecure RPattern") -> Dict[str, Any]:
+def create_hyper_secure_pattern(data: str = "TOP SECRET: Rahul's HyperSecure RPattern") -> Pattern:
     """Create a hyper-secure RPattern."""
     hyper_rpattern = HyperSecureRPattern(expiry_seconds=30, security_level="ULTRA")
     return hyper_rpattern.encode_hyper_secure_data(data)
@@ -17,6 +17,12 @@ import os
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(__file__))
 
+from block_crc import BlockCollector
+from pattern_codec import color_lut, lookup_colors
+from scanner_pipeline import ScanPipeline, check_drop_policy, DEFAULT_QUEUE_SIZE
+from scanner_vision import (RegionTracker, single_region, detect_multiscale, mirror_region, sample_grid,
+                            DETECTION_SCALE)
+
 try:
     from hyper_secure_core import HyperSecureRPattern
     HYPER_SECURITY_AVAILABLE = True
@@ -45,6 +51,7 @@ class HyperSecureColorDetector:
         (255, 255, 255): 'auth_start',
         (0, 0, 0): 'auth_end',
         (128, 128, 128): 'checksum',
+        (64, 64, 64): 'timestamp',  # halfway between black and gray: without it a dark capture reads as the end frame
     }
     
     def __init__(self):
@@ -52,36 +59,39 @@ class HyperSecureColorDetector:
         self.color_tolerance = 40  # Improved tolerance
         self.noise_threshold = 5   # Noise reduction
         
+        # Data and security colors, built once: classification is a lookup table index
+        self.colors = np.array(list({**self.HYPER_COLOR_MAP, **self.SECURITY_COLORS}), dtype=np.uint8)
+        self.calibrate()
+    
+    def calibrate(self, measured: Optional[np.ndarray] = None):
+        """
+        Classify against the colors as this camera shows them (None: the nominal colors).
+        
+        Raises:
+            ValueError: if measured is not one RGB color per data and security color, in order
+        """
+        reference = self.colors if measured is None else np.asarray(measured, dtype=np.uint8).reshape(-1, 3)
+        if len(reference) != len(self.colors):
+            raise ValueError(f"Expected {len(self.colors)} measured colors, got {len(reference)}")
+        self.reference = reference
+        color_lut(reference)  # built once per reference palette, not on the first frame
+    
     def detect_dominant_color_advanced(self, roi: np.ndarray) -> Tuple[int, int, int]:
-        """Advanced color detection with noise reduction."""
-        # Convert BGR to RGB
-        rgb_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)
-        
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(rgb_roi, (5, 5), 0)
-        
-        # Calculate mean color from center region (ignore edges)
-        h, w = blurred.shape[:2]
+        """Advanced color detection: every pixel of the center region votes, so glare and noise are outvoted."""
+        # Center region (ignore edges)
+        h, w = roi.shape[:2]
         center_h, center_w = h//4, w//4
-        center_region = blurred[center_h:h-center_h, center_w:w-center_w]
-        
-        mean_color = np.mean(center_region.reshape(-1, 3), axis=0).astype(int)
+        center_region = roi[center_h:h-center_h, center_w:w-center_w]
         
-        # Find closest color with improved matching
-        min_distance = float('inf')
-        closest_color = (255, 255, 255)
-        
-        # Check all hyper colors
-        all_colors = {**self.HYPER_COLOR_MAP, **self.SECURITY_COLORS}
-        
-        for rgb_color in all_colors.keys():
-            # Use weighted Euclidean distance
-            distance = np.sqrt(np.sum((np.array(rgb_color) - mean_color) ** 2))
-            if distance < min_distance:
-                min_distance = distance
-                closest_color = rgb_color
-        
-        return closest_color
+        # Classify every pixel (BGR to RGB) with one table lookup, then take the majority
+        symbols, _ = lookup_colors(center_region[..., ::-1], self.reference)
+        votes = np.bincount(symbols.ravel(), minlength=len(self.colors))
+        return tuple(int(c) for c in self.colors[votes.argmax()])
+    
+    def closest_colors(self, colors: np.ndarray) -> np.ndarray:
+        """Snap sampled (..., 3) RGB colors to the closest data or security colors, as a uint8 array."""
+        symbols, _ = lookup_colors(colors, self.reference)
+        return self.colors[symbols]
     
     def classify_color_type(self, rgb_color: Tuple[int, int, int]) -> str:
         """Classify color as data or security frame."""
@@ -96,8 +106,21 @@ class HyperSecureColorDetector:
 class HyperSecureScanner:
     """Military-grade RPattern scanner with advanced detection."""
     
-    def __init__(self, camera_index: int = 0):
-        """Initialize hyper-secure scanner."""
+    def __init__(self, camera_index: int = 0, grid_size: int = 4, encoding_mode: str = "frame",
+                 drop_policy: str = 'latest', queue_size: int = DEFAULT_QUEUE_SIZE,
+                 session_salt: Optional[bytes] = None):
+        """
+        Initialize hyper-secure scanner (grid size, mode and session salt must match the generator).
+        
+        Args:
+            camera_index: Camera index to use
+            grid_size: Grid of the generator
+            encoding_mode: 'frame' or 'cell', as the generator
+            drop_policy: 'latest' (stages drop stale frames) or 'queue' (every frame, with latency)
+            queue_size: Frames waiting before each pipeline stage
+            session_salt: Session salt of the generator, its keys derive from it
+        """
+        check_drop_policy(drop_policy)
         self.camera_index = camera_index
         self.cap = None
         
@@ -105,28 +128,48 @@ class HyperSecureScanner:
         self.color_detector = HyperSecureColorDetector()
         
         if HYPER_SECURITY_AVAILABLE:
-            self.rpattern = HyperSecureRPattern(expiry_seconds=30, security_level="ULTRA")
-            self.grid_size = 4  # 4x4 for hyper-secure
+            self.rpattern = HyperSecureRPattern(expiry_seconds=30, security_level="ULTRA",
+                                                grid_size=grid_size, encoding_mode=encoding_mode,
+                                                session_salt=session_salt)
+            self.grid_size = self.rpattern.grid_size  # 4x4 by default, 8x8/12x12 in cell mode
+            self.sequence_cells = self.rpattern.sequence_cells
+            crc_block_size = self.rpattern.crc_block_size
         else:
             self.rpattern = RPattern(expiry_minutes=1)
             self.grid_size = 3  # 3x3 for standard
+            self.sequence_cells = 0
+            crc_block_size = 0
+        
+        # CRC-verified blocks survive failed decodes, so later loops only fix the bad ones
+        self.blocks = BlockCollector(crc_block_size) if crc_block_size else None
         
         # Enhanced detection parameters
         self.min_pattern_size = 150
         self.max_pattern_size = 600
         self.detection_stability_frames = 5
         self.max_detection_time = 15
+        self.tracking = True  # once found, re-verify the pattern in a small window instead of the whole frame
+        self.detection_scale = DETECTION_SCALE / 2  # 1080p capture: full-frame searches run at 480x270
+        self.tracker = RegionTracker(single_region(self.detect_pattern_region_advanced), full_detect=self.locate_pattern)
         
         # Advanced frame tracking
         self.frame_buffer = deque(maxlen=30)
         self.stable_detections = deque(maxlen=10)
         self.security_sequence = []
+        self.max_sequence_frames = 900  # ~30 s at 30 fps, enough for a full loop with duplicates
         
         # Detection state
         self.is_scanning = False
         self.detection_confidence = 0.0
         self.last_detection_time = 0
         
+        # Threaded pipeline: capture, detect, extract and decode on their own threads
+        self.drop_policy = drop_policy
+        self.queue_size = queue_size
+        self.pipeline: Optional[ScanPipeline] = None
+        self._decoded = deque()  # (item, data) per decode, until the display thread shows it
+        self._reset_requested = False
+        
         self.window_name = "🔒 HyperSecure RPattern Scanner - Rahul Chaube"
         
     def initialize_camera(self) -> bool:
@@ -151,8 +194,10 @@ class HyperSecureScanner:
             print(f"❌ Camera initialization error: {e}")
             return False
     
-    def detect_pattern_region_advanced(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
-        """Advanced pattern detection with multiple algorithms."""
+    def detect_pattern_region_advanced(self, frame: np.ndarray, scale: float = 1.0) -> Optional[Tuple[int, int, int, int]]:
+        """Advanced pattern detection with multiple algorithms (scale: frame size relative to the camera's)."""
+        min_size, max_size = self.min_pattern_size * scale, self.max_pattern_size * scale
+        
         # Method 1: Edge detection
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
@@ -174,9 +219,12 @@ class HyperSecureScanner:
             # Get bounding rectangle
             x, y, w, h = cv2.boundingRect(contour)
             
+            # The thresholded background spans the whole image: not a pattern
+            if (w, h) == (gray.shape[1], gray.shape[0]):
+                continue
+            
             # Size filtering
-            if (self.min_pattern_size <= w <= self.max_pattern_size and 
-                self.min_pattern_size <= h <= self.max_pattern_size):
+            if min_size <= w <= max_size and min_size <= h <= max_size:
                 
                 # Aspect ratio check (should be roughly square)
                 aspect_ratio = w / h
@@ -188,7 +236,7 @@ class HyperSecureScanner:
                     area_ratio = contour_area / bbox_area if bbox_area > 0 else 0
                     
                     # Score based on size and shape
-                    size_score = min(w, h) / self.max_pattern_size
+                    size_score = min(w, h) / max_size
                     shape_score = 1.0 - abs(aspect_ratio - 1.0)
                     area_score = area_ratio
                     
@@ -202,10 +250,12 @@ class HyperSecureScanner:
             return best_candidates[0][:4]
         
         # Method 2: Color-based detection (fallback)
-        return self._detect_by_color_clustering(frame)
+        return self._detect_by_color_clustering(frame, scale)
     
-    def _detect_by_color_clustering(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    def _detect_by_color_clustering(self, frame: np.ndarray, scale: float = 1.0) -> Optional[Tuple[int, int, int, int]]:
         """Detect pattern using color clustering."""
+        min_size, max_size = self.min_pattern_size * scale, self.max_pattern_size * scale
+        
         # Convert to HSV for better color detection
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
         
@@ -219,63 +269,39 @@ class HyperSecureScanner:
         
         for contour in contours:
             x, y, w, h = cv2.boundingRect(contour)
-            if (self.min_pattern_size <= w <= self.max_pattern_size and 
-                self.min_pattern_size <= h <= self.max_pattern_size):
+            if min_size <= w <= max_size and min_size <= h <= max_size:
                 aspect_ratio = w / h
                 if 0.8 <= aspect_ratio <= 1.2:
                     return (x, y, w, h)
         
         return None
     
-    def extract_grid_colors_advanced(self, frame: np.ndarray, pattern_region: Tuple[int, int, int, int]) -> List[List[Tuple[int, int, int]]]:
-        """Extract colors with advanced sampling."""
+    def locate_pattern(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Full-frame search: detect on a downscaled pyramid level, refine corners at full resolution."""
+        return detect_multiscale(frame, single_region(self.detect_pattern_region_advanced), self.detection_scale)
+    
+    def extract_grid_colors_advanced(self, frame: np.ndarray, pattern_region: Tuple[int, int, int, int]) -> np.ndarray:
+        """Extract colors with advanced sampling: a (grid, grid, 3) array of RGB colors."""
         x, y, w, h = pattern_region
-        pattern_roi = frame[y:y+h, x:x+w]
         
-        # Resize to standard size for consistent sampling
-        standard_size = 400
-        resized_roi = cv2.resize(pattern_roi, (standard_size, standard_size))
-        
-        cell_size = standard_size // self.grid_size
-        grid_colors = []
-        
-        for row in range(self.grid_size):
-            row_colors = []
-            for col in range(self.grid_size):
-                # Calculate cell boundaries
-                cell_y = row * cell_size
-                cell_x = col * cell_size
-                
-                # Extract center region of cell (avoid edges)
-                margin = cell_size // 4
-                cell_roi = resized_roi[
-                    cell_y + margin:cell_y + cell_size - margin,
-                    cell_x + margin:cell_x + cell_size - margin
-                ]
-                
-                if cell_roi.size > 0:
-                    # Use advanced color detection
-                    dominant_color = self.color_detector.detect_dominant_color_advanced(cell_roi)
-                    row_colors.append(dominant_color)
-                else:
-                    row_colors.append((255, 255, 255))
-                    
-            grid_colors.append(row_colors)
-        
-        return grid_colors
+        # Mean of the center of every cell (the inner half, avoiding edges), then the closest colors
+        means = sample_grid(frame[y:y+h, x:x+w], self.grid_size, margin=0.375)
+        if means is None:
+            return np.full((self.grid_size, self.grid_size, 3), 255, dtype=np.uint8)
+        return self.color_detector.closest_colors(means)
     
-    def validate_security_sequence(self, frames: List[List[List[Tuple[int, int, int]]]]) -> bool:
+    def validate_security_sequence(self, frames: np.ndarray) -> bool:
         """Validate security frame sequence."""
         if len(frames) < 5:
             return False
         
         # Check first frame (should be auth_start)
-        first_color = frames[0][0][0]
+        first_color = tuple(int(c) for c in frames[0][0][0])
         if self.color_detector.classify_color_type(first_color) != "security_auth_start":
             return False
         
         # Check last frame (should be auth_end)
-        last_color = frames[-1][0][0]
+        last_color = tuple(int(c) for c in frames[-1][0][0])
         if self.color_detector.classify_color_type(last_color) != "security_auth_end":
             return False
         
@@ -288,24 +314,58 @@ class HyperSecureScanner:
         
         print(f"🔍 Processing {len(captured_frames)} hyper-secure frames...")
         
-        # Validate security sequence
-        if not self.validate_security_sequence(captured_frames):
+        # Stack grids into a (frames, grid, grid, 3) tensor for the decoders
+        captured_frames = np.array(captured_frames, dtype=np.uint8)
+        
+        # Validate security sequence (sequenced frames are put in order by the decoder)
+        if not self.sequence_cells and not self.validate_security_sequence(captured_frames):
             print("❌ Security validation failed")
             return None
         
         # Attempt decoding
         if HYPER_SECURITY_AVAILABLE:
-            decoded_data = self.rpattern.decode_hyper_secure_frames(captured_frames)
+            decoded_data = self.rpattern.decode_hyper_secure_frames(captured_frames, self.blocks)
         else:
             decoded_data = self.rpattern.decode_frames(captured_frames)
         
         if decoded_data:
             print(f"✅ HyperSecure pattern decoded successfully!")
+            if self.blocks:
+                self.blocks.reset()
             return decoded_data
         else:
             print("❌ Failed to decode hyper-secure pattern")
+            if self.blocks and self.blocks.length:
+                verified, total = self.blocks.progress
+                print(f"🧱 {verified}/{total} CRC blocks verified, waiting for blocks {self.blocks.missing.tolist()}")
             return None
     
+    def screen_sequence(self) -> bool:
+        """
+        Abandon the capture as soon as its header frames show an expired or foreign pattern.
+        
+        Returns:
+            True if the capture was abandoned
+        """
+        if not HYPER_SECURITY_AVAILABLE or not self.security_sequence:
+            return False
+        
+        try:
+            self.rpattern.screen_capture(np.array(self.security_sequence, dtype=np.uint8))
+        except ValueError as e:
+            print(f"⛔ Abandoning capture: {e}")
+            self.is_scanning = False
+            self.security_sequence = []
+            if self.blocks:
+                self.blocks.reset()
+            return True
+        return False
+    
+    @property
+    def block_progress(self) -> Optional[np.ndarray]:
+        """Per-block progress map (True = verified), or None when CRC blocks are off."""
+        return self.blocks.progress_map if self.blocks else None
+    
     def draw_advanced_overlay(self, frame: np.ndarray, pattern_region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
         """Draw advanced detection overlay."""
         overlay = frame.copy()
@@ -331,6 +391,11 @@ class HyperSecureScanner:
         cv2.putText(overlay, status_text, (10, 90),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
         
+        # Pipeline queue depths and frame rates
+        if self.pipeline:
+            cv2.putText(overlay, self.pipeline.summary(), (250, 125),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
+        
         # Confidence meter
         conf_width = 200
         conf_height = 20
@@ -382,6 +447,13 @@ class HyperSecureScanner:
             if frame_count > 0:
                 cv2.putText(overlay, f"Frames: {frame_count}", (x, y - 10),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            
+            # Block map: one square per CRC block, green once verified
+            block_map = self.block_progress
+            if block_map is not None and len(block_map):
+                for i, verified in enumerate(block_map):
+                    color = (0, 255, 0) if verified else (0, 0, 255)
+                    cv2.rectangle(overlay, (x + i * 8, y + h + 6), (x + i * 8 + 6, y + h + 12), color, -1)
         
         # Instructions
         instructions = [
@@ -397,8 +469,128 @@ class HyperSecureScanner:
         
         return overlay
     
+    def _detect_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: find the pattern in the camera frame as captured (only the display is mirrored)."""
+        if self.tracking:
+            regions = self.tracker.update(item['frame'])
+            item['region'] = regions[0] if regions else None
+        else:
+            regions = self.locate_pattern(item['frame'])
+            item['region'] = regions[0] if regions else None
+        return item
+    
+    def _extract_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: sample the grid colors of a detected pattern."""
+        if item['region']:
+            item['colors'] = self.extract_grid_colors_advanced(item['frame'], item['region'])
+        return item
+    
+    def _decode_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: track detection confidence and decode complete sequences, in capture order."""
+        if self._reset_requested:
+            # Reset detection
+            self._reset_requested = False
+            self.is_scanning = False
+            self.security_sequence = []
+            self.detection_confidence = 0.0
+            if self.blocks:
+                self.blocks.reset()
+            self.tracker.reset()
+            print("🔄 Detection reset")
+        
+        pattern_region = item['region']
+        
+        current_time = time.time()
+        
+        if pattern_region:
+            # Update detection confidence
+            self.detection_confidence = min(1.0, self.detection_confidence + 0.1)
+            self.last_detection_time = current_time
+            
+            grid_colors = item['colors']
+            
+            # Add to frame buffer
+            self.frame_buffer.append(grid_colors)
+            
+            # Check for stable detection
+            if len(self.frame_buffer) >= self.detection_stability_frames:
+                if not self.is_scanning:
+                    # Start sequence capture
+                    self.is_scanning = True
+                    self.security_sequence = []
+                    print("🎯 Stable pattern detected! Starting capture...")
+                
+                # Analyze current frame for security markers
+                center_color = tuple(int(c) for c in grid_colors[self.grid_size//2][self.grid_size//2])
+                color_type = self.color_detector.classify_color_type(center_color)
+                
+                if self.sequence_cells:
+                    # Frames carry their loop index: keep everything, decode whenever the end frame passes
+                    self.security_sequence.append(grid_colors)
+                    del self.security_sequence[:-self.max_sequence_frames]
+                    
+                    if color_type == "security_auth_end":
+                        decoded_data = self.process_hyper_secure_sequence(self.security_sequence)
+                        
+                        if decoded_data:
+                            print(f"🎉 HYPERSECURE PATTERN DETECTED: {decoded_data}")
+                            self._decoded.append((item, decoded_data))  # shown by the display thread
+                            self.is_scanning = False
+                        
+                        # Verified blocks are kept, so the next loop starts a fresh capture
+                        if decoded_data or self.blocks:
+                            self.security_sequence = []
+                elif color_type.startswith("security_"):
+                    if color_type == "security_auth_start" and len(self.security_sequence) == 0:
+                        print("🔄 Security sequence started")
+                        self.security_sequence = [grid_colors]
+                    elif len(self.security_sequence) > 0:
+                        self.security_sequence.append(grid_colors)
+                        
+                        if color_type == "security_auth_end":
+                            print("🏁 Security sequence complete")
+                            
+                            # Process the sequence
+                            decoded_data = self.process_hyper_secure_sequence(self.security_sequence)
+                            
+                            if decoded_data:
+                                print(f"🎉 HYPERSECURE PATTERN DETECTED: {decoded_data}")
+                                self._decoded.append((item, decoded_data))  # shown by the display thread
+                            
+                            # Reset
+                            self.is_scanning = False
+                            self.security_sequence = []
+                
+                # Check the signed expiry every few frames, well before the loop ends
+                if len(self.security_sequence) % 5 == 0:
+                    self.screen_sequence()
+                
+                # Timeout check
+                if (len(self.security_sequence) > 0 and 
+                    current_time - self.last_detection_time > self.max_detection_time):
+                    print("⏰ Detection timeout - resetting")
+                    self.is_scanning = False
+                    self.security_sequence = []
+        
+        else:
+            # Decrease confidence when no pattern detected
+            self.detection_confidence = max(0.0, self.detection_confidence - 0.05)
+            
+            # Reset if no detection for too long
+            if current_time - self.last_detection_time > 2.0:
+                if self.is_scanning:
+                    self.is_scanning = False
+                    self.security_sequence = []
+        return item
+    
     def start_scanning(self):
-        """Start the advanced scanning process."""
+        """
+        Start the advanced scanning process.
+        
+        Capture, detection, color extraction and decoding run on their own
+        threads (scanner_pipeline.ScanPipeline); this thread only draws the
+        overlay and handles keys.
+        """
         if not self.initialize_camera():
             return
         
@@ -407,84 +599,25 @@ class HyperSecureScanner:
         
         cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
         
+        self.pipeline = ScanPipeline(self.cap.read, [
+            ('detect', self._detect_stage),
+            ('extract', self._extract_stage),
+            ('decode', self._decode_stage),
+        ], self.queue_size, self.drop_policy).start()
+        
         try:
-            while True:
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("❌ Failed to read from camera")
-                    break
-                
-                # Flip for mirror effect
-                frame = cv2.flip(frame, 1)
-                
-                # Detect pattern region
-                pattern_region = self.detect_pattern_region_advanced(frame)
-                
-                current_time = time.time()
-                
-                if pattern_region:
-                    # Update detection confidence
-                    self.detection_confidence = min(1.0, self.detection_confidence + 0.1)
-                    self.last_detection_time = current_time
-                    
-                    # Extract grid colors
-                    grid_colors = self.extract_grid_colors_advanced(frame, pattern_region)
-                    
-                    # Add to frame buffer
-                    self.frame_buffer.append(grid_colors)
-                    
-                    # Check for stable detection
-                    if len(self.frame_buffer) >= self.detection_stability_frames:
-                        if not self.is_scanning:
-                            # Start sequence capture
-                            self.is_scanning = True
-                            self.security_sequence = []
-                            print("🎯 Stable pattern detected! Starting capture...")
-                        
-                        # Analyze current frame for security markers
-                        center_color = grid_colors[self.grid_size//2][self.grid_size//2]
-                        color_type = self.color_detector.classify_color_type(center_color)
-                        
-                        if color_type.startswith("security_"):
-                            if color_type == "security_auth_start" and len(self.security_sequence) == 0:
-                                print("🔄 Security sequence started")
-                                self.security_sequence = [grid_colors]
-                            elif len(self.security_sequence) > 0:
-                                self.security_sequence.append(grid_colors)
-                                
-                                if color_type == "security_auth_end":
-                                    print("🏁 Security sequence complete")
-                                    
-                                    # Process the sequence
-                                    decoded_data = self.process_hyper_secure_sequence(self.security_sequence)
-                                    
-                                    if decoded_data:
-                                        print(f"🎉 HYPERSECURE PATTERN DETECTED: {decoded_data}")
-                                        self.show_success_message(frame, decoded_data)
-                                    
-                                    # Reset
-                                    self.is_scanning = False
-                                    self.security_sequence = []
-                        
-                        # Timeout check
-                        if (len(self.security_sequence) > 0 and 
-                            current_time - self.last_detection_time > self.max_detection_time):
-                            print("⏰ Detection timeout - resetting")
-                            self.is_scanning = False
-                            self.security_sequence = []
+            while self.pipeline.running:
+                item = self.pipeline.latest()
+                if item is None:
+                    continue
                 
-                else:
-                    # Decrease confidence when no pattern detected
-                    self.detection_confidence = max(0.0, self.detection_confidence - 0.05)
-                    
-                    # Reset if no detection for too long
-                    if current_time - self.last_detection_time > 2.0:
-                        if self.is_scanning:
-                            self.is_scanning = False
-                            self.security_sequence = []
+                while self._decoded:
+                    decoded_item, decoded_data = self._decoded.popleft()
+                    self.show_success_message(cv2.flip(decoded_item['frame'], 1), decoded_data)
                 
-                # Draw overlay
-                display_frame = self.draw_advanced_overlay(frame, pattern_region)
+                # Mirror for display only: the stages work on the frame as captured
+                frame = cv2.flip(item['frame'], 1)
+                display_frame = self.draw_advanced_overlay(frame, mirror_region(item['region'], frame.shape[1]))
                 
                 # Show frame
                 cv2.imshow(self.window_name, display_frame)
@@ -494,16 +627,14 @@ class HyperSecureScanner:
                 if key == ord('q'):
                     break
                 elif key == ord('r'):
-                    # Reset detection
-                    self.is_scanning = False
-                    self.security_sequence = []
-                    self.detection_confidence = 0.0
-                    print("🔄 Detection reset")
+                    # Reset detection (done by the decode thread, between two frames)
+                    self._reset_requested = True
         
         except KeyboardInterrupt:
             print("🛑 Scanner interrupted by user")
         
         finally:
+            self.pipeline.stop()
             self.cleanup()
     
     def show_success_message(self, frame: np.ndarray, decoded_data: str):
@@ -0,0 +1,1206 @@
+"""
+RPattern Codec - Shared Frame and Symbol Kernels
+Creator: Rahul Chaube 🚀
+
+NumPy building blocks shared by every RPattern core.
+
+Frames are stored as a single uint8 tensor of shape
+(frames, grid, grid, 3) instead of nested lists of RGB tuples, and
+payload bytes are mapped to N-bit palette indices with
+np.unpackbits/np.packbits instead of '0'/'1' strings. Decoders classify
+captured colors against a palette with one broadcasted argmin.
+
+Encoders return a Pattern: the packed symbol stream plus grid/palette
+config and header fields, with frames materialized lazily.
+
+Two frame layouts are supported:
+- 'frame': one symbol per frame, every cell painted the same color
+- 'cell':  spatial multiplexing, every grid cell carries its own symbol
+
+Fountain patterns instead split the stream into packets, each led by a
+solid marker frame, so a capture can start anywhere in the loop.
+
+Sequenced patterns reserve the last few cells of every frame for the
+frame's loop index, so captures can be reassembled by index regardless
+of rotation, drops or duplicates.
+
+Clocked patterns reserve a few more cells, just before the index cells,
+for a black/white binary counter of the frame index. The lowest bit
+toggles on every symbol, so a scanner finds symbol boundaries from the
+pattern itself instead of the wall clock (see symbol_clock.py).
+
+Patterns may carry format header frames right after the start marker.
+They use a fixed header palette, so a decoder can read them before it
+knows which core produced the pattern (see format_header.py).
+
+Larger palettes (up to 64 colors) are generated rather than hand-picked;
+sizes that are not a power of two pack bytes by base conversion in small
+fixed groups. Calibrated patterns follow the header with frames showing
+every palette color, and decoders classify against the colors measured
+there instead of the nominal RGB values no camera reproduces exactly.
+
+Scanners classifying many colors against a fixed palette (cell means,
+raw pixels for per-pixel votes) look them up in a quantized RGB table
+instead (color_lut / lookup_colors): the table is built once per palette,
+so a newly measured palette gets its own.
+"""
+
+import copy
+import struct
+from functools import lru_cache
+from typing import List, Tuple, Sequence, Union, Any, Dict, Optional
+
+import numpy as np
+
+
+# Canonical frame tensor dtype
+FRAME_DTYPE = np.uint8
+
+# Frame layouts: one symbol per frame or one symbol per grid cell
+ENCODING_MODES = ('frame', 'cell')
+
+# Byte length prefix used by the 'cell' layout to drop padding cells
+LENGTH_PREFIX = struct.Struct('>H')
+
+# Anything a decoder accepts as frames: tensor or legacy nested lists
+FrameInput = Union[np.ndarray, Sequence[Sequence[Sequence[Tuple[int, int, int]]]]]
+
+
+def solid_frames(colors: np.ndarray, grid_size: int) -> np.ndarray:
+    """
+    Build one solid-colored frame per color.
+    
+    Args:
+        colors: Array of shape (N, 3) with one RGB color per frame
+        grid_size: Width/height of the square grid
+    
+    Returns:
+        uint8 tensor of shape (N, grid_size, grid_size, 3)
+    """
+    colors = np.asarray(colors, dtype=FRAME_DTYPE).reshape(-1, 3)
+    shape = (len(colors), grid_size, grid_size, 3)
+    return np.ascontiguousarray(np.broadcast_to(colors[:, None, None, :], shape))
+
+
+def marker_frame(color: Tuple[int, int, int], grid_size: int) -> np.ndarray:
+    """Build a single solid marker frame as a (1, G, G, 3) tensor."""
+    return solid_frames(np.array([color]), grid_size)
+
+
+def as_frame_array(frames: FrameInput) -> np.ndarray:
+    """
+    Convert frames to the canonical (N, G, G, 3) uint8 tensor.
+    
+    Tensors are returned as-is (no copy) when they already have the right
+    dtype; legacy nested lists of RGB tuples are converted once.
+    """
+    if isinstance(frames, Pattern):
+        array = frames.frames
+    elif isinstance(frames, np.ndarray) and frames.dtype == FRAME_DTYPE:
+        array = frames
+    else:
+        array = np.asarray(frames)
+        if array.dtype.kind == 'f':
+            array = np.rint(array)
+        if array.size and (array.min() < 0 or array.max() > 255):
+            raise ValueError("Frame colors must be in range 0-255")
+        array = array.astype(FRAME_DTYPE)
+    
+    if array.ndim != 4 or array.shape[-1] != 3:
+        raise ValueError(f"Frames must have shape (frames, rows, cols, 3), got {array.shape}")
+    
+    return array
+
+
+def frames_to_lists(frames: FrameInput) -> List[List[List[Tuple[int, int, int]]]]:
+    """Legacy view: convert a frame tensor to nested lists of RGB tuples."""
+    return [[[tuple(cell) for cell in row] for row in frame]
+            for frame in as_frame_array(frames).tolist()]
+
+
+def legacy_frames(pattern_data: Any) -> List[List[List[Tuple[int, int, int]]]]:
+    """Compatibility accessor returning a pattern's frames as nested tuple lists."""
+    return frames_to_lists(pattern_data['frames'])
+
+
+def palette_from_map(color_map: Dict[str, Tuple[int, int, int]]) -> np.ndarray:
+    """
+    Turn a {'bits': (r, g, b)} color map into a (P, 3) palette array.
+    
+    Row i of the palette is the color for symbol value i, so the palette
+    can be indexed directly with the output of bytes_to_symbols().
+    """
+    palette = np.zeros((len(color_map), 3), dtype=FRAME_DTYPE)
+    for bits, color in color_map.items():
+        palette[int(bits, 2)] = color
+    return palette
+
+
+# Format header frames: a fixed palette, one 3-bit symbol per cell
+HEADER_COLOR_MAP = {
+    '000': (255, 0, 0),      # Red
+    '001': (0, 255, 0),      # Green
+    '010': (0, 0, 255),      # Blue
+    '011': (255, 255, 0),    # Yellow
+    '100': (255, 0, 255),    # Magenta
+    '101': (0, 255, 255),    # Cyan
+    '110': (255, 128, 0),    # Orange
+    '111': (128, 0, 255),    # Purple
+}
+HEADER_BITS_PER_SYMBOL = 3
+HEADER_PALETTE = palette_from_map(HEADER_COLOR_MAP)
+
+# Loop length the frame index must cover whatever the palette: a long URL at one bit per frame
+MIN_SEQUENCE_FRAMES = 1024
+
+# Clock cells: bit j of the frame index, black = 0, white = 1
+CLOCK_PALETTE = np.array([(0, 0, 0), (255, 255, 255)], dtype=FRAME_DTYPE)
+MAX_CLOCK_CELLS = 4
+
+# Generated data palettes: up to 64 colors drawn from a 6x6x6 RGB lattice
+MAX_COLORS = 64
+PALETTE_LATTICE_LEVELS = 6
+
+# Measured calibration colors closer than this are treated as a failed preamble
+CALIBRATION_MIN_SEPARATION = 12
+
+# Color lookup tables: bits kept per channel (5 = a 32x32x32 table)
+LUT_BITS = 5
+
+
+def _check_bits_per_symbol(bits_per_symbol: int):
+    """Validate a bits-per-symbol value for the codec kernel."""
+    if not 1 <= bits_per_symbol <= 8:
+        raise ValueError(f"bits_per_symbol must be between 1 and 8, got {bits_per_symbol}")
+
+
+def bytes_to_symbols(data: bytes, bits_per_symbol: int) -> np.ndarray:
+    """
+    Split bytes into N-bit symbol indices (MSB first).
+    
+    The final symbol is zero-padded when the bit count is not a multiple
+    of bits_per_symbol.
+    
+    Args:
+        data: Payload bytes
+        bits_per_symbol: Bits carried by one symbol (e.g. 2, 3, 4, 6)
+    
+    Returns:
+        uint8 array of symbol values in range [0, 2**bits_per_symbol)
+    """
+    _check_bits_per_symbol(bits_per_symbol)
+    
+    bits = np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8))
+    padding = (-len(bits)) % bits_per_symbol
+    if padding:
+        bits = np.concatenate([bits, np.zeros(padding, dtype=np.uint8)])
+    
+    # OR each bit plane into place (at most 8 vectorized passes)
+    groups = bits.reshape(-1, bits_per_symbol)
+    symbols = np.zeros(len(groups), dtype=np.uint8)
+    for i in range(bits_per_symbol):
+        symbols |= groups[:, i] << (bits_per_symbol - 1 - i)
+    return symbols
+
+
+def symbols_to_bytes(symbols: np.ndarray, bits_per_symbol: int, length: Optional[int] = None) -> bytes:
+    """
+    Reassemble bytes from N-bit symbol indices.
+    
+    Trailing padding bits that do not form a whole byte are dropped.
+    
+    Args:
+        symbols: Symbol values produced by bytes_to_symbols()
+        bits_per_symbol: Bits carried by one symbol
+        length: Optional exact byte count to return
+    
+    Returns:
+        Decoded bytes
+    """
+    _check_bits_per_symbol(bits_per_symbol)
+    
+    symbols = np.asarray(symbols, dtype=np.uint8).reshape(-1)
+    bits = np.empty((len(symbols), bits_per_symbol), dtype=np.uint8)
+    for i in range(bits_per_symbol):
+        bits[:, i] = (symbols >> (bits_per_symbol - 1 - i)) & 1
+    bits = bits.reshape(-1)
+    
+    byte_count = len(bits) // 8 if length is None else min(length, len(bits) // 8)
+    return np.packbits(bits[:byte_count * 8]).tobytes()
+
+
+def check_colors(colors: int):
+    """Validate a data palette size."""
+    if not 2 <= colors <= MAX_COLORS:
+        raise ValueError(f"colors must be between 2 and {MAX_COLORS}, got {colors}")
+
+
+def is_power_of_two(colors: int) -> bool:
+    """True if a palette of this size packs whole bits per symbol."""
+    return colors & (colors - 1) == 0
+
+
+@lru_cache(maxsize=64)
+def generate_palette(colors: int) -> np.ndarray:
+    """
+    Data palette of `colors` well-separated colors.
+    
+    Colors are picked greedily from a 6-level RGB lattice, each one as far
+    as possible from those already chosen. Greys are left out, since the
+    cores use white, black and greys for their marker frames.
+    
+    Returns:
+        Read-only (colors, 3) uint8 palette, identical on every call
+    """
+    check_colors(colors)
+    levels = np.linspace(0, 255, PALETTE_LATTICE_LEVELS).round().astype(np.int32)
+    candidates = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(-1, 3)
+    candidates = candidates[np.ptp(candidates, axis=1) > 0]
+    
+    chosen = [int(np.flatnonzero((candidates == (255, 0, 0)).all(axis=1))[0])]
+    nearest = np.linalg.norm(candidates - candidates[chosen[0]], axis=1)
+    while len(chosen) < colors:
+        chosen.append(int(nearest.argmax()))
+        nearest = np.minimum(nearest, np.linalg.norm(candidates - candidates[chosen[-1]], axis=1))
+    
+    palette = candidates[chosen].astype(FRAME_DTYPE)
+    palette.setflags(write=False)
+    return palette
+
+
+@lru_cache(maxsize=64)
+def digit_group(colors: int) -> Tuple[int, int]:
+    """
+    Group size for packing bytes into base-`colors` digits.
+    
+    Returns:
+        (bytes, digits): groups of `bytes` bytes become `digits` digits,
+        picking the group (up to 6 bytes) that wastes the fewest bits
+    """
+    check_colors(colors)
+    best = None
+    for group in range(1, 7):
+        digits = _digits_needed(group, colors)
+        if best is None or digits * best[0] < best[1] * group:
+            best = (group, digits)
+    return best
+
+
+def _digits_needed(byte_count: int, colors: int) -> int:
+    """Fewest base-`colors` digits that hold any value of byte_count bytes."""
+    digits, capacity = 0, 1
+    while capacity < 256 ** byte_count:
+        digits, capacity = digits + 1, capacity * colors
+    return digits
+
+
+def bytes_to_digits(data: bytes, colors: int) -> np.ndarray:
+    """
+    Split bytes into base-`colors` digits (MSB first), group by group.
+    
+    Each group of digit_group() bytes is converted on its own, so a misread
+    digit spoils one group instead of the rest of the stream. A short last
+    group uses only as many digits as it needs.
+    
+    Returns:
+        uint8 array of digits in range [0, colors)
+    """
+    group, digits = digit_group(colors)
+    data = np.frombuffer(bytes(data), dtype=np.uint8)
+    full = len(data) // group * group
+    out = [_group_digits(data[:full].reshape(-1, group), digits, colors)]
+    if full < len(data):
+        tail = data[full:]
+        out.append(_group_digits(tail[None], _digits_needed(len(tail), colors), colors))
+    return np.concatenate(out).astype(np.uint8)
+
+
+def digits_to_bytes(symbols: np.ndarray, colors: int, length: Optional[int] = None) -> bytes:
+    """
+    Reassemble bytes from base-`colors` digits produced by bytes_to_digits().
+    
+    Args:
+        symbols: Digit stream, possibly followed by padding
+        colors: Palette size the digits were drawn from
+        length: Optional exact byte count to return
+    
+    Returns:
+        Decoded bytes
+    """
+    group, digits = digit_group(colors)
+    symbols = np.asarray(symbols, dtype=np.int64).reshape(-1)
+    if length is not None:
+        symbols = symbols[:symbol_count(length, colors)]  # padding would shift the short group
+    full = len(symbols) // digits
+    out = [_digit_bytes(symbols[:full * digits].reshape(-1, digits), group, colors)]
+    
+    # Leftover digits hold the largest short group they have room for
+    leftover = len(symbols) - full * digits
+    tail = max((size for size in range(1, group) if _digits_needed(size, colors) <= leftover), default=0)
+    if tail:
+        needed = _digits_needed(tail, colors)
+        out.append(_digit_bytes(symbols[full * digits:full * digits + needed][None], tail, colors))
+    
+    data = b''.join(out)
+    return data if length is None else data[:length]
+
+
+def _group_digits(groups: np.ndarray, digits: int, colors: int) -> np.ndarray:
+    """(n, bytes) groups to a flat stream of `digits` digits per group."""
+    values = groups.astype(np.int64) @ (256 ** np.arange(groups.shape[1] - 1, -1, -1, dtype=np.int64))
+    out = np.empty((len(values), digits), dtype=np.int64)
+    for i in range(digits - 1, -1, -1):
+        values, out[:, i] = np.divmod(values, colors)
+    return out.reshape(-1)
+
+
+def _digit_bytes(groups: np.ndarray, byte_count: int, colors: int) -> bytes:
+    """(n, digits) digit groups back to byte_count bytes each (misread overflow wraps)."""
+    values = groups @ (colors ** np.arange(groups.shape[1] - 1, -1, -1, dtype=np.int64))
+    values %= 256 ** byte_count
+    shifts = 8 * np.arange(byte_count - 1, -1, -1, dtype=np.int64)
+    return ((values[:, None] >> shifts) & 0xFF).astype(np.uint8).tobytes()
+
+
+def encode_symbols(data: bytes, colors: int) -> np.ndarray:
+    """Bytes to palette indices: whole bits for power-of-two palettes, base conversion otherwise."""
+    if is_power_of_two(colors):
+        return bytes_to_symbols(data, colors.bit_length() - 1)
+    return bytes_to_digits(data, colors)
+
+
+def decode_symbols(symbols: np.ndarray, colors: int, length: Optional[int] = None) -> bytes:
+    """Inverse of encode_symbols()."""
+    if is_power_of_two(colors):
+        return symbols_to_bytes(symbols, colors.bit_length() - 1, length)
+    return digits_to_bytes(symbols, colors, length)
+
+
+def symbol_count(byte_count: int, colors: int) -> int:
+    """Number of symbols encode_symbols() produces for byte_count bytes."""
+    if is_power_of_two(colors):
+        bits = colors.bit_length() - 1
+        return -(-byte_count * 8 // bits)
+    group, digits = digit_group(colors)
+    full, tail = divmod(byte_count, group)
+    return full * digits + (_digits_needed(tail, colors) if tail else 0)
+
+
+def classify_cells(cells: np.ndarray, palette: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classify cell colors against a palette in one broadcasted argmin.
+    
+    Args:
+        cells: Array of shape (N, cells, 3) with measured RGB colors
+        palette: Array of shape (P, 3) with reference colors
+    
+    Returns:
+        (symbols, distances): both of shape (N, cells); symbols are palette
+        indices and distances are Euclidean distances to the chosen color
+    """
+    cells = np.asarray(cells, dtype=np.int32)
+    palette = np.asarray(palette, dtype=np.int32).reshape(-1, 3)
+    
+    diff = cells[..., None, :] - palette  # (N, cells, P, 3)
+    squared = np.einsum('...k,...k->...', diff, diff)  # (N, cells, P)
+    
+    symbols = squared.argmin(axis=-1)
+    distances = np.sqrt(np.take_along_axis(squared, symbols[..., None], axis=-1)[..., 0])
+    return symbols.astype(np.uint8), distances
+
+
+def classify_frames(frames: FrameInput, palette: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classify solid-colored frames using every cell of each frame.
+    
+    Each cell is classified independently and the frame symbol is the
+    majority vote, so a few occluded or glared cells do not flip it.
+    
+    Returns:
+        (symbols, distances): shape (N,); distances are the mean distance
+        of the cells that voted for the winning symbol
+    """
+    frames = as_frame_array(frames)
+    cells = frames.reshape(len(frames), -1, 3)
+    cell_symbols, cell_distances = classify_cells(cells, palette)
+    
+    votes = cell_symbols[..., None] == np.arange(len(palette))  # (N, cells, P)
+    symbols = votes.sum(axis=1).argmax(axis=1).astype(np.uint8)
+    
+    winners = cell_symbols == symbols[:, None]
+    distances = (cell_distances * winners).sum(axis=1) / np.maximum(winners.sum(axis=1), 1)
+    return symbols, distances
+
+
+def check_encoding_mode(mode: str):
+    """Validate a frame layout name."""
+    if mode not in ENCODING_MODES:
+        raise ValueError(f"Unknown encoding mode '{mode}', expected one of {ENCODING_MODES}")
+
+
+def add_length_prefix(data: bytes) -> bytes:
+    """Prefix data with its 16-bit big-endian byte length."""
+    if len(data) > 0xFFFF:
+        raise ValueError(f"Payload too large for one pattern: {len(data)} bytes")
+    return LENGTH_PREFIX.pack(len(data)) + data
+
+
+def strip_length_prefix(data: bytes) -> bytes:
+    """Remove the length prefix and any trailing padding bytes."""
+    if len(data) < LENGTH_PREFIX.size:
+        raise ValueError("Missing length prefix")
+    (length,) = LENGTH_PREFIX.unpack_from(data)
+    if LENGTH_PREFIX.size + length > len(data):
+        raise ValueError("Length prefix exceeds captured data")
+    return data[LENGTH_PREFIX.size:LENGTH_PREFIX.size + length]
+
+
+def symbols_to_frames(symbols: np.ndarray, palette: np.ndarray, grid_size: int,
+                      mode: str = 'frame') -> np.ndarray:
+    """
+    Lay out a symbol stream as a (frames, grid, grid, 3) tensor.
+    
+    In 'frame' mode each symbol fills a whole frame. In 'cell' mode the
+    symbols fill the grid row by row, grid_size**2 symbols per frame, and
+    the last frame is padded with symbol 0.
+    """
+    check_encoding_mode(mode)
+    symbols = np.asarray(symbols, dtype=np.uint8).reshape(-1)
+    
+    if mode == 'frame':
+        return solid_frames(palette[symbols], grid_size)
+    
+    return np.ascontiguousarray(palette[cell_symbol_grid(symbols, grid_size)])
+
+
+def split_at_markers(frames: FrameInput, palette: np.ndarray, marker: Tuple[int, int, int],
+                     mode: str = 'frame') -> List[np.ndarray]:
+    """
+    Cut a capture into the symbol streams that follow each marker frame.
+    
+    Used by packetized (fountain) patterns, where every packet starts with
+    a solid marker frame. A capture may start or stop mid-packet; those
+    partial streams are returned too and rejected later by their checksum.
+    
+    Returns:
+        One symbol array per marker, data palette indices only
+    """
+    frames = as_frame_array(frames)
+    palette = np.asarray(palette, dtype=FRAME_DTYPE).reshape(-1, 3)
+    extended = np.concatenate([palette, np.asarray([marker], dtype=FRAME_DTYPE)])
+    
+    frame_symbols, _ = classify_frames(frames, extended)
+    starts = np.flatnonzero(frame_symbols == len(palette))
+    ends = np.append(starts[1:], len(frames))
+    
+    packets = []
+    for start, end in zip(starts, ends):
+        if end - start > 1:
+            packets.append(frames_to_symbols(frames[start + 1:end], palette, mode)[0])
+    return packets
+
+
+def check_sequence_cells(sequence_cells: int, grid_size: int):
+    """Validate the number of cells reserved for the frame index (0 = off)."""
+    if sequence_cells == 1 or not 0 <= sequence_cells < grid_size * grid_size:
+        raise ValueError(f"sequence_cells must be 0, or at least 2 while leaving a data cell "
+                         f"in a {grid_size}x{grid_size} grid, got {sequence_cells}")
+
+
+def sequence_capacity(sequence_cells: int, base: int) -> int:
+    """Longest loop the frame index of `sequence_cells` base-`base` cells can number."""
+    return base ** (sequence_cells - 1) // 2
+
+
+def check_sequence_capacity(sequence_cells: int, colors: int):
+    """Validate the frame index of a palette numbers loops of MIN_SEQUENCE_FRAMES frames (0 = off)."""
+    if not sequence_cells or sequence_capacity(sequence_cells, colors) >= MIN_SEQUENCE_FRAMES:
+        return
+    needed = sequence_cells
+    while sequence_capacity(needed, colors) < MIN_SEQUENCE_FRAMES:
+        needed += 1
+    raise ValueError(f"{sequence_cells} sequence cells number only {sequence_capacity(sequence_cells, colors)} "
+                     f"frames with {colors} colors; use at least {needed} for loops of up to "
+                     f"{MIN_SEQUENCE_FRAMES} frames")
+
+
+def check_clock_cells(clock_cells: int, sequence_cells: int, grid_size: int):
+    """Validate a clock cell count; index and clock cells must leave room for the header's first byte."""
+    if not 0 <= clock_cells <= MAX_CLOCK_CELLS:
+        raise ValueError(f"clock_cells must be between 0 and {MAX_CLOCK_CELLS}, got {clock_cells}")
+    if clock_cells and grid_size * grid_size - sequence_cells - clock_cells < 3:
+        raise ValueError(f"{sequence_cells} sequence and {clock_cells} clock cells leave fewer than "
+                         f"3 data cells in a {grid_size}x{grid_size} grid")
+
+
+def clock_bits(count: int, clock_cells: int) -> np.ndarray:
+    """
+    Clock cell values for `count` consecutive frames.
+    
+    Returns:
+        uint8 array of shape (count, clock_cells) holding bit j of each
+        frame index in column j (column 0 toggles every frame)
+    """
+    index = np.arange(count, dtype=np.int64)[:, None]
+    return ((index >> np.arange(clock_cells)) & 1).astype(np.uint8)
+
+
+def sequence_digits(count: int, sequence_cells: int, base: int) -> np.ndarray:
+    """
+    Index digits for a loop of `count` frames.
+    
+    Each frame carries index * 2 + last, written MSB first as
+    `sequence_cells - 1` base-`base` digits, followed by a check digit
+    (digit sum + 1, mod base). The last-frame flag tells the assembler how
+    long the loop is; the check digit rejects misread indices, including
+    frames that read as one solid color.
+    
+    Returns:
+        uint8 array of shape (count, sequence_cells)
+    """
+    if count > sequence_capacity(sequence_cells, base):
+        raise ValueError(f"{count} frames do not fit in {sequence_cells} sequence cells; "
+                         f"use more sequence cells or a larger grid")
+    values = np.arange(count, dtype=np.int64) * 2
+    values[-1:] += 1
+    powers = base ** np.arange(sequence_cells - 2, -1, -1, dtype=np.int64)
+    digits = (values[:, None] // powers) % base
+    check = (digits.sum(axis=1, keepdims=True) + 1) % base
+    return np.concatenate([digits, check], axis=1).astype(np.uint8)
+
+
+def sequence_indices(frames: FrameInput, palette: np.ndarray, sequence_cells: int) -> Tuple[np.ndarray, int]:
+    """
+    Loop index of every captured frame of a sequenced loop.
+    
+    Args:
+        frames: Captured frames, any rotation, with drops and duplicates
+        palette: (P, 3) data palette the index digits are drawn from
+        sequence_cells: Cells reserved for the index at the end of each frame
+    
+    Returns:
+        (index, total): per captured frame its place in the loop (-1 if the
+        index failed its check digit or is out of range), and the loop length
+    
+    Raises:
+        ValueError: if the last frame of the loop was never captured
+    """
+    frames = as_frame_array(frames)
+    cells = frames.reshape(len(frames), -1, 3)
+    digits, _ = classify_cells(cells[:, cells.shape[1] - sequence_cells:], palette)
+    digits, check = digits[:, :-1].astype(np.int64), digits[:, -1]
+    valid = (digits.sum(axis=1) + 1) % len(palette) == check
+    
+    powers = len(palette) ** np.arange(sequence_cells - 2, -1, -1, dtype=np.int64)
+    values = digits @ powers
+    index, last = values >> 1, (values & 1) * valid
+    if not last.any():
+        raise ValueError("Last frame of the loop not captured yet")
+    
+    # A misread index can fake a last-frame flag: pick the loop length that
+    # explains the most captured frames while leaving the fewest holes
+    seen = np.unique(index[valid])
+    candidates = np.unique(index[last == 1]) + 1
+    scores = 2 * np.searchsorted(seen, candidates) - candidates
+    total = int(candidates[scores.argmax()])
+    return np.where(valid & (index < total), index, -1), total
+
+
+def fuse_by_index(frames: np.ndarray, index: np.ndarray, total: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Place captured frames (or any per-frame arrays) at their loop index.
+    
+    Repeated captures of one index are fused with a per-cell median.
+    
+    Returns:
+        (assembled, missing): total entries, zeros where nothing was
+        captured, and the sorted indices that were never seen
+    """
+    keep = index >= 0
+    frames, index = frames[keep], index[keep]
+    order = np.argsort(index, kind='stable')
+    frames, index = frames[order], index[order]
+    
+    seen, starts = np.unique(index, return_index=True)
+    assembled = np.zeros((total,) + frames.shape[1:], dtype=frames.dtype)
+    for position, group in zip(seen, np.split(frames, starts[1:])):
+        fused = np.median(group, axis=0)
+        assembled[position] = fused if frames.dtype.kind == 'f' else np.rint(fused)
+    
+    missing = np.setdiff1d(np.arange(total), seen)
+    return assembled, missing
+
+
+def assemble_sequence(frames: FrameInput, palette: np.ndarray,
+                      sequence_cells: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rebuild a sequenced loop in canonical order from any capture.
+    
+    Frames are placed by the index in their sequence cells, so a capture
+    may start anywhere in the loop and wrap around it. Repeated captures
+    of one frame are fused with a per-cell median; frames whose index
+    fails its check digit or is out of range are dropped.
+    
+    Args:
+        frames: Captured frames, any rotation, with drops and duplicates
+        palette: (P, 3) data palette the index digits are drawn from
+        sequence_cells: Cells reserved for the index at the end of each frame
+    
+    Returns:
+        (frames, missing): the (total, grid, grid, 3) loop with missing
+        frames left black, and the sorted indices that were never seen
+    
+    Raises:
+        ValueError: if the last frame of the loop was never captured
+    """
+    frames = as_frame_array(frames)
+    index, total = sequence_indices(frames, palette, sequence_cells)
+    return fuse_by_index(frames, index, total)
+
+
+def header_frame_count(header_length: int, grid_size: int, reserved_cells: int = 0) -> int:
+    """Number of frames needed for a format header of header_length bytes."""
+    slots = grid_size * grid_size - reserved_cells
+    symbols = -(-header_length * 8 // HEADER_BITS_PER_SYMBOL)
+    return -(-symbols // slots)
+
+
+def header_cell_symbols(header: bytes, grid_size: int, reserved_cells: int = 0) -> np.ndarray:
+    """
+    Lay out format header bytes over the data cells of header frames.
+    
+    Returns:
+        uint8 array of shape (frames, grid_size**2) with HEADER_PALETTE
+        indices; the last reserved_cells (clock and index) cells of each
+        row are left 0
+    """
+    cells = grid_size * grid_size
+    slots = cells - reserved_cells
+    symbols = bytes_to_symbols(header, HEADER_BITS_PER_SYMBOL)
+    symbols = np.concatenate([symbols, np.zeros((-len(symbols)) % slots, dtype=np.uint8)])
+    
+    rows = np.zeros((len(symbols) // slots, cells), dtype=np.uint8)
+    rows[:, :slots] = symbols.reshape(-1, slots)
+    return rows
+
+
+def read_header_cells(frames: FrameInput, reserved_cells: int = 0,
+                      length: Optional[int] = None) -> bytes:
+    """Read format header bytes back out of captured header frames."""
+    frames = as_frame_array(frames)
+    cells = frames.reshape(len(frames), -1, 3)
+    symbols, _ = classify_cells(cells[:, :cells.shape[1] - reserved_cells], HEADER_PALETTE)
+    return symbols_to_bytes(symbols.reshape(-1), HEADER_BITS_PER_SYMBOL, length)
+
+
+def calibration_frame_count(colors: int, grid_size: int, reserved_cells: int = 0) -> int:
+    """Frames needed to show every palette color once."""
+    return -(-colors // (grid_size * grid_size - reserved_cells))
+
+
+def calibration_cell_symbols(colors: int, grid_size: int, reserved_cells: int = 0) -> np.ndarray:
+    """
+    Calibration preamble: palette colors in order over the data cells.
+    
+    Data cell k of the preamble shows color k % colors, so leftover cells
+    repeat colors and give the decoder extra samples.
+    
+    Returns:
+        uint8 array of shape (frames, grid_size**2) with data palette
+        indices; the last reserved_cells cells of each row are left 0
+    """
+    cells = grid_size * grid_size
+    slots = cells - reserved_cells
+    count = calibration_frame_count(colors, grid_size, reserved_cells)
+    rows = np.zeros((count, cells), dtype=np.uint8)
+    rows[:, :slots] = (np.arange(count * slots) % colors).reshape(count, slots)
+    return rows
+
+
+def measure_palette(frames: FrameInput, palette: np.ndarray, reserved_cells: int = 0) -> np.ndarray:
+    """
+    Measure the palette as captured, from calibration preamble frames.
+    
+    Each color is the per-channel median of the cells that showed it. If
+    the measured colors are not clearly apart (preamble missed or washed
+    out), the nominal palette is kept.
+    
+    Args:
+        frames: The captured calibration frames, in order
+        palette: (P, 3) nominal data palette
+        reserved_cells: Clock and index cells at the end of every frame
+    
+    Returns:
+        (P, 3) uint8 palette to classify the data frames against
+    """
+    frames = as_frame_array(frames)
+    palette = np.asarray(palette, dtype=FRAME_DTYPE).reshape(-1, 3)
+    cells = frames.reshape(len(frames), -1, 3)
+    samples = cells[:, :cells.shape[1] - reserved_cells].reshape(-1, 3)
+    
+    owners = np.arange(len(samples)) % len(palette)
+    if len(samples) < len(palette):
+        print("⚠️ Calibration preamble incomplete, using the nominal palette")
+        return palette
+    measured = np.stack([np.median(samples[owners == i], axis=0) for i in range(len(palette))])
+    
+    spread = measured[:, None].astype(np.int32) - measured[None].astype(np.int32)
+    distances = np.sqrt((spread ** 2).sum(axis=-1)) + np.eye(len(palette)) * 1e9
+    if distances.min() < CALIBRATION_MIN_SEPARATION:
+        print("⚠️ Calibration colors indistinct, using the nominal palette")
+        return palette
+    return measured.round().astype(FRAME_DTYPE)
+
+
+def split_calibration(frames: FrameInput, palette: np.ndarray,
+                      reserved_cells: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Measure and drop the calibration frames right after the start frame.
+    
+    Returns:
+        (palette, frames): the measured palette and the loop without its
+        calibration frames, so the cores keep their fixed marker offsets
+    
+    Raises:
+        ValueError: if the calibration frames are missing
+    """
+    frames = as_frame_array(frames)
+    count = calibration_frame_count(len(palette), frames.shape[1], reserved_cells)
+    if len(frames) < count + 1:
+        raise ValueError("Calibration frames missing")
+    measured = measure_palette(frames[1:1 + count], palette, reserved_cells)
+    return measured, np.delete(frames, np.s_[1:1 + count], axis=0)
+
+
+def cell_symbol_grid(symbols: np.ndarray, grid_size: int) -> np.ndarray:
+    """Pad a symbol stream with symbol 0 and reshape it to (frames, grid, grid)."""
+    symbols = np.asarray(symbols, dtype=np.uint8).reshape(-1)
+    padding = (-len(symbols)) % (grid_size * grid_size)
+    if padding:
+        symbols = np.concatenate([symbols, np.zeros(padding, dtype=np.uint8)])
+    return symbols.reshape(-1, grid_size, grid_size)
+
+
+def frames_to_symbols(frames: FrameInput, palette: np.ndarray, mode: str = 'frame',
+                      sequence_cells: int = 0, clock_cells: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read the symbol stream back out of captured frames.
+    
+    The last `sequence_cells` cells of each frame hold its index and the
+    `clock_cells` before them its clock; both are skipped.
+    
+    Returns:
+        (symbols, distances): one entry per frame in 'frame' mode, one per
+        data cell (row-major, frame by frame) in 'cell' mode
+    """
+    check_encoding_mode(mode)
+    frames = as_frame_array(frames)
+    cells = frames.reshape(len(frames), -1, 3)
+    cells = cells[:, :cells.shape[1] - sequence_cells - clock_cells]
+    
+    if mode == 'frame':
+        return classify_frames(cells[:, None], palette)
+    
+    symbols, distances = classify_cells(cells, palette)
+    return symbols.reshape(-1), distances.reshape(-1)
+
+
+@lru_cache(maxsize=64)
+def _cached_templates(palette_bytes: bytes, grid_size: int) -> np.ndarray:
+    """Solid template frames for a palette, shared by every pattern using it."""
+    palette = np.frombuffer(palette_bytes, dtype=FRAME_DTYPE).reshape(-1, 3)
+    templates = solid_frames(palette, grid_size)
+    templates.setflags(write=False)
+    return templates
+
+
+def frame_templates(palette: np.ndarray, grid_size: int) -> np.ndarray:
+    """
+    Read-only (P, grid, grid, 3) tensor with one solid frame per palette color.
+    
+    Templates are cached per palette and grid size, so indexing them hands
+    out views instead of allocating a new frame per symbol.
+    """
+    palette = np.ascontiguousarray(palette, dtype=FRAME_DTYPE)
+    return _cached_templates(palette.tobytes(), grid_size)
+
+
+def _check_lut_bits(bits: int):
+    """Validate the bits per channel of a color lookup table."""
+    if not 1 <= bits <= 8:
+        raise ValueError(f"Lookup table bits must be between 1 and 8, got {bits}")
+
+
+@lru_cache(maxsize=16)
+def _cached_lut(palette_bytes: bytes, bits: int) -> np.ndarray:
+    """Quantized RGB table for a palette, shared by every detector using it."""
+    palette = np.frombuffer(palette_bytes, dtype=FRAME_DTYPE).reshape(-1, 3)
+    levels = 1 << bits
+    shift = 8 - bits
+    centers = (np.arange(levels) << shift) + ((1 << shift) >> 1)  # middle of every bin
+    
+    plane = np.stack(np.meshgrid(centers, centers, indexing='ij'), axis=-1).reshape(-1, 2)
+    table = np.empty((levels, levels, levels), dtype=np.uint8)
+    for red in range(levels):  # one red plane at a time keeps 64x64x64 tables in a few MB
+        cells = np.concatenate([np.full((len(plane), 1), centers[red]), plane], axis=1)
+        symbols, _ = classify_cells(cells[None], palette)
+        table[red] = symbols.reshape(levels, levels)
+    table.setflags(write=False)
+    return table
+
+
+def color_lut(palette: np.ndarray, bits: int = LUT_BITS) -> np.ndarray:
+    """
+    Read-only (L, L, L) table of the closest palette index for every quantized RGB color.
+    
+    Tables are cached per palette, so a detector rebuilds one only when
+    its palette changes (e.g. after calibration).
+    
+    Args:
+        palette: (P, 3) reference colors
+        bits: Bits kept per channel; L = 2 ** bits (5: 32 KB, 6: 256 KB)
+    
+    Raises:
+        ValueError: on bits outside 1..8
+    """
+    _check_lut_bits(bits)
+    palette = np.ascontiguousarray(palette, dtype=FRAME_DTYPE).reshape(-1, 3)
+    return _cached_lut(palette.tobytes(), bits)
+
+
+def lookup_colors(colors: np.ndarray, palette: np.ndarray, bits: int = LUT_BITS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classify colors against a palette with one fancy-index into its lookup table.
+    
+    Args:
+        colors: (..., 3) RGB colors of any shape: cell means, or raw pixels
+            (non-uint8 values are rounded and clamped to 0-255)
+        palette: (P, 3) reference colors
+        bits: Bits kept per channel of the table
+    
+    Returns:
+        (symbols, distances): both of shape colors.shape[:-1]; symbols come
+        from the table (exact but for colors within a bin of a decision
+        boundary), distances are exact distances to the chosen color
+    """
+    table = color_lut(palette, bits)
+    colors = np.asarray(colors)
+    if colors.dtype != FRAME_DTYPE:
+        # Float cell means or wider integers: round and clamp, never truncate or wrap around
+        colors = np.clip(np.rint(colors), 0, 255).astype(FRAME_DTYPE)
+    quantized = colors >> (8 - bits)
+    symbols = table[quantized[..., 0], quantized[..., 1], quantized[..., 2]]
+    
+    palette = np.asarray(palette, dtype=np.int32).reshape(-1, 3)
+    diff = colors.astype(np.int32) - palette[symbols]
+    return symbols, np.sqrt(np.einsum('...k,...k->...', diff, diff))
+
+
+class Pattern:
+    """
+    Compact RPattern: a packed symbol stream plus grid/palette config.
+    
+    Symbols index an extended palette (data colors followed by the marker
+    colors of the security frames, then the header palette when the pattern
+    has format header frames). In 'frame' mode there is one symbol per
+    frame; in 'cell' mode, or when frames carry sequence cells or a format
+    header, one symbol per grid cell, shape (frames, grid, grid).
+    Frames are only built when asked for:
+        
+        pattern[i]         -> one (grid, grid, 3) frame (a template view in frame mode)
+        pattern.frames     -> the full (frames, grid, grid, 3) tensor
+        pattern['expiry']  -> header field (legacy dict-style access)
+    """
+    
+    __slots__ = ('symbols', 'palette', 'grid_size', 'encoding_mode', 'frame_duration',
+                 'leading_frames', 'trailing_frames', 'header', 'sequence_cells', 'header_frames',
+                 'clock_cells', 'calibration_frames')
+    
+    def __init__(self, symbols: np.ndarray, palette: np.ndarray, grid_size: int,
+                 frame_duration: float, encoding_mode: str = 'frame',
+                 leading_frames: int = 0, trailing_frames: int = 0,
+                 header: Optional[Dict[str, Any]] = None, sequence_cells: int = 0,
+                 header_frames: int = 0, clock_cells: int = 0, calibration_frames: int = 0):
+        """
+        Wrap an already laid out symbol stream.
+        
+        Args:
+            symbols: uint8 array of shape (frames,) or (frames, grid, grid)
+            palette: (P, 3) colors indexed by symbol value
+            grid_size: Width/height of the square grid
+            frame_duration: Seconds per frame
+            encoding_mode: 'frame' or 'cell'
+            leading_frames: Security frames before the data frames
+            trailing_frames: Security frames after the data frames
+            header: Scalar metadata fields (timestamp, expiry, ids, ...)
+            sequence_cells: Cells per frame holding the frame index
+            header_frames: Format header frames right after the first leading frame
+            clock_cells: Cells per frame, before the index cells, holding the clock
+            calibration_frames: Palette calibration frames after the header frames
+        """
+        check_encoding_mode(encoding_mode)
+        self.symbols = np.asarray(symbols, dtype=np.uint8)
+        self.palette = np.asarray(palette, dtype=FRAME_DTYPE).reshape(-1, 3)
+        self.grid_size = grid_size
+        self.encoding_mode = encoding_mode
+        self.frame_duration = frame_duration
+        self.leading_frames = leading_frames
+        self.trailing_frames = trailing_frames
+        self.header = header if header is not None else {}
+        self.sequence_cells = sequence_cells
+        self.header_frames = header_frames
+        self.clock_cells = clock_cells
+        self.calibration_frames = calibration_frames
+    
+    @classmethod
+    def build(cls, data_symbols: np.ndarray, palette: np.ndarray, grid_size: int,
+              frame_duration: float, encoding_mode: str = 'frame',
+              leading: Sequence[Tuple[int, int, int]] = (),
+              trailing: Sequence[Tuple[int, int, int]] = (), sequence_cells: int = 0,
+              format_header: bytes = b'', clock_cells: int = 0, calibration: bool = False,
+              **header) -> 'Pattern':
+        """
+        Lay out data symbols between solid security marker frames.
+        
+        Args:
+            data_symbols: Flat stream of data palette indices
+            palette: (P, 3) data palette
+            grid_size: Width/height of the square grid
+            frame_duration: Seconds per frame
+            encoding_mode: 'frame' (one symbol per frame) or 'cell' (one per grid cell)
+            leading: Marker colors shown before the data frames
+            trailing: Marker colors shown after the data frames
+            sequence_cells: Cells at the end of every frame (markers included)
+                that carry the frame's loop index, see assemble_sequence()
+            format_header: Packed format header, shown in header palette
+                frames right after the first leading frame
+            clock_cells: Cells before the index cells of every frame showing
+                the low bits of the frame index in CLOCK_PALETTE
+            calibration: Show every data palette color in frames right after
+                the header frames, see measure_palette()
+            **header: Metadata fields stored on the pattern
+        
+        Returns:
+            Pattern
+        """
+        check_encoding_mode(encoding_mode)
+        check_sequence_cells(sequence_cells, grid_size)
+        check_clock_cells(clock_cells, sequence_cells, grid_size)
+        palette = np.asarray(palette, dtype=FRAME_DTYPE).reshape(-1, 3)
+        markers = np.asarray(list(leading) + list(trailing), dtype=FRAME_DTYPE).reshape(-1, 3)
+        header_palette = HEADER_PALETTE if format_header else np.zeros((0, 3), dtype=FRAME_DTYPE)
+        clock_palette = CLOCK_PALETTE if clock_cells else np.zeros((0, 3), dtype=FRAME_DTYPE)
+        if len(palette) + len(markers) + len(header_palette) + len(clock_palette) > 256:
+            raise ValueError("Palette plus marker, header and clock colors must fit in 256 symbols")
+        
+        marker_symbols = np.arange(len(palette), len(palette) + len(markers), dtype=np.uint8)
+        head, tail = marker_symbols[:len(leading)], marker_symbols[len(leading):]
+        
+        if sequence_cells or clock_cells or format_header or calibration:
+            reserved_cells = sequence_cells + clock_cells
+            header_rows = header_cell_symbols(format_header, grid_size, reserved_cells)
+            header_rows += len(palette) + len(markers)
+            calibration_rows = (calibration_cell_symbols(len(palette), grid_size, reserved_cells)
+                                if calibration else np.zeros((0, grid_size * grid_size), dtype=np.uint8))
+            symbols = cls._cell_symbols(data_symbols, head, np.concatenate([header_rows, calibration_rows]),
+                                        tail, len(palette), grid_size, encoding_mode, sequence_cells,
+                                        clock_cells, len(palette) + len(markers) + len(header_palette))
+            return cls(symbols, np.concatenate([palette, markers, header_palette, clock_palette]),
+                       grid_size, frame_duration, encoding_mode, len(leading), len(trailing), header,
+                       sequence_cells, len(header_rows), clock_cells, len(calibration_rows))
+        
+        if encoding_mode == 'frame':
+            data = np.asarray(data_symbols, dtype=np.uint8).reshape(-1)
+        else:
+            data = cell_symbol_grid(data_symbols, grid_size)
+            head = np.broadcast_to(head[:, None, None], (len(head), grid_size, grid_size))
+            tail = np.broadcast_to(tail[:, None, None], (len(tail), grid_size, grid_size))
+        
+        return cls(np.concatenate([head, data, tail]), np.concatenate([palette, markers]),
+                   grid_size, frame_duration, encoding_mode,
+                   len(leading), len(trailing), header)
+    
+    @staticmethod
+    def _cell_symbols(data_symbols: np.ndarray, head: np.ndarray, header_rows: np.ndarray,
+                      tail: np.ndarray, base: int, grid_size: int, encoding_mode: str,
+                      sequence_cells: int, clock_cells: int = 0, clock_base: int = 0) -> np.ndarray:
+        """Per-cell symbols: header (and calibration) rows after the first marker, clock bits and index digits in the last cells."""
+        cells = grid_size * grid_size
+        slots = cells - sequence_cells - clock_cells
+        data = np.asarray(data_symbols, dtype=np.uint8).reshape(-1)
+        
+        if encoding_mode == 'frame':
+            data_rows = np.repeat(data[:, None], cells, axis=1)
+        else:
+            data = np.concatenate([data, np.zeros((-len(data)) % slots, dtype=np.uint8)])
+            data_rows = np.zeros((len(data) // slots, cells), dtype=np.uint8)
+            data_rows[:, :slots] = data.reshape(-1, slots)
+        
+        head_rows = np.repeat(head[:, None], cells, axis=1)
+        rows = np.concatenate([head_rows[:1], header_rows, head_rows[1:], data_rows,
+                               np.repeat(tail[:, None], cells, axis=1)])
+        if clock_cells:
+            rows[:, slots:slots + clock_cells] = clock_bits(len(rows), clock_cells) + clock_base
+        if sequence_cells:
+            rows[:, cells - sequence_cells:] = sequence_digits(len(rows), sequence_cells, base)
+        return rows.reshape(-1, grid_size, grid_size)
+    
+    @classmethod
+    def from_packets(cls, packets: Sequence[np.ndarray], palette: np.ndarray, grid_size: int,
+                     frame_duration: float, marker: Tuple[int, int, int],
+                     encoding_mode: str = 'frame', **header) -> 'Pattern':
+        """
+        Lay out self-contained packets, each led by a solid marker frame.
+        
+        Args:
+            packets: One data symbol stream per packet
+            palette: (P, 3) data palette
+            grid_size: Width/height of the square grid
+            frame_duration: Seconds per frame
+            marker: Color of the frame that starts every packet
+            encoding_mode: 'frame' or 'cell' (each packet pads its own last frame)
+            **header: Metadata fields stored on the pattern
+        
+        Returns:
+            Pattern
+        """
+        check_encoding_mode(encoding_mode)
+        palette = np.asarray(palette, dtype=FRAME_DTYPE).reshape(-1, 3)
+        if len(palette) >= 256:
+            raise ValueError("Palette plus marker color must fit in 256 symbols")
+        marker_symbol = np.array([len(palette)], dtype=np.uint8)
+        
+        if encoding_mode == 'cell':
+            marker_symbol = np.broadcast_to(marker_symbol[:, None, None], (1, grid_size, grid_size))
+        
+        parts = []
+        for packet in packets:
+            parts.append(marker_symbol)
+            if encoding_mode == 'frame':
+                parts.append(np.asarray(packet, dtype=np.uint8).reshape(-1))
+            else:
+                parts.append(cell_symbol_grid(packet, grid_size))
+        
+        return cls(np.concatenate(parts), np.concatenate([palette, np.asarray([marker], dtype=FRAME_DTYPE)]),
+                   grid_size, frame_duration, encoding_mode, header=header)
+    
+    @property
+    def total_frames(self) -> int:
+        """Number of frames, security frames included."""
+        return len(self.symbols)
+    
+    @property
+    def data_frames(self) -> int:
+        """Number of data frames."""
+        return (self.total_frames - self.leading_frames - self.trailing_frames
+                - self.header_frames - self.calibration_frames)
+    
+    def with_format_header(self, format_header: bytes) -> 'Pattern':
+        """
+        Copy of the pattern showing another format header.
+        
+        Only the header rows are rewritten; index and clock cells, markers
+        and data frames stay as they are, so this costs next to nothing.
+        
+        Args:
+            format_header: Packed header that fits the same number of frames
+        
+        Returns:
+            New Pattern (metadata dict copied, symbols copied)
+        
+        Raises:
+            ValueError: if the pattern has no header frames or the new header needs a different count
+        """
+        reserved_cells = self.sequence_cells + self.clock_cells
+        rows = header_cell_symbols(format_header, self.grid_size, reserved_cells)
+        if not self.header_frames or len(rows) != self.header_frames:
+            raise ValueError(f"Format header needs {len(rows)} frames, pattern has {self.header_frames}")
+        
+        # Extended palette order: data, markers, header palette, clock palette
+        base = len(self.palette) - len(HEADER_PALETTE) - (len(CLOCK_PALETTE) if self.clock_cells else 0)
+        slots = self.grid_size * self.grid_size - reserved_cells
+        symbols = self.symbols.copy()
+        header_rows = symbols[1:1 + len(rows)].reshape(len(rows), -1)
+        header_rows[:, :slots] = rows[:, :slots] + base
+        
+        pattern = copy.copy(self)
+        pattern.symbols = symbols
+        pattern.header = dict(self.header)
+        return pattern
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the symbol stream and palette."""
+        return self.symbols.nbytes + self.palette.nbytes
+    
+    def frame(self, index: int) -> np.ndarray:
+        """Materialize a single (grid, grid, 3) frame."""
+        symbols = self.symbols[index]
+        if self.symbols.ndim == 1:
+            return frame_templates(self.palette, self.grid_size)[symbols]
+        return self.palette[symbols]
+    
+    @property
+    def frames(self) -> np.ndarray:
+        """Materialize the full (frames, grid, grid, 3) tensor."""
+        if self.symbols.ndim == 1:
+            return frame_templates(self.palette, self.grid_size)[self.symbols]
+        return self.palette[self.symbols]
+    
+    def _fields(self) -> Dict[str, Any]:
+        """Derived metadata fields, in legacy dict order."""
+        return {
+            'frame_duration': self.frame_duration,
+            'total_frames': self.total_frames,
+            'data_frames': self.data_frames,
+            'security_frames': self.leading_frames + self.trailing_frames,
+            'grid_size': self.grid_size,
+            'encoding_mode': self.encoding_mode,
+            'sequence_cells': self.sequence_cells,
+            'header_frames': self.header_frames,
+            'clock_cells': self.clock_cells,
+            'calibration_frames': self.calibration_frames,
+        }
+    
+    def keys(self) -> List[str]:
+        """Legacy dict keys, so {**pattern} and JSON export keep working."""
+        return ['frames'] + list(self._fields()) + list(self.header)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Legacy dict-style field lookup."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Legacy metadata dict with the frame tensor materialized."""
+        return {key: self[key] for key in self.keys()}
+    
+    def __getitem__(self, key):
+        """Frame by index/slice, or metadata field by name."""
+        if not isinstance(key, str):
+            if isinstance(key, slice):
+                return self.frames[key]
+            return self.frame(key)
+        
+        if key == 'frames':
+            return self.frames
+        fields = self._fields()
+        if key in fields:
+            return fields[key]
+        return self.header[key]
+    
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and key in self.keys()
+    
+    def __len__(self) -> int:
+        return self.total_frames
+    
+    def __iter__(self):
+        for index in range(self.total_frames):
+            yield self.frame(index)
+    
+    def __repr__(self) -> str:
+        return (f"Pattern({self.total_frames} frames, {self.grid_size}x{self.grid_size}, "
+                f"mode={self.encoding_mode}, {self.nbytes} bytes)")
@@ -11,8 +11,9 @@ import sys
 import time
 import threading
 import math
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Any, List, Tuple, Optional
 from rpattern_revolutionary import RPatternCore, create_revolutionary_pattern
+from pattern_codec import Pattern
 
 
 class RPatternAnimator:
@@ -68,6 +69,10 @@ class RPatternAnimator:
         self.is_playing = False
         self.pattern_data = None
         self.last_frame_time = 0
+        self.clock_cells = range(0)  # flat indices of the cells drawn without effects
+        self.playlist: List[Pattern] = []  # sub-patterns of a chunked message, shown in turn
+        self.playlist_index = 0
+        self.tiles: List[List[Any]] = []  # striped message: [playlist, sub-pattern index, frame, rect] per tile
         
         # Visual effects
         self.pulse_amplitude = 0.2  # Pulsing effect
@@ -83,16 +88,66 @@ class RPatternAnimator:
         print(f"📺 Display Size: {window_size}")
         print(f"🎬 Pattern Area: {self.pattern_size}x{self.pattern_size}")
     
-    def load_pattern(self, pattern_data: Dict[str, Any]):
+    def load_pattern(self, pattern_data: Pattern):
         """Load a revolutionary pattern for display."""
-        self.pattern_data = pattern_data
         self.current_frame = 0
+        self.tiles = []
         self.animation_time = 0
         self.is_playing = True
+        self._set_pattern(pattern_data)
+        self.last_frame_time = time.time()
         
+        frame_duration = pattern_data.get('frame_duration', 0.3)
         print(f"🎬 Pattern loaded: {pattern_data.get('pattern_id', 'Unknown')}")
         print(f"📊 Frames: {pattern_data.get('total_frames', 0)}")
-        print(f"⏱️ Duration: {pattern_data.get('frame_duration', 0.3)}s per frame")
+        print(f"⏱️ Duration: {frame_duration}s per frame ({1 / frame_duration:.1f} symbols/s)")
+        if self.clock_cells:
+            print(f"🕐 Clock cells: {len(self.clock_cells)}")
+    
+    def _set_pattern(self, pattern_data: Pattern):
+        """Show a pattern: its grid, and which cells are drawn without effects (on load and playlist switches)."""
+        self.pattern_data = pattern_data
+        
+        # Match the pattern's grid (cell-mode patterns use 8x8, 12x12, ...)
+        self.grid_size = pattern_data.get('grid_size', self.grid_size)
+        self.cell_size = self.pattern_size // self.grid_size
+        
+        # Clock cells sit just before the index cells and must stay pure black/white
+        end = self.grid_size * self.grid_size - pattern_data.get('sequence_cells', 0)
+        self.clock_cells = range(end - pattern_data.get('clock_cells', 0), end)
+        if pattern_data.get('subdivision') or pattern_data.get('sweep_rate'):
+            # Layered patterns and rate sweeps are drawn flat: pulsing would wash out
+            # the sub-cell shading, or the known colors a sweep is measured against
+            self.clock_cells = range(self.grid_size * self.grid_size)
+    
+    def load_playlist(self, patterns: List[Pattern]):
+        """
+        Show sub-patterns one loop each, round robin.
+        
+        Chunked messages (RPatternCore.encode_chunked_patterns), or a rate
+        sweep ahead of a pattern (RPatternCore.encode_rate_sweep() + [pattern]):
+        every sub-pattern runs at its own frame_duration.
+        """
+        self.playlist = list(patterns)
+        self.playlist_index = 0
+        self.load_pattern(self.playlist[0])
+        print(f"🧩 Playlist: {len(self.playlist)} sub-patterns")
+    
+    def load_tiles(self, playlists: List[List[Pattern]]):
+        """
+        Show a striped message (RPatternCore.encode_striped_patterns) as tiles side by side.
+        
+        Every tile runs its own playlist on the shared frame schedule. For
+        separate screens, give each animator one playlist with load_playlist.
+        """
+        self.load_playlist(playlists[0])
+        tile_size = min(self.pattern_size, (self.window_size[0] - 40) // len(playlists))
+        left = (self.window_size[0] - tile_size * len(playlists)) // 2
+        self.tiles = [[list(playlist), 0, 0, pygame.Rect(left + index * tile_size, self.pattern_rect.y,
+                                                           tile_size, tile_size)]
+                      for index, playlist in enumerate(playlists)]
+        self.cell_size = tile_size // self.grid_size
+        print(f"🧱 Tiles: {len(self.tiles)} of {tile_size}px")
     
     def create_and_load_pattern(self, data: str, expiry_seconds: int = 60):
         """Create and load a pattern in one step."""
@@ -123,16 +178,18 @@ class RPatternAnimator:
         
         return (r, g, b)
     
-    def _draw_pattern_cell(self, cell_color: Tuple[int, int, int], x: int, y: int):
-        """Draw a single pattern cell with effects."""
+    def _draw_pattern_cell(self, cell_color: Tuple[int, int, int], x: int, y: int, effects: bool = True,
+                           area: Optional[pygame.Rect] = None):
+        """Draw a single pattern cell of `area` (default: the pattern area), with effects unless it is a clock cell."""
         # Calculate cell position
-        cell_x = self.pattern_rect.x + x * self.cell_size + self.cell_margin
-        cell_y = self.pattern_rect.y + y * self.cell_size + self.cell_margin
+        area = area or self.pattern_rect
+        cell_x = area.x + x * self.cell_size + self.cell_margin
+        cell_y = area.y + y * self.cell_size + self.cell_margin
         cell_w = self.cell_size - 2 * self.cell_margin
         cell_h = self.cell_size - 2 * self.cell_margin
         
         # Apply visual effects
-        enhanced_color = self._apply_visual_effects(cell_color)
+        enhanced_color = self._apply_visual_effects(cell_color) if effects else tuple(cell_color)
         
         # Create cell rectangle
         cell_rect = pygame.Rect(cell_x, cell_y, cell_w, cell_h)
@@ -142,27 +199,31 @@ class RPatternAnimator:
         pygame.draw.rect(self.screen, (255, 255, 255), cell_rect, 2)  # White border
         
         # Add glow effect for bright colors
-        if sum(enhanced_color) > 400:  # Bright colors
+        if effects and sum(enhanced_color) > 400:  # Bright colors
             glow_rect = pygame.Rect(cell_x - 2, cell_y - 2, cell_w + 4, cell_h + 4)
             glow_color = tuple(min(255, c + 30) for c in enhanced_color)
             pygame.draw.rect(self.screen, glow_color, glow_rect, 4)
     
     def _draw_pattern_frame(self):
-        """Draw the current pattern frame."""
-        if not self.pattern_data or not self.pattern_data.get('frames'):
+        """Draw the current pattern frame (one per tile for a striped message)."""
+        if self.tiles:
+            for playlist, index, frame, rect in self.tiles:
+                self._draw_grid(playlist[index][frame], rect)
             return
         
-        frames = self.pattern_data['frames']
-        if self.current_frame >= len(frames):
+        if self.pattern_data is None or self.current_frame >= len(self.pattern_data):
             return
         
-        current_pattern = frames[self.current_frame]
-        
-        # Draw each cell in the pattern
+        # Materialize only the frame on screen
+        self._draw_grid(self.pattern_data[self.current_frame])
+    
+    def _draw_grid(self, current_pattern, area: Optional[pygame.Rect] = None):
+        """Draw each cell of one frame."""
         for y in range(len(current_pattern)):
             for x in range(len(current_pattern[y])):
                 cell_color = current_pattern[y][x]
-                self._draw_pattern_cell(cell_color, x, y)
+                clock = y * self.grid_size + x in self.clock_cells
+                self._draw_pattern_cell(cell_color, x, y, effects=not clock, area=area)
     
     def _draw_ui_info(self):
         """Draw UI information and controls."""
@@ -177,7 +238,10 @@ class RPatternAnimator:
             
             # Frame info
             total_frames = self.pattern_data.get('total_frames', 0)
-            frame_info = f"Frame: {self.current_frame + 1}/{total_frames}"
+            frame_duration = self.pattern_data.get('frame_duration', 0.3)
+            frame_info = f"Frame: {self.current_frame + 1}/{total_frames} @ {1 / frame_duration:.1f} symbols/s"
+            if self.clock_cells:
+                frame_info += " (clocked)"
             frame_text = self.font_info.render(frame_info, True, self.text_color)
             self.screen.blit(frame_text, (20, y_offset))
             y_offset += 30
@@ -243,10 +307,23 @@ class RPatternAnimator:
         # Frame advancement
         frame_duration = self.pattern_data.get('frame_duration', 0.3)
         
-        if time.time() - self.last_frame_time >= frame_duration:
+        now = time.time()
+        if now - self.last_frame_time >= frame_duration:
+            # One frame per tick on a fixed schedule, so short frames neither drift nor get skipped
             total_frames = self.pattern_data.get('total_frames', 1)
             self.current_frame = (self.current_frame + 1) % total_frames
-            self.last_frame_time = time.time()
+            self.last_frame_time += frame_duration
+            if self.current_frame == 0 and len(self.playlist) > 1:
+                # Next sub-pattern, keeping the frame schedule
+                self.playlist_index = (self.playlist_index + 1) % len(self.playlist)
+                self._set_pattern(self.playlist[self.playlist_index])
+            for tile in self.tiles:
+                # Tiles loop sub-patterns of different lengths, each on its own
+                playlist, index, frame, _ = tile
+                frame = (frame + 1) % playlist[index].total_frames
+                tile[1:3] = ((index + 1) % len(playlist) if frame == 0 else index), frame
+            if now - self.last_frame_time >= frame_duration:
+                self.last_frame_time = now  # fell behind (paused, slow tick): restart the schedule
     
     def _update_fps(self):
         """Update FPS counter."""
@@ -291,7 +368,7 @@ class RPatternAnimator:
         
         return True
     
-    def run_display(self, pattern_data: Dict[str, Any] = None):
+    def run_display(self, pattern_data: Pattern = None):
         """Run the main display loop."""
         if pattern_data:
             self.load_pattern(pattern_data)
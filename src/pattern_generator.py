@@ -11,6 +11,7 @@ import time
 import threading
 from typing import Dict, Any, List, Tuple
 from rpattern_core import RPattern, create_test_pattern
+from pattern_codec import Pattern
 
 
 class RPatternDisplay:
@@ -53,7 +54,7 @@ class RPatternDisplay:
         self.is_playing = False
         self.loop_pattern = True
         
-    def load_pattern(self, pattern_data: Dict[str, Any]):
+    def load_pattern(self, pattern_data: Pattern):
         """Load a pattern for display."""
         self.pattern_data = pattern_data
         self.current_frame = 0
@@ -78,7 +79,7 @@ class RPatternDisplay:
         
         if current_time - self.last_frame_time >= frame_duration:
             self.current_frame += 1
-            if self.current_frame >= len(self.pattern_data['frames']):
+            if self.current_frame >= len(self.pattern_data):
                 if self.loop_pattern:
                     self.current_frame = 0
                 else:
@@ -87,10 +88,11 @@ class RPatternDisplay:
             
     def draw_pattern_frame(self):
         """Draw the current pattern frame."""
-        if not self.pattern_data or self.current_frame >= len(self.pattern_data['frames']):
+        if not self.pattern_data or self.current_frame >= len(self.pattern_data):
             return
             
-        frame = self.pattern_data['frames'][self.current_frame]
+        # Materialize only the frame on screen
+        frame = self.pattern_data[self.current_frame]
         
         # Draw the 3x3 grid
         for row in range(3):
@@ -249,7 +251,7 @@ class RPatternGenerator:
         display.run(data)
     
     @staticmethod
-    def save_pattern_info(pattern_data: Dict[str, Any], filename: str = "rpattern_info.json"):
+    def save_pattern_info(pattern_data: Pattern, filename: str = "rpattern_info.json"):
         """Save pattern information to a file."""
         import json
         
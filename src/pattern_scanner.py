@@ -12,6 +12,12 @@ import threading
 from typing import List, Tuple, Optional, Dict, Any
 from collections import defaultdict, deque
 from rpattern_core import RPattern
+from pattern_codec import color_lut, lookup_colors
+from fountain_code import FountainDecoder
+from scanner_pipeline import ScanPipeline, check_drop_policy, DEFAULT_QUEUE_SIZE
+from scanner_vision import (RegionTracker, single_region, detect_multiscale, mirror_region, sample_grid,
+                            DETECTION_SCALE)
+from unified_decoder import UnifiedDecoder
 
 
 class ColorDetector:
@@ -35,13 +41,38 @@ class ColorDetector:
         (0, 0, 255): '10',      # Blue
         (255, 255, 0): '11',    # Yellow
         (255, 255, 255): 'sync_start',  # White (sync)
-        (0, 0, 0): 'sync_end'           # Black (sync)
+        (0, 0, 0): 'sync_end',          # Black (sync)
+        # The rest of the format header palette: header cells must survive snapping
+        (255, 0, 255): 'header',        # Magenta
+        (0, 255, 255): 'header',        # Cyan
+        (255, 128, 0): 'header',        # Orange
+        (128, 0, 255): 'header',        # Purple
     }
     
     def __init__(self):
         """Initialize color detector."""
         self.tolerance = 50  # RGB tolerance for color matching
+        self.colors = np.array(list(self.RGB_COLORS), dtype=np.uint8)  # nominal colors, RGB_COLORS order
+        self.classes = list(self.RGB_COLORS.values())
+        self.calibrate()
+    
+    def calibrate(self, measured: Optional[np.ndarray] = None):
+        """
+        Classify against the colors as this camera shows them.
         
+        Args:
+            measured: (10, 3) RGB colors measured for RGB_COLORS, in order
+                (None: back to the nominal colors)
+        
+        Raises:
+            ValueError: if the measured colors do not match RGB_COLORS
+        """
+        reference = self.colors if measured is None else np.asarray(measured, dtype=np.uint8).reshape(-1, 3)
+        if len(reference) != len(self.colors):
+            raise ValueError(f"Expected {len(self.colors)} measured colors, got {len(reference)}")
+        self.reference = reference
+        color_lut(reference)  # built once per reference palette, not on the first frame
+    
     def detect_dominant_color(self, roi: np.ndarray) -> Tuple[int, int, int]:
         """
         Detect the dominant color in a region of interest.
@@ -59,31 +90,48 @@ class ColorDetector:
         mean_color = np.mean(rgb_roi.reshape(-1, 3), axis=0).astype(int)
         
         # Find closest predefined color
-        min_distance = float('inf')
-        closest_color = (255, 255, 255)  # Default to white
-        
-        for rgb_color in self.RGB_COLORS.keys():
-            distance = np.sqrt(np.sum((np.array(rgb_color) - mean_color) ** 2))
-            if distance < min_distance:
-                min_distance = distance
-                closest_color = rgb_color
-                
-        return closest_color
+        return tuple(int(c) for c in self.closest_colors(mean_color))
+    
+    def closest_colors(self, colors: np.ndarray) -> np.ndarray:
+        """
+        Snap sampled colors to the closest predefined colors.
+        
+        Args:
+            colors: (..., 3) array of RGB colors, e.g. a whole sampled grid
+        
+        Returns:
+            uint8 array of the same shape holding predefined (nominal) colors
+        """
+        symbols, _ = lookup_colors(colors, self.reference)
+        return self.colors[symbols]
     
     def classify_color(self, rgb_color: Tuple[int, int, int]) -> str:
         """Classify RGB color to bit pattern or sync signal."""
-        return self.RGB_COLORS.get(rgb_color, '00')
+        symbol, _ = lookup_colors(rgb_color, self.reference)
+        return self.classes[int(symbol)]
 
 
 class RPatternScanner:
     """Main scanner class for detecting and decoding RPatterns."""
     
-    def __init__(self, camera_index: int = 0):
-        """Initialize the scanner."""
+    def __init__(self, camera_index: int = 0, transmission: str = "sequential",
+                 drop_policy: str = 'latest', queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Initialize the scanner (transmission must match the generator's).
+        
+        Args:
+            camera_index: Camera index to use
+            transmission: 'sequential' or 'fountain'
+            drop_policy: 'latest' (stages drop stale frames) or 'queue' (every frame, with latency)
+            queue_size: Frames waiting before each pipeline stage
+        """
+        check_drop_policy(drop_policy)
         self.camera_index = camera_index
         self.cap = None
         self.color_detector = ColorDetector()
-        self.rpattern = RPattern()
+        self.rpattern = RPattern(transmission=transmission)
+        self.fountain = FountainDecoder()  # Droplets collected so far (fountain mode)
+        self.decoder = UnifiedDecoder(self.rpattern)  # Reads the format header of sequential loops
         
         # Detection state
         self.is_scanning = False
@@ -95,10 +143,21 @@ class RPatternScanner:
         self.min_pattern_size = 100  # Minimum pattern size in pixels
         self.max_detection_time = 30  # Maximum time to capture pattern (seconds)
         self.grid_size = 3  # 3x3 pattern grid
+        self.tracking = True  # once found, re-verify the pattern in a small window instead of the whole frame
+        self.detection_scale = DETECTION_SCALE  # full-frame searches run on the frame downscaled by this factor
+        self.tracker = RegionTracker(single_region(self.detect_pattern_region), full_detect=self.locate_pattern)
         
         # Frame sequence buffer
         self.frame_buffer = deque(maxlen=20)  # Keep last 20 frames
         self.sync_detected = False
+        self.loop_frames = None  # Exact loop length once the format header is read
+        
+        # Threaded pipeline: capture, detect, extract and decode on their own threads
+        self.drop_policy = drop_policy
+        self.queue_size = queue_size
+        self.pipeline: Optional[ScanPipeline] = None
+        self._decoded = deque()  # (item, data) per decode, until the display thread shows it
+        self._reset_requested = False
         
         # GUI elements
         self.window_name = "🚀 RPattern Scanner - by Rahul Chaube"
@@ -123,12 +182,13 @@ class RPatternScanner:
             print(f"❌ Camera initialization error: {e}")
             return False
     
-    def detect_pattern_region(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    def detect_pattern_region(self, frame: np.ndarray, scale: float = 1.0) -> Optional[Tuple[int, int, int, int]]:
         """
         Detect the RPattern region in the frame.
         
         Args:
             frame: Input frame from camera
+            scale: Size of frame relative to the camera's (pyramid levels), for the size limit
             
         Returns:
             (x, y, width, height) of detected pattern region or None
@@ -156,7 +216,7 @@ class RPatternScanner:
                 x, y, w, h = cv2.boundingRect(contour)
                 
                 # Check size constraints
-                if w >= self.min_pattern_size and h >= self.min_pattern_size:
+                if w >= self.min_pattern_size * scale and h >= self.min_pattern_size * scale:
                     # Check aspect ratio (should be roughly square)
                     aspect_ratio = w / h
                     if 0.8 <= aspect_ratio <= 1.2:
@@ -164,7 +224,19 @@ class RPatternScanner:
                         
         return None
     
-    def extract_grid_colors(self, frame: np.ndarray, pattern_region: Tuple[int, int, int, int]) -> List[List[Tuple[int, int, int]]]:
+    def locate_pattern(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """
+        Full-frame search: detect on a downscaled pyramid level, refine corners at full resolution.
+        
+        Args:
+            frame: Input frame from camera
+        
+        Returns:
+            [(x, y, width, height)] of the pattern region, or an empty list
+        """
+        return detect_multiscale(frame, single_region(self.detect_pattern_region), self.detection_scale)
+    
+    def extract_grid_colors(self, frame: np.ndarray, pattern_region: Tuple[int, int, int, int]) -> np.ndarray:
         """
         Extract colors from the 3x3 grid pattern.
         
@@ -173,43 +245,15 @@ class RPatternScanner:
             pattern_region: (x, y, width, height) of pattern region
             
         Returns:
-            3x3 grid of RGB colors
+            (3, 3, 3) array of RGB colors, each snapped to a predefined color
         """
         x, y, w, h = pattern_region
         
-        # Extract pattern ROI
-        pattern_roi = frame[y:y+h, x:x+w]
-        
-        # Divide into 3x3 grid
-        cell_height = h // self.grid_size
-        cell_width = w // self.grid_size
-        
-        grid_colors = []
-        
-        for row in range(self.grid_size):
-            row_colors = []
-            for col in range(self.grid_size):
-                # Calculate cell boundaries
-                cell_y = row * cell_height
-                cell_x = col * cell_width
-                
-                # Extract cell ROI (use center portion to avoid edge effects)
-                margin = min(cell_width, cell_height) // 4
-                cell_roi = pattern_roi[
-                    cell_y + margin:cell_y + cell_height - margin,
-                    cell_x + margin:cell_x + cell_width - margin
-                ]
-                
-                if cell_roi.size > 0:
-                    # Detect dominant color in this cell
-                    dominant_color = self.color_detector.detect_dominant_color(cell_roi)
-                    row_colors.append(dominant_color)
-                else:
-                    row_colors.append((255, 255, 255))  # Default to white
-                    
-            grid_colors.append(row_colors)
-            
-        return grid_colors
+        # Mean of every cell's center portion (away from edge effects), then the closest colors
+        means = sample_grid(frame[y:y+h, x:x+w], self.grid_size, margin=0.25)
+        if means is None:
+            return np.full((self.grid_size, self.grid_size, 3), 255, dtype=np.uint8)  # Default to white
+        return self.color_detector.closest_colors(means)
     
     def process_frame_sequence(self) -> Optional[str]:
         """
@@ -223,8 +267,8 @@ class RPatternScanner:
             
         print(f"🔍 Processing {len(self.captured_frames)} captured frames...")
         
-        # Try to decode the captured frames
-        decoded_data = self.rpattern.decode_frames(self.captured_frames)
+        # Try to decode the captured frames as a (frames, 3, 3, 3) tensor
+        decoded_data = self.rpattern.decode_frames(np.array(self.captured_frames, dtype=np.uint8))
         
         if decoded_data:
             print(f"✅ RPattern decoded successfully!")
@@ -233,6 +277,25 @@ class RPatternScanner:
             print("❌ Failed to decode RPattern")
             return None
     
+    def process_fountain_packet(self) -> Optional[str]:
+        """
+        Feed the packet captured since the last start frame to the fountain decoder.
+        
+        Returns:
+            Decoded data string once enough droplets have arrived, else None
+        """
+        decoded_data = self.rpattern.decode_frames(
+            np.array(self.captured_frames, dtype=np.uint8), fountain=self.fountain
+        )
+        
+        received, needed = self.fountain.progress
+        print(f"💧 Droplets: {received}/{needed}")
+        
+        if decoded_data:
+            print("✅ RPattern decoded successfully!")
+            self.fountain.reset()
+        return decoded_data
+    
     def draw_detection_overlay(self, frame: np.ndarray, pattern_region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
         """Draw detection overlay on the frame."""
         overlay = frame.copy()
@@ -247,6 +310,11 @@ class RPatternScanner:
         cv2.putText(overlay, status_text, 
                    (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         
+        # Pipeline queue depths and frame rates
+        if self.pipeline:
+            cv2.putText(overlay, self.pipeline.summary(), 
+                       (10, 95), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        
         # Draw pattern region if detected
         if pattern_region:
             x, y, w, h = pattern_region
@@ -287,8 +355,115 @@ class RPatternScanner:
         
         return overlay
     
+    def _detect_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: find the pattern in the camera frame as captured (only the display is mirrored)."""
+        if self.tracking:
+            regions = self.tracker.update(item['frame'])
+            item['region'] = regions[0] if regions else None
+        else:
+            regions = self.locate_pattern(item['frame'])
+            item['region'] = regions[0] if regions else None
+        return item
+    
+    def _extract_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: sample the grid colors of a detected pattern."""
+        if item['region']:
+            item['colors'] = self.extract_grid_colors(item['frame'], item['region'])
+        return item
+    
+    def _decode_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: follow the sync frames and decode complete loops, in capture order."""
+        if self._reset_requested:
+            # Reset detection
+            self._reset_requested = False
+            self.is_scanning = False
+            self.sync_detected = False
+            self.captured_frames = []
+            self.fountain.reset()
+            self.tracker.reset()
+            print("🔄 Detection reset")
+        
+        pattern_region = item['region']
+        
+        if pattern_region and not self.is_scanning:
+            # Start pattern detection
+            self.is_scanning = True
+            self.captured_frames = []
+            self.frame_timestamps = []
+            self.detection_start_time = time.time()
+            self.sync_detected = False
+            print("🎯 Pattern detected! Starting capture...")
+        
+        if self.is_scanning and pattern_region:
+            grid_colors = item['colors']
+            
+            # Check for synchronization frames
+            center_color = tuple(int(c) for c in grid_colors[1][1])  # Middle cell
+            color_class = self.color_detector.classify_color(center_color)
+            
+            if self.rpattern.transmission == 'fountain':
+                # Every droplet starts with a white frame: no need to wait for the loop start
+                self.captured_frames.append(grid_colors)
+                
+                if color_class == 'sync_start' and len(self.captured_frames) > 1:
+                    decoded_data = self.process_fountain_packet()
+                    self.captured_frames = [grid_colors]
+                    
+                    if decoded_data:
+                        print(f"🎉 RPattern Detected: {decoded_data}")
+                        self._decoded.append((item, decoded_data))
+                        self.is_scanning = False
+            elif color_class == 'sync_start' and not self.sync_detected:
+                print("🔄 Start sync detected")
+                self.sync_detected = True
+                self.loop_frames = None
+                self.captured_frames = [grid_colors]
+                self.frame_timestamps = [time.time()]
+            elif self.sync_detected:
+                self.captured_frames.append(grid_colors)
+                self.frame_timestamps.append(time.time())
+                
+                if self.loop_frames is None:
+                    header = self.decoder.read_header(self.captured_frames)
+                    if header:
+                        self.loop_frames = header.total_frames
+                        print(f"📋 Format header: {self.loop_frames} frames per loop")
+                
+                # The header gives the exact length; older patterns end at the end sync
+                if self.loop_frames:
+                    loop_done = len(self.captured_frames) >= self.loop_frames
+                else:
+                    loop_done = color_class == 'sync_end'
+                
+                if loop_done:
+                    print("🏁 End of loop reached")
+                    # Try to decode the pattern
+                    decoded_data = self.process_frame_sequence()
+                    
+                    if decoded_data:
+                        print(f"🎉 RPattern Detected: {decoded_data}")
+                        # Success message is shown by the display thread
+                        self._decoded.append((item, decoded_data))
+                    
+                    # Reset detection
+                    self.is_scanning = False
+                    self.sync_detected = False
+            
+            # Check timeout
+            if time.time() - self.detection_start_time > self.max_detection_time:
+                print("⏰ Detection timeout")
+                self.is_scanning = False
+                self.sync_detected = False
+        return item
+    
     def start_scanning(self):
-        """Start the scanning process."""
+        """
+        Start the scanning process.
+        
+        Capture, detection, color extraction and decoding run on their own
+        threads (scanner_pipeline.ScanPipeline); this thread only draws the
+        overlay and handles keys.
+        """
         if not self.initialize_camera():
             return
             
@@ -297,67 +472,27 @@ class RPatternScanner:
         
         cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
         
+        self.pipeline = ScanPipeline(self.cap.read, [
+            ('detect', self._detect_stage),
+            ('extract', self._extract_stage),
+            ('decode', self._decode_stage),
+        ], self.queue_size, self.drop_policy).start()
+        
         try:
-            while True:
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("❌ Failed to read from camera")
-                    break
+            while self.pipeline.running:
+                item = self.pipeline.latest()
+                if item is None:
+                    continue
+                # Mirror for display only: the stages work on the frame as captured
+                frame = cv2.flip(item['frame'], 1)
                 
-                # Flip frame horizontally for mirror effect
-                frame = cv2.flip(frame, 1)
-                
-                # Detect pattern region
-                pattern_region = self.detect_pattern_region(frame)
-                
-                if pattern_region and not self.is_scanning:
-                    # Start pattern detection
-                    self.is_scanning = True
-                    self.captured_frames = []
-                    self.frame_timestamps = []
-                    self.detection_start_time = time.time()
-                    self.sync_detected = False
-                    print("🎯 Pattern detected! Starting capture...")
-                
-                if self.is_scanning and pattern_region:
-                    # Extract colors from current frame
-                    grid_colors = self.extract_grid_colors(frame, pattern_region)
-                    
-                    # Check for synchronization frames
-                    center_color = grid_colors[1][1]  # Middle cell
-                    color_class = self.color_detector.classify_color(center_color)
-                    
-                    if color_class == 'sync_start' and not self.sync_detected:
-                        print("🔄 Start sync detected")
-                        self.sync_detected = True
-                        self.captured_frames = [grid_colors]
-                        self.frame_timestamps = [time.time()]
-                    elif self.sync_detected:
-                        self.captured_frames.append(grid_colors)
-                        self.frame_timestamps.append(time.time())
-                        
-                        if color_class == 'sync_end':
-                            print("🏁 End sync detected")
-                            # Try to decode the pattern
-                            decoded_data = self.process_frame_sequence()
-                            
-                            if decoded_data:
-                                print(f"🎉 RPattern Detected: {decoded_data}")
-                                # Show success message
-                                self.show_success_message(frame, decoded_data)
-                            
-                            # Reset detection
-                            self.is_scanning = False
-                            self.sync_detected = False
-                            
-                    # Check timeout
-                    if time.time() - self.detection_start_time > self.max_detection_time:
-                        print("⏰ Detection timeout")
-                        self.is_scanning = False
-                        self.sync_detected = False
+                while self._decoded:
+                    decoded_item, decoded_data = self._decoded.popleft()
+                    # Show success message
+                    self.show_success_message(cv2.flip(decoded_item['frame'], 1), decoded_data)
                 
                 # Draw overlay
-                display_frame = self.draw_detection_overlay(frame, pattern_region)
+                display_frame = self.draw_detection_overlay(frame, mirror_region(item['region'], frame.shape[1]))
                 
                 # Show frame
                 cv2.imshow(self.window_name, display_frame)
@@ -367,16 +502,14 @@ class RPatternScanner:
                 if key == ord('q'):
                     break
                 elif key == ord('r'):
-                    # Reset detection
-                    self.is_scanning = False
-                    self.sync_detected = False
-                    self.captured_frames = []
-                    print("🔄 Detection reset")
+                    # Reset detection (done by the decode thread, between two frames)
+                    self._reset_requested = True
                     
         except KeyboardInterrupt:
             print("🛑 Scanner interrupted by user")
             
         finally:
+            self.pipeline.stop()
             self.cleanup()
     
     def show_success_message(self, frame: np.ndarray, decoded_data: str):
@@ -418,6 +551,8 @@ def main():
     parser = argparse.ArgumentParser(description="🚀 RPattern Scanner by Rahul Chaube")
     parser.add_argument("--camera", "-c", type=int, default=0,
                        help="Camera index to use")
+    parser.add_argument("--transmission", "-t", choices=["sequential", "fountain"],
+                       default="sequential", help="Transmission mode used by the generator")
     
     args = parser.parse_args()
     
@@ -427,7 +562,7 @@ def main():
     print("-" * 50)
     
     # Start scanner
-    scanner = RPatternScanner(camera_index=args.camera)
+    scanner = RPatternScanner(camera_index=args.camera, transmission=args.transmission)
     scanner.start_scanning()
 
 
@@ -0,0 +1,347 @@
+"""
+RPattern Payload Envelope - Compact Binary Payloads
+Creator: Rahul Chaube 🚀
+
+Versioned binary replacement for the JSON payloads the cores encrypt.
+Every byte of payload becomes frames on screen, so fields are stored as
+fixed-width integers, varints and enum codes instead of JSON strings.
+
+Layout (version 1):
+    byte 0       envelope version
+    byte 1       flags (compression method, preset dictionary)
+    [byte]       preset dictionary id, only when FLAG_DICTIONARY is set
+    bytes        timestamp, 48-bit big-endian (unit chosen by the core)
+    varint       lifetime (expiry - timestamp, same unit)
+    varint       data length, followed by the (possibly compressed) data
+    fields       tag byte, varint length, value - repeated to the end
+
+The data field can be compressed with raw deflate (optionally primed
+with a preset dictionary trained on typical payloads) or raw LZMA2. The
+encoder keeps the data uncompressed whenever compression does not help.
+
+Unknown tags are skipped so newer encoders stay readable. The JSON form
+is kept as a debug option; decoders tell the two apart by the first
+byte ('{' starts a JSON payload).
+"""
+
+import json
+import lzma
+import zlib
+from collections import Counter
+from typing import Dict, Any, Tuple, Sequence, Union
+
+
+ENVELOPE_VERSION = 1
+
+# Payload serialization formats
+PAYLOAD_FORMATS = ('binary', 'json')
+
+# Security levels as one-byte enum codes
+SECURITY_LEVELS = ('LOW', 'MEDIUM', 'HIGH', 'MILITARY', 'ULTRA')
+
+# Optional fields: name -> (tag, kind)
+ENVELOPE_FIELDS = {
+    'session_id': (0x01, 'hex'),
+    'counter': (0x02, 'uint'),
+    'security_level': (0x03, 'enum'),
+    'auth_token': (0x04, 'hex'),
+    'auth_hash': (0x05, 'hex'),
+}
+FIELDS_BY_TAG = {tag: (name, kind) for name, (tag, kind) in ENVELOPE_FIELDS.items()}
+
+TIMESTAMP_BYTES = 6
+
+# Compression of the data field
+COMPRESSION_METHODS = ('none', 'zlib', 'lzma')
+FLAG_ZLIB = 0x01
+FLAG_LZMA = 0x02
+FLAG_DICTIONARY = 0x04
+KNOWN_FLAGS = FLAG_ZLIB | FLAG_LZMA | FLAG_DICTIONARY
+
+# Built-in preset dictionary for URLs, UPI intents and access-card JSON.
+# zlib favours matches near the end, so the most common strings come last.
+DEFAULT_DICTIONARY = (
+    b'{"type": "access_card", "user": "level": "admin"}'
+    b'.html.php?id=/index&ref=utm_source=utm_medium=utm_campaign='
+    b'https://github.com/https://www.youtube.com/watch?v=https://www.google.com/'
+    b'.org/.net/.io/.co.in/.in/.com/https://http://www.'
+    b'@okhdfcbank@okicici@oksbi@ybl@paytm@upi@okaxis'
+    b'&mc=&tr=&tn=&cu=INR&am=&pn=upi://pay?pa='
+    b'https://rahulcodes.in/'
+)
+DEFAULT_DICTIONARY_ID = 1
+
+# Preset dictionaries by id (the id travels in the envelope)
+PRESET_DICTIONARIES = {
+    DEFAULT_DICTIONARY_ID: DEFAULT_DICTIONARY,
+}
+
+
+def check_payload_format(payload_format: str):
+    """Validate a payload serialization format name."""
+    if payload_format not in PAYLOAD_FORMATS:
+        raise ValueError(f"Unknown payload format '{payload_format}', expected one of {PAYLOAD_FORMATS}")
+
+
+def check_compression(method: str, level: int):
+    """Validate a compression method and level."""
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(f"Unknown compression '{method}', expected one of {COMPRESSION_METHODS}")
+    if not 0 <= level <= 9:
+        raise ValueError(f"Compression level must be between 0 and 9, got {level}")
+
+
+def register_dictionary(dictionary_id: int, dictionary: bytes):
+    """
+    Register a preset compression dictionary.
+    
+    Encoder and decoder must register the same bytes under the same id.
+    
+    Args:
+        dictionary_id: Id stored in the envelope (1-255)
+        dictionary: Dictionary bytes, e.g. from train_dictionary()
+    """
+    if not 1 <= dictionary_id <= 255:
+        raise ValueError(f"Dictionary id must be between 1 and 255, got {dictionary_id}")
+    PRESET_DICTIONARIES[dictionary_id] = bytes(dictionary)
+
+
+def train_dictionary(samples: Sequence[Union[str, bytes]], size: int = 1024) -> bytes:
+    """
+    Build a preset dictionary from a corpus of typical payloads.
+    
+    Substrings shared by several samples are scored by how much they would
+    save (document frequency x length) and packed greedily, best last.
+    
+    Args:
+        samples: Example payloads (URLs, UPI strings, JSON cards, ...)
+        size: Maximum dictionary size in bytes
+    
+    Returns:
+        Dictionary bytes for register_dictionary()
+    """
+    counts = Counter()
+    for sample in samples:
+        sample = sample.encode('utf-8') if isinstance(sample, str) else sample
+        pieces = set()
+        for n in (4, 8, 12, 16, 24, 32):
+            pieces.update(sample[i:i + n] for i in range(len(sample) - n + 1))
+        counts.update(pieces)
+    
+    ranked = sorted((piece for piece, count in counts.items() if count > 1),
+                    key=lambda piece: (counts[piece] - 1) * len(piece), reverse=True)
+    
+    picked = []
+    total = 0
+    for piece in ranked:
+        if total >= size:
+            break
+        if any(piece in chosen for chosen in picked):
+            continue
+        picked.append(piece)
+        total += len(piece)
+    
+    return b''.join(reversed(picked))[-size:]
+
+
+def _compress(data: bytes, method: str, level: int, dictionary: bytes) -> bytes:
+    """Compress the data field without container headers."""
+    if method == 'lzma':
+        return lzma.compress(data, format=lzma.FORMAT_RAW,
+                             filters=[{'id': lzma.FILTER_LZMA2, 'preset': level}])
+    
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(data: bytes, flags: int, dictionary: bytes) -> bytes:
+    """Inflate the data field according to the envelope flags."""
+    if flags & FLAG_LZMA:
+        return lzma.decompress(data, format=lzma.FORMAT_RAW,
+                               filters=[{'id': lzma.FILTER_LZMA2}])
+    
+    if dictionary:
+        decompressor = zlib.decompressobj(-15, zdict=dictionary)
+    else:
+        decompressor = zlib.decompressobj(-15)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode a non-negative integer as an unsigned LEB128 varint."""
+    if value < 0:
+        raise ValueError(f"Varints must be non-negative, got {value}")
+    
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """
+    Decode a varint starting at pos.
+    
+    Returns:
+        (value, next position)
+    """
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _encode_field(kind: str, value: Any) -> bytes:
+    """Encode one optional field value."""
+    if kind == 'hex':
+        return bytes.fromhex(value)
+    if kind == 'uint':
+        return encode_varint(value)
+    if value not in SECURITY_LEVELS:
+        raise ValueError(f"Unknown security level '{value}', expected one of {SECURITY_LEVELS}")
+    return bytes([SECURITY_LEVELS.index(value)])
+
+
+def _decode_field(kind: str, raw: bytes) -> Any:
+    """Decode one optional field value."""
+    if kind == 'hex':
+        return raw.hex()
+    if kind == 'uint':
+        return decode_varint(raw, 0)[0]
+    return SECURITY_LEVELS[raw[0]]
+
+
+def pack_payload(payload: Dict[str, Any], payload_format: str = 'binary',
+                 compression: str = 'none', level: int = 9,
+                 dictionary_id: int = 0) -> bytes:
+    """
+    Serialize a payload dict for encryption.
+    
+    Args:
+        payload: Dict with 'data', 'timestamp', 'expiry' and any of the
+            optional ENVELOPE_FIELDS
+        payload_format: 'binary' (compact envelope) or 'json' (debug, never compressed)
+        compression: 'none', 'zlib' (raw deflate) or 'lzma' (raw LZMA2)
+        level: Compression level 0-9
+        dictionary_id: Registered preset dictionary for zlib (0 = none)
+    
+    Returns:
+        Serialized payload bytes
+    """
+    check_payload_format(payload_format)
+    check_compression(compression, level)
+    
+    if payload_format == 'json':
+        return json.dumps(payload).encode('utf-8')
+    
+    if not isinstance(payload['data'], str):
+        raise TypeError(f"Payload data must be a string, got {type(payload['data']).__name__}")
+    
+    lifetime = payload['expiry'] - payload['timestamp']
+    data = payload['data'].encode('utf-8')
+    flags = 0
+    
+    if dictionary_id and dictionary_id not in PRESET_DICTIONARIES:
+        raise ValueError(f"Unknown compression dictionary: {dictionary_id}")
+    
+    if compression != 'none':
+        dictionary = PRESET_DICTIONARIES[dictionary_id] if compression == 'zlib' and dictionary_id else b''
+        compressed = _compress(data, compression, level, dictionary)
+        
+        # Skip compression unless it pays for its own dictionary id byte
+        if len(compressed) + bool(dictionary) < len(data):
+            data = compressed
+            flags = FLAG_LZMA if compression == 'lzma' else FLAG_ZLIB
+            if dictionary:
+                flags |= FLAG_DICTIONARY
+    
+    out = bytearray([ENVELOPE_VERSION, flags])
+    if flags & FLAG_DICTIONARY:
+        out.append(dictionary_id)
+    out += payload['timestamp'].to_bytes(TIMESTAMP_BYTES, 'big')
+    out += encode_varint(lifetime)
+    out += encode_varint(len(data)) + data
+    
+    for name, value in payload.items():
+        if name in ('data', 'timestamp', 'expiry'):
+            continue
+        if name not in ENVELOPE_FIELDS:
+            raise ValueError(f"Field '{name}' has no binary envelope encoding")
+        tag, kind = ENVELOPE_FIELDS[name]
+        raw = _encode_field(kind, value)
+        out += bytes([tag]) + encode_varint(len(raw)) + raw
+    
+    return bytes(out)
+
+
+def unpack_payload(blob: bytes) -> Dict[str, Any]:
+    """
+    Parse a payload produced by pack_payload() in either format.
+    
+    Returns:
+        Payload dict with 'data', 'timestamp', 'expiry' and optional fields
+    """
+    if blob[:1] == b'{':
+        return json.loads(blob.decode('utf-8'))
+    
+    if len(blob) < 2 + TIMESTAMP_BYTES or blob[0] != ENVELOPE_VERSION:
+        raise ValueError("Unsupported payload envelope")
+    
+    flags = blob[1]
+    if flags & ~KNOWN_FLAGS:
+        raise ValueError(f"Unsupported envelope flags: {flags:#04x}")
+    
+    pos = 2
+    dictionary = b''
+    if flags & FLAG_DICTIONARY:
+        dictionary_id = blob[pos]
+        if dictionary_id not in PRESET_DICTIONARIES:
+            raise ValueError(f"Unknown compression dictionary: {dictionary_id}")
+        dictionary = PRESET_DICTIONARIES[dictionary_id]
+        pos += 1
+    
+    timestamp = int.from_bytes(blob[pos:pos + TIMESTAMP_BYTES], 'big')
+    lifetime, pos = decode_varint(blob, pos + TIMESTAMP_BYTES)
+    length, pos = decode_varint(blob, pos)
+    if pos + length > len(blob):
+        raise ValueError("Truncated payload data")
+    
+    data = blob[pos:pos + length]
+    if flags & (FLAG_ZLIB | FLAG_LZMA):
+        data = _decompress(data, flags, dictionary)
+    
+    payload = {
+        'data': data.decode('utf-8'),
+        'timestamp': timestamp,
+        'expiry': timestamp + lifetime,
+    }
+    pos += length
+    
+    while pos < len(blob):
+        tag = blob[pos]
+        length, pos = decode_varint(blob, pos + 1)
+        raw = blob[pos:pos + length]
+        if len(raw) != length:
+            raise ValueError("Truncated payload field")
+        pos += length
+        
+        if tag in FIELDS_BY_TAG:
+            name, kind = FIELDS_BY_TAG[tag]
+            payload[name] = _decode_field(kind, raw)
+    
+    return payload
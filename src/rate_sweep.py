@@ -0,0 +1,206 @@
+"""
+RPattern Rate Sweep - Measuring the Symbol Rate a Scanner Resolves
+Creator: Rahul Chaube 🚀
+
+frame_duration was a fixed guess (0.5 s in RPattern, 0.4 s in
+BulletproofRPattern, 0.3 s in RPatternConfig), whatever the camera's
+frame rate or the display's refresh. Too slow wastes the loop; too fast
+and symbols fall between camera frames.
+
+A rate sweep is a short run of known frames shown before the pattern,
+at increasing symbol rates (SWEEP_RATES), one sub-pattern per rate:
+    
+    - every sweep frame is a fixed grid of header palette colors, and
+      consecutive frames differ in every cell, so a view caught during a
+      transition matches no frame and is not counted
+    - a scanner counts the clean views it gets of every sweep frame; a
+      rate is resolved when every frame at that rate (and every slower
+      one) was seen at least SWEEP_MIN_VIEWS times
+    - the pass ends at the start marker of the pattern that follows, or
+      when the sweep starts over
+
+The highest resolved rate is kept in a RateProfile, which a deployment
+stores next to its display and hands to RPatternCore.use_rate_profile()
+so encoders run at that rate. Rates above half the display's refresh
+(30 symbols/s on a 60 Hz screen) cannot be shown and are not swept.
+"""
+
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from format_header import START_MARKER
+from pattern_codec import Pattern, HEADER_PALETTE
+
+
+SWEEP_RATES = (3, 4, 6, 8, 10, 12, 15, 20, 30)  # symbols per second, slowest first
+SWEEP_SYMBOLS = 6  # known frames shown at each rate
+SWEEP_MIN_VIEWS = 2  # clean camera views every frame needs for its rate to count
+SWEEP_MAX_DISTANCE = 60  # largest cell color distance of a clean view: half the header palette spacing
+
+
+def check_sweep_rates(rates: Sequence[float]):
+    """Validate sweep rates: positive and increasing."""
+    if not rates or any(rate <= 0 for rate in rates) or list(rates) != sorted(set(rates)):
+        raise ValueError(f"Sweep rates must be positive and increasing, got {tuple(rates)}")
+
+
+def sweep_symbols(step: int, grid_size: int) -> np.ndarray:
+    """
+    Header palette indices of the frames shown at one sweep rate.
+    
+    Args:
+        step: Index of the rate in the sweep
+        grid_size: Width/height of the square grid
+    
+    Returns:
+        (SWEEP_SYMBOLS, grid, grid) uint8 array; consecutive frames differ in every cell
+    """
+    colors = len(HEADER_PALETTE)
+    rng = np.random.default_rng(step)
+    cells = grid_size * grid_size
+    first = rng.integers(0, colors, (1, cells))
+    changes = rng.integers(1, colors, (SWEEP_SYMBOLS - 1, cells))
+    symbols = np.cumsum(np.concatenate([first, changes]), axis=0) % colors
+    return symbols.astype(np.uint8).reshape(SWEEP_SYMBOLS, grid_size, grid_size)
+
+
+def sweep_patterns(grid_size: int, rates: Sequence[float] = SWEEP_RATES) -> List[Pattern]:
+    """
+    Sub-patterns of a rate sweep, slowest first.
+    
+    Show them ahead of a pattern with RPatternAnimator.load_playlist().
+    
+    Args:
+        grid_size: Width/height of the square grid (same as the pattern's)
+        rates: Symbol rates to sweep
+    
+    Returns:
+        One cell-mode Pattern per rate, its frame_duration set to 1 / rate
+    """
+    check_sweep_rates(rates)
+    return [Pattern(sweep_symbols(step, grid_size), HEADER_PALETTE, grid_size, 1 / rate,
+                    'cell', header={'sweep_rate': rate})
+            for step, rate in enumerate(rates)]
+
+
+@dataclass
+class RateProfile:
+    """Symbol rate the scanners of one deployment were measured to resolve."""
+    symbol_rate: float
+    measured_at: float = 0.0  # Unix time of the sweep
+    
+    def __post_init__(self):
+        if self.symbol_rate <= 0:
+            raise ValueError(f"Profile symbol rate must be positive, got {self.symbol_rate}")
+    
+    @property
+    def frame_duration(self) -> float:
+        """Seconds per frame at the profile's rate."""
+        return 1 / self.symbol_rate
+    
+    def save(self, path: str):
+        """Write the profile as JSON."""
+        with open(path, 'w') as f:
+            json.dump(asdict(self), f, indent=2)
+    
+    @classmethod
+    def load(cls, path: str) -> 'RateProfile':
+        """
+        Read a profile written by save().
+        
+        Raises:
+            ValueError: if the file is not a rate profile
+        """
+        with open(path) as f:
+            fields = json.load(f)
+        try:
+            return cls(float(fields['symbol_rate']), float(fields.get('measured_at', 0.0)))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Not a rate profile: {path}") from e
+
+
+class RateSweepReader:
+    """Count clean views of sweep frames and report the fastest rate resolved."""
+    
+    def __init__(self, grid_size: int, rates: Sequence[float] = SWEEP_RATES,
+                 min_views: int = SWEEP_MIN_VIEWS, max_distance: float = SWEEP_MAX_DISTANCE):
+        """
+        Set up a reader for one sweep layout.
+        
+        Args:
+            grid_size: Width/height of the square grid (must match the display's sweep)
+            rates: Symbol rates of the sweep
+            min_views: Clean views every frame needs for its rate to count
+            max_distance: Largest cell color distance of a clean view
+        """
+        check_sweep_rates(rates)
+        self.rates = tuple(rates)
+        self.min_views = min_views
+        self.max_distance = max_distance
+        symbols = np.stack([sweep_symbols(step, grid_size) for step in range(len(rates))])
+        self._templates = HEADER_PALETTE[symbols].reshape(len(rates) * SWEEP_SYMBOLS, -1, 3).astype(np.float32)
+        self.measured_rate: Optional[float] = None  # result of the last complete pass
+        self.passes = 0
+        self.reset()
+    
+    def reset(self):
+        """Forget the views of the current pass."""
+        self.views = np.zeros((len(self.rates), SWEEP_SYMBOLS), dtype=np.int32)
+        self._step = -1  # fastest rate seen in this pass
+    
+    @property
+    def resolved_rate(self) -> float:
+        """Fastest rate of the current pass with every frame (and every slower rate) resolved, 0 if none."""
+        resolved = (self.views >= self.min_views).all(axis=1)
+        count = len(resolved) if resolved.all() else int(np.argmin(resolved))
+        return float(self.rates[count - 1]) if count else 0.0
+    
+    def feed(self, grid) -> Optional[float]:
+        """
+        Add one camera frame.
+        
+        Args:
+            grid: Sampled (grid, grid, 3) RGB colors of the pattern
+        
+        Returns:
+            The resolved rate when this frame ends a sweep pass, else None
+        """
+        cells = np.asarray(grid, dtype=np.float32).reshape(-1, 3)
+        if len(cells) != self._templates.shape[1]:
+            return None
+        
+        distances = np.linalg.norm(self._templates - cells, axis=-1).max(axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] <= self.max_distance:
+            step, symbol = divmod(best, SWEEP_SYMBOLS)
+            rate = self._finish() if step < self._step else None  # the sweep started over
+            self.views[step, symbol] += 1
+            self._step = max(self._step, step)
+            return rate
+        
+        # Start marker of the pattern after the sweep (its last cells may hold index digits)
+        if self._step >= 0 and np.linalg.norm(cells[0] - START_MARKER) <= self.max_distance:
+            return self._finish()
+        return None
+    
+    def _finish(self) -> float:
+        """Close the current pass and keep its result."""
+        self.measured_rate = self.resolved_rate
+        self.passes += 1
+        self.reset()
+        return self.measured_rate
+    
+    def profile(self) -> Optional[RateProfile]:
+        """
+        Profile of the last complete pass.
+        
+        Returns:
+            RateProfile, or None if no pass has resolved even the slowest rate
+        """
+        if not self.measured_rate:
+            return None
+        return RateProfile(self.measured_rate, time.time())
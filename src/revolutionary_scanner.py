@@ -11,8 +11,19 @@ import numpy as np
 import time
 import threading
 import json
+from collections import deque
 from typing import Dict, Any, List, Tuple, Optional, Callable
-from rpattern_revolutionary import RPatternCore
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+from auth_header import StaleHeaderError
+from block_crc import BlockCollector
+from chunked_transport import ChunkAssembler
+from format_header import loop_starts
+from pattern_codec import lookup_colors
+from rate_sweep import RateSweepReader
+from fountain_code import FountainDecoder
+from scanner_pipeline import ScanPipeline, check_drop_policy, DEFAULT_QUEUE_SIZE
+from scanner_vision import RegionTracker, detect_multiscale, sample_grid, DETECTION_SCALE
+from symbol_clock import SymbolClock
 
 
 class RevolutionaryScanner:
@@ -21,18 +32,77 @@ class RevolutionaryScanner:
     Uses advanced computer vision to detect and decode dynamic patterns.
     """
     
-    def __init__(self, camera_id: int = 0):
-        """Initialize the revolutionary scanner."""
+    MARKER_COLORS = np.array([(255, 255, 255), (0, 0, 0)], dtype=np.uint8)  # start and end frames
+    
+    def __init__(self, camera_id: int = 0, config: RPatternConfig = None,
+                 drop_policy: str = 'latest', queue_size: int = DEFAULT_QUEUE_SIZE,
+                 core: Optional[RPatternCore] = None,
+                 auth_key: Optional[bytes] = None, chunk_secret: Optional[bytes] = None):
+        """
+        Initialize the revolutionary scanner (config must match the generator's grid and mode).
+        
+        Args:
+            camera_id: Camera index to use
+            config: Core configuration of the generator
+            drop_policy: 'latest' (stages drop stale frames) or 'queue' (every frame, with latency)
+            queue_size: Frames waiting before each pipeline stage
+            core: The generator's core itself, decoding with all of its keys (replaces config)
+            auth_key: Expiry header key of the generator (RPatternCore.auth_key)
+            chunk_secret: Chunk record key of the generator (RPatternCore.chunk_secret)
+        
+        Without the generator's keys every pattern is rejected as issued under
+        another key. Chunked messages need only auth_key and chunk_secret; a
+        single pattern is encrypted with a per-pattern key only its core holds.
+        """
+        check_drop_policy(drop_policy)
         self.camera_id = camera_id
         self.cap = None
         self.is_scanning = False
-        self.decoder = RPatternCore()
+        self.decoder = core or RPatternCore(config, auth_key=auth_key, chunk_secret=chunk_secret)
+        self.grid_size = self.decoder.config.grid_size
+        
+        # Fountain mode keeps droplets across decode attempts, so any loop position works
+        self.fountain = FountainDecoder() if self.decoder.config.transmission == 'fountain' else None
+        
+        # Sequential mode keeps CRC-verified blocks, so later loops only fix the bad ones
+        crc_block_size = self.decoder.config.crc_block_size
+        self.blocks = BlockCollector(crc_block_size) if crc_block_size and not self.fountain else None
+        
+        # Chunked messages keep every opened chunk, whichever sub-pattern the capture started on
+        self.chunks = ChunkAssembler(self.decoder.chunk_secret) if not self.fountain else None
+        
+        # Clocked patterns mark their own symbol boundaries: buffer one fused grid per symbol
+        clock_cells = self.decoder.config.clock_cells
+        self.symbol_clock = SymbolClock(clock_cells, self.decoder.config.sequence_cells) if clock_cells else None
+        
+        # Layered patterns: sub-cells are sampled too once they are big enough on the sensor
+        self.subdivision = self.decoder.config.subdivision
+        self.min_subcell_size = 6  # pixels per sub-cell side needed to read the enhancement layer
+        self.last_enhancement: Optional[bytes] = None
+        
+        # Rate sweeps shown ahead of a pattern: the fastest symbol rate this camera resolves
+        self.rate_sweep = RateSweepReader(self.grid_size)
+        
+        # Striped messages show several tiles at once: one buffer and clock per tile, in screen order
+        self.tile_frames: List[List[Dict[str, Any]]] = []
+        self.tile_clocks: List[Optional[SymbolClock]] = []
+        self.tiles_expected = 0  # tile count named by the tiles' format headers, 0 until one is read
+        
+        # Threaded pipeline: capture, detect, extract and decode on their own threads
+        self.drop_policy = drop_policy
+        self.queue_size = queue_size
+        self.pipeline: Optional[ScanPipeline] = None
+        self._decoded = deque()  # decoded items, until the display thread reports them
+        self._reset_requested = False
         
         # Pattern detection state
         self.detected_frames = []
-        self.frame_buffer_size = 100  # Store last 100 frames
+        self.frame_buffer_size = 600  # ~20 s at 30 fps: a full loop, duplicates included, for reassembly
         self.detection_threshold = 0.8
         self.pattern_region = None
+        self.tracking = True  # once found, re-verify the pattern in a small window instead of the whole frame
+        self.detection_scale = DETECTION_SCALE  # full-frame searches run on the frame downscaled by this factor
+        self.tracker = RegionTracker(self._detect_pattern_regions, full_detect=self._locate_patterns)
         
         # Color detection configuration
         self.color_tolerance = 30
@@ -76,10 +146,12 @@ class RevolutionaryScanner:
             print(f"❌ Camera initialization failed: {e}")
             return False
     
-    def _detect_pattern_region(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    def _detect_pattern_region(self, frame: np.ndarray, scale: float = 1.0) -> Optional[Tuple[int, int, int, int]]:
         """
         Detect potential pattern region in frame.
         Returns (x, y, width, height) of detected region.
+        
+        scale is the size of frame relative to the camera's (pyramid levels), for the size limits.
         """
         # Convert to HSV for better color detection
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
@@ -99,7 +171,7 @@ class RevolutionaryScanner:
         for contour in sorted(contours, key=cv2.contourArea, reverse=True):
             area = cv2.contourArea(contour)
             
-            if self.min_pattern_size**2 < area < self.max_pattern_size**2:
+            if (self.min_pattern_size * scale)**2 < area < (self.max_pattern_size * scale)**2:
                 x, y, w, h = cv2.boundingRect(contour)
                 
                 # Check if region is roughly square (patterns should be square)
@@ -109,90 +181,98 @@ class RevolutionaryScanner:
         
         return None
     
-    def _extract_pattern_colors(self, frame: np.ndarray, region: Tuple[int, int, int, int]) -> Optional[List[List[Tuple[int, int, int]]]]:
-        """
-        Extract color grid from detected pattern region.
+    def _detect_pattern_regions(self, frame: np.ndarray, scale: float = 1.0) -> List[Tuple[int, int, int, int]]:
         """
-        x, y, w, h = region
-        
-        # Extract pattern region
-        pattern_region = frame[y:y+h, x:x+w]
-        
-        # Resize to standard grid size (4x4)
-        grid_size = 4
-        cell_width = w // grid_size
-        cell_height = h // grid_size
+        Detect every pattern region in frame, for tiles of a striped message.
         
-        color_grid = []
-        
-        for row in range(grid_size):
-            color_row = []
-            for col in range(grid_size):
-                # Calculate cell boundaries
-                cell_x = col * cell_width
-                cell_y = row * cell_height
-                
-                # Extract cell region
-                cell = pattern_region[cell_y:cell_y+cell_height, cell_x:cell_x+cell_width]
-                
-                if cell.size == 0:
-                    color_row.append((128, 128, 128))  # Gray fallback
-                    continue
-                
-                # Get average color of cell
-                avg_color = np.mean(cell, axis=(0, 1))
-                
-                # Convert BGR to RGB
-                r, g, b = avg_color[2], avg_color[1], avg_color[0]
-                color_row.append((int(r), int(g), int(b)))
-            
-            color_grid.append(color_row)
+        Keeps square regions at least half the size of the largest one and
+        orders them in rows, left to right, the way the tiles are laid out.
+        scale is the size of frame relative to the camera's (pyramid levels), for the size limits.
+        """
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        bright_mask = cv2.inRange(hsv, np.array([0, 100, 100]), np.array([179, 255, 255]))
+        contours, _ = cv2.findContours(bright_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        return color_grid
+        regions = []
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if (self.min_pattern_size * scale)**2 < area < (self.max_pattern_size * scale)**2:
+                x, y, w, h = cv2.boundingRect(contour)
+                if 0.7 < w / h < 1.3:
+                    regions.append((x, y, w, h))
+        if not regions:
+            return []
+        
+        largest = max(w * h for _, _, w, h in regions)
+        regions = [region for region in regions if 2 * region[2] * region[3] >= largest]
+        row_height = min(h for _, _, _, h in regions)
+        return sorted(regions, key=lambda region: (region[1] // row_height, region[0]))
+    
+    def _locate_patterns(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Full-frame search: detect on a downscaled pyramid level, refine corners at full resolution."""
+        return detect_multiscale(frame, self._detect_pattern_regions, self.detection_scale)
+    
+    def _extract_pattern_colors(self, frame: np.ndarray, region: Tuple[int, int, int, int],
+                                grid_size: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Extract color grid from detected pattern region (default: the configured grid).
+        Returns a (grid, grid, 3) array of RGB colors; in cell mode every cell is its own symbol.
+        """
+        x, y, w, h = region
+        return sample_grid(frame[y:y+h, x:x+w], grid_size or self.grid_size)
+    
+    def _extract_subcell_colors(self, frame: np.ndarray,
+                                region: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        """Sample the sub-cells of a layered pattern, or None when they are too small to resolve."""
+        if not self.subdivision:
+            return None
+        fine_size = self.grid_size * self.subdivision
+        if min(region[2], region[3]) < fine_size * self.min_subcell_size:
+            return None
+        return self._extract_pattern_colors(frame, region, fine_size)
     
-    def _is_valid_pattern_frame(self, color_grid: List[List[Tuple[int, int, int]]]) -> bool:
+    def _is_valid_pattern_frame(self, color_grid: Optional[np.ndarray]) -> bool:
         """
         Check if extracted colors represent a valid pattern frame.
         """
-        if not color_grid or len(color_grid) != 4:
+        if color_grid is None or len(color_grid) != self.grid_size:
             return False
         
-        # Check for security frame markers
-        first_color = color_grid[0][0]
-        
-        # Check for start frame (white-ish)
-        if self._color_distance(first_color, (255, 255, 255)) < 50:
+        # Check for security frame markers: start (white-ish) or end (black-ish)
+        _, distance = lookup_colors(color_grid[0][0], self.MARKER_COLORS)
+        if distance < 50:
             return True
         
-        # Check for end frame (black-ish)
-        if self._color_distance(first_color, (0, 0, 0)) < 50:
-            return True
-        
-        # Check for data frames (should have distinct colors)
-        unique_colors = set()
-        for row in color_grid:
-            for color in row:
-                unique_colors.add(color)
-        
         # Pattern frames should have some color variation
-        return len(unique_colors) > 1
-    
-    def _color_distance(self, color1: Tuple[int, int, int], color2: Tuple[int, int, int]) -> float:
-        """Calculate Euclidean distance between two colors."""
-        r1, g1, b1 = color1
-        r2, g2, b2 = color2
-        return np.sqrt((r1-r2)**2 + (g1-g2)**2 + (b1-b2)**2)
+        cells = np.asarray(color_grid).reshape(-1, 3)
+        return bool((cells != cells[0]).any())
     
-    def _add_frame_to_buffer(self, color_grid: List[List[Tuple[int, int, int]]]):
-        """Add detected frame to buffer."""
+    def _add_frame_to_buffer(self, color_grid: np.ndarray, subcell_grid: Optional[np.ndarray] = None) -> bool:
+        """
+        Add detected frame to buffer.
+        
+        With clock cells, camera frames are collected until the clock
+        toggles and only the fused symbol is buffered (without sub-cells).
+        
+        Returns:
+            True if the buffer grew
+        """
+        if self.symbol_clock:
+            color_grid = self.symbol_clock.feed(color_grid)
+            subcell_grid = None
+            if color_grid is None:
+                return False
+        
         self.detected_frames.append({
             'timestamp': time.time(),
-            'colors': color_grid
+            'colors': color_grid,
+            'subcells': subcell_grid
         })
         
         # Keep buffer size manageable
         if len(self.detected_frames) > self.frame_buffer_size:
             self.detected_frames.pop(0)
+        return True
     
     def _attempt_decode(self) -> Optional[str]:
         """
@@ -202,18 +282,37 @@ class RevolutionaryScanner:
             return None
         
         try:
-            # Extract just the color grids
-            color_frames = [frame['colors'] for frame in self.detected_frames]
+            # Stack the color grids into a (frames, grid, grid, 3) tensor
+            color_frames = np.array([frame['colors'] for frame in self.detected_frames], dtype=np.uint8)
             
-            # Try to decode
-            decoded_data = self.decoder.decode_revolutionary_pattern(color_frames)
+            # Give up on expired or foreign patterns once their header frames are in
+            if not self.fountain:
+                try:
+                    self.decoder.screen_capture(color_frames)
+                except ValueError as e:
+                    if isinstance(e, StaleHeaderError) and self.decoder.config.refresh_interval:
+                        # Rolling refresh: the data frames stay, so keep their blocks for the next header
+                        print(f"⏳ Waiting for a refreshed header: {e}")
+                        self.detected_frames.clear()
+                    else:
+                        print(f"⛔ Abandoning capture: {e}")
+                        self._reset_decoders()
+                    return None
+            
+            # Chunked messages show sub-patterns back to back: decode each loop on its own
+            starts = loop_starts(color_frames) if self.chunks is not None else []
+            if starts and starts[0][1].chunked:
+                decoded_data = self._attempt_chunk_decode(color_frames, [start for start, _ in starts])
+            else:
+                decoded_data = self.decoder.decode_revolutionary_pattern(color_frames, self.fountain, self.blocks)
             
             if decoded_data:
                 self.successful_decodes += 1
                 self.last_decode_time = time.time()
+                self.last_enhancement = self._decode_enhancement()
                 
                 # Clear buffer after successful decode
-                self.detected_frames.clear()
+                self._reset_decoders()
                 
                 return decoded_data
         
@@ -222,6 +321,102 @@ class RevolutionaryScanner:
         
         return None
     
+    def _decode_enhancement(self) -> Optional[bytes]:
+        """Enhancement layer of the buffered capture, if every frame was close enough to resolve it."""
+        subcells = [frame.get('subcells') for frame in self.detected_frames]
+        if not self.subdivision or any(grid is None for grid in subcells):
+            return None
+        return self.decoder.decode_enhancement(np.array(subcells, dtype=np.uint8))
+    
+    def _attempt_chunk_decode(self, color_frames: np.ndarray, starts: List[int],
+                              buffer: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+        """
+        Decode every complete sub-pattern loop in a buffer (default: the single-pattern one).
+        
+        Opened chunks stay in self.chunks, so only the loop still being
+        shown (from the last start frame on) is kept in the buffer.
+        """
+        decoded_data = None
+        for begin, end in zip(starts, starts[1:]):
+            decoded_data = self.decoder.decode_revolutionary_pattern(
+                color_frames[begin:end], blocks=self.blocks, chunks=self.chunks
+            ) or decoded_data
+        del (self.detected_frames if buffer is None else buffer)[:starts[-1]]
+        return decoded_data
+    
+    def _scan_tiles(self, frame: np.ndarray, regions: List[Tuple[int, int, int, int]]) -> Optional[str]:
+        """
+        Buffer one camera frame of every tile of a striped message.
+        
+        Tiles are told apart by their place on screen, and every tile's
+        sub-patterns feed the same ChunkAssembler.
+        
+        Returns:
+            The message once the last missing chunk is in, else None
+        """
+        while len(self.tile_frames) < len(regions):
+            clock_cells = self.decoder.config.clock_cells
+            self.tile_frames.append([])
+            self.tile_clocks.append(SymbolClock(clock_cells, self.decoder.config.sequence_cells)
+                                    if clock_cells else None)
+        
+        decoded_data = None
+        for buffer, clock, region in zip(self.tile_frames, self.tile_clocks, regions):
+            color_grid = self._extract_pattern_colors(frame, region)
+            if not self._is_valid_pattern_frame(color_grid):
+                continue
+            if clock:
+                color_grid = clock.feed(color_grid)
+                if color_grid is None:
+                    continue
+            
+            buffer.append({'timestamp': time.time(), 'colors': color_grid})
+            if len(buffer) > self.frame_buffer_size:
+                buffer.pop(0)
+            if len(buffer) % 5 == 0:
+                decoded_data = self._attempt_tile_decode(buffer) or decoded_data
+        return decoded_data
+    
+    def _attempt_tile_decode(self, buffer: List[Dict[str, Any]]) -> Optional[str]:
+        """Decode the complete sub-pattern loops buffered for one tile."""
+        try:
+            color_frames = np.array([frame['colors'] for frame in buffer], dtype=np.uint8)
+            starts = loop_starts(color_frames)
+            if not starts or not starts[0][1].chunked:
+                return None
+            self.tiles_expected = starts[0][1].tiles
+            
+            decoded_data = self._attempt_chunk_decode(color_frames, [start for start, _ in starts], buffer)
+            if decoded_data:
+                self.successful_decodes += 1
+                self.last_decode_time = time.time()
+                self._reset_decoders()
+            return decoded_data
+        
+        except Exception as e:
+            print(f"🔍 Tile decode attempt failed: {e}")
+            return None
+    
+    def _reset_decoders(self):
+        """Clear the frame buffers and any droplets, blocks or chunks kept across attempts."""
+        self.detected_frames.clear()
+        self.tile_frames.clear()
+        self.tile_clocks.clear()
+        self.tiles_expected = 0
+        if self.symbol_clock:
+            self.symbol_clock.reset()
+        if self.fountain:
+            self.fountain.reset()
+        if self.blocks:
+            self.blocks.reset()
+        if self.chunks:
+            self.chunks.reset()
+    
+    @property
+    def block_progress(self) -> Optional[np.ndarray]:
+        """Per-block progress map (True = verified), or None when CRC blocks are off."""
+        return self.blocks.progress_map if self.blocks else None
+    
     def _draw_scanning_ui(self, frame: np.ndarray) -> np.ndarray:
         """Draw scanning UI overlay on frame."""
         overlay = frame.copy()
@@ -246,6 +441,44 @@ class RevolutionaryScanner:
         cv2.putText(overlay, f"Successful Decodes: {self.successful_decodes}", 
                    (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
         
+        if self.pipeline:
+            info_y += 30
+            cv2.putText(overlay, self.pipeline.summary(), 
+                       (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        
+        if self.symbol_clock:
+            info_y += 30
+            cv2.putText(overlay, f"Symbols: {self.symbol_clock.symbols} (missed {self.symbol_clock.dropped})", 
+                       (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        
+        if self.rate_sweep.measured_rate is not None:
+            info_y += 30
+            cv2.putText(overlay, f"Symbol Rate: {self.rate_sweep.measured_rate:g}/s", 
+                       (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        
+        if self.blocks and self.blocks.length:
+            info_y += 30
+            verified, total = self.blocks.progress
+            cv2.putText(overlay, f"CRC Blocks: {verified}/{total}", 
+                       (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        
+        if self.chunks and self.chunks.message_id:
+            info_y += 30
+            received, count = self.chunks.progress
+            cv2.putText(overlay, f"Chunks: {received}/{count or '?'}", 
+                       (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        
+        if self.tile_frames:
+            info_y += 30
+            cv2.putText(overlay, f"Tiles: {len(self.tile_frames)}/{self.tiles_expected or '?'}", 
+                       (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        
+        if self.tracking:
+            info_y += 30
+            state = f"locked ({self.tracker.misses} missed)" if self.tracker.locked else "searching"
+            cv2.putText(overlay, f"Tracking: {state}", 
+                       (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        
         # Draw pattern region if detected
         if self.pattern_region:
             x, y, w, h = self.pattern_region
@@ -272,10 +505,64 @@ class RevolutionaryScanner:
         
         return overlay
     
+    def _detect_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: find the pattern regions of a camera frame (several tiles mean a striped message)."""
+        if self.tracking:
+            item['regions'] = self.tracker.update(item['frame'])
+        else:
+            item['regions'] = self._locate_patterns(item['frame'])
+        return item
+    
+    def _extract_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: sample the colors of a single pattern (tiles are sampled as they are decoded)."""
+        if len(item['regions']) == 1:
+            region = item['regions'][0]
+            item['colors'] = self._extract_pattern_colors(item['frame'], region)
+            item['subcells'] = self._extract_subcell_colors(item['frame'], region)
+        return item
+    
+    def _decode_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: buffer the frame and decode every few frames, in capture order."""
+        if self._reset_requested:
+            self._reset_requested = False
+            self.tracker.reset()
+            self._reset_decoders()
+            print("🔄 Frame buffer reset")
+        
+        self.total_scans += 1
+        regions = item['regions']
+        self.pattern_region = regions[0] if regions else None
+        decoded_data = None
+        
+        if len(regions) > 1:
+            decoded_data = self._scan_tiles(item['frame'], regions)
+        
+        elif self._is_valid_pattern_frame(item.get('colors')):
+            color_grid = item['colors']
+            swept = self.rate_sweep.feed(color_grid)
+            if swept is not None:
+                print(f"📶 Rate sweep: {swept:g} symbols/s resolved" if swept
+                      else "📶 Rate sweep: not even the slowest rate resolved")
+            
+            # Attempt decode every few buffered frames
+            if (self._add_frame_to_buffer(color_grid, item.get('subcells'))
+                    and len(self.detected_frames) % 5 == 0):
+                decoded_data = self._attempt_decode()
+        
+        item['decoded'] = decoded_data
+        item['enhancement'] = self.last_enhancement if decoded_data else None
+        if decoded_data:
+            self._decoded.append(item)  # the display may skip frames, never a decode
+        return item
+    
     def scan_revolutionary_patterns(self, on_decode: Callable[[str], None] = None) -> bool:
         """
         Start revolutionary pattern scanning.
         
+        Capture, detection, color extraction and decoding run on their own
+        threads (scanner_pipeline.ScanPipeline); this thread only draws the
+        overlay and handles keys.
+        
         Args:
             on_decode: Callback function called when pattern is decoded
             
@@ -293,44 +580,37 @@ class RevolutionaryScanner:
         print("📱 Point camera at RPattern to decode")
         print("🎮 Press 'q' to quit, 's' to save frame, 'r' to reset")
         
+        self.pipeline = ScanPipeline(self.cap.read, [
+            ('detect', self._detect_stage),
+            ('extract', self._extract_stage),
+            ('decode', self._decode_stage),
+        ], self.queue_size, self.drop_policy).start()
+        
         try:
-            while self.is_scanning:
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("❌ Failed to read frame")
-                    break
-                
-                self.total_scans += 1
-                
-                # Detect pattern region
-                self.pattern_region = self._detect_pattern_region(frame)
+            while self.is_scanning and self.pipeline.running:
+                item = self.pipeline.latest()
+                if item is None:
+                    continue
+                frame = item['frame']
                 
-                if self.pattern_region:
-                    # Extract colors from pattern
-                    color_grid = self._extract_pattern_colors(frame, self.pattern_region)
+                while self._decoded:
+                    decoded = self._decoded.popleft()
+                    print(f"\n🎉 REVOLUTIONARY PATTERN DECODED!")
+                    print(f"📝 Data: {decoded['decoded']}")
+                    if decoded['enhancement'] is not None:
+                        print(f"🔬 Enhancement layer: {len(decoded['enhancement'])} bytes")
+                    print(f"⏰ Decode latency: {time.time() - decoded['timestamp']:.3f}s")
+                    
+                    if on_decode:
+                        on_decode(decoded['decoded'])
                     
-                    if color_grid and self._is_valid_pattern_frame(color_grid):
-                        self._add_frame_to_buffer(color_grid)
-                        
-                        # Attempt decode every few frames
-                        if len(self.detected_frames) % 5 == 0:
-                            decoded_data = self._attempt_decode()
-                            
-                            if decoded_data:
-                                print(f"\n🎉 REVOLUTIONARY PATTERN DECODED!")
-                                print(f"📝 Data: {decoded_data}")
-                                print(f"⏰ Decode time: {time.time() - self.last_decode_time:.3f}s")
-                                
-                                if on_decode:
-                                    on_decode(decoded_data)
-                                
-                                # Show success overlay
-                                success_frame = frame.copy()
-                                cv2.putText(success_frame, "DECODE SUCCESS!", 
-                                           (50, self.frame_height//2), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 0), 3)
-                                cv2.imshow('Revolutionary Scanner', success_frame)
-                                cv2.waitKey(2000)  # Show for 2 seconds
+                    # Show success overlay (the pipeline keeps capturing meanwhile)
+                    success_frame = frame.copy()
+                    cv2.putText(success_frame, "DECODE SUCCESS!", 
+                               (50, self.frame_height//2), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 0), 3)
+                    cv2.imshow('Revolutionary Scanner', success_frame)
+                    cv2.waitKey(2000)  # Show for 2 seconds
                 
                 # Draw UI overlay
                 display_frame = self._draw_scanning_ui(frame)
@@ -348,9 +628,8 @@ class RevolutionaryScanner:
                     cv2.imwrite(filename, frame)
                     print(f"💾 Frame saved: {filename}")
                 elif key == ord('r'):
-                    # Reset frame buffer
-                    self.detected_frames.clear()
-                    print("🔄 Frame buffer reset")
+                    # Reset frame buffer (done by the decode thread, between two frames)
+                    self._reset_requested = True
         
         except KeyboardInterrupt:
             print("\n🛑 Scanning interrupted by user")
@@ -360,6 +639,7 @@ class RevolutionaryScanner:
         
         finally:
             self.is_scanning = False
+            self.pipeline.stop()
             if self.cap:
                 self.cap.release()
             cv2.destroyAllWindows()
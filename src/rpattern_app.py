@@ -22,6 +22,7 @@ try:
     from rpattern_revolutionary import RPatternCore, create_revolutionary_pattern
     from pattern_display import RPatternAnimator, display_pattern
     from revolutionary_scanner import RevolutionaryScanner, start_revolutionary_scanning
+    from pattern_codec import legacy_frames
     MODULES_AVAILABLE = True
 except ImportError as e:
     print(f"⚠️ Some modules not available: {e}")
@@ -508,7 +509,8 @@ Technology: Python, OpenCV, Pygame, Military-grade Cryptography
                     # Save pattern temporarily
                     import tempfile
                     with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                        json.dump(self.state.current_pattern, f)
+                        pattern = self.state.current_pattern
+                        json.dump({**pattern, 'frames': legacy_frames(pattern)}, f)
                         temp_file = f.name
                     
                     # Launch display script
@@ -633,8 +635,9 @@ Technology: Python, OpenCV, Pygame, Military-grade Cryptography
             )
             
             if filename:
+                pattern = self.state.current_pattern
                 with open(filename, 'w') as f:
-                    json.dump(self.state.current_pattern, f, indent=2)
+                    json.dump({**pattern, 'frames': legacy_frames(pattern)}, f, indent=2)
                 
                 messagebox.showinfo("Success", f"Pattern saved to {filename}")
                 self._update_status(f"💾 Pattern saved to {filename}")
@@ -5,9 +5,18 @@ Creator: Rahul Chaube 🚀
 
 import time
 import hashlib
-import json
-from typing import List, Tuple, Optional, Dict, Any
-from crypto_utils import encrypt_data, decrypt_data
+from typing import Optional, Dict, Any
+import numpy as np
+from crypto_utils import encrypt_data, decrypt_bytes
+from fountain_code import FountainDecoder, fountain_encode, check_transmission, check_fountain
+from format_header import FormatHeader, split_format_header, check_format, FORMAT_RPATTERN, PALETTE_PRIMARY_4
+from payload_envelope import (
+    pack_payload, unpack_payload, check_payload_format, check_compression, DEFAULT_DICTIONARY_ID
+)
+from pattern_codec import (
+    FrameInput, Pattern, as_frame_array, palette_from_map,
+    bytes_to_symbols, symbols_to_bytes, classify_frames, split_at_markers
+)
 
 
 class RPattern:
@@ -29,11 +38,50 @@ class RPattern:
     # Reverse mapping for decoding
     REVERSE_COLOR_MAP = {v: k for k, v in COLOR_MAP.items()}
     
-    def __init__(self, expiry_minutes: int = 5):
-        """Initialize RPattern with expiry time."""
+    # Palette indexed by symbol value (2 bits per color)
+    BITS_PER_SYMBOL = 2
+    PALETTE = palette_from_map(COLOR_MAP)
+    
+    # Synchronization frames around the data
+    START_SYNC_COLOR = (255, 255, 255)  # All white
+    END_SYNC_COLOR = (0, 0, 0)          # All black
+    
+    # Identifiers written to the format header
+    FORMAT_ID = FORMAT_RPATTERN
+    PALETTE_ID = PALETTE_PRIMARY_4
+    
+    def __init__(self, expiry_minutes: int = 5, payload_format: str = "binary",
+                 compression: str = "zlib", compression_level: int = 9,
+                 compression_dictionary: int = DEFAULT_DICTIONARY_ID,
+                 transmission: str = "sequential", fountain_block_size: int = 48,
+                 fountain_repair: float = 1.0):
+        """
+        Initialize RPattern with expiry time and payload settings.
+        
+        Args:
+            expiry_minutes: Pattern lifetime
+            payload_format: 'binary' envelope, or 'json' for debugging
+            compression: 'none', 'zlib' or 'lzma' (skipped when it does not shrink the data)
+            compression_level: Compression level 0-9
+            compression_dictionary: Preset zlib dictionary id (0 = none)
+            transmission: 'sequential' (start to end sync) or 'fountain' (join mid-loop)
+            fountain_block_size: Source block size in bytes for fountain mode
+            fountain_repair: Repair droplets per source block in fountain mode
+        """
+        check_payload_format(payload_format)
+        check_compression(compression, compression_level)
+        check_transmission(transmission)
+        check_fountain(fountain_block_size, fountain_repair)
         self.expiry_minutes = expiry_minutes
+        self.payload_format = payload_format
+        self.compression = compression
+        self.compression_level = compression_level
+        self.compression_dictionary = compression_dictionary
+        self.transmission = transmission
+        self.fountain_block_size = fountain_block_size
+        self.fountain_repair = fountain_repair
         
-    def encode_data(self, data: str, use_encryption: bool = True) -> Dict[str, Any]:
+    def encode_data(self, data: str, use_encryption: bool = True) -> Pattern:
         """
         Encode data into RPattern format.
         
@@ -42,7 +90,7 @@ class RPattern:
             use_encryption: Whether to encrypt the data
             
         Returns:
-            Dictionary containing pattern data and metadata
+            Pattern with lazily built frames and metadata
         """
         # Create timestamp for expiry
         timestamp = int(time.time())
@@ -52,75 +100,101 @@ class RPattern:
         payload = {
             'data': data,
             'timestamp': timestamp,
-            'expiry': expiry_time,
-            'creator': 'RPattern by Rahul Chaube'
+            'expiry': expiry_time
         }
         
-        # Convert to JSON
-        json_data = json.dumps(payload)
+        # Serialize (and compress) to the binary envelope, or JSON when debugging
+        payload_bytes = pack_payload(payload, self.payload_format, self.compression,
+                                     self.compression_level, self.compression_dictionary)
         
         # Encrypt if requested
         if use_encryption:
-            encoded_data = encrypt_data(json_data)
+            encoded_data = encrypt_data(payload_bytes)
         else:
-            encoded_data = json_data.encode('utf-8')
-            
-        # Convert to binary string
-        binary_data = ''.join(format(byte, '08b') for byte in encoded_data)
+            encoded_data = payload_bytes
         
-        # Add padding to ensure even number of bits (for 2-bit color encoding)
-        if len(binary_data) % 2 != 0:
-            binary_data += '0'
+        if self.transmission == 'fountain':
+            return self._build_fountain_pattern(
+                encoded_data,
+                timestamp=timestamp,
+                expiry=expiry_time,
+                encrypted=use_encryption
+            )
             
-        # Generate color frames
-        frames = self._binary_to_frames(binary_data)
-        
-        # Add error correction and synchronization frames
-        frames = self._add_error_correction(frames)
-        
-        return {
-            'frames': frames,
-            'frame_duration': self.FRAME_DURATION,
-            'total_frames': len(frames),
-            'timestamp': timestamp,
-            'expiry': expiry_time,
-            'encrypted': use_encryption
-        }
+        # Split bytes into 2-bit color indices
+        symbols = bytes_to_symbols(encoded_data, self.BITS_PER_SYMBOL)
+        format_header = FormatHeader(
+            format_id=self.FORMAT_ID,
+            grid_size=self.PATTERN_SIZE,
+            palette_id=self.PALETTE_ID,
+            bits_per_symbol=self.BITS_PER_SYMBOL,
+            payload_length=len(encoded_data),
+            encrypted=use_encryption
+        )
+            
+        # One solid frame per symbol, between the synchronization frames (format header first)
+        return Pattern.build(
+            symbols, self.PALETTE, self.PATTERN_SIZE, self.FRAME_DURATION,
+            leading=[self.START_SYNC_COLOR],
+            trailing=[self.END_SYNC_COLOR],
+            format_header=format_header.pack(),
+            timestamp=timestamp,
+            expiry=expiry_time,
+            encrypted=use_encryption
+        )
+    
+    def _build_fountain_pattern(self, encoded_data: bytes, **header) -> Pattern:
+        """Lay out one loop of fountain droplets, each led by a start sync frame."""
+        packets = fountain_encode(encoded_data, self.fountain_block_size, self.fountain_repair)
+        return Pattern.from_packets(
+            [bytes_to_symbols(packet, self.BITS_PER_SYMBOL) for packet in packets],
+            self.PALETTE, self.PATTERN_SIZE, self.FRAME_DURATION,
+            marker=self.START_SYNC_COLOR,
+            transmission='fountain',
+            droplets=len(packets),
+            **header
+        )
     
-    def decode_frames(self, color_frames: List[List[List[Tuple[int, int, int]]]]) -> Optional[str]:
+    def decode_frames(self, color_frames: FrameInput,
+                      fountain: Optional[FountainDecoder] = None) -> Optional[str]:
         """
         Decode color frames back to original data.
         
         Args:
-            color_frames: List of color frames captured from camera
+            color_frames: Frame tensor (or legacy nested lists) captured from camera
+            fountain: Decoder that keeps droplets across calls (fountain mode only)
             
         Returns:
             Decoded data string or None if decoding fails
         """
         try:
-            # Remove error correction frames
-            cleaned_frames = self._remove_error_correction(color_frames)
+            color_frames = as_frame_array(color_frames)
             
-            # Convert frames back to binary
-            binary_data = self._frames_to_binary(cleaned_frames)
-            
-            # Convert binary to bytes
-            if len(binary_data) % 8 != 0:
-                # Remove padding
-                binary_data = binary_data[:-(len(binary_data) % 8)]
+            if self.transmission == 'fountain':
+                # Droplets can start anywhere in the capture
+                byte_data = self._fountain_bytes(color_frames, fountain or FountainDecoder())
                 
-            byte_data = bytes(int(binary_data[i:i+8], 2) 
-                            for i in range(0, len(binary_data), 8))
-            
-            # Try to decrypt (assume encrypted first)
-            try:
-                json_str = decrypt_data(byte_data)
-            except:
-                # If decryption fails, try as plain text
-                json_str = byte_data.decode('utf-8')
+                # Droplets carry no format header: assume encrypted, fall back to plain text
+                try:
+                    payload_bytes = decrypt_bytes(byte_data)
+                except ValueError:
+                    payload_bytes = byte_data
+            else:
+                # The format header says how long the payload is and whether it is encrypted
+                header, color_frames = split_format_header(color_frames)
+                payload_length = check_format(header, self.FORMAT_ID)
+                
+                # Remove error correction frames
+                cleaned_frames = self._remove_error_correction(color_frames)
+                
+                # Convert frames back to symbols, then exactly payload_length bytes
+                symbols = self._frames_to_symbols(cleaned_frames)
+                byte_data = symbols_to_bytes(symbols, self.BITS_PER_SYMBOL, payload_length)
+                encrypted = header.encrypted if header else True
+                payload_bytes = decrypt_bytes(byte_data) if encrypted else byte_data
                 
-            # Parse JSON
-            payload = json.loads(json_str)
+            # Parse the envelope (binary or JSON)
+            payload = unpack_payload(payload_bytes)
             
             # Check expiry
             current_time = int(time.time())
@@ -133,64 +207,18 @@ class RPattern:
             print(f"Decoding error: {e}")
             return None
     
-    def _binary_to_frames(self, binary_data: str) -> List[List[List[Tuple[int, int, int]]]]:
-        """Convert binary data to color frames."""
-        frames = []
-        
-        # Process binary data in chunks of 2 bits
-        for i in range(0, len(binary_data), 2):
-            if i + 1 < len(binary_data):
-                bit_pair = binary_data[i:i+2]
-            else:
-                bit_pair = binary_data[i] + '0'  # Pad with 0
-                
-            color = self.COLOR_MAP.get(bit_pair, (255, 255, 255))  # White as fallback
-            
-            # Create a frame (3x3 grid with the same color)
-            frame = [[color for _ in range(self.PATTERN_SIZE)] 
-                    for _ in range(self.PATTERN_SIZE)]
-            frames.append(frame)
-            
-        return frames
+    def _fountain_bytes(self, frames: np.ndarray, fountain: FountainDecoder) -> bytes:
+        """Feed every packet in the capture to the fountain decoder."""
+        for symbols in split_at_markers(frames, self.PALETTE, self.START_SYNC_COLOR):
+            fountain.add_packet(symbols_to_bytes(symbols, self.BITS_PER_SYMBOL))
+        return fountain.data()
     
-    def _frames_to_binary(self, frames: List[List[List[Tuple[int, int, int]]]]) -> str:
-        """Convert color frames back to binary data."""
-        binary_data = ""
-        
-        for frame in frames:
-            # Get the dominant color from the center of the frame
-            center_color = frame[1][1]  # Middle cell of 3x3 grid
-            
-            # Find closest color match
-            closest_color = min(self.COLOR_MAP.values(), 
-                              key=lambda c: sum((a-b)**2 for a, b in zip(c, center_color)))
-            
-            # Get the corresponding bit pair
-            bit_pair = self.REVERSE_COLOR_MAP.get(closest_color, '00')
-            binary_data += bit_pair
-            
-        return binary_data
-    
-    def _add_error_correction(self, frames: List[List[List[Tuple[int, int, int]]]]) -> List[List[List[Tuple[int, int, int]]]]:
-        """Add error correction and synchronization frames."""
-        corrected_frames = []
-        
-        # Add start synchronization frame (all white)
-        sync_frame = [[(255, 255, 255) for _ in range(self.PATTERN_SIZE)] 
-                     for _ in range(self.PATTERN_SIZE)]
-        corrected_frames.append(sync_frame)
-        
-        # Add data frames
-        corrected_frames.extend(frames)
-        
-        # Add end synchronization frame (all black)
-        end_frame = [[(0, 0, 0) for _ in range(self.PATTERN_SIZE)] 
-                    for _ in range(self.PATTERN_SIZE)]
-        corrected_frames.append(end_frame)
-        
-        return corrected_frames
+    def _frames_to_symbols(self, frames: np.ndarray) -> np.ndarray:
+        """Convert color frames back to 2-bit symbols (all cells vote)."""
+        symbols, _ = classify_frames(frames, self.PALETTE)
+        return symbols
     
-    def _remove_error_correction(self, frames: List[List[List[Tuple[int, int, int]]]]) -> List[List[List[Tuple[int, int, int]]]]:
+    def _remove_error_correction(self, frames: np.ndarray) -> np.ndarray:
         """Remove error correction and synchronization frames."""
         if len(frames) < 2:
             return frames
@@ -219,7 +247,7 @@ class RPattern:
         }
 
 
-def create_test_pattern(data: str = "https://rahulcodes.in") -> Dict[str, Any]:
+def create_test_pattern(data: str = "https://rahulcodes.in") -> Pattern:
     """Create a test RPattern for the given data."""
     rpattern = RPattern(expiry_minutes=5)
     return rpattern.encode_data(data, use_encryption=True)
@@ -11,8 +11,34 @@ import time
 import hashlib
 import secrets
 import base64
-from typing import List, Tuple, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import BinaryIO, List, Sequence, Tuple, Dict, Any, Optional, Union
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from auth_header import AuthHeader, StaleHeaderError, check_auth_header
+from block_crc import BlockCollector, add_block_crcs, check_block_size, split_block_crcs
+from chunked_transport import (
+    ChunkAssembler, seal_stream, seal_record, open_record, record_header, derive_chunk_key, check_chunk_size,
+    CONTENT_TEXT, DEFAULT_CHUNK_SIZE, KIND_LAST, KIND_MANIFEST
+)
+from error_correction import fec_encode, fec_decode, check_fec
+from layered_pattern import LayeredPattern, check_subdivision, demodulate, read_enhancement
+from fountain_code import FountainDecoder, fountain_encode, check_transmission, check_fountain
+from format_header import (
+    FormatHeader, split_format_header, check_format, screen_capture, read_format_header,
+    FORMAT_REVOLUTIONARY, PALETTE_BRIGHT_8, PALETTE_GENERATED, MAX_TILES
+)
+from payload_envelope import (
+    pack_payload, unpack_payload, check_payload_format, check_compression, DEFAULT_DICTIONARY_ID
+)
+from pattern_codec import (
+    FrameInput, Pattern, as_frame_array, palette_from_map,
+    encode_symbols, decode_symbols, frames_to_symbols, check_colors, is_power_of_two, generate_palette,
+    check_encoding_mode, add_length_prefix, strip_length_prefix, split_at_markers,
+    check_sequence_cells, check_sequence_capacity, check_clock_cells, assemble_sequence, split_calibration
+)
+from rate_sweep import RateProfile, sweep_patterns, SWEEP_RATES
 
 try:
     from Crypto.Cipher import AES
@@ -26,12 +52,30 @@ except ImportError:
 @dataclass
 class RPatternConfig:
     """Configuration for RPattern system."""
-    grid_size: int = 4  # 4x4 grid for more data
-    frame_duration: float = 0.3  # seconds per frame
+    grid_size: int = 4  # 4x4 grid for more data (8x8, 12x12 in cell mode)
+    frame_duration: float = 0.3  # seconds per frame (RPatternCore.use_rate_profile sets a measured one)
     expiry_seconds: int = 30  # auto-expire after 30 seconds
-    colors: int = 8  # 8-color encoding system
+    colors: int = 8  # palette size: 8 = the bright colors below, else generated (2-64, see sequence_cells)
     security_level: str = "MILITARY"  # MILITARY, HIGH, MEDIUM
     encryption: str = "AES-256"  # AES-256, ChaCha20
+    encoding_mode: str = "frame"  # frame = one symbol per frame, cell = one symbol per grid cell
+    payload_format: str = "binary"  # binary envelope, or json for debugging
+    compression: str = "zlib"  # none, zlib, lzma (skipped when it does not shrink the data)
+    compression_level: int = 9  # 0-9
+    compression_dictionary: int = DEFAULT_DICTIONARY_ID  # preset zlib dictionary id, 0 = none
+    fec_symbols: int = 8  # Reed-Solomon parity bytes per codeword (corrects half as many), 0 = off
+    fec_block_length: int = 64  # max codeword length (data + parity), codewords are interleaved
+    transmission: str = "sequential"  # sequential = start to end frame, fountain = join mid-loop
+    fountain_block_size: int = 48  # source block bytes per fountain droplet
+    fountain_repair: float = 1.0  # repair droplets per source block in each loop
+    sequence_cells: int = 5  # last cells of each frame carry its loop index + check digit (0 = off; more for < 7 colors)
+    crc_block_size: int = 32  # bytes per CRC-checked block, good blocks are kept across loops (0 = off)
+    clock_cells: int = 0  # cells before the index cells toggling every frame, for symbol sync (0 = off)
+    calibration: bool = True  # show the palette after the header; decoders classify against measured colors
+    refresh_interval: int = 0  # rolling refresh: seconds each re-signed header stays valid, data frames
+                               # live expiry_seconds (0 = off, the header expires with the data)
+    chunk_size: int = DEFAULT_CHUNK_SIZE  # plaintext bytes per sub-pattern of encode_chunked_patterns
+    subdivision: int = 0  # sub-cells per cell side carrying the enhancement layer of layered patterns (2, 4; 0 = off)
     
 
 class RPatternCore:
@@ -64,17 +108,68 @@ class RPatternCore:
     # Reverse mapping for decoding
     COLOR_TO_BITS = {v: k for k, v in REVOLUTIONARY_COLORS.items()}
     
-    def __init__(self, config: RPatternConfig = None):
-        """Initialize revolutionary RPattern core."""
+    # Palette indexed by symbol value (3 bits per color)
+    BITS_PER_SYMBOL = 3
+    PALETTE = palette_from_map(REVOLUTIONARY_COLORS)
+    
+    # Identifiers written to the format header
+    FORMAT_ID = FORMAT_REVOLUTIONARY
+    PALETTE_ID = PALETTE_BRIGHT_8
+    
+    def __init__(self, config: RPatternConfig = None,
+                 auth_key: Optional[bytes] = None, chunk_secret: Optional[bytes] = None):
+        """
+        Initialize revolutionary RPattern core.
+        
+        Args:
+            config: Core configuration
+            auth_key: Key signing the expiry header (default: new random key)
+            chunk_secret: Key of chunked message records (default: new random key)
+        
+        A decoder built apart from the generator needs the generator's
+        auth_key and chunk_secret to accept its patterns.
+        """
         self.config = config or RPatternConfig()
+        check_encoding_mode(self.config.encoding_mode)
+        check_payload_format(self.config.payload_format)
+        check_compression(self.config.compression, self.config.compression_level)
+        check_fec(self.config.fec_symbols, self.config.fec_block_length)
+        check_transmission(self.config.transmission)
+        check_fountain(self.config.fountain_block_size, self.config.fountain_repair)
+        check_sequence_cells(self.config.sequence_cells, self.config.grid_size)
+        check_clock_cells(self.config.clock_cells, self.config.sequence_cells, self.config.grid_size)
+        if self.config.clock_cells and self.config.transmission == 'fountain':
+            raise ValueError("Clock cells are only supported with sequential transmission")
+        if self.config.refresh_interval < 0:
+            raise ValueError(f"refresh_interval must not be negative, got {self.config.refresh_interval}")
+        if self.config.refresh_interval and self.config.transmission == 'fountain':
+            raise ValueError("Rolling refresh needs the header frames of sequential transmission")
+        check_block_size(self.config.crc_block_size)
+        check_chunk_size(self.config.chunk_size)
+        check_subdivision(self.config.subdivision)
+        if self.config.subdivision and self.config.transmission == 'fountain':
+            raise ValueError("Layered patterns need the format header of sequential transmission")
+        if self.config.frame_duration <= 0:
+            raise ValueError(f"frame_duration must be positive, got {self.config.frame_duration}")
+        check_colors(self.config.colors)
+        check_sequence_capacity(self.config.sequence_cells, self.config.colors)
+        if self.config.colors == len(self.PALETTE):
+            self.palette, self.palette_id = self.PALETTE, self.PALETTE_ID
+        else:
+            self.palette, self.palette_id = generate_palette(self.config.colors), PALETTE_GENERATED
         self.session_id = secrets.token_hex(12)  # Unique session
+        self.auth_key = auth_key or secrets.token_bytes(32)  # Signs the cleartext expiry header
+        self.chunk_secret = chunk_secret or secrets.token_bytes(32)  # Keys the records of chunked messages
         self.pattern_counter = 0
+        self.last_fec_corrections = 0  # Bytes repaired by FEC in the last decode
         
         print(f"🚀 RPattern Core initialized - Session: {self.session_id}")
         print(f"🛡️ Security Level: {self.config.security_level}")
         print(f"🔒 Encryption: {self.config.encryption}")
+        print(f"🧩 Encoding Mode: {self.config.encoding_mode} ({self.config.grid_size}x{self.config.grid_size})")
+        print(f"🎨 Palette: {self.config.colors} colors{' (calibrated)' if self.config.calibration else ''}")
         
-    def _military_encrypt(self, data: str) -> bytes:
+    def _military_encrypt(self, data: bytes) -> bytes:
         """Military-grade encryption for data."""
         if not CRYPTO_AVAILABLE:
             return self._fallback_encrypt(data)
@@ -84,7 +179,7 @@ class RPatternCore:
         
         # AES-256 encryption in GCM mode (authenticated encryption)
         cipher = AES.new(key, AES.MODE_GCM)
-        ciphertext, tag = cipher.encrypt_and_digest(data.encode('utf-8'))
+        ciphertext, tag = cipher.encrypt_and_digest(data)
         
         # Store encryption data for decoding
         self._encryption_data = {
@@ -96,16 +191,15 @@ class RPatternCore:
         # Return encrypted data
         return ciphertext
         
-    def _fallback_encrypt(self, data: str) -> bytes:
+    def _fallback_encrypt(self, data: bytes) -> bytes:
         """Fallback encryption when crypto not available."""
         # Multi-layer XOR with rotating keys
         key1 = hashlib.sha256(self.session_id.encode()).digest()
         key2 = hashlib.sha256(f"{self.session_id}_salt".encode()).digest()
         
-        data_bytes = data.encode('utf-8')
         encrypted = bytearray()
         
-        for i, byte in enumerate(data_bytes):
+        for i, byte in enumerate(data):
             # Rotate between two keys
             key = key1 if i % 2 == 0 else key2
             encrypted.append(byte ^ key[i % len(key)])
@@ -113,84 +207,99 @@ class RPatternCore:
         return bytes(encrypted)
     
     def _create_secure_payload(self, data: str) -> Dict[str, Any]:
-        """Create secure payload with military-grade metadata."""
+        """
+        Create the secure payload that gets encrypted.
+        
+        Only fields the decoder needs travel in the frames; pattern id,
+        version, creator and grid settings stay in the local Pattern header.
+        """
         current_time = int(time.time() * 1000)  # Millisecond precision
         self.pattern_counter += 1
         
-        payload = {
+        return {
             'data': data,
             'timestamp': current_time,
             'expiry': current_time + (self.config.expiry_seconds * 1000),
-            'session_id': self.session_id,
-            'pattern_id': f"RP_{self.session_id}_{self.pattern_counter:04d}",
-            'security_level': self.config.security_level,
-            'version': '2.0-REVOLUTIONARY',
-            'creator': 'RPattern by Rahul Chaube',
-            'grid_size': self.config.grid_size,
-            'color_count': self.config.colors,
-            'sequence_id': self.pattern_counter
+            'counter': self.pattern_counter,
+            'security_level': self.config.security_level
         }
-        
-        # Add security hash
-        payload_str = json.dumps(payload, sort_keys=True)
-        payload['security_hash'] = hashlib.sha256(payload_str.encode()).hexdigest()[:24]
-        
-        return payload
     
-    def _data_to_revolutionary_frames(self, encrypted_data: bytes) -> List[List[List[Tuple[int, int, int]]]]:
-        """Convert encrypted data to revolutionary color frames."""
-        # Convert to binary
-        binary_data = ''.join(format(byte, '08b') for byte in encrypted_data)
-        
-        # Pad to multiple of 3 (for 8-color encoding)
-        while len(binary_data) % 3 != 0:
-            binary_data += '0'
-        
-        frames = []
-        
-        # Process 3 bits at a time (8 colors = 3 bits each)
-        for i in range(0, len(binary_data), 3):
-            bit_triplet = binary_data[i:i+3]
-            color = self.REVOLUTIONARY_COLORS.get(bit_triplet, (128, 128, 128))
-            
-            # Create 4x4 frame filled with this color
-            frame = [[color for _ in range(self.config.grid_size)] 
-                    for _ in range(self.config.grid_size)]
-            
-            frames.append(frame)
-        
-        return frames
+    def _data_to_revolutionary_stream(self, encrypted_data: bytes) -> bytes:
+        """Protect encrypted data into the byte stream shown by the data frames."""
+        # Reed-Solomon parity + interleaving so misread colors can be repaired
+        encrypted_data = fec_encode(encrypted_data, self.config.fec_symbols, self.config.fec_block_length)
+        
+        # Per-block CRCs, so a failed decode knows which blocks to recapture
+        encrypted_data = add_block_crcs(encrypted_data, self.config.crc_block_size)
+        
+        # Cell mode pads the last frame, so record the exact byte length
+        if self.config.encoding_mode == 'cell':
+            encrypted_data = add_length_prefix(encrypted_data)
+        return encrypted_data
     
-    def _add_revolutionary_security(self, data_frames: List) -> List:
-        """Add revolutionary security frames."""
-        secured_frames = []
-        
-        # 1. Start frame (Pure White)
-        start_frame = [[self.SECURITY_FRAMES['start'] for _ in range(self.config.grid_size)]
-                      for _ in range(self.config.grid_size)]
-        secured_frames.append(start_frame)
-        
-        # 2. Authentication frame (Gray)
-        auth_frame = [[self.SECURITY_FRAMES['auth'] for _ in range(self.config.grid_size)]
-                     for _ in range(self.config.grid_size)]
-        secured_frames.append(auth_frame)
-        
-        # 3. Data marker frame (Dark Gray)
-        data_marker = [[self.SECURITY_FRAMES['data'] for _ in range(self.config.grid_size)]
-                      for _ in range(self.config.grid_size)]
-        secured_frames.append(data_marker)
-        
-        # 4. Data frames
-        secured_frames.extend(data_frames)
-        
-        # 5. End frame (Pure Black)
-        end_frame = [[self.SECURITY_FRAMES['end'] for _ in range(self.config.grid_size)]
-                    for _ in range(self.config.grid_size)]
-        secured_frames.append(end_frame)
+    def _format_header(self, payload_length: int, expiry: int, **layout) -> FormatHeader:
+        """
+        Describe this core's layout, plus the signed expiry (ms) scanners check early.
         
-        return secured_frames
+        Chunked sub-patterns pass their chunked/tile_index/tiles fields in `layout`.
+        """
+        return FormatHeader(
+            format_id=self.FORMAT_ID,
+            grid_size=self.config.grid_size,
+            palette_id=self.palette_id,
+            bits_per_symbol=self.config.colors.bit_length() - 1 if is_power_of_two(self.config.colors) else 0,
+            payload_length=payload_length,
+            colors=self.config.colors,
+            calibrated=self.config.calibration,
+            encoding_mode=self.config.encoding_mode,
+            sequence_cells=self.config.sequence_cells,
+            clock_cells=self.config.clock_cells,
+            fec_symbols=self.config.fec_symbols,
+            fec_block_length=self.config.fec_block_length,
+            crc_block_size=self.config.crc_block_size,
+            auth=AuthHeader.issue(self.auth_key, expiry / 1000).seal(self.auth_key),
+            **layout
+        )
+    
+    def _build_revolutionary_pattern(self, stream: bytes, layout: Optional[Dict[str, Any]] = None,
+                                     **header) -> Pattern:
+        """Lay out the data stream (per frame or per cell) between the security frames."""
+        # Split into palette indices (8 colors = 3 bits each, other sizes by base conversion)
+        symbols = encode_symbols(stream, self.config.colors)
+        return Pattern.build(
+            symbols, self.palette, self.config.grid_size, self.config.frame_duration,
+            encoding_mode=self.config.encoding_mode,
+            leading=[
+                self.SECURITY_FRAMES['start'],  # 1. Start frame (Pure White)
+                self.SECURITY_FRAMES['auth'],   # 2. Authentication frame (Gray)
+                self.SECURITY_FRAMES['data'],   # 3. Data marker frame (Dark Gray)
+            ],                                  # 4. Data frames
+            trailing=[
+                self.SECURITY_FRAMES['end'],    # 5. End frame (Pure Black)
+            ],
+            sequence_cells=self.config.sequence_cells,
+            clock_cells=self.config.clock_cells,
+            calibration=self.config.calibration,
+            format_header=self._format_header(len(stream), header.get('header_expiry', header['expiry']),
+                                              **(layout or {})).pack(),
+            **header
+        )
+    
+    def _build_fountain_pattern(self, encrypted_data: bytes, **header) -> Pattern:
+        """Lay out one loop of fountain droplets, each led by a start (white) frame."""
+        stream = fec_encode(encrypted_data, self.config.fec_symbols, self.config.fec_block_length)
+        packets = fountain_encode(stream, self.config.fountain_block_size, self.config.fountain_repair)
+        return Pattern.from_packets(
+            [encode_symbols(packet, self.config.colors) for packet in packets],
+            self.palette, self.config.grid_size, self.config.frame_duration,
+            marker=self.SECURITY_FRAMES['start'],
+            encoding_mode=self.config.encoding_mode,
+            transmission='fountain',
+            droplets=len(packets),
+            **header
+        )
     
-    def encode_revolutionary_pattern(self, data: str) -> Dict[str, Any]:
+    def encode_revolutionary_pattern(self, data: str) -> Pattern:
         """
         Encode data into a revolutionary RPattern.
         
@@ -202,42 +311,43 @@ class RPatternCore:
         
         start_time = time.time()
         
-        # Create secure payload
+        # Create secure payload and serialize it (compressed binary envelope or JSON)
         payload = self._create_secure_payload(data)
+        payload_bytes = pack_payload(payload, self.config.payload_format, self.config.compression,
+                                     self.config.compression_level, self.config.compression_dictionary)
+        pattern_id = f"RP_{self.session_id}_{self.pattern_counter:04d}"
+        security_hash = hashlib.sha256(payload_bytes).hexdigest()[:24]
         
         # Encrypt with military-grade encryption
-        payload_json = json.dumps(payload)
-        encrypted_data = self._military_encrypt(payload_json)
-        
-        # Convert to revolutionary frames
-        data_frames = self._data_to_revolutionary_frames(encrypted_data)
-        
-        # Add revolutionary security
-        all_frames = self._add_revolutionary_security(data_frames)
-        
-        # Create pattern metadata
-        pattern_data = {
-            'frames': all_frames,
-            'frame_duration': self.config.frame_duration,
-            'total_frames': len(all_frames),
-            'data_frames': len(data_frames),
-            'security_frames': len(all_frames) - len(data_frames),
-            'pattern_id': payload['pattern_id'],
-            'session_id': self.session_id,
-            'timestamp': payload['timestamp'],
-            'expiry': payload['expiry'],
-            'security_level': self.config.security_level,
-            'encryption': self.config.encryption,
-            'grid_size': self.config.grid_size,
-            'color_depth': self.config.colors,
-            'version': '2.0-REVOLUTIONARY',
-            'creator': 'RPattern by Rahul Chaube',
-            'generation_time': time.time() - start_time
-        }
+        encrypted_data = self._military_encrypt(payload_bytes)
+        
+        # Revolutionary security and pattern header fields
+        header = dict(
+            pattern_id=pattern_id,
+            session_id=self.session_id,
+            timestamp=payload['timestamp'],
+            expiry=payload['expiry'],
+            security_level=self.config.security_level,
+            encryption=self.config.encryption,
+            color_depth=self.config.colors,
+            version='2.0-REVOLUTIONARY',
+            creator='RPattern by Rahul Chaube',
+            generation_time=time.time() - start_time
+        )
+        if self.config.refresh_interval:
+            header['header_expiry'] = self._header_expiry(payload['expiry'], time.time())
+        
+        if self.config.transmission == 'fountain':
+            # Self-contained droplets, decodable from any starting frame
+            pattern = self._build_fountain_pattern(encrypted_data, **header)
+        else:
+            # Convert to revolutionary symbols between the security frames
+            stream = self._data_to_revolutionary_stream(encrypted_data)
+            pattern = self._build_revolutionary_pattern(stream, **header)
         
         # Add encryption metadata
         if hasattr(self, '_encryption_data'):
-            pattern_data['crypto'] = {
+            pattern.header['crypto'] = {
                 'key': self._encryption_data['key'].hex(),
                 'nonce': self._encryption_data['nonce'].hex(),
                 'tag': self._encryption_data['tag'].hex(),
@@ -248,53 +358,301 @@ class RPatternCore:
         expiry_time = (payload['expiry'] - payload['timestamp']) / 1000
         
         print(f"✅ Revolutionary RPattern created in {generation_time:.4f}s")
-        print(f"🎬 Total Frames: {len(all_frames)} ({len(data_frames)} data + {len(all_frames)-len(data_frames)} security)")
+        print(f"🎬 Total Frames: {pattern.total_frames} ({pattern.data_frames} data + {pattern['security_frames']} security)")
         print(f"⏰ Auto-expires in: {expiry_time:.1f} seconds")
-        print(f"🆔 Pattern ID: {payload['pattern_id']}")
-        print(f"🛡️ Security Hash: {payload['security_hash']}")
+        print(f"🆔 Pattern ID: {pattern_id}")
+        print(f"🛡️ Security Hash: {security_hash}")
+        
+        return pattern
+    
+    def encode_chunked_patterns(self, data: Union[str, bytes, BinaryIO]) -> List[Pattern]:
+        """
+        Encode a large payload as independent sub-patterns, manifest first.
+        
+        Each sub-pattern carries one AES-GCM record of chunk_size bytes
+        (chunked_transport.py) with its own format header, auth header,
+        FEC and CRC blocks. Displays show them one after another; a lost
+        frame costs one short loop, and scanners keep the chunks they
+        already opened.
+        
+        Args:
+            data: Text, bytes or a binary file object (read one chunk at a time)
+        
+        Returns:
+            The manifest pattern followed by one pattern per chunk
+        
+        Raises:
+            ValueError: with fountain transmission, which has no format header to flag chunks
+        """
+        return self._chunked_playlists(data, 1)[0]
+    
+    def encode_striped_patterns(self, data: Union[str, bytes, BinaryIO], tiles: int) -> List[List[Pattern]]:
+        """
+        Stripe a payload across several displays (or tiles of one display).
+        
+        The chunked sub-patterns are dealt round robin, manifest first, so
+        every tile loops through its own share of the chunks and the
+        message arrives in about 1/tiles of the single-display time. Each
+        tile's format header names its index and the tile count.
+        
+        Args:
+            data: Text, bytes or a binary file object (read one chunk at a time)
+            tiles: Number of displays or tiles (1-16)
+        
+        Returns:
+            One playlist of sub-patterns per tile, in tile order
+        
+        Raises:
+            ValueError: for an unsupported tile count or fountain transmission
+        """
+        if not 1 <= tiles <= MAX_TILES:
+            raise ValueError(f"Tile count must be between 1 and {MAX_TILES}, got {tiles}")
+        return self._chunked_playlists(data, tiles)
+    
+    def _chunked_playlists(self, data: Union[str, bytes, BinaryIO], tiles: int) -> List[List[Pattern]]:
+        """Seal the payload into chunk records and lay each out as a sub-pattern of its tile."""
+        if self.config.transmission == 'fountain':
+            raise ValueError("Chunked transport needs the format header of sequential transmission")
+        print(f"🧩 Creating chunked RPattern ({self.config.chunk_size}-byte chunks, {tiles} tile(s))...")
+        
+        start_time = time.time()
+        timestamp = int(start_time * 1000)
+        expiry = timestamp + self.config.expiry_seconds * 1000
+        self.pattern_counter += 1
+        header = dict(
+            session_id=self.session_id,
+            timestamp=timestamp,
+            expiry=expiry,
+            security_level=self.config.security_level,
+            encryption='AES-256-GCM STREAM',
+            color_depth=self.config.colors,
+            version='2.0-REVOLUTIONARY',
+            creator='RPattern by Rahul Chaube',
+            tiles=tiles
+        )
+        if self.config.refresh_interval:
+            header['header_expiry'] = self._header_expiry(expiry, start_time)
+        
+        # Display order is manifest, chunk 0, chunk 1, ...: entry i goes to tile i % tiles.
+        # The manifest is sealed last (it holds the digest) but shown first.
+        playlists: List[List[Pattern]] = [[] for _ in range(tiles)]
+        records = seal_stream(self.chunk_secret, data, self.config.chunk_size)
+        for position, record in enumerate(records, start=1):
+            manifest = record_header(record)[2] == KIND_MANIFEST
+            tile = 0 if manifest else position % tiles
+            name = 'manifest' if manifest else f"{position - 1:04d}"
+            stream = self._data_to_revolutionary_stream(record)
+            pattern = self._build_revolutionary_pattern(
+                stream, dict(chunked=True, tile_index=tile, tiles=tiles),
+                pattern_id=f"RP_{self.session_id}_{self.pattern_counter:04d}_{name}",
+                chunk_index=None if manifest else position - 1, tile_index=tile, **header
+            )
+            if manifest:
+                playlists[0].insert(0, pattern)
+            else:
+                playlists[tile].append(pattern)
+        
+        loops = [sum(pattern.total_frames for pattern in playlist) for playlist in playlists]
+        print(f"✅ {sum(map(len, playlists)) - 1} chunk(s) + manifest created in {time.time() - start_time:.4f}s")
+        print(f"🎬 Frames per tile: {loops} (longest sub-pattern {max(p.total_frames for pl in playlists for p in pl)})")
+        return playlists
+    
+    def encode_rate_sweep(self, rates: Sequence[float] = SWEEP_RATES) -> List[Pattern]:
+        """
+        Sub-patterns of a symbol-rate sweep, to show ahead of a pattern.
+        
+        A scanner watching the sweep (RevolutionaryScanner.rate_sweep)
+        reports the fastest rate it resolves; pass its RateProfile to
+        use_rate_profile() to run the encoder at that rate.
+        
+        Args:
+            rates: Symbol rates to sweep, slowest first
+        
+        Returns:
+            One sub-pattern per rate, e.g. for
+            RPatternAnimator.load_playlist(sweep + [pattern])
+        """
+        return sweep_patterns(self.config.grid_size, rates)
+    
+    def use_rate_profile(self, profile: Union[RateProfile, str]):
+        """
+        Run at the symbol rate a sweep measured.
+        
+        Args:
+            profile: RateProfile, or the path of one saved with RateProfile.save()
+        """
+        if isinstance(profile, str):
+            profile = RateProfile.load(profile)
+        self.config.frame_duration = profile.frame_duration
+        print(f"📶 Symbol rate: {profile.symbol_rate:g} symbols/s ({profile.frame_duration:.3f}s per frame)")
+    
+    def encode_layered_pattern(self, data: str, enhancement: Union[str, bytes]) -> LayeredPattern:
+        """
+        Encode a two-layer pattern: `data` for every scanner, `enhancement` for close ones.
+        
+        The base layer is an ordinary pattern of `data`. The enhancement
+        layer is sealed as its own AES-GCM record, FEC protected and shaded
+        into the sub-cells of the base data frames (layered_pattern.py),
+        so it adds no frames.
+        
+        Args:
+            data: Base layer data, decodable at any distance
+            enhancement: Extra text or bytes for scanners that resolve sub-cells
+        
+        Returns:
+            LayeredPattern showing both layers
+        
+        Raises:
+            ValueError: if subdivision is off, or the enhancement does not fit in the base data frames
+        """
+        if not self.config.subdivision:
+            raise ValueError("Layered patterns need subdivision set (2 or 4)")
+        if isinstance(enhancement, str):
+            enhancement = enhancement.encode('utf-8')
+        
+        base = self.encode_revolutionary_pattern(data)
+        message_id = secrets.token_bytes(8)
+        record = seal_record(derive_chunk_key(self.chunk_secret, message_id), message_id, 0, KIND_LAST, enhancement)
+        stream = fec_encode(record, self.config.fec_symbols, self.config.fec_block_length)
+        pattern = LayeredPattern.build(base, stream, self.config.subdivision)
+        
+        print(f"🔬 Enhancement layer: {len(enhancement)} bytes in {self.config.subdivision}x"
+              f"{self.config.subdivision} sub-cells")
+        return pattern
+    
+    def decode_layered_pattern(self, frames: FrameInput) -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        Decode both layers of a capture sampled at sub-cell resolution.
+        
+        Args:
+            frames: (frames, grid * subdivision, grid * subdivision, 3) sub-cell colors
+        
+        Returns:
+            (base data, enhancement bytes), each None if its layer failed
+        """
+        data = self.decode_revolutionary_pattern(demodulate(frames, self.config.subdivision)[0])
+        if data is None:
+            return None, None  # the enhancement record shares the base pattern's header checks
+        return data, self.decode_enhancement(frames)
+    
+    def decode_enhancement(self, frames: FrameInput) -> Optional[bytes]:
+        """
+        Read, repair and open the enhancement layer of a sub-cell capture.
+        
+        Only the enhancement record is checked here: call it once the base
+        layer of the same capture has decoded.
         
-        return pattern_data
+        Returns:
+            The enhancement bytes, or None if the layer could not be read
+        """
+        try:
+            coarse, soft = demodulate(frames, self.config.subdivision)
+            found = read_format_header(coarse)
+            if found is None:
+                raise ValueError("Format header not captured")
+            check_format(found[1], self.FORMAT_ID)
+            stream = read_enhancement(coarse, soft, found, self.palette)
+            record, corrections = fec_decode(stream, self.config.fec_symbols, self.config.fec_block_length)
+            if corrections:
+                print(f"🩹 FEC corrected {corrections} enhancement byte(s)")
+            enhancement = open_record(derive_chunk_key(self.chunk_secret, record_header(record)[0]), record)
+            print(f"🔬 Enhancement layer decoded: {len(enhancement)} bytes")
+            return enhancement
+        except Exception as e:
+            print(f"❌ Enhancement layer failed: {e}")
+            return None
+    
+    def refresh_pattern(self, pattern: Pattern, now: Optional[float] = None) -> Pattern:
+        """
+        Re-sign the header of a rolling refresh pattern, keeping its data frames.
+        
+        Costs one HMAC and a few header frames instead of a new payload,
+        encryption and FEC pass, and scanners keep the data blocks they
+        already verified: the next header is all they need.
+        
+        Args:
+            pattern: Pattern made by this core with refresh_interval set
+            now: Current Unix time (default: time.time())
+        
+        Returns:
+            The pattern showing a header valid for another refresh_interval
+        
+        Raises:
+            ValueError: if rolling refresh is off or the data frames have expired
+        """
+        if not self.config.refresh_interval:
+            raise ValueError("Rolling refresh is off (refresh_interval = 0)")
+        now = time.time() if now is None else now
+        expiry = self._header_expiry(pattern['expiry'], now)
+        
+        _, header = read_format_header(pattern[:1 + pattern.header_frames])
+        auth = AuthHeader.issue(self.auth_key, expiry / 1000).seal(self.auth_key)
+        refreshed = pattern.with_format_header(replace(header, auth=auth).pack())
+        refreshed.header['header_expiry'] = expiry
+        
+        print(f"🔄 Header refreshed, valid for {(expiry - now * 1000) / 1000:.1f}s")
+        return refreshed
+    
+    def _header_expiry(self, data_expiry: int, now: float) -> int:
+        """Expiry (ms) of a freshly signed rolling header, never past the data's own."""
+        if now * 1000 >= data_expiry:
+            raise ValueError("Data frames have expired; encode a new pattern")
+        return min(data_expiry, int((now + self.config.refresh_interval) * 1000))
     
-    def decode_revolutionary_pattern(self, frames: List[List[List[Tuple[int, int, int]]]]) -> Optional[str]:
+    def decode_revolutionary_pattern(self, frames: FrameInput,
+                                     fountain: Optional[FountainDecoder] = None,
+                                     blocks: Optional[BlockCollector] = None,
+                                     chunks: Optional[ChunkAssembler] = None) -> Optional[str]:
         """
         Decode a revolutionary RPattern back to original data.
+        
+        Accepts the (frames, grid, grid, 3) tensor or legacy nested lists.
+        In fountain mode the capture may start anywhere; pass a
+        FountainDecoder to keep droplets across partial captures. In
+        sequential mode pass a BlockCollector to keep CRC-verified blocks,
+        so the next loop only has to fix the blocks that failed. With rolling
+        refresh, once every block is verified only a fresh header is needed.
+        
+        A sub-pattern of a chunked message adds its record to `chunks` (a
+        ChunkAssembler kept across loops) and the text is returned once the
+        last missing chunk is in; binary messages are read from chunks.data().
         """
+        self.last_fec_corrections = 0
+        if blocks is None and self.config.crc_block_size:
+            blocks = BlockCollector(self.config.crc_block_size)
+        
         try:
+            frames = as_frame_array(frames)
+            
             print(f"🔍 Decoding Revolutionary RPattern...")
             print(f"📊 Total frames: {len(frames)}")
             
-            # Validate frame structure
-            if len(frames) < 4:  # Need at least start + auth + data + end
-                raise ValueError("Invalid frame structure")
+            if self.config.transmission == 'fountain':
+                encrypted_data = self._fountain_bytes(frames, fountain or FountainDecoder())
+            elif self.config.refresh_interval and blocks is not None and blocks.complete:
+                # Data frames are unchanged across refreshes: only the new header is missing
+                self._check_header(self._fresh_header(frames))
+                encrypted_data = blocks.data()
+            else:
+                encrypted_data, header = self._sequential_bytes(frames)
+                if header is not None and header.chunked:
+                    return self._decode_chunk(encrypted_data, header, chunks)
+                if self.config.crc_block_size:
+                    # Kept even if the header turns out stale: rolling data frames outlive it
+                    encrypted_data = self._checked_bytes(encrypted_data, blocks)
+                
+                # Reject expired or foreign patterns before any FEC or decryption work
+                self._check_header(header)
             
-            # Check security frames
-            start_color = frames[0][0][0]
-            end_color = frames[-1][0][0]
-            
-            if not self._color_matches(start_color, self.SECURITY_FRAMES['start']):
-                raise ValueError("Invalid start frame")
-            
-            if not self._color_matches(end_color, self.SECURITY_FRAMES['end']):
-                raise ValueError("Invalid end frame")
-            
-            # Extract data frames (skip security frames)
-            data_frames = frames[3:-1]  # Skip start, auth, data_marker, and end
-            
-            print(f"📊 Data frames: {len(data_frames)}")
-            
-            # Convert frames back to binary
-            binary_data = self._frames_to_binary(data_frames)
-            
-            # Convert to bytes
-            if len(binary_data) % 8 != 0:
-                binary_data = binary_data[:-(len(binary_data) % 8)]
-            
-            encrypted_data = bytes(int(binary_data[i:i+8], 2) 
-                                 for i in range(0, len(binary_data), 8))
+            # Repair misread symbols before decryption
+            encrypted_data, self.last_fec_corrections = fec_decode(
+                encrypted_data, self.config.fec_symbols, self.config.fec_block_length
+            )
+            if self.last_fec_corrections:
+                print(f"🩹 FEC corrected {self.last_fec_corrections} byte(s)")
             
             # Decrypt data
-            decrypted_json = self._military_decrypt(encrypted_data)
-            payload = json.loads(decrypted_json)
+            payload = unpack_payload(self._military_decrypt(encrypted_data))
             
             # Validate expiry
             current_time = int(time.time() * 1000)
@@ -307,35 +665,141 @@ class RPatternCore:
             
         except Exception as e:
             print(f"❌ Decoding failed: {e}")
+            if blocks is not None and blocks.complete and not isinstance(e, StaleHeaderError):
+                # Every block verified yet decryption failed: stale blocks from another pattern
+                blocks.reset()
+            return None
+    
+    def _decode_chunk(self, stream: bytes, header: FormatHeader,
+                      chunks: Optional[ChunkAssembler]) -> Optional[str]:
+        """Open the record of one chunked sub-pattern and add it to the message being reassembled."""
+        self._check_header(header)
+        if self.config.crc_block_size:
+            # Chunks are small and cached once opened, so their CRC blocks are not kept across loops
+            stream = b''.join(split_block_crcs(stream, self.config.crc_block_size)[0])
+        record, self.last_fec_corrections = fec_decode(
+            stream, self.config.fec_symbols, self.config.fec_block_length
+        )
+        
+        chunks = chunks if chunks is not None else ChunkAssembler(self.chunk_secret)
+        chunks.add_record(record)
+        received, count = chunks.progress
+        print(f"🧩 Chunks received: {received}/{count or '?'}{' + manifest' if chunks.has_manifest else ''}")
+        if not chunks.complete or chunks.content != CONTENT_TEXT:
+            return None
+        
+        text = chunks.text()
+        print(f"✅ Successfully decoded {len(text)} characters from {count} chunk(s)")
+        return text
+    
+    def _sequential_bytes(self, frames: np.ndarray) -> Tuple[bytes, Optional[FormatHeader]]:
+        """Validate the security frames and read the data frames between them, plus the format header."""
+        if self.config.sequence_cells:
+            # Put frames back in loop order, whatever frame the capture started on
+            frames, missing = assemble_sequence(frames, self.palette, self.config.sequence_cells)
+            if len(missing):
+                print(f"⚠️ {len(missing)} frame(s) not captured, relying on FEC")
+        
+        # Validate frame structure
+        if len(frames) < 4:  # Need at least start + auth + data + end
+            raise ValueError("Invalid frame structure")
+        
+        # Check security frames
+        start_color = frames[0, 0, 0].astype(int)
+        end_color = frames[-1, 0, 0].astype(int)
+        
+        if not self._color_matches(start_color, self.SECURITY_FRAMES['start']):
+            raise ValueError("Invalid start frame")
+        
+        if not self._color_matches(end_color, self.SECURITY_FRAMES['end']):
+            raise ValueError("Invalid end frame")
+        
+        # Read and drop the format header frames after the start frame
+        header, frames = split_format_header(frames, self.config.sequence_cells, authenticated=True,
+                                             clock_cells=self.config.clock_cells,
+                                             calibrated=self.config.calibration)
+        payload_length = check_format(header, self.FORMAT_ID)
+        
+        # Classify against the palette as this camera sees it
+        palette = self.palette
+        if self.config.calibration:
+            palette, frames = split_calibration(frames, self.palette,
+                                                self.config.sequence_cells + self.config.clock_cells)
+        
+        # Extract data frames (skip security frames)
+        data_frames = frames[3:-1]  # Skip start, auth, data_marker, and end
+        
+        print(f"📊 Data frames: {len(data_frames)}")
+        
+        # Convert frames back to symbols, then bytes
+        symbols = self._frames_to_symbols(data_frames, palette)
+        encrypted_data = decode_symbols(symbols, self.config.colors, payload_length)
+        if self.config.encoding_mode == 'cell':
+            encrypted_data = strip_length_prefix(encrypted_data)
+        return encrypted_data, header
+    
+    def _check_header(self, header: Optional[FormatHeader]):
+        """
+        Check the signed expiry; with rolling refresh it is the only freshness check, so it is required.
+        
+        Raises:
+            StaleHeaderError: if the header has expired, or is unreadable with rolling refresh
+            ValueError: if the pattern was issued under another key
+        """
+        rolling = bool(self.config.refresh_interval)
+        if header is not None:
+            check_auth_header(header.auth, self.auth_key, required=rolling)
+        elif rolling:
+            raise StaleHeaderError("Freshness header unreadable")
+    
+    def _fresh_header(self, frames: np.ndarray) -> Optional[FormatHeader]:
+        """The format header of a raw capture, checked to be this core's."""
+        found = read_format_header(frames)
+        if found is None:
             return None
+        check_format(found[1], self.FORMAT_ID)
+        return found[1]
+    
+    def screen_capture(self, frames: FrameInput) -> Optional[AuthHeader]:
+        """
+        Check a sequential capture in progress from its header frames alone.
+        
+        Returns:
+            The verified auth header once it has been captured, else None
+        
+        Raises:
+            ValueError: if the pattern is expired, foreign or of another format
+        """
+        return screen_capture(frames, self.FORMAT_ID, self.auth_key)
+    
+    def _checked_bytes(self, stream: bytes, blocks: BlockCollector) -> bytes:
+        """Merge this capture's CRC blocks with the ones verified earlier."""
+        blocks.add_capture(stream)
+        verified, total = blocks.progress
+        print(f"🧱 CRC blocks verified: {verified}/{total}")
+        return blocks.data()
+    
+    def _fountain_bytes(self, frames: np.ndarray, fountain: FountainDecoder) -> bytes:
+        """Feed every droplet in the capture to the fountain decoder."""
+        for symbols in split_at_markers(frames, self.palette, self.SECURITY_FRAMES['start'],
+                                        self.config.encoding_mode):
+            fountain.add_packet(decode_symbols(symbols, self.config.colors))
+        
+        received, needed = fountain.progress
+        print(f"💧 Fountain droplets: {received}/{needed}")
+        return fountain.data()
     
     def _color_matches(self, color1: Tuple[int, int, int], color2: Tuple[int, int, int], threshold: int = 30) -> bool:
         """Check if two colors match within threshold."""
         return all(abs(a - b) <= threshold for a, b in zip(color1, color2))
     
-    def _frames_to_binary(self, frames: List) -> str:
-        """Convert color frames back to binary data."""
-        binary_data = ""
-        
-        for frame in frames:
-            # Get center color
-            center_color = frame[self.config.grid_size//2][self.config.grid_size//2]
-            
-            # Find closest matching color
-            min_distance = float('inf')
-            best_bits = '000'
-            
-            for bits, color in self.REVOLUTIONARY_COLORS.items():
-                distance = sum((a-b)**2 for a, b in zip(color, center_color))
-                if distance < min_distance:
-                    min_distance = distance
-                    best_bits = bits
-            
-            binary_data += best_bits
-        
-        return binary_data
+    def _frames_to_symbols(self, frames: np.ndarray, palette: np.ndarray) -> np.ndarray:
+        """Convert color frames back to palette indices (per frame or per cell)."""
+        symbols, _ = frames_to_symbols(frames, palette, self.config.encoding_mode,
+                                       self.config.sequence_cells, self.config.clock_cells)
+        return symbols
     
-    def _military_decrypt(self, encrypted_data: bytes) -> str:
+    def _military_decrypt(self, encrypted_data: bytes) -> bytes:
         """Military-grade decryption."""
         if not hasattr(self, '_encryption_data'):
             return self._fallback_decrypt(encrypted_data)
@@ -355,9 +819,9 @@ class RPatternCore:
             self._encryption_data['tag']
         )
         
-        return plaintext.decode('utf-8')
+        return plaintext
     
-    def _fallback_decrypt(self, encrypted_data: bytes) -> str:
+    def _fallback_decrypt(self, encrypted_data: bytes) -> bytes:
         """Fallback decryption."""
         key1 = hashlib.sha256(self.session_id.encode()).digest()
         key2 = hashlib.sha256(f"{self.session_id}_salt".encode()).digest()
@@ -368,10 +832,10 @@ class RPatternCore:
             key = key1 if i % 2 == 0 else key2
             decrypted.append(byte ^ key[i % len(key)])
         
-        return bytes(decrypted).decode('utf-8')
+        return bytes(decrypted)
 
 
-def create_revolutionary_pattern(data: str, expiry_seconds: int = 30, security_level: str = "MILITARY") -> Dict[str, Any]:
+def create_revolutionary_pattern(data: str, expiry_seconds: int = 30, security_level: str = "MILITARY") -> Pattern:
     """
     Create a revolutionary RPattern quickly.
     
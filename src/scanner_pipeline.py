@@ -0,0 +1,257 @@
+"""
+RPattern Scanner Pipeline - Threaded Capture and Processing
+Creator: Rahul Chaube 🚀
+
+The scanners used to read the camera, detect the pattern, extract its
+colors, decode, draw the overlay and show it one after the other on one
+thread. Whenever a stage was slow the camera kept filling its own buffer,
+so every later frame was already stale when it was read.
+
+ScanPipeline runs each stage on its own thread:
+    
+    capture -> [detect] -> [extract] -> [decode] -> main thread (overlay, imshow, keys)
+
+Stages are linked by bounded FrameQueues with a drop policy:
+    
+    latest  a full queue drops its oldest frame: stages always work on the
+            newest frames and the camera is read as fast as it delivers
+    queue   a full queue blocks the stage feeding it, back to the camera:
+            every frame is processed, in order, at the cost of latency
+
+One thread per stage keeps frames in order (the decoders are stateful),
+while OpenCV and NumPy release the GIL, so on a multi-core machine the
+stages overlap and the processed frame rate follows the camera's instead
+of the sum of the stage times. The output queue always keeps the latest
+frame: the display only needs the newest one. Per-stage queue depth,
+drops and frame rates are available from stats().
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+DROP_POLICIES = ('latest', 'queue')
+DEFAULT_QUEUE_SIZE = 2  # frames waiting per stage: enough to absorb jitter, too few to go stale
+
+
+def check_drop_policy(policy: str):
+    """Validate a queue drop policy."""
+    if policy not in DROP_POLICIES:
+        raise ValueError(f"Drop policy must be one of {DROP_POLICIES}, got {policy!r}")
+
+
+class FrameQueue:
+    """Bounded, closable frame queue with a drop policy."""
+    
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE, policy: str = 'latest'):
+        """
+        Create an empty queue.
+        
+        Args:
+            maxsize: Frames the queue holds
+            policy: 'latest' (drop the oldest frame when full) or 'queue' (block when full)
+        
+        Raises:
+            ValueError: on an unknown policy or a size below 1
+        """
+        check_drop_policy(policy)
+        if maxsize < 1:
+            raise ValueError(f"Queue size must be at least 1, got {maxsize}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.high_water = 0  # deepest the queue has been
+        self.closed = False
+        self._items = deque()
+        self._lock = threading.Condition()
+    
+    @property
+    def depth(self) -> int:
+        """Frames waiting."""
+        return len(self._items)
+    
+    def put(self, item: Any) -> bool:
+        """
+        Add a frame, dropping the oldest or waiting for room when full.
+        
+        Returns:
+            False if the queue was closed
+        """
+        with self._lock:
+            while len(self._items) >= self.maxsize and not self.closed:
+                if self.policy == 'latest':
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    self._lock.wait()
+            if self.closed:
+                return False
+            self._items.append(item)
+            self.high_water = max(self.high_water, len(self._items))
+            self._lock.notify_all()
+            return True
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Take the oldest frame.
+        
+        Args:
+            timeout: Seconds to wait for one (None = until one arrives or the queue closes)
+        
+        Returns:
+            The frame, or None on timeout or once the queue is closed and empty
+        """
+        with self._lock:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._items and not self.closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._lock.wait(remaining)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._lock.notify_all()
+            return item
+    
+    def close(self):
+        """Wake every waiting thread; puts fail from now on, gets drain what is left."""
+        with self._lock:
+            self.closed = True
+            self._lock.notify_all()
+
+
+class ScanPipeline:
+    """Camera capture and processing stages, each on its own thread."""
+    
+    def __init__(self, read: Callable[[], Tuple[bool, Any]],
+                 stages: Sequence[Tuple[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]]],
+                 queue_size: int = DEFAULT_QUEUE_SIZE, drop_policy: str = 'latest'):
+        """
+        Set up the pipeline (threads start with start()).
+        
+        Args:
+            read: Camera read function returning (ok, frame), e.g. cv2.VideoCapture.read
+            stages: (name, function) pairs run in order; each function takes and
+                returns an item dict ('frame', 'timestamp', 'index' and whatever
+                earlier stages added), or returns None to drop the item
+            queue_size: Frames waiting before each stage
+            drop_policy: 'latest' or 'queue', for the queues in front of the stages
+        """
+        check_drop_policy(drop_policy)
+        self.read = read
+        self.stages = list(stages)
+        self.queues = [FrameQueue(queue_size, drop_policy) for _ in self.stages]
+        self.output = FrameQueue(queue_size, 'latest')
+        self.processed = [0] * len(self.stages)
+        self.captured = 0
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._started = 0.0
+    
+    @property
+    def running(self) -> bool:
+        """True until capture ends, a stage fails or stop() is called."""
+        return bool(self._threads) and not self._stop.is_set() and any(t.is_alive() for t in self._threads)
+    
+    def start(self) -> 'ScanPipeline':
+        """Start the capture and stage threads."""
+        self._started = time.monotonic()
+        self._threads = [threading.Thread(target=self._capture, name='capture', daemon=True)]
+        for index, (name, _) in enumerate(self.stages):
+            self._threads.append(threading.Thread(target=self._run_stage, args=(index,), name=name, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+    
+    def stop(self, timeout: float = 1.0):
+        """Stop every thread and wait for them (a camera read in progress is given `timeout` seconds)."""
+        self._stop.set()
+        for queue in self.queues + [self.output]:
+            queue.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+    
+    def latest(self, timeout: float = 0.05) -> Optional[Dict[str, Any]]:
+        """
+        Newest processed item, skipping any older ones still waiting.
+        
+        Returns:
+            The item, or None if nothing new arrived within `timeout` seconds
+        """
+        item = self.output.get(timeout)
+        while item is not None and self.output.depth:
+            item = self.output.get(0)
+        return item
+    
+    def _capture(self):
+        """Capture thread: read the camera as fast as it delivers."""
+        queue = self.queues[0] if self.queues else self.output
+        try:
+            while not self._stop.is_set():
+                ok, frame = self.read()
+                if not ok:
+                    print("❌ Failed to read frame")
+                    break
+                self.captured += 1
+                if not queue.put({'frame': frame, 'timestamp': time.time(), 'index': self.captured - 1}):
+                    break
+        except Exception as e:
+            self.error = e
+            print(f"❌ Capture failed: {e}")
+        finally:
+            queue.close()
+    
+    def _run_stage(self, index: int):
+        """Stage thread: process items in order until its input closes."""
+        name, function = self.stages[index]
+        target = self.queues[index + 1] if index + 1 < len(self.queues) else self.output
+        try:
+            while True:
+                item = self.queues[index].get()
+                if item is None:
+                    break
+                item = function(item)
+                self.processed[index] += 1
+                if item is not None and not target.put(item):
+                    break
+        except Exception as e:
+            self.error = e
+            print(f"❌ Pipeline stage '{name}' failed: {e}")
+            self._stop.set()
+            for queue in self.queues:
+                queue.close()
+        finally:
+            target.close()
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-stage counters.
+        
+        Returns:
+            {'capture': {...}, <stage name>: {...}, ...}: 'fps' (items per second
+            since start), and for stages 'depth' / 'dropped' / 'high_water' of the
+            queue in front of them
+        """
+        elapsed = max(time.monotonic() - self._started, 1e-9) if self._started else 0.0
+        stats = {'capture': {'frames': self.captured, 'fps': self.captured / elapsed if elapsed else 0.0}}
+        for (name, _), queue, processed in zip(self.stages, self.queues, self.processed):
+            stats[name] = {
+                'frames': processed,
+                'fps': processed / elapsed if elapsed else 0.0,
+                'depth': queue.depth,
+                'dropped': queue.dropped,
+                'high_water': queue.high_water,
+            }
+        return stats
+    
+    def summary(self) -> str:
+        """One-line queue depths and frame rates, for scanner overlays."""
+        stats = self.stats()
+        depths = ' '.join(f"{name}:{stats[name]['depth']}" for name, _ in self.stages)
+        last = stats[self.stages[-1][0]]['fps'] if self.stages else stats['capture']['fps']
+        return f"Queues {depths} | {stats['capture']['fps']:.1f}/{last:.1f} fps"
@@ -0,0 +1,269 @@
+"""
+RPattern Scanner Vision - Shared Region Detection and Sampling Helpers
+Creator: Rahul Chaube 🚀
+
+Every scanner ran its full-frame detector (Canny + findContours, HSV
+masking, or adaptive thresholding + morphology + color clustering) on
+every camera frame, even with the pattern found and standing still.
+
+RegionTracker wraps a scanner's detector with a lock-on mode:
+    
+    - searching: the detector runs on the whole frame until it finds the
+      pattern, which locks the tracker on
+    - locked: the region is predicted from its last position and velocity
+      (constant velocity model), and the detector only runs on a search
+      window around the prediction, a fraction of the frame
+    - a cheap confidence check accepts what the window finds only if it
+      has as many regions as before, each close to its predicted size;
+      otherwise the frame is a miss and the prediction is kept, so a dark
+      marker frame does not drop the lock
+    - after max_misses misses in a row the lock is lost and the next
+      detection is a full-frame one again
+
+Full-frame searches (the first one and every one after a lost lock) run
+on a detection pyramid, detect_multiscale():
+    
+    - the detector runs on the frame downscaled by a factor (a 0.5 level
+      of a 720p frame is 640x360), so its cost falls with the square of
+      the factor; the detectors scale their pixel size limits to match
+    - each candidate is then refined at full resolution, by running the
+      detector again on just the candidate area plus a few pixels, so the
+      corners are as exact as a full-resolution search would make them
+
+sample_grid() samples the cells of a found pattern for every scanner in
+one array operation: the ROI is reshaped to (grid, cell h, grid, cell w,
+3), the inner part of every cell is sliced out (with a stride on large
+cells) and all cells are averaged at once, instead of a Python loop of
+per-cell slices, conversions and means.
+"""
+
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+Region = Tuple[int, int, int, int]  # x, y, width, height
+
+TRACK_MARGIN = 0.5  # search window margin around the predicted regions, as a fraction of their size
+TRACK_MAX_MISSES = 5  # missed frames in a row before the lock is lost (marker frames, motion blur)
+TRACK_MAX_SCALE_CHANGE = 0.3  # largest relative size change of a region between two frames
+DETECTION_SCALE = 0.5  # pyramid level full-frame searches run on, as a fraction of the camera resolution
+REFINE_MARGIN = 4  # pyramid-level pixels around a candidate searched again at full resolution
+CELL_MARGIN = 0.2  # inset of every cell side left out of its color, as a fraction of the cell size
+CELL_SAMPLES = 16  # pixels sampled per cell side at most: larger cells are sampled with a stride
+
+
+def single_region(detect: Callable[..., Optional[Region]]) -> Callable[..., List[Region]]:
+    """Adapt a detector returning one region or None to the list form RegionTracker expects."""
+    def detect_regions(frame: np.ndarray, *args) -> List[Region]:
+        region = detect(frame, *args)
+        return [region] if region else []
+    return detect_regions
+
+
+def mirror_region(region: Optional[Region], width: int) -> Optional[Region]:
+    """
+    Region as it appears in the frame mirrored left to right.
+    
+    Scanners show a mirrored (selfie) view, but detect and sample the frame
+    as captured: a mirrored grid has every row reversed, which scrambles
+    cell-mode data and the index digits in the last cells.
+    """
+    if not region:
+        return region
+    x, y, w, h = region
+    return width - x - w, y, w, h
+
+
+def check_detection_scale(scale: float):
+    """Validate a pyramid detection scale."""
+    if not 0 < scale <= 1:
+        raise ValueError(f"Detection scale must be in (0, 1], got {scale}")
+
+
+def _overlap(a: Region, b: Region) -> int:
+    """Intersection area of two regions."""
+    w = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    h = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    return max(0, w) * max(0, h)
+
+
+def detect_multiscale(frame: np.ndarray, detect: Callable[[np.ndarray, float], List[Region]],
+                      scale: float = DETECTION_SCALE, margin: int = REFINE_MARGIN) -> List[Region]:
+    """
+    Run a detector on a downscaled pyramid level, then refine at full resolution.
+    
+    Args:
+        frame: Full-resolution (BGR) camera frame
+        detect: Detector taking an image and the scale of that image relative to
+            the camera (for its pixel size limits), returning regions in image pixels
+        scale: Pyramid level to search, as a fraction of the frame size (1 = no pyramid)
+        margin: Pyramid-level pixels around each candidate searched again at full resolution
+    
+    Returns:
+        Regions in full-resolution pixels, in the detector's order
+    
+    Raises:
+        ValueError: on a scale outside (0, 1]
+    """
+    check_detection_scale(scale)
+    if scale == 1:
+        return list(detect(frame, 1.0))
+    
+    height, width = frame.shape[:2]
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    level = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    
+    regions = []
+    for x, y, w, h in detect(level, scale):
+        candidate = (int(x / scale), int(y / scale), int(round(w / scale)), int(round(h / scale)))
+        pad = int(np.ceil(margin / scale))
+        left, top = max(0, candidate[0] - pad), max(0, candidate[1] - pad)
+        right = min(width, candidate[0] + candidate[2] + pad)
+        bottom = min(height, candidate[1] + candidate[3] + pad)
+        
+        # The candidate area at full resolution: exact corners at a fraction of the full-frame cost
+        found = [(rx + left, ry + top, rw, rh) for rx, ry, rw, rh in detect(frame[top:bottom, left:right], 1.0)]
+        found = [region for region in found if _overlap(region, candidate)]
+        regions.append(max(found, key=lambda region: _overlap(region, candidate)) if found else candidate)
+    return regions
+
+
+def sample_grid(roi: np.ndarray, grid_size: int, margin: float = CELL_MARGIN,
+                samples: int = CELL_SAMPLES) -> Optional[np.ndarray]:
+    """
+    Mean color of every cell of a pattern image, all cells at once.
+    
+    Args:
+        roi: BGR image of the pattern, cropped to its region
+        grid_size: Cells per side
+        margin: Inset of every cell side left out, as a fraction of the cell
+            size, so neighbouring cells do not bleed into the average
+        samples: Pixels sampled per cell side at most (0 = every pixel)
+    
+    Returns:
+        (grid, grid, 3) uint8 array of RGB colors, or None if the image is
+        smaller than the grid
+    """
+    cell_height, cell_width = roi.shape[0] // grid_size, roi.shape[1] // grid_size
+    if not cell_height or not cell_width:
+        return None
+    
+    cells = roi[:grid_size * cell_height, :grid_size * cell_width].reshape(
+        grid_size, cell_height, grid_size, cell_width, roi.shape[2])
+    inset_y, inset_x = int(cell_height * margin), int(cell_width * margin)
+    if 2 * inset_y >= cell_height or 2 * inset_x >= cell_width:
+        inset_y = inset_x = 0  # cells too small for an inset
+    step_y = max(1, (cell_height - 2 * inset_y) // samples) if samples else 1
+    step_x = max(1, (cell_width - 2 * inset_x) // samples) if samples else 1
+    inner = cells[:, inset_y:cell_height - inset_y:step_y, :, inset_x:cell_width - inset_x:step_x]
+    
+    # Rows first, then columns: whole pixel rows are added at a time, far faster than one mean over both
+    sums = inner.sum(axis=1, dtype=np.uint32).sum(axis=2)
+    return (sums / (inner.shape[1] * inner.shape[3]))[..., ::-1].astype(np.uint8)
+
+
+class RegionTracker:
+    """Lock on to detected pattern regions and re-verify them in a small search window."""
+    
+    def __init__(self, detect: Callable[[np.ndarray], List[Region]], margin: float = TRACK_MARGIN,
+                 max_misses: int = TRACK_MAX_MISSES, max_scale_change: float = TRACK_MAX_SCALE_CHANGE,
+                 full_detect: Optional[Callable[[np.ndarray], List[Region]]] = None):
+        """
+        Wrap a full-frame detector.
+        
+        Args:
+            detect: Detector returning the pattern regions of a (BGR) frame
+            margin: Search window margin around the predicted regions, as a fraction of their size
+            max_misses: Missed frames in a row before the lock is lost
+            max_scale_change: Largest relative size change accepted between two frames
+            full_detect: Detector for full-frame searches, e.g. a detect_multiscale()
+                wrapper (default: detect; search windows are already small)
+        """
+        self.detect = detect
+        self.full_detect = full_detect or detect
+        self.margin = margin
+        self.max_misses = max_misses
+        self.max_scale_change = max_scale_change
+        self.full_detections = 0  # frames the detector ran on the whole frame
+        self.tracked_frames = 0  # frames it only ran on a search window
+        self.reset()
+    
+    def reset(self):
+        """Drop the lock: the next frame runs a full-frame detection."""
+        self.regions: List[Region] = []
+        self.velocity = np.zeros(2)
+        self.misses = 0
+        self.window: Optional[Region] = None  # last search window, for overlays
+    
+    @property
+    def locked(self) -> bool:
+        """True while regions are being tracked."""
+        return bool(self.regions)
+    
+    def update(self, frame: np.ndarray) -> List[Region]:
+        """
+        Pattern regions of the next camera frame.
+        
+        Returns:
+            Detected (or, on a miss while locked, predicted) regions; empty if none
+        """
+        if not self.regions:
+            return self._full_detection(frame)
+        
+        predicted = [self._shift(region, self.velocity) for region in self.regions]
+        self.window = self._search_window(predicted, frame.shape)
+        x, y, w, h = self.window
+        self.tracked_frames += 1
+        found = []
+        if w and h:
+            found = [(rx + x, ry + y, rw, rh) for rx, ry, rw, rh in self.detect(frame[y:y + h, x:x + w])]
+        
+        if self._consistent(found, predicted):
+            shift = np.mean([np.subtract(new[:2], old[:2]) for new, old in zip(found, self.regions)], axis=0)
+            self.velocity = 0.5 * self.velocity + 0.5 * shift
+            self.regions, self.misses = found, 0
+            return found
+        
+        self.misses += 1
+        if self.misses > self.max_misses:
+            self.reset()
+            return self._full_detection(frame)
+        self.regions = predicted  # coast on the motion model
+        return predicted
+    
+    def _full_detection(self, frame: np.ndarray) -> List[Region]:
+        """Run the detector on the whole frame and lock on to what it finds."""
+        self.full_detections += 1
+        self.regions = list(self.full_detect(frame))
+        self.velocity = np.zeros(2)
+        self.misses = 0
+        self.window = None
+        return self.regions
+    
+    @staticmethod
+    def _shift(region: Region, velocity: np.ndarray) -> Region:
+        """Region moved by the velocity (pixels per frame)."""
+        x, y, w, h = region
+        return int(round(x + velocity[0])), int(round(y + velocity[1])), w, h
+    
+    def _search_window(self, regions: Sequence[Region], shape: Tuple[int, ...]) -> Region:
+        """Bounding box of the regions plus the margin, clamped to the frame."""
+        left = min(x for x, _, _, _ in regions)
+        top = min(y for _, y, _, _ in regions)
+        right = max(x + w for x, _, w, _ in regions)
+        bottom = max(y + h for _, y, _, h in regions)
+        pad = int(self.margin * max(max(w, h) for _, _, w, h in regions))
+        height, width = shape[:2]
+        left, top = max(0, left - pad), max(0, top - pad)
+        right, bottom = min(width, right + pad), min(height, bottom + pad)
+        return left, top, max(0, right - left), max(0, bottom - top)
+    
+    def _consistent(self, found: Sequence[Region], predicted: Sequence[Region]) -> bool:
+        """Cheap confidence check: same region count, each close to its predicted size."""
+        if not found or len(found) != len(predicted):
+            return False
+        low, high = 1 - self.max_scale_change, 1 + self.max_scale_change
+        return all(low <= w / pw <= high and low <= h / ph <= high
+                   for (_, _, w, h), (_, _, pw, ph) in zip(found, predicted))
@@ -0,0 +1,120 @@
+"""
+RPattern Symbol Clock - Symbol Boundaries From the Pattern Itself
+Creator: Rahul Chaube 🚀
+
+Scanners used to keep every camera frame and rely on the display's
+wall-clock frame_duration (0.3-0.5 s) being long enough for repeats to
+be harmless. That capped the display at 2-3 symbols per second.
+
+Clocked patterns reserve a few cells, just before the index cells, that
+show the low bits of the frame index in black and white
+(pattern_codec.CLOCK_PALETTE). Cell 0 toggles on every symbol, so a
+scanner sees exactly where one symbol ends and the next begins. A 60 fps
+camera can then follow a display running at 10-20 symbols per second:
+
+    - camera frames caught mid-transition show grey clock cells and are
+      skipped
+    - the remaining views of one symbol are fused with a per-cell median,
+      which also out-votes a view torn by a rolling shutter
+    - with two or more clock cells, a jump in the clock value counts the
+      symbols the camera missed entirely
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+from pattern_codec import CLOCK_PALETTE, classify_cells
+
+
+# Clock cells further than this from pure black or white are mid-transition
+CLOCK_MAX_DISTANCE = 120
+
+
+class SymbolClock:
+    """Collapse an oversampled camera stream into one grid per displayed symbol."""
+    
+    def __init__(self, clock_cells: int, sequence_cells: int = 0,
+                 max_distance: float = CLOCK_MAX_DISTANCE):
+        """
+        Set up a clock reader for one pattern layout.
+        
+        Args:
+            clock_cells: Clock cells per frame (must match the generator)
+            sequence_cells: Index cells after the clock cells
+            max_distance: Largest color distance of a settled clock cell
+        
+        Raises:
+            ValueError: if clock_cells is not positive
+        """
+        if clock_cells < 1:
+            raise ValueError(f"SymbolClock needs at least one clock cell, got {clock_cells}")
+        self.clock_cells = clock_cells
+        self.sequence_cells = sequence_cells
+        self.max_distance = max_distance
+        self.reset()
+    
+    def reset(self):
+        """Forget the current symbol and the statistics."""
+        self._value: Optional[int] = None
+        self._views: List[np.ndarray] = []
+        self.symbols = 0  # symbols emitted so far
+        self.dropped = 0  # symbols skipped over, as told by clock jumps
+        self.blended = 0  # camera frames rejected as mid-transition
+    
+    def read(self, grid: np.ndarray) -> Optional[int]:
+        """
+        Clock value shown in one camera frame.
+        
+        Returns:
+            The value of the clock bits, or None if any clock cell is mid-transition
+        """
+        cells = np.asarray(grid).reshape(1, -1, 3)
+        end = cells.shape[1] - self.sequence_cells
+        bits, distances = classify_cells(cells[:, end - self.clock_cells:end], CLOCK_PALETTE)
+        if distances.max() > self.max_distance:
+            return None
+        return int(bits[0].astype(np.int64) @ (1 << np.arange(self.clock_cells)))
+    
+    def feed(self, grid) -> Optional[np.ndarray]:
+        """
+        Add one camera frame.
+        
+        Args:
+            grid: Sampled (grid, grid, 3) RGB colors of the pattern
+        
+        Returns:
+            The fused grid of the previous symbol when this frame starts a
+            new one, else None
+        """
+        grid = np.asarray(grid, dtype=np.uint8)
+        value = self.read(grid)
+        if value is None:
+            self.blended += 1
+            return None
+        
+        if value == self._value:
+            self._views.append(grid)
+            return None
+        
+        symbol = self.flush()
+        if self._value is not None:
+            # Clock runs modulo 2**clock_cells, so only short gaps can be counted
+            self.dropped += (value - self._value) % (1 << self.clock_cells) - 1
+        self._value = value
+        self._views = [grid]
+        return symbol
+    
+    def flush(self) -> Optional[np.ndarray]:
+        """
+        Emit the symbol still being collected, e.g. when the capture ends.
+        
+        Returns:
+            Its fused grid, or None if no frame of it was seen
+        """
+        if not self._views:
+            return None
+        symbol = np.median(np.stack(self._views), axis=0).astype(np.uint8)
+        self._views = []
+        self.symbols += 1
+        return symbol
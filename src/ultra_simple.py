@@ -177,11 +177,12 @@ class UltraSimpleLauncher:
             if not os.path.exists(script_path):
                 self._create_simple_display_script()
             
-            # Save pattern data for the display script
+            # Save pattern data for the display script (frames as legacy lists)
             import json
+            from pattern_codec import legacy_frames
             pattern_file = os.path.join(os.path.dirname(__file__), "current_pattern.json")
             with open(pattern_file, 'w') as f:
-                json.dump(pattern, f)
+                json.dump({**pattern, 'frames': legacy_frames(pattern)}, f)
             
             # Launch display
             subprocess.Popen([sys.executable, script_path], 
@@ -0,0 +1,124 @@
+"""
+RPattern Unified Decoder - One Entry Point for Every Core
+Creator: Rahul Chaube 🚀
+
+Scanners used to be tied to one core and had to guess the layout of
+whatever was on screen. The format header shown after the start marker
+names the core, so the unified decoder reads it once and hands the
+capture straight to the right decoder - a dict lookup instead of trying
+every core in turn.
+
+The header also gives the exact loop length, so a scanner can size its
+frame buffer up front and stop capturing as soon as the loop is in.
+
+The secure cores derive their keys per instance, so they must be
+registered; the basic v1 core is available out of the box.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from format_header import (
+    FormatHeader, read_format_header, FORMAT_RPATTERN, FORMAT_REVOLUTIONARY,
+    FORMAT_HYPER_SECURE, FORMAT_BULLETPROOF
+)
+from pattern_codec import FrameInput, as_frame_array
+from rpattern_core import RPattern
+
+
+# Decode method of the core registered for each format id
+DECODE_METHODS = {
+    FORMAT_RPATTERN: 'decode_frames',
+    FORMAT_REVOLUTIONARY: 'decode_revolutionary_pattern',
+    FORMAT_HYPER_SECURE: 'decode_hyper_secure_frames',
+    FORMAT_BULLETPROOF: 'decode_bulletproof_frames',
+}
+
+
+class UnifiedDecoder:
+    """Dispatch captures to the core named by their format header."""
+    
+    def __init__(self, *cores):
+        """
+        Register the cores whose patterns should be decoded.
+        
+        Args:
+            cores: Core instances (RPattern, RPatternCore, HyperSecureRPattern,
+                BulletproofRPattern); a default RPattern handles v1 patterns
+                unless one is given
+        """
+        self.cores: Dict[int, object] = {}
+        self.last_header: Optional[FormatHeader] = None
+        self.register(RPattern())
+        for core in cores:
+            self.register(core)
+    
+    def register(self, core):
+        """
+        Route patterns of the core's format to it, replacing any earlier core.
+        
+        Raises:
+            ValueError: if the object is not a known core
+        """
+        format_id = getattr(core, 'FORMAT_ID', None)
+        if format_id not in DECODE_METHODS:
+            raise ValueError(f"{type(core).__name__} is not an RPattern core")
+        self.cores[format_id] = core
+    
+    def read_header(self, frames: FrameInput) -> Optional[FormatHeader]:
+        """The format header of the first complete loop start in the capture, or None."""
+        found = read_format_header(frames)
+        return found[1] if found else None
+    
+    def frame_buffer(self, header: FormatHeader) -> np.ndarray:
+        """Pre-sized (frames, grid, grid, 3) buffer holding exactly one loop."""
+        return np.zeros((header.total_frames, header.grid_size, header.grid_size, 3), dtype=np.uint8)
+    
+    def frames_needed(self, frames: FrameInput) -> Optional[int]:
+        """
+        Frames still to capture before the first full loop is in.
+        
+        Returns:
+            0 once the capture holds a whole loop from its start marker,
+            None while no format header has been seen yet
+        """
+        frames = as_frame_array(frames)
+        found = read_format_header(frames)
+        if found is None:
+            return None
+        start, header = found
+        return max(0, start + header.total_frames - len(frames))
+    
+    def decode(self, frames: FrameInput) -> Optional[str]:
+        """
+        Decode a capture with the core its format header names.
+        
+        Args:
+            frames: Capture containing at least one loop start and its header
+        
+        Returns:
+            Decoded data string, or None if no header was found, the format
+            has no registered core, the loop is incomplete or decoding fails
+        """
+        frames = as_frame_array(frames)
+        found = read_format_header(frames)
+        if found is None:
+            print("❌ No format header in capture")
+            return None
+        start, header = found
+        self.last_header = header
+        
+        core = self.cores.get(header.format_id)
+        if core is None:
+            print(f"❌ No core registered for format id {header.format_id}")
+            return None
+        
+        if not header.sequence_cells:
+            # Unsequenced loops must be cut at the start marker to their exact length
+            if len(frames) < start + header.total_frames:
+                print(f"⏳ Capture incomplete: {len(frames) - start}/{header.total_frames} frames")
+                return None
+            frames = frames[start:start + header.total_frames]
+        
+        return getattr(core, DECODE_METHODS[header.format_id])(frames)
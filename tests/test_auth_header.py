@@ -0,0 +1,108 @@
+"""
+Test suite for the authenticated cleartext expiry header
+Author: Rahul Chaube
+"""
+
+import unittest
+from unittest import mock
+import time
+import sys
+import os
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from auth_header import AuthHeader, check_auth_header, derive_auth_key, AUTH_HEADER_SIZE
+from hyper_secure_core import HyperSecureRPattern
+from bulletproof_core import BulletproofRPattern
+from rpattern_revolutionary import RPatternCore
+
+
+class TestAuthHeader(unittest.TestCase):
+    """Test cases for sealing and checking auth headers"""
+    
+    def setUp(self):
+        """Two unrelated issuers"""
+        self.key = derive_auth_key(b"issuer one")
+        self.other_key = derive_auth_key(b"issuer two")
+    
+    def test_seal_round_trip(self):
+        """Test a sealed header opens with its key and nothing else"""
+        header = AuthHeader.issue(self.key, 1_900_000_000.2)
+        sealed = header.seal(self.key)
+        self.assertEqual(len(sealed), AUTH_HEADER_SIZE)
+        self.assertEqual(AuthHeader.open(sealed, self.key), header)
+        self.assertEqual(header.expires, 1_900_000_001)
+        
+        with self.assertRaises(ValueError):
+            AuthHeader.open(sealed, self.other_key)
+        tampered = bytearray(sealed)
+        tampered[5] ^= 0x01
+        with self.assertRaises(ValueError):
+            AuthHeader.open(bytes(tampered), self.key)
+    
+    def test_expiry_and_grace(self):
+        """Test expired headers are rejected unless inside the grace period"""
+        sealed = AuthHeader.issue(self.key, 1000).seal(self.key)
+        self.assertEqual(check_auth_header(sealed, self.key, now=990).expires, 1000)
+        self.assertIsNotNone(check_auth_header(sealed, self.key, grace=30, now=1020))
+        with self.assertRaises(ValueError):
+            check_auth_header(sealed, self.key, now=1020)
+        with self.assertRaises(ValueError):
+            check_auth_header(sealed, self.other_key, now=990)
+        
+        # A bad MAC may just be a misread: left to the payload checks
+        misread = sealed[:-1] + bytes([sealed[-1] ^ 0xFF])
+        self.assertIsNone(check_auth_header(misread, self.key, now=990))
+
+
+class TestEarlyRejection(unittest.TestCase):
+    """Test cases for rejecting captures from their header frames"""
+    
+    def test_hyper_secure_round_trip(self):
+        """Test HyperSecure patterns decode now the expiry no longer rides on a 24-bit color"""
+        core = HyperSecureRPattern()
+        pattern = core.encode_hyper_secure_data("https://rahulcodes.in/secure")
+        self.assertEqual(core.decode_hyper_secure_frames(pattern.frames), "https://rahulcodes.in/secure")
+        
+        head = pattern.frames[:1 + pattern.header_frames]
+        self.assertGreaterEqual(core.screen_capture(head).expires * 1000, pattern["expiry"])
+        self.assertIsNone(core.screen_capture(head[:-1]))
+    
+    def test_expired_and_foreign_captures(self):
+        """Test the header frames alone are enough to abandon a capture"""
+        core = HyperSecureRPattern()
+        pattern = core.encode_hyper_secure_data("stale")
+        head = pattern.frames[:1 + pattern.header_frames]
+        
+        with mock.patch('auth_header.time') as clock:
+            clock.time.return_value = time.time() + 60
+            with self.assertRaises(ValueError):
+                core.screen_capture(head)
+            self.assertIsNone(core.decode_hyper_secure_frames(pattern.frames))
+        with self.assertRaises(ValueError):
+            HyperSecureRPattern().screen_capture(head)
+        
+        bulletproof = BulletproofRPattern()
+        pattern = bulletproof.encode_bulletproof_data("https://rahulcodes.in")
+        with self.assertRaises(ValueError):
+            BulletproofRPattern().screen_capture(pattern.frames)
+        with self.assertRaises(ValueError):
+            core.screen_capture(pattern.frames)  # another core's format
+    
+    def test_decoder_built_from_issuer_keys(self):
+        """Test a decoder built apart from the generator accepts its patterns given the generator's keys"""
+        core = HyperSecureRPattern()
+        pattern = core.encode_hyper_secure_data("https://rahulcodes.in/issuer")
+        decoder = HyperSecureRPattern(session_salt=core.session_salt)
+        self.assertEqual(decoder.decode_hyper_secure_frames(pattern.frames), "https://rahulcodes.in/issuer")
+        
+        revolutionary = RPatternCore()
+        head = revolutionary.encode_revolutionary_pattern("https://rahulcodes.in/issuer").frames
+        self.assertIsNotNone(RPatternCore(auth_key=revolutionary.auth_key).screen_capture(head))
+        with self.assertRaises(ValueError):
+            RPatternCore().screen_capture(head)
+
+
+if __name__ == '__main__':
+    unittest.main()
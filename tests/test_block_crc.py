@@ -0,0 +1,84 @@
+"""
+Test suite for per-block CRCs and selective recapture
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from block_crc import BlockCollector, add_block_crcs, split_block_crcs, block_spans, BLOCK_CRC
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+
+
+class TestBlockCRC(unittest.TestCase):
+    """Test cases for framing and checking CRC blocks"""
+    
+    def test_damage_is_localized(self):
+        """Test a flipped byte only fails the block it landed in"""
+        data = os.urandom(100)
+        framed = bytearray(add_block_crcs(data, 32))
+        self.assertEqual(len(framed), len(data) + 4 * BLOCK_CRC.size)
+        
+        framed[40] ^= 0x01
+        blocks, valid = split_block_crcs(bytes(framed), 32)
+        self.assertEqual(valid.tolist(), [True, False, True, True])
+        self.assertEqual(b''.join(blocks[2:]), data[64:])
+    
+    def test_blocks_are_bound_to_their_index(self):
+        """Test a block read at the wrong position fails its CRC"""
+        framed = add_block_crcs(bytes(64), 32)
+        stride = 32 + BLOCK_CRC.size
+        swapped = framed[stride:] + framed[:stride]
+        
+        self.assertFalse(split_block_crcs(swapped, 32)[1].any())
+        self.assertEqual(add_block_crcs(b"abc", 0), b"abc")
+        with self.assertRaises(ValueError):
+            block_spans(35, 32)
+    
+    def test_collector_merges_loops(self):
+        """Test verified blocks are kept and only bad ones are replaced"""
+        data = os.urandom(100)
+        framed = add_block_crcs(data, 32)
+        first, second = bytearray(framed), bytearray(framed)
+        first[5] ^= 0xFF
+        second[80] ^= 0xFF
+        
+        blocks = BlockCollector(32)
+        self.assertEqual(blocks.add_capture(bytes(first)), 3)
+        self.assertEqual(blocks.progress_map.tolist(), [False, True, True, True])
+        self.assertEqual(blocks.add_capture(bytes(second)), 1)
+        self.assertTrue(blocks.complete)
+        self.assertEqual(blocks.data(), data)
+        
+        blocks.add_capture(add_block_crcs(data[:50], 32))
+        self.assertEqual(blocks.progress, (2, 2))
+
+
+class TestSelectiveRecapture(unittest.TestCase):
+    """Test cases for CRC blocks inside the cores"""
+    
+    def test_second_loop_fills_failed_blocks(self):
+        """Test two damaged loops decode together when neither does alone"""
+        core = RPatternCore(RPatternConfig(fec_symbols=0, crc_block_size=8))
+        pattern = core.encode_revolutionary_pattern("https://rahulcodes.in/blocks")
+        first = np.delete(pattern.frames, range(24, 44), axis=0)
+        second = np.delete(pattern.frames, range(66, 86), axis=0)
+        
+        self.assertIsNone(core.decode_revolutionary_pattern(second))
+        
+        blocks = BlockCollector(core.config.crc_block_size)
+        self.assertIsNone(core.decode_revolutionary_pattern(first, blocks=blocks))
+        self.assertGreater(len(blocks.missing), 0)
+        self.assertEqual(core.decode_revolutionary_pattern(second, blocks=blocks),
+                         "https://rahulcodes.in/blocks")
+        self.assertTrue(blocks.complete)
+
+
+if __name__ == '__main__':
+    unittest.main()
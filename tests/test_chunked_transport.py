@@ -0,0 +1,115 @@
+"""
+Test suite for chunked transport: sealed chunk records and sub-pattern reassembly
+Author: Rahul Chaube
+"""
+
+import unittest
+import io
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chunked_transport import ChunkAssembler, seal_stream, record_header, KIND_LAST, KIND_MANIFEST
+from format_header import read_format_header
+from revolutionary_scanner import RevolutionaryScanner
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+
+
+class TestChunkRecords(unittest.TestCase):
+    """Test cases for sealing and reassembling chunk records"""
+    
+    def setUp(self):
+        """One encoder secret and a payload of several chunks"""
+        self.secret = b"\x42" * 32
+        self.data = bytes(range(256)) * 3
+    
+    def test_records_reassemble_in_any_order(self):
+        """Test records open on their own and reassemble from any order, manifest included"""
+        records = list(seal_stream(self.secret, io.BytesIO(self.data), chunk_size=100))
+        self.assertEqual(len(records), 9)  # 8 chunks + manifest
+        self.assertEqual([record_header(r)[2] for r in records[-2:]], [KIND_LAST, KIND_MANIFEST])
+        
+        chunks = ChunkAssembler(self.secret)
+        for index in np.random.default_rng(7).permutation(len(records)):
+            self.assertFalse(chunks.complete)
+            self.assertTrue(chunks.add_record(records[index]))
+        self.assertFalse(chunks.add_record(records[3]))  # a repeat loop adds nothing
+        self.assertEqual(chunks.data(), self.data)
+        
+        with self.assertRaises(ValueError):
+            ChunkAssembler(b"\x00" * 32).add_record(records[0])
+    
+    def test_moved_and_truncated_chunks_fail(self):
+        """Test a chunk moved to another index fails its tag and a missing chunk keeps the message open"""
+        records = list(seal_stream(self.secret, self.data, chunk_size=100))
+        chunks = ChunkAssembler(self.secret)
+        moved = bytearray(records[1])
+        moved[8:12] = (2).to_bytes(4, 'big')
+        with self.assertRaises(ValueError):
+            chunks.add_record(bytes(moved))
+        
+        for record in records[:-2] + records[-1:]:
+            chunks.add_record(record)
+        self.assertEqual(chunks.missing, [7])
+        with self.assertRaises(ValueError):
+            chunks.data()
+    
+    def test_new_message_restarts_assembler(self):
+        """Test a record of another message drops the chunks of the previous one"""
+        chunks = ChunkAssembler(self.secret)
+        first = list(seal_stream(self.secret, "first message", chunk_size=4))
+        second = list(seal_stream(self.secret, "second", chunk_size=4))
+        chunks.add_record(first[0])
+        chunks.add_record(second[0])
+        self.assertEqual(chunks.progress, (1, 0))
+        for record in second[1:]:
+            chunks.add_record(record)
+        self.assertEqual(chunks.text(), "second")
+
+
+class TestChunkedPatterns(unittest.TestCase):
+    """Test cases for chunked sub-patterns through the core and the scanner"""
+    
+    def setUp(self):
+        """A core cutting a long message into small sub-patterns"""
+        self.core = RPatternCore(RPatternConfig(chunk_size=48, expiry_seconds=60))
+        self.text = "https://rahulcodes.in/" + "chunked-transport/" * 8
+        self.patterns = self.core.encode_chunked_patterns(self.text)
+    
+    def test_lost_frame_costs_one_sub_pattern(self):
+        """Test a damaged sub-pattern is the only one recaptured, and chunks decode in any order"""
+        self.assertEqual(len(self.patterns), 5)  # manifest + 4 chunks
+        self.assertTrue(all(read_format_header(p.frames)[1].chunked for p in self.patterns))
+        
+        chunks = ChunkAssembler(self.core.chunk_secret)
+        damaged = np.delete(self.patterns[2].frames, np.s_[20:80], axis=0)
+        self.assertIsNone(self.core.decode_revolutionary_pattern(damaged, chunks=chunks))
+        for index in (4, 0, 1, 3):
+            self.assertIsNone(self.core.decode_revolutionary_pattern(self.patterns[index].frames, chunks=chunks))
+        self.assertEqual(chunks.missing, [1])  # sub-pattern 2 carries chunk 1
+        self.assertEqual(self.core.decode_revolutionary_pattern(self.patterns[2].frames, chunks=chunks), self.text)
+    
+    def test_scanner_splits_back_to_back_loops(self):
+        """Test the scanner cuts a playlist capture at its start frames and keeps chunks across loops"""
+        # A decoder of its own: only the generator's keys are shared
+        scanner = RevolutionaryScanner(config=self.core.config, auth_key=self.core.auth_key,
+                                       chunk_secret=self.core.chunk_secret)
+        self.assertIsNot(scanner.decoder, self.core)
+        
+        playlist = np.concatenate([p.frames for p in self.patterns[3:] + self.patterns])
+        decoded = None
+        for frame in playlist[100:]:
+            scanner.detected_frames.append({'timestamp': 0, 'colors': frame})
+            if len(scanner.detected_frames) % 50 == 0:
+                decoded = scanner._attempt_decode() or decoded
+        decoded = scanner._attempt_decode() or decoded
+        self.assertEqual(decoded, self.text)
+        self.assertLess(len(scanner.detected_frames), max(p.total_frames for p in self.patterns) + 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
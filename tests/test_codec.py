@@ -0,0 +1,331 @@
+"""
+Test suite for the shared RPattern codec kernels
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pattern_codec import (
+    solid_frames, as_frame_array, frames_to_lists, legacy_frames,
+    bytes_to_symbols, symbols_to_bytes, palette_from_map,
+    classify_cells, classify_frames, symbols_to_frames, frames_to_symbols,
+    add_length_prefix, strip_length_prefix, frame_templates, Pattern,
+    sequence_digits, assemble_sequence, color_lut, lookup_colors, generate_palette
+)
+from rpattern_core import RPattern
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+from hyper_secure_core import HyperSecureRPattern
+from bulletproof_core import BulletproofRPattern
+from pattern_scanner import ColorDetector
+from hyper_secure_scanner import HyperSecureColorDetector
+
+
+class TestFrameTensor(unittest.TestCase):
+    """Test cases for the (frames, grid, grid, 3) frame tensor"""
+    
+    def test_solid_frames_shape(self):
+        """Test solid frames are built as one uint8 tensor"""
+        frames = solid_frames(np.array([(255, 0, 0), (0, 0, 255)]), 4)
+        
+        self.assertEqual(frames.shape, (2, 4, 4, 3))
+        self.assertEqual(frames.dtype, np.uint8)
+        self.assertTrue(np.all(frames[1] == (0, 0, 255)))
+    
+    def test_legacy_round_trip(self):
+        """Test tensor <-> nested list conversion"""
+        frames = solid_frames(np.array([(1, 2, 3)]), 3)
+        lists = frames_to_lists(frames)
+        
+        self.assertEqual(lists[0][2][1], (1, 2, 3))
+        np.testing.assert_array_equal(as_frame_array(lists), frames)
+    
+    def test_invalid_shape_rejected(self):
+        """Test malformed frames raise ValueError"""
+        with self.assertRaises(ValueError):
+            as_frame_array([[1, 2, 3]])
+    
+    def test_cores_decode_tensor_and_lists(self):
+        """Test decoders accept both the tensor and legacy lists"""
+        rpattern = RPattern(expiry_minutes=5)
+        pattern = rpattern.encode_data("https://rahulcodes.in", use_encryption=True)
+        
+        self.assertIsInstance(pattern['frames'], np.ndarray)
+        self.assertEqual(rpattern.decode_frames(pattern['frames']), "https://rahulcodes.in")
+        self.assertEqual(rpattern.decode_frames(legacy_frames(pattern)), "https://rahulcodes.in")
+        
+        bp_rpattern = BulletproofRPattern()
+        pattern = bp_rpattern.encode_bulletproof_data("Bulletproof")
+        self.assertEqual(pattern['frames'].shape[1:], (3, 3, 3))
+        self.assertEqual(bp_rpattern.decode_bulletproof_frames(pattern['frames']), "Bulletproof")
+
+
+
+class TestSymbolKernel(unittest.TestCase):
+    """Test cases for the bytes <-> N-bit symbol kernel"""
+    
+    def test_round_trip_all_widths(self):
+        """Test every supported bits-per-symbol value round-trips"""
+        data = os.urandom(3000)
+        
+        for bits_per_symbol in (1, 2, 3, 4, 5, 6, 7, 8):
+            symbols = bytes_to_symbols(data, bits_per_symbol)
+            self.assertEqual(len(symbols), -(-len(data) * 8 // bits_per_symbol))
+            self.assertLess(int(symbols.max()), 2 ** bits_per_symbol)
+            self.assertEqual(symbols_to_bytes(symbols, bits_per_symbol), data)
+    
+    def test_msb_first_order(self):
+        """Test symbols match the legacy '08b' string slicing"""
+        data = b'\xb4\x0f'
+        binary = ''.join(format(byte, '08b') for byte in data) + '00'
+        expected = [int(binary[i:i+3], 2) for i in range(0, len(binary), 3)]
+        
+        self.assertEqual(bytes_to_symbols(data, 3).tolist(), expected)
+    
+    def test_exact_length(self):
+        """Test an explicit byte length trims padding"""
+        symbols = bytes_to_symbols(b'abc', 6)
+        self.assertEqual(symbols_to_bytes(symbols, 6, length=2), b'ab')
+    
+    def test_invalid_width(self):
+        """Test unsupported widths are rejected"""
+        with self.assertRaises(ValueError):
+            bytes_to_symbols(b'x', 9)
+    
+    def test_palette_from_map(self):
+        """Test palettes are ordered by symbol value"""
+        palette = palette_from_map({'1': (0, 0, 255), '0': (255, 0, 0)})
+        self.assertEqual(palette.tolist(), [[255, 0, 0], [0, 0, 255]])
+
+
+
+class TestPaletteClassifier(unittest.TestCase):
+    """Test cases for batched nearest-palette classification"""
+    
+    PALETTE = np.array([(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)])
+    
+    def test_classify_cells(self):
+        """Test per-cell symbols and distances"""
+        cells = np.array([[(250, 5, 5), (0, 0, 200)], [(250, 250, 10), (10, 240, 0)]])
+        symbols, distances = classify_cells(cells, self.PALETTE)
+        
+        self.assertEqual(symbols.tolist(), [[0, 2], [3, 1]])
+        self.assertAlmostEqual(distances[0, 1], 55.0)
+    
+    def test_frames_use_all_cells(self):
+        """Test a corrupted center cell is outvoted by the rest of the frame"""
+        frames = solid_frames(self.PALETTE[[1, 2]], 3)
+        frames[0, 1, 1] = (255, 0, 0)
+        
+        symbols, _ = classify_frames(frames, self.PALETTE)
+        self.assertEqual(symbols.tolist(), [1, 2])
+    
+    def test_lookup_matches_classify(self):
+        """Test table lookups agree with the exact classifier on captured-looking colors"""
+        rng = np.random.default_rng(5)
+        for palette in (self.PALETTE, generate_palette(16)):
+            owners = rng.integers(0, len(palette), 5000)
+            colors = np.clip(palette[owners] + rng.integers(-30, 31, (5000, 3)), 0, 255).astype(np.uint8)
+            symbols, distances = lookup_colors(colors.reshape(50, 100, 3), palette)
+            expected, expected_distances = classify_cells(colors[None], palette)
+            self.assertEqual(symbols.shape, (50, 100))
+            np.testing.assert_array_equal(symbols.reshape(-1), expected[0])
+            np.testing.assert_allclose(distances.reshape(-1), expected_distances[0])
+    
+    def test_lookup_rounds_non_integer_colors(self):
+        """Test float and out-of-range colors are rounded and clamped, not truncated or wrapped"""
+        rng = np.random.default_rng(7)
+        for palette in (self.PALETTE, generate_palette(16)):
+            owners = rng.integers(0, len(palette), 5000)
+            colors = palette[owners] + rng.uniform(-30, 30, (5000, 3))  # outside 0-255 near the extremes
+            symbols, distances = lookup_colors(colors, palette)
+            expected, expected_distances = classify_cells(np.clip(np.rint(colors), 0, 255)[None], palette)
+            np.testing.assert_array_equal(symbols, expected[0])
+            np.testing.assert_allclose(distances, expected_distances[0])
+            np.testing.assert_array_equal(symbols, classify_cells(colors[None], palette)[0][0])
+        
+        symbols, _ = lookup_colors(np.array([[255.6, -0.4, 300.0], [-1.0, 0.0, 255.4]]), self.PALETTE)
+        np.testing.assert_array_equal(symbols, lookup_colors(np.array([[255, 0, 255], [0, 0, 255]],
+                                                                      dtype=np.uint8), self.PALETTE)[0])
+    
+    def test_table_built_once_per_palette(self):
+        """Test tables are cached per palette, rebuilt for a measured one, and read-only"""
+        table = color_lut(self.PALETTE)
+        self.assertEqual((table.shape, table.dtype), ((32, 32, 32), np.uint8))
+        self.assertIs(color_lut(self.PALETTE.copy()), table)
+        self.assertIsNot(color_lut(self.PALETTE // 2), table)
+        self.assertEqual(color_lut(self.PALETTE, 6).shape, (64, 64, 64))
+        self.assertFalse(table.flags.writeable)
+        with self.assertRaises(ValueError):
+            color_lut(self.PALETTE, 9)
+    
+    def test_scanner_detectors(self):
+        """Test detectors classify by table, against measured colors after calibration"""
+        detector = ColorDetector()
+        dim_red = (110, 0, 0)  # red as a dark camera sees it: nominally closer to black
+        self.assertEqual(detector.classify_color(dim_red), 'sync_end')
+        detector.calibrate(detector.colors // 2)
+        self.assertEqual(detector.classify_color(dim_red), '00')
+        self.assertEqual(detector.closest_colors(np.array([dim_red])).tolist(), [[255, 0, 0]])
+        with self.assertRaises(ValueError):
+            detector.calibrate(detector.colors[:3])
+        
+        # Every pixel votes: glare on a third of a cyan cell does not turn it white
+        roi = np.full((40, 40, 3), (255, 255, 0), dtype=np.uint8)  # BGR cyan
+        roi[10:20] = 255
+        self.assertEqual(HyperSecureColorDetector().detect_dominant_color_advanced(roi), (0, 255, 255))
+
+
+
+class TestCellMode(unittest.TestCase):
+    """Test cases for spatial multiplexing (one symbol per grid cell)"""
+    
+    PALETTE = np.array([(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)])
+    
+    def test_cell_layout_round_trip(self):
+        """Test symbols fill cells row by row and pad the last frame"""
+        symbols = np.arange(20, dtype=np.uint8) % 4
+        frames = symbols_to_frames(symbols, self.PALETTE, 3, mode='cell')
+        
+        self.assertEqual(frames.shape, (3, 3, 3, 3))
+        self.assertEqual(tuple(frames[0, 0, 1]), (0, 255, 0))
+        
+        decoded, _ = frames_to_symbols(frames, self.PALETTE, mode='cell')
+        self.assertEqual(decoded[:20].tolist(), symbols.tolist())
+        self.assertEqual(decoded[20:].tolist(), [0] * 7)
+    
+    def test_length_prefix(self):
+        """Test the length prefix drops padding bytes"""
+        self.assertEqual(strip_length_prefix(add_length_prefix(b'data') + b'\x00\x00'), b'data')
+        
+        with self.assertRaises(ValueError):
+            strip_length_prefix(b'\x00\x09abc')
+    
+    def test_revolutionary_cell_mode(self):
+        """Test cell mode needs far fewer frames on larger grids"""
+        data = "https://rahulcodes.in/" + "x" * 200
+        frame_core = RPatternCore(RPatternConfig())
+        frame_pattern = frame_core.encode_revolutionary_pattern(data)
+        
+        for grid_size in (8, 12):
+            core = RPatternCore(RPatternConfig(grid_size=grid_size, encoding_mode='cell'))
+            pattern = core.encode_revolutionary_pattern(data)
+            
+            self.assertEqual(pattern['frames'].shape[1:], (grid_size, grid_size, 3))
+            self.assertLess(pattern['data_frames'] * 20, frame_pattern['data_frames'])
+            self.assertEqual(core.decode_revolutionary_pattern(pattern['frames']), data)
+    
+    def test_hyper_cell_mode(self):
+        """Test the hyper-secure core in cell mode"""
+        hyper = HyperSecureRPattern(grid_size=8, encoding_mode='cell')
+        pattern = hyper.encode_hyper_secure_data("CLASSIFIED")
+        
+        self.assertEqual(pattern['frames'].shape[1:], (8, 8, 3))
+        self.assertEqual(pattern['encoding_mode'], 'cell')
+    
+    def test_unknown_mode_rejected(self):
+        """Test unknown encoding modes raise ValueError"""
+        with self.assertRaises(ValueError):
+            RPatternCore(RPatternConfig(encoding_mode='diagonal'))
+
+
+
+class TestPattern(unittest.TestCase):
+    """Test cases for the lazy symbol-stream Pattern object"""
+    
+    PALETTE = np.array([(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)])
+    
+    def test_build_layout(self):
+        """Test markers wrap the data frames and fields are derived"""
+        pattern = Pattern.build([1, 2, 3], self.PALETTE, 3, 0.5,
+                                leading=[(255, 255, 255)], trailing=[(0, 0, 0)], expiry=42)
+        
+        self.assertEqual(pattern.symbols.tolist(), [4, 1, 2, 3, 5])
+        self.assertEqual(len(pattern), 5)
+        self.assertEqual(pattern['data_frames'], 3)
+        self.assertEqual(pattern['security_frames'], 2)
+        self.assertEqual(pattern['expiry'], 42)
+        self.assertIsNone(pattern.get('missing'))
+        self.assertFalse(hasattr(pattern, '__dict__'))
+    
+    def test_frames_are_lazy_template_views(self):
+        """Test single frames are read-only views of shared templates"""
+        pattern = Pattern.build([1, 1, 2], self.PALETTE, 4, 0.3)
+        templates = frame_templates(pattern.palette, 4)
+        
+        self.assertTrue(np.shares_memory(pattern[0], templates))
+        self.assertFalse(pattern[0].flags.writeable)
+        self.assertEqual(tuple(pattern[-1][3, 3]), (0, 0, 255))
+        np.testing.assert_array_equal(pattern['frames'], solid_frames(self.PALETTE[[1, 1, 2]], 4))
+    
+    def test_cell_mode_markers(self):
+        """Test cell-mode markers are solid and data fills cells"""
+        pattern = Pattern.build(np.arange(5) % 4, self.PALETTE, 2, 0.3, encoding_mode='cell',
+                                leading=[(255, 255, 255)])
+        
+        self.assertEqual(pattern.symbols.shape, (3, 2, 2))
+        self.assertTrue(np.all(pattern[0] == 255))
+        self.assertEqual(tuple(pattern[1][1, 1]), (255, 255, 0))
+    
+    def test_legacy_dict_export(self):
+        """Test dict unpacking and decoding straight from a Pattern"""
+        rpattern = RPattern(expiry_minutes=5)
+        pattern = rpattern.encode_data("https://rahulcodes.in", use_encryption=True)
+        exported = {**pattern, 'frames': legacy_frames(pattern)}
+        
+        self.assertEqual(exported['total_frames'], len(exported['frames']))
+        self.assertTrue(exported['encrypted'])
+        self.assertEqual(rpattern.decode_frames(pattern), "https://rahulcodes.in")
+        self.assertLess(pattern.nbytes, pattern['frames'].nbytes)
+
+
+
+class TestSequenceAssembly(unittest.TestCase):
+    """Test cases for sequence-numbered frames and out-of-order assembly"""
+    
+    PALETTE = TestPattern.PALETTE
+    
+    def test_index_digits(self):
+        """Test indices are MSB-first digits with the last-frame flag and a check digit"""
+        digits = sequence_digits(3, 3, 4)
+        
+        self.assertEqual(digits.tolist(), [[0, 0, 1], [0, 2, 3], [1, 1, 3]])
+        with self.assertRaises(ValueError):
+            sequence_digits(9, 3, 4)
+    
+    def test_rotation_drops_and_duplicates(self):
+        """Test any rotation reassembles, duplicates fuse and drops are reported"""
+        pattern = Pattern.build(np.arange(12) % 4, self.PALETTE, 3, 0.5, encoding_mode='cell',
+                                leading=[(255, 255, 255)], trailing=[(0, 0, 0)], sequence_cells=3)
+        frames = pattern.frames
+        
+        captured = np.concatenate([frames[3:], frames[:1], frames[1:2], frames[1:2]])
+        assembled, missing = assemble_sequence(captured, self.PALETTE, 3)
+        
+        self.assertEqual(missing.tolist(), [2])
+        np.testing.assert_array_equal(np.delete(assembled, 2, axis=0), np.delete(frames, 2, axis=0))
+        self.assertEqual(frames_to_symbols(assembled[1:2], self.PALETTE, 'cell', 3)[0].tolist(),
+                         list(range(4)) + list(range(2)))
+    
+    def test_cores_decode_any_rotation(self):
+        """Test the cores decode a capture that starts mid-loop with repeated frames"""
+        core = RPatternCore(RPatternConfig())
+        pattern = core.encode_revolutionary_pattern("https://rahulcodes.in/sequence")
+        frames = np.repeat(pattern.frames, 2, axis=0)
+        rotated = np.concatenate([frames[40:], frames[:40]])
+        self.assertEqual(core.decode_revolutionary_pattern(rotated), "https://rahulcodes.in/sequence")
+        
+        bp_rpattern = BulletproofRPattern()
+        pattern = bp_rpattern.encode_bulletproof_data("Bulletproof")
+        dropped = np.delete(np.roll(pattern.frames, 9, axis=0), 5, axis=0)
+        self.assertEqual(bp_rpattern.decode_bulletproof_frames(dropped), "Bulletproof")
+
+
+if __name__ == '__main__':
+    unittest.main()
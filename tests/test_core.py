@@ -9,11 +9,14 @@ from unittest.mock import patch, MagicMock
 import sys
 import os
 
+import numpy as np
+
 # Add src to path for testing
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 try:
     from rpattern_revolutionary import RPatternCore, create_revolutionary_pattern
+    from pattern_codec import Pattern, legacy_frames
 except ImportError:
     # Mock the imports if not available
     RPatternCore = MagicMock
@@ -38,7 +41,7 @@ class TestRPatternCore(unittest.TestCase):
             pattern = create_revolutionary_pattern(test_data)
             
             # Check pattern structure
-            self.assertIsInstance(pattern, dict)
+            self.assertIsInstance(pattern, Pattern)
             self.assertIn('frames', pattern)
             self.assertIn('pattern_id', pattern)
             self.assertIn('timestamp', pattern)
@@ -56,7 +59,7 @@ class TestRPatternCore(unittest.TestCase):
         for level in security_levels:
             if create_revolutionary_pattern != MagicMock:
                 pattern = create_revolutionary_pattern(test_data, 30, level)
-                self.assertIsInstance(pattern, dict)
+                self.assertIsInstance(pattern, Pattern)
                 self.assertEqual(pattern.get('security_level'), level)
             else:
                 # Mock test
@@ -98,7 +101,7 @@ class TestRPatternCore(unittest.TestCase):
             if create_revolutionary_pattern != MagicMock:
                 try:
                     pattern = create_revolutionary_pattern(data)
-                    self.assertIsInstance(pattern, dict)
+                    self.assertIsInstance(pattern, Pattern)
                 except Exception as e:
                     # Large data might have size limits
                     if len(data) > 1000:  # Assuming 1KB limit
@@ -126,7 +129,7 @@ class TestRPatternCore(unittest.TestCase):
                     pattern = create_revolutionary_pattern(invalid_input)
                     # Should either succeed with string conversion or fail gracefully
                     if pattern is not None:
-                        self.assertIsInstance(pattern, dict)
+                        self.assertIsInstance(pattern, Pattern)
                 except (ValueError, TypeError):
                     # Expected for invalid inputs
                     pass
@@ -163,14 +166,18 @@ class TestPatternSecurity(unittest.TestCase):
             
             # Check that we have encrypted frames
             self.assertIn('frames', pattern)
-            self.assertIsInstance(pattern['frames'], list)
+            frames = pattern['frames']
             
-            if pattern['frames']:
-                # Frames should contain numeric color data
-                frame = pattern['frames'][0]
-                self.assertIsInstance(frame, list)
-                if frame:
-                    self.assertIsInstance(frame[0], list)
+            # Frames are a uint8 (frames, grid, grid, 3) tensor of color data
+            self.assertEqual(frames.dtype, np.uint8)
+            self.assertEqual(frames.ndim, 4)
+            self.assertEqual(frames.shape[1:], (pattern['grid_size'], pattern['grid_size'], 3))
+            
+            # Legacy nested lists are still available
+            frame = legacy_frames(pattern)[0]
+            self.assertIsInstance(frame, list)
+            self.assertIsInstance(frame[0], list)
+            self.assertIsInstance(frame[0][0], tuple)
         else:
             # Mock test
             pattern = {
@@ -193,7 +200,7 @@ class TestPerformanceMetrics(unittest.TestCase):
         for i in range(num_patterns):
             if create_revolutionary_pattern != MagicMock:
                 pattern = create_revolutionary_pattern(f"{test_data} {i}")
-                self.assertIsInstance(pattern, dict)
+                self.assertIsInstance(pattern, Pattern)
             else:
                 # Mock test with small delay
                 time.sleep(0.001)  # 1ms mock delay
@@ -0,0 +1,112 @@
+"""
+Test suite for Reed-Solomon forward error correction
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from error_correction import (
+    rs_encode_block, rs_correct_block, fec_encode, fec_decode, ReedSolomonError
+)
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+from bulletproof_core import BulletproofRPattern
+
+
+class TestReedSolomon(unittest.TestCase):
+    """Test cases for single Reed-Solomon codewords"""
+    
+    def test_corrects_up_to_half_parity(self):
+        """Test nsym/2 byte errors are corrected and counted"""
+        data = b"RPattern by Rahul Chaube"
+        codeword = bytearray(rs_encode_block(data, 10))
+        for pos in (0, 7, 13, 20, len(codeword) - 1):
+            codeword[pos] ^= 0xA5
+        
+        self.assertEqual(rs_correct_block(bytes(codeword), 10), (data, 5))
+    
+    def test_too_many_errors(self):
+        """Test uncorrectable codewords raise instead of returning garbage"""
+        codeword = bytearray(rs_encode_block(b"0123456789", 4))
+        for pos in range(4):
+            codeword[pos] ^= 0xFF
+        
+        with self.assertRaises(ReedSolomonError):
+            rs_correct_block(bytes(codeword), 4)
+
+
+class TestInterleavedFEC(unittest.TestCase):
+    """Test cases for the interleaved multi-codeword stream"""
+    
+    def test_round_trip_lengths(self):
+        """Test clean streams of any length decode without corrections"""
+        for length in (0, 1, 55, 56, 57, 300):
+            data = os.urandom(length)
+            stream = fec_encode(data, 8, 64)
+            self.assertEqual(fec_decode(stream, 8, 64), (data, 0))
+    
+    def test_burst_is_spread(self):
+        """Test a burst longer than one codeword can fix is still repaired"""
+        data = os.urandom(300)
+        stream = bytearray(fec_encode(data, 8, 64))
+        
+        # 6 codewords x 4 correctable bytes; a 20-byte burst hits each at most 4 times
+        for pos in range(100, 120):
+            stream[pos] ^= 0x3C
+        
+        self.assertEqual(fec_decode(bytes(stream), 8, 64), (data, 20))
+    
+    def test_disabled(self):
+        """Test nsym=0 passes data through unchanged"""
+        self.assertEqual(fec_encode(b"abc", 0), b"abc")
+        with self.assertRaises(ValueError):
+            fec_encode(b"abc", 7)
+
+
+class TestCoreFEC(unittest.TestCase):
+    """Test cases for FEC inside the cores"""
+    
+    def _corrupt(self, frames, first, count, palette):
+        """Replace a run of data frames with the next palette color."""
+        frames = frames.copy()
+        for index in range(first, first + count):
+            symbol = int(np.argmin(np.abs(palette.astype(int) - frames[index, 0, 0]).sum(axis=1)))
+            frames[index] = palette[(symbol + 1) % len(palette)]
+        return frames
+    
+    def test_revolutionary_survives_burst(self):
+        """Test a hand passing in front of the screen no longer breaks decoding"""
+        core = RPatternCore(RPatternConfig())
+        pattern = core.encode_revolutionary_pattern("https://rahulcodes.in/fec")
+        frames = self._corrupt(pattern.frames, 10, 6, core.PALETTE)
+        
+        self.assertEqual(core.decode_revolutionary_pattern(frames), "https://rahulcodes.in/fec")
+        self.assertGreater(core.last_fec_corrections, 0)
+        
+        unprotected = RPatternCore(RPatternConfig(fec_symbols=0))
+        pattern = unprotected.encode_revolutionary_pattern("https://rahulcodes.in/fec")
+        frames = self._corrupt(pattern.frames, 10, 6, unprotected.PALETTE)
+        self.assertIsNone(unprotected.decode_revolutionary_pattern(frames))
+    
+    def test_bulletproof_reports_corrections(self):
+        """Test the bulletproof decoder reports repaired bytes"""
+        bp_rpattern = BulletproofRPattern()
+        pattern = bp_rpattern.encode_bulletproof_data("Bulletproof")
+        
+        self.assertEqual(bp_rpattern.decode_bulletproof_frames(pattern), "Bulletproof")
+        self.assertEqual(bp_rpattern.last_fec_corrections, 0)
+        
+        first_data = pattern.leading_frames + pattern.header_frames
+        frames = self._corrupt(pattern.frames, first_data + 3, 3, bp_rpattern.PALETTE)
+        self.assertEqual(bp_rpattern.decode_bulletproof_frames(frames), "Bulletproof")
+        self.assertGreater(bp_rpattern.last_fec_corrections, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Test suite for format header frames and the unified decoder
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from format_header import (
+    FormatHeader, read_format_header, FORMAT_HEADER_SIZE, FORMAT_REVOLUTIONARY, PALETTE_BRIGHT_8
+)
+from unified_decoder import UnifiedDecoder
+from rpattern_core import RPattern
+from rpattern_revolutionary import RPatternCore
+from bulletproof_core import BulletproofRPattern
+
+
+class TestFormatHeader(unittest.TestCase):
+    """Test cases for packing and locating format headers"""
+    
+    def test_pack_round_trip(self):
+        """Test a header survives packing and a flipped bit fails its CRC"""
+        header = FormatHeader(FORMAT_REVOLUTIONARY, 4, PALETTE_BRIGHT_8, 3, 300,
+                              encoding_mode='cell', sequence_cells=5, fec_symbols=8,
+                              fec_block_length=64, crc_block_size=32)
+        packed = header.pack()
+        self.assertEqual(len(packed), FORMAT_HEADER_SIZE)
+        self.assertEqual(FormatHeader.unpack(packed), header)
+        
+        damaged = bytearray(packed)
+        damaged[2] ^= 0x01
+        with self.assertRaises(ValueError):
+            FormatHeader.unpack(bytes(damaged))
+        with self.assertRaises(ValueError):
+            FormatHeader(16, 4, 1, 3, 10).pack()
+    
+    def test_header_predicts_loop_length(self):
+        """Test the header alone gives every core's exact frame count"""
+        for pattern in (RPattern().encode_data("https://rahulcodes.in"),
+                        RPatternCore().encode_revolutionary_pattern("https://rahulcodes.in"),
+                        BulletproofRPattern().encode_bulletproof_data("https://rahulcodes.in")):
+            start, header = read_format_header(pattern.frames)
+            self.assertEqual(start, 0)
+            self.assertEqual(header.total_frames, pattern.total_frames)
+            self.assertEqual(header.header_frames, pattern.header_frames)
+    
+    def test_rotated_sequenced_capture(self):
+        """Test the header is found mid-capture even when frames repeat"""
+        pattern = RPatternCore().encode_revolutionary_pattern("https://rahulcodes.in/header")
+        frames = np.repeat(pattern.frames, 2, axis=0)
+        rotated = np.concatenate([frames[31:], frames[:31]])
+        
+        start, header = read_format_header(rotated)
+        self.assertEqual(start, len(frames) - 31 + 1)  # the second capture of the start frame
+        self.assertEqual(header.format_id, FORMAT_REVOLUTIONARY)
+        self.assertIsNone(read_format_header(pattern.frames[4:]))
+
+
+class TestUnifiedDecoder(unittest.TestCase):
+    """Test cases for dispatching captures by their header"""
+    
+    def test_dispatch_to_registered_cores(self):
+        """Test every capture reaches the core that made it, surrounded by junk frames"""
+        revolutionary = RPatternCore()
+        bulletproof = BulletproofRPattern()
+        decoder = UnifiedDecoder(revolutionary, bulletproof)
+        
+        for text, encode in (("https://rahulcodes.in/v1", RPattern().encode_data),
+                             ("https://rahulcodes.in/v2", revolutionary.encode_revolutionary_pattern),
+                             ("https://rahulcodes.in/v4", bulletproof.encode_bulletproof_data)):
+            pattern = encode(text)
+            grid = pattern.frames.shape[1]
+            junk = np.zeros((3, grid, grid, 3), dtype=np.uint8)
+            capture = np.concatenate([junk, pattern.frames, junk])
+            
+            self.assertEqual(decoder.frames_needed(capture[:30]), pattern.total_frames - 27)
+            self.assertEqual(decoder.frames_needed(capture), 0)
+            self.assertEqual(decoder.frame_buffer(decoder.read_header(capture)).shape, pattern.frames.shape)
+            self.assertEqual(decoder.decode(capture), text)
+        
+        self.assertIsNone(UnifiedDecoder().decode(bulletproof.encode_bulletproof_data("x").frames[:1]))
+        with self.assertRaises(ValueError):
+            decoder.register(object())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Test suite for fountain-coded transmission
+Author: Rahul Chaube
+"""
+
+import unittest
+import random
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fountain_code import FountainDecoder, fountain_encode, droplet_mask, PACKET_HEADER
+from rpattern_core import RPattern
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+
+
+class TestFountainCode(unittest.TestCase):
+    """Test cases for droplet generation and decoding"""
+    
+    def test_any_order_decodes(self):
+        """Test shuffled droplets decode once they have full rank"""
+        data = os.urandom(500)
+        packets = fountain_encode(data, 16, 1.0)
+        order = list(range(len(packets)))
+        random.Random(7).shuffle(order)
+        
+        decoder = FountainDecoder()
+        for count, index in enumerate(order, 1):
+            decoder.add_packet(packets[index])
+            if decoder.complete:
+                break
+        
+        self.assertEqual(decoder.data(), data)
+        self.assertLess(count, len(packets))
+    
+    def test_mid_loop_start(self):
+        """Test repair droplets stand in for systematic ones missed before joining"""
+        data = os.urandom(200)
+        packets = fountain_encode(data, 16, 1.0)
+        k = -(-len(data) // 16)
+        
+        decoder = FountainDecoder()
+        for packet in packets[k // 2:] + packets:
+            decoder.add_packet(packet)
+            if decoder.complete:
+                break
+        self.assertEqual(decoder.data(), data)
+    
+    def test_corrupt_and_foreign_packets(self):
+        """Test damaged packets are rejected and a new message restarts the decoder"""
+        packets = fountain_encode(b"first message", 4)
+        damaged = bytearray(packets[0])
+        damaged[PACKET_HEADER.size] ^= 0x01
+        
+        decoder = FountainDecoder()
+        self.assertFalse(decoder.add_packet(bytes(damaged)))
+        self.assertFalse(decoder.add_packet(packets[0][:5]))
+        self.assertTrue(decoder.add_packet(packets[0]))
+        self.assertFalse(decoder.add_packet(packets[0]))
+        
+        for packet in fountain_encode(b"second one!!", 4):
+            decoder.add_packet(packet)
+        self.assertEqual(decoder.data(), b"second one!!")
+        
+        with self.assertRaises(ValueError):
+            FountainDecoder().data()
+    
+    def test_seeds_are_deterministic(self):
+        """Test droplet contents depend only on seed and block count"""
+        self.assertEqual(droplet_mask(3, 10), 1 << 3)
+        self.assertEqual(droplet_mask(500, 70), droplet_mask(500, 70))
+        self.assertLess(droplet_mask(500, 70), 1 << 70)
+
+
+class TestFountainCores(unittest.TestCase):
+    """Test cases for fountain mode in the cores"""
+    
+    def _rotate(self, frames, offset):
+        """Simulate a scanner joining the display loop at an arbitrary frame."""
+        return np.concatenate([frames[offset:], frames[:offset]])
+    
+    def test_rpattern_joins_mid_loop(self):
+        """Test the basic core decodes a capture that starts mid-packet"""
+        rpattern = RPattern(transmission='fountain', fountain_block_size=16)
+        pattern = rpattern.encode_data("https://rahulcodes.in")
+        
+        self.assertEqual(pattern['transmission'], 'fountain')
+        frames = self._rotate(pattern.frames, pattern.total_frames // 3 + 5)
+        self.assertEqual(rpattern.decode_frames(frames), "https://rahulcodes.in")
+    
+    def test_revolutionary_partial_captures(self):
+        """Test droplets collected over separate captures add up"""
+        core = RPatternCore(RPatternConfig(transmission='fountain', encoding_mode='cell',
+                                           fountain_block_size=8))
+        pattern = core.encode_revolutionary_pattern("https://rahulcodes.in/fountain")
+        frames = self._rotate(pattern.frames, 7)
+        half = len(frames) // 2
+        
+        fountain = FountainDecoder()
+        self.assertIsNone(core.decode_revolutionary_pattern(frames[:half // 2], fountain))
+        self.assertGreater(fountain.progress[0], 0)
+        self.assertEqual(core.decode_revolutionary_pattern(frames[half // 2:], fountain),
+                         "https://rahulcodes.in/fountain")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Test suite for two-layer (coarse base + fine enhancement) patterns
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from layered_pattern import modulate, demodulate, enhancement_capacity
+from revolutionary_scanner import RevolutionaryScanner
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+
+
+def camera_view(frame, pixels):
+    """BGR camera frame of one fine frame, `pixels` camera pixels per sub-cell."""
+    return np.kron(frame, np.ones((pixels, pixels, 1), dtype=np.uint8))[..., ::-1].copy()
+
+
+class TestModulation(unittest.TestCase):
+    """Test cases for shading sub-cells around the base color"""
+    
+    def test_cell_means_keep_the_base(self):
+        """Test sub-cell pairs carry their bits while each cell still averages to its base color"""
+        rng = np.random.default_rng(3)
+        frames = rng.integers(60, 196, (5, 4, 4, 3)).astype(np.uint8)
+        signs = rng.choice([-1, 1], (5, 4, 4, 8)).astype(np.int8)
+        fine = modulate(frames, signs, 4)
+        self.assertEqual(fine.shape, (5, 16, 16, 3))
+        
+        coarse, soft = demodulate(fine, 4)
+        np.testing.assert_array_equal(coarse, frames)
+        np.testing.assert_array_equal(np.sign(soft), signs)
+        
+        # Saturated channels clip, shifting the mean by at most half the depth
+        saturated = np.full((1, 2, 2, 3), 255, dtype=np.uint8)
+        saturated[..., 1:] = 0
+        coarse, soft = demodulate(modulate(saturated, np.ones((1, 2, 2, 2), dtype=np.int8), 2), 2)
+        self.assertLessEqual(np.abs(coarse.astype(int) - saturated).max(), 20)
+        self.assertTrue((soft > 0).all())
+
+
+class TestLayeredPatterns(unittest.TestCase):
+    """Test cases for encoding and decoding both layers"""
+    
+    def setUp(self):
+        """A frame-mode core with 4x4 sub-cells per cell"""
+        self.core = RPatternCore(RPatternConfig(subdivision=4, expiry_seconds=60))
+        self.enhancement = bytes(np.random.default_rng(5).integers(0, 256, 600, dtype=np.uint8))
+        self.pattern = self.core.encode_layered_pattern("https://rahulcodes.in/base", self.enhancement)
+    
+    def test_both_layers_round_trip(self):
+        """Test near captures read both layers, far captures the base, at several times the base rate"""
+        frames = self.pattern.frames
+        capture = np.concatenate([frames[40:], frames[:40], frames[10:20]])
+        self.assertEqual(self.core.decode_layered_pattern(capture),
+                         ("https://rahulcodes.in/base", self.enhancement))
+        
+        coarse = demodulate(capture, 4)[0]
+        self.assertEqual(self.core.decode_revolutionary_pattern(coarse), "https://rahulcodes.in/base")
+        base_bytes = self.pattern.base.data_frames * 3 // 8  # 3 bits per data frame
+        self.assertGreater(len(self.enhancement), 5 * base_bytes)
+        self.assertEqual(self.pattern['grid_size'], 16)
+        np.testing.assert_array_equal(self.pattern[40], frames[40])
+    
+    def test_scanner_reads_enhancement_up_close(self):
+        """Test the scanner reads sub-cells only when they are big enough on the sensor"""
+        for pixels, expected in ((10, self.enhancement), (3, None)):
+            scanner = RevolutionaryScanner(core=self.core)
+            size = 16 * pixels
+            for frame in self.pattern.frames:
+                image = camera_view(frame, pixels)
+                scanner._add_frame_to_buffer(scanner._extract_pattern_colors(image, (0, 0, size, size)),
+                                             scanner._extract_subcell_colors(image, (0, 0, size, size)))
+            self.assertEqual(scanner._attempt_decode(), "https://rahulcodes.in/base")
+            self.assertEqual(scanner.last_enhancement, expected)
+    
+    def test_capacity_and_config(self):
+        """Test oversized enhancement layers and bad subdivisions are refused"""
+        capacity = enhancement_capacity(self.pattern.base, 4)
+        with self.assertRaises(ValueError):
+            self.core.encode_layered_pattern("https://rahulcodes.in/base", b"\x00" * capacity)
+        with self.assertRaises(ValueError):
+            RPatternCore(RPatternConfig(subdivision=3))
+        with self.assertRaises(ValueError):
+            RPatternCore().encode_layered_pattern("base", b"extra")
+
+
+if __name__ == '__main__':
+    unittest.main()
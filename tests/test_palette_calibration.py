@@ -0,0 +1,102 @@
+"""
+Test suite for generated palettes, base conversion and palette calibration
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pattern_codec import (
+    generate_palette, encode_symbols, decode_symbols, symbol_count, digit_group, measure_palette
+)
+from format_header import read_format_header, PALETTE_GENERATED
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+
+
+def color_cast(frames):
+    """What a cheap camera does to the screen: black and white hold, midtones wash out unevenly."""
+    return (255 * (frames / 255.0) ** np.array([0.6, 0.75, 0.9])).round().astype(np.uint8)
+
+
+class TestLargePalettes(unittest.TestCase):
+    """Test cases for generated palettes and symbol packing"""
+    
+    def test_base_conversion_round_trip(self):
+        """Test non-power-of-two palettes round trip and a misread digit stays in its group"""
+        data = bytes(range(256)) + b"RPattern"
+        for colors in (5, 12, 16, 48):
+            symbols = encode_symbols(data, colors)
+            self.assertEqual(len(symbols), symbol_count(len(data), colors))
+            self.assertLess(int(symbols.max()), colors)
+            self.assertEqual(decode_symbols(symbols, colors), data)
+            self.assertEqual(decode_symbols(np.concatenate([symbols, [0, 0, 0]]), colors, len(data)), data)
+        
+        group, digits = digit_group(48)
+        self.assertEqual((group, digits), (2, 3))  # 5.33 of the ideal 5.58 bits per symbol
+        symbols = encode_symbols(data, 48)
+        symbols[10 * digits] = (symbols[10 * digits] + 1) % 48
+        damaged = decode_symbols(symbols, 48)
+        self.assertEqual([i for i in range(len(data)) if damaged[i] != data[i]], [20])
+    
+    def test_generated_palettes(self):
+        """Test generated palettes are deterministic, grey-free and well separated"""
+        for colors in (16, 32, 64):
+            palette = generate_palette(colors).astype(int)
+            self.assertEqual(len(np.unique(palette, axis=0)), colors)
+            self.assertTrue((np.ptp(palette, axis=1) > 0).all())
+            distances = np.linalg.norm(palette[:, None] - palette[None], axis=-1) + np.eye(colors) * 1e9
+            self.assertGreater(distances.min(), 70)
+        np.testing.assert_array_equal(generate_palette(12), generate_palette(12))
+        
+        with self.assertRaises(ValueError):
+            generate_palette(65)
+        with self.assertRaises(ValueError):
+            RPatternCore(RPatternConfig(colors=1))
+
+    
+    def test_small_palettes_need_more_sequence_cells(self):
+        """Test 2 and 3 colors are refused with too few index cells, and encode a long URL with enough"""
+        url = "https://rahulcodes.in/" + "x" * 34
+        for colors, sequence_cells in ((2, 12), (3, 8)):
+            with self.assertRaisesRegex(ValueError, f"at least {sequence_cells}"):
+                RPatternCore(RPatternConfig(colors=colors))
+            core = RPatternCore(RPatternConfig(colors=colors, sequence_cells=sequence_cells))
+            pattern = core.encode_revolutionary_pattern(url)
+            capture = np.concatenate([pattern.frames[40:], pattern.frames[:40]])  # started mid-loop
+            self.assertEqual(core.decode_revolutionary_pattern(capture), url)
+        RPatternCore(RPatternConfig(colors=2, sequence_cells=0))  # no index, no limit
+
+class TestPaletteCalibration(unittest.TestCase):
+    """Test cases for the calibration preamble"""
+    
+    def test_measure_palette(self):
+        """Test the measured palette follows the capture, and a blank preamble falls back"""
+        palette = generate_palette(24)
+        rows = np.arange(2 * 16) % 24
+        frames = palette[rows].reshape(2, 4, 4, 3)
+        np.testing.assert_array_equal(measure_palette(color_cast(frames), palette), color_cast(palette))
+        np.testing.assert_array_equal(measure_palette(np.zeros_like(frames), palette), palette)
+    
+    def test_calibrated_decode_survives_color_cast(self):
+        """Test 48 colors decode through a color cast only when classified against the preamble"""
+        text = "https://rahulcodes.in/palette"
+        for calibration, expected in ((True, text), (False, None)):
+            core = RPatternCore(RPatternConfig(colors=48, sequence_cells=0, encoding_mode='cell',
+                                               calibration=calibration))
+            pattern = core.encode_revolutionary_pattern(text)
+            self.assertEqual(core.decode_revolutionary_pattern(pattern.frames), text)
+            self.assertEqual(core.decode_revolutionary_pattern(color_cast(pattern.frames)), expected)
+        
+        header = read_format_header(pattern.frames)[1]
+        self.assertEqual((header.palette_id, header.palette_size), (PALETTE_GENERATED, 48))
+        self.assertEqual(header.total_frames, pattern.total_frames)
+
+
+if __name__ == '__main__':
+    unittest.main()
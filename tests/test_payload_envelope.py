@@ -0,0 +1,145 @@
+"""
+Test suite for the binary payload envelope
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from payload_envelope import (
+    pack_payload, unpack_payload, encode_varint, decode_varint,
+    train_dictionary, register_dictionary, PRESET_DICTIONARIES,
+    DEFAULT_DICTIONARY_ID, FLAG_ZLIB, FLAG_LZMA, FLAG_DICTIONARY
+)
+from rpattern_core import RPattern
+from bulletproof_core import BulletproofRPattern
+
+
+class TestPayloadEnvelope(unittest.TestCase):
+    """Test cases for the versioned binary envelope"""
+    
+    PAYLOAD = {
+        'data': 'upi://pay?pa=rahul@okaxis&am=499.00',
+        'timestamp': 1760000000123,
+        'expiry': 1760000030123,
+        'session_id': 'a1b2c3d4e5f6a7b8c9d0e1f2',
+        'counter': 300,
+        'security_level': 'MILITARY',
+        'auth_hash': '0123456789abcdef'
+    }
+    
+    def test_varint_round_trip(self):
+        """Test varints for small and large values"""
+        for value in (0, 1, 127, 128, 300, 2 ** 40):
+            encoded = encode_varint(value)
+            self.assertEqual(decode_varint(encoded, 0), (value, len(encoded)))
+        self.assertEqual(len(encode_varint(127)), 1)
+    
+    def test_binary_round_trip(self):
+        """Test every field survives the binary envelope"""
+        blob = pack_payload(self.PAYLOAD)
+        
+        self.assertEqual(unpack_payload(blob), self.PAYLOAD)
+        self.assertLess(len(blob), len(pack_payload(self.PAYLOAD, 'json')) // 2)
+    
+    def test_json_debug_format(self):
+        """Test JSON payloads are still readable by the same decoder"""
+        blob = pack_payload(self.PAYLOAD, 'json')
+        
+        self.assertTrue(blob.startswith(b'{'))
+        self.assertEqual(unpack_payload(blob), self.PAYLOAD)
+    
+    def test_unknown_fields(self):
+        """Test unknown tags are skipped and unknown names rejected"""
+        blob = pack_payload({'data': 'x', 'timestamp': 1, 'expiry': 2}) + b'\x7f\x02ab'
+        self.assertEqual(unpack_payload(blob), {'data': 'x', 'timestamp': 1, 'expiry': 2})
+        
+        with self.assertRaises(ValueError):
+            pack_payload({'data': 'x', 'timestamp': 1, 'expiry': 2, 'creator': 'me'})
+        with self.assertRaises(ValueError):
+            pack_payload({'data': 'x', 'timestamp': 1, 'expiry': 2, 'security_level': 'COSMIC'})
+    
+    def test_fewer_frames_than_json(self):
+        """Test the binary envelope shortens patterns for typical URLs"""
+        url = "https://rahulcodes.in"
+        
+        json_pattern = RPattern(payload_format='json').encode_data(url)
+        rpattern = RPattern()
+        binary_pattern = rpattern.encode_data(url)
+        
+        self.assertLess(binary_pattern.total_frames, json_pattern.total_frames)
+        self.assertEqual(rpattern.decode_frames(binary_pattern), url)
+        
+        bp_rpattern = BulletproofRPattern()
+        pattern = bp_rpattern.encode_bulletproof_data(url)
+        self.assertEqual(bp_rpattern.decode_bulletproof_frames(pattern), url)
+
+
+
+class TestPayloadCompression(unittest.TestCase):
+    """Test cases for the pre-encryption compression stage"""
+    
+    UPI = "upi://pay?pa=rahul@okaxis&pn=Rahul%20Chaube&am=499.00&cu=INR&tn=Order42"
+    
+    def _pack(self, data, **kwargs):
+        return pack_payload({'data': data, 'timestamp': 1, 'expiry': 2}, **kwargs)
+    
+    def test_methods_round_trip(self):
+        """Test zlib (with and without dictionary) and lzma inflate back"""
+        data = self.UPI * 4
+        for kwargs in ({'compression': 'zlib'},
+                       {'compression': 'zlib', 'dictionary_id': DEFAULT_DICTIONARY_ID},
+                       {'compression': 'lzma', 'level': 6}):
+            blob = self._pack(data, **kwargs)
+            self.assertTrue(blob[1] & (FLAG_ZLIB | FLAG_LZMA))
+            self.assertLess(len(blob), len(self._pack(data)))
+            self.assertEqual(unpack_payload(blob)['data'], data)
+    
+    def test_dictionary_shrinks_short_payloads(self):
+        """Test the preset dictionary helps where plain deflate cannot"""
+        plain = self._pack(self.UPI)
+        primed = self._pack(self.UPI, compression='zlib', dictionary_id=DEFAULT_DICTIONARY_ID)
+        
+        self.assertTrue(primed[1] & FLAG_DICTIONARY)
+        self.assertLess(len(primed), len(plain) - 20)
+    
+    def test_skip_when_not_smaller(self):
+        """Test incompressible data is sent as-is with no flag"""
+        blob = self._pack(os.urandom(16).hex(), compression='lzma')
+        self.assertEqual(blob[1], 0)
+    
+    def test_trained_dictionary(self):
+        """Test a dictionary trained on a corpus is usable by id"""
+        corpus = [f"upi://pay?pa=shop{i}@ybl&pn=Shop%20{i}&am={i}.00&cu=INR" for i in range(40)]
+        dictionary = train_dictionary(corpus, size=256)
+        
+        self.assertLessEqual(len(dictionary), 256)
+        self.assertIn(b'&cu=INR', dictionary)
+        
+        register_dictionary(42, dictionary)
+        try:
+            blob = self._pack(corpus[7], compression='zlib', dictionary_id=42)
+            self.assertEqual(blob[2], 42)
+            self.assertEqual(unpack_payload(blob)['data'], corpus[7])
+        finally:
+            del PRESET_DICTIONARIES[42]
+        
+        with self.assertRaises(ValueError):
+            unpack_payload(blob)
+    
+    def test_cores_compress_by_default(self):
+        """Test cores compress and still decode"""
+        rpattern = RPattern()
+        compressed = rpattern.encode_data(self.UPI)
+        uncompressed = RPattern(compression='none').encode_data(self.UPI)
+        
+        self.assertLess(compressed.total_frames, uncompressed.total_frames)
+        self.assertEqual(rpattern.decode_frames(compressed), self.UPI)
+
+
+if __name__ == '__main__':
+    unittest.main()
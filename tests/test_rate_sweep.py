@@ -0,0 +1,103 @@
+"""
+Test suite for the symbol-rate calibration sweep
+Author: Rahul Chaube
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from rate_sweep import RateProfile, RateSweepReader, SWEEP_RATES
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+
+
+def camera_views(playlist, fps, exposure, phase=0.003):
+    """
+    Views of a playlist by a camera at `fps`, each one blending whatever the
+    display showed during its `exposure` seconds.
+    """
+    frames, ends = [], []
+    for pattern in playlist:
+        for frame in pattern.frames:
+            frames.append(frame.astype(np.float32))
+            ends.append((ends[-1] if ends else 0) + pattern.frame_duration)
+    starts = np.concatenate([[0], ends[:-1]])
+    
+    views = []
+    for t in np.arange(phase, ends[-1] - exposure, 1 / fps):
+        overlap = np.clip(np.minimum(ends, t + exposure) - np.maximum(starts, t), 0, None)
+        weights = overlap / exposure
+        views.append(np.rint(np.tensordot(weights, frames, axes=1)).astype(np.uint8))
+    return views
+
+
+class TestRateSweep(unittest.TestCase):
+    """Test cases for sweep patterns, the sweep reader and rate profiles"""
+    
+    def setUp(self):
+        """A core running at the default rate and its sweep, followed by a pattern"""
+        self.core = RPatternCore(RPatternConfig(expiry_seconds=60))
+        self.sweep = self.core.encode_rate_sweep()
+        self.pattern = self.core.encode_revolutionary_pattern("https://rahulcodes.in/rate")
+    
+    def test_sweep_steps_up_the_rate(self):
+        """Test one sub-pattern per rate, consecutive frames differing in every cell"""
+        self.assertEqual([p['sweep_rate'] for p in self.sweep], list(SWEEP_RATES))
+        self.assertEqual([p.frame_duration for p in self.sweep], [1 / rate for rate in SWEEP_RATES])
+        for pattern in self.sweep:
+            frames = pattern.frames.astype(int)
+            self.assertTrue((np.abs(np.diff(frames, axis=0)).sum(axis=-1) > 0).all())
+        with self.assertRaises(ValueError):
+            self.core.encode_rate_sweep((10, 5))
+    
+    def test_faster_camera_resolves_faster_rate(self):
+        """Test the measured rate follows the camera: a few views per symbol, blended views ignored"""
+        measured = {}
+        for fps in (15, 30, 120):
+            reader = RateSweepReader(self.core.config.grid_size)
+            results = [reader.feed(view) for view in camera_views(self.sweep + [self.pattern], fps, 0.5 / fps)]
+            self.assertEqual([r for r in results if r is not None], [reader.measured_rate])
+            measured[fps] = reader.measured_rate
+        
+        self.assertEqual(measured[120], SWEEP_RATES[-1])
+        self.assertLess(measured[15], measured[30])
+        self.assertLessEqual(measured[30], 15)  # at least two clean views of every symbol
+        self.assertGreaterEqual(measured[30], 8)
+    
+    def test_restarted_sweep_ends_a_pass(self):
+        """Test a looping sweep reports once per pass, and an unseen rate leaves the pass unresolved"""
+        reader = RateSweepReader(self.core.config.grid_size)
+        views = camera_views(self.sweep * 2, 60, 1 / 120)
+        results = [r for r in map(reader.feed, views) if r is not None]
+        self.assertEqual(results, [SWEEP_RATES[-1]])
+        
+        reader = RateSweepReader(self.core.config.grid_size)
+        for view in camera_views(self.sweep[1:] + [self.pattern], 60, 1 / 120):
+            reader.feed(view)
+        self.assertEqual(reader.measured_rate, 0.0)  # the slowest rate was never shown
+        self.assertIsNone(reader.profile())
+    
+    def test_profile_sets_encoder_rate(self):
+        """Test a saved profile round trips and the encoder then runs at its rate"""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'rate.json')
+            RateProfile(12, 1.5e9).save(path)
+            self.assertEqual(RateProfile.load(path), RateProfile(12, 1.5e9))
+            self.core.use_rate_profile(path)
+        
+        pattern = self.core.encode_revolutionary_pattern("https://rahulcodes.in/rate")
+        self.assertAlmostEqual(pattern['frame_duration'], 1 / 12)
+        with self.assertRaises(ValueError):
+            RateProfile(0)
+        with self.assertRaises(ValueError):
+            RPatternCore(RPatternConfig(frame_duration=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Test suite for rolling refresh: stable data frames under a re-signed header
+Author: Rahul Chaube
+"""
+
+import unittest
+from unittest import mock
+import time
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from auth_header import AuthHeader, StaleHeaderError, check_auth_header, derive_auth_key
+from block_crc import BlockCollector
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+
+
+class TestRollingRefresh(unittest.TestCase):
+    """Test cases for refreshing and decoding rolling patterns"""
+    
+    def setUp(self):
+        """A kiosk core whose data lives an hour under a 20 s header"""
+        self.core = RPatternCore(RPatternConfig(expiry_seconds=3600, refresh_interval=20))
+        self.pattern = self.core.encode_revolutionary_pattern("https://rahulcodes.in/kiosk")
+    
+    def test_refresh_rewrites_only_the_header(self):
+        """Test a refresh re-signs the header frames and leaves every other frame alone"""
+        pattern = self.pattern
+        self.assertLessEqual(pattern['header_expiry'] - pattern['timestamp'], 20_100)
+        
+        refreshed = self.core.refresh_pattern(pattern, now=time.time() + 600)
+        changed = np.flatnonzero((refreshed.frames != pattern.frames).any(axis=(1, 2, 3)))
+        self.assertTrue(set(changed) <= set(range(1, 1 + pattern.header_frames)))
+        self.assertGreater(refreshed['header_expiry'], pattern['header_expiry'] + 500_000)
+        self.assertEqual(refreshed.total_frames, pattern.total_frames)
+        
+        with self.assertRaises(ValueError):
+            self.core.refresh_pattern(pattern, now=time.time() + 3601)
+        with self.assertRaises(ValueError):
+            RPatternCore().refresh_pattern(pattern)
+    
+    def test_stale_header_keeps_verified_blocks(self):
+        """Test a capture under an expired header still banks its blocks, and the next header alone decodes"""
+        blocks = BlockCollector(self.core.config.crc_block_size)
+        with mock.patch('auth_header.time') as clock:
+            clock.time.return_value = time.time() + 60
+            self.assertIsNone(self.core.decode_revolutionary_pattern(self.pattern.frames, blocks=blocks))
+            self.assertTrue(blocks.complete)
+            
+            refreshed = self.core.refresh_pattern(self.pattern, now=clock.time.return_value)
+            head = refreshed.frames[:1 + refreshed.header_frames]
+            self.assertEqual(self.core.decode_revolutionary_pattern(head, blocks=blocks),
+                             "https://rahulcodes.in/kiosk")
+    
+    def test_header_is_required(self):
+        """Test rolling decoders reject headers that fail their MAC instead of trusting the payload"""
+        key = derive_auth_key(b"kiosk")
+        misread = bytearray(AuthHeader.issue(key, 1000).seal(key))
+        misread[-1] ^= 0xFF
+        self.assertIsNone(check_auth_header(bytes(misread), key, now=990))
+        with self.assertRaises(StaleHeaderError):
+            check_auth_header(bytes(misread), key, now=990, required=True)
+        
+        frames = self.pattern.frames.copy()
+        frames[1:1 + self.pattern.header_frames] = 0  # header frames washed out
+        self.assertIsNone(self.core.decode_revolutionary_pattern(frames))
+        self.assertEqual(self.core.decode_revolutionary_pattern(self.pattern.frames),
+                         "https://rahulcodes.in/kiosk")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+"""
+Test suite for the threaded scanner pipeline
+Author: Rahul Chaube
+"""
+
+import unittest
+import threading
+import time
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scanner_pipeline import FrameQueue, ScanPipeline
+from revolutionary_scanner import RevolutionaryScanner
+from pattern_scanner import RPatternScanner
+from rpattern_core import RPattern
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+from hyper_secure_scanner import HyperSecureScanner
+from hyper_secure_core import HyperSecureRPattern
+
+
+def fake_camera(frames, interval=0.0):
+    """cv2.VideoCapture.read stand-in: the given frames, then a failed read."""
+    frames = iter(frames)
+    
+    def read():
+        time.sleep(interval)
+        frame = next(frames, None)
+        return frame is not None, frame
+    return read
+
+
+def camera_images(frames):
+    """BGR camera images showing each (grid, grid, 3) RGB frame as a 120-pixel pattern at (40, 40)."""
+    images = []
+    for frame in frames:
+        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        cell = 120 // len(frame)
+        image[40:160, 40:160] = np.kron(frame, np.ones((cell, cell, 1), dtype=np.uint8))[..., ::-1]
+        images.append(image)
+    return images
+
+
+def scan_stages(scanner, images):
+    """Run a scanner's own stages over camera images, with the pattern held still at (40, 40)."""
+    scanner.locate_pattern = lambda frame: [(40, 40, 120, 120)]
+    scanner.tracking = False
+    return run(ScanPipeline(fake_camera(images), [
+        ('detect', scanner._detect_stage),
+        ('extract', scanner._extract_stage),
+        ('decode', scanner._decode_stage),
+    ], drop_policy='queue'))
+
+
+def run(pipeline, timeout=10.0):
+    """Run a pipeline until its camera runs out."""
+    pipeline.start()
+    deadline = time.monotonic() + timeout
+    while pipeline.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+    return pipeline
+
+
+class TestFrameQueue(unittest.TestCase):
+    """Test cases for the two drop policies"""
+    
+    def test_latest_drops_oldest(self):
+        """Test a full 'latest' queue keeps the newest frames"""
+        queue = FrameQueue(2, 'latest')
+        for index in range(5):
+            self.assertTrue(queue.put(index))
+        self.assertEqual((queue.depth, queue.dropped, queue.high_water), (2, 3, 2))
+        self.assertEqual([queue.get(0), queue.get(0), queue.get(0)], [3, 4, None])
+        with self.assertRaises(ValueError):
+            FrameQueue(2, 'newest')
+    
+    def test_queue_blocks_until_room(self):
+        """Test a full 'queue' queue holds the producer back, and closing releases it"""
+        queue = FrameQueue(1, 'queue')
+        queue.put(0)
+        results = []
+        producer = threading.Thread(target=lambda: results.append(queue.put(1)))
+        producer.start()
+        time.sleep(0.05)
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(queue.get(0), 0)
+        producer.join(1)
+        self.assertEqual((results, queue.get(0), queue.dropped), ([True], 1, 0))
+        
+        queue.put(2)
+        producer = threading.Thread(target=lambda: results.append(queue.put(3)))
+        producer.start()
+        queue.close()
+        producer.join(1)
+        self.assertEqual(results, [True, False])
+        self.assertEqual([queue.get(), queue.get()], [2, None])
+
+
+class TestScanPipeline(unittest.TestCase):
+    """Test cases for capture and stage threads"""
+    
+    def test_stages_overlap(self):
+        """Test slow stages run side by side: every frame, in order, at about the camera's rate"""
+        seen = []
+        
+        def slow(item):
+            time.sleep(0.01)
+            return item
+        
+        def record(item):
+            time.sleep(0.01)
+            seen.append(item['frame'])
+            return item
+        
+        start = time.monotonic()
+        pipeline = run(ScanPipeline(fake_camera(range(60), 0.01),
+                                    [('detect', slow), ('extract', slow), ('decode', record)],
+                                    drop_policy='queue'))
+        elapsed = time.monotonic() - start
+        self.assertEqual(seen, list(range(60)))
+        self.assertLess(elapsed, 60 * 0.03)  # a serial loop takes at least 60 x 40 ms
+        stats = pipeline.stats()
+        self.assertEqual([stats[name]['frames'] for name in ('detect', 'extract', 'decode')], [60] * 3)
+        self.assertEqual(sum(stats[name]['dropped'] for name in ('detect', 'extract', 'decode')), 0)
+    
+    def test_latest_frame_wins(self):
+        """Test a stage slower than the camera drops stale frames and never falls behind"""
+        seen = []
+        
+        def decode(item):
+            time.sleep(0.005)
+            seen.append(item['frame'])
+            return None if item['frame'] % 2 else item  # filtered items go no further
+        
+        pipeline = run(ScanPipeline(fake_camera(range(400), 0.0005), [('decode', decode)], queue_size=1))
+        stats = pipeline.stats()['decode']
+        self.assertGreater(stats['dropped'], 0)
+        self.assertEqual(stats['frames'] + stats['dropped'], 400)
+        self.assertEqual(stats['high_water'], 1)
+        self.assertEqual(seen, sorted(seen))
+        self.assertIn('decode:', pipeline.summary())
+    
+    def test_revolutionary_scanner_stages(self):
+        """Test the scanner's own stages decode a pattern from camera frames"""
+        core = RPatternCore(RPatternConfig(expiry_seconds=60))
+        pattern = core.encode_revolutionary_pattern("https://rahulcodes.in/pipeline")
+        scanner = RevolutionaryScanner(drop_policy='queue', core=core)
+        # Marker frames are too dark for color-based detection: hold the pattern still instead
+        scanner._locate_patterns = lambda frame: [(40, 40, 120, 120)]
+        scanner.tracking = False
+        
+        camera = camera_images(np.concatenate([pattern.frames[30:], pattern.frames]))
+        
+        run(ScanPipeline(fake_camera(camera), [
+            ('detect', scanner._detect_stage),
+            ('extract', scanner._extract_stage),
+            ('decode', scanner._decode_stage),
+        ], drop_policy='queue'))
+        self.assertEqual([item['decoded'] for item in scanner._decoded], ["https://rahulcodes.in/pipeline"])
+    
+    def test_hyper_secure_scanner_stages(self):
+        """Test the HyperSecure scanner's stages decode camera frames: index digits only read unmirrored"""
+        core = HyperSecureRPattern(expiry_seconds=60)
+        pattern = core.encode_hyper_secure_data("https://rahulcodes.in/hyper")
+        scanner = HyperSecureScanner(drop_policy='queue', session_salt=core.session_salt)
+        self.assertEqual(scanner.sequence_cells, 5)
+        
+        scan_stages(scanner, camera_images(np.concatenate([pattern.frames[20:], pattern.frames])))
+        self.assertEqual([data for _, data in scanner._decoded], ["https://rahulcodes.in/hyper"])
+    
+    def test_hyper_secure_scanner_dark_capture(self):
+        """Test a slightly dark capture decodes every loop: the timestamp frame is not taken for the end frame"""
+        core = HyperSecureRPattern(expiry_seconds=60)
+        pattern = core.encode_hyper_secure_data("https://rahulcodes.in/dark")
+        for offset in (-6, -12):
+            scanner = HyperSecureScanner(drop_policy='queue', session_salt=core.session_salt)
+            # The tail of a loop first, while detection settles, then three full loops
+            images = camera_images(np.concatenate([pattern.frames[-10:]] + [pattern.frames] * 3))
+            scan_stages(scanner, [np.clip(image.astype(int) + offset, 0, 255).astype(np.uint8) for image in images])
+            self.assertEqual([data for _, data in scanner._decoded], ["https://rahulcodes.in/dark"] * 3)
+    
+    def test_hyper_secure_scanner_cell_mode(self):
+        """Test the scanner's encoding_mode='cell' option reads rows in their captured order"""
+        core = HyperSecureRPattern(expiry_seconds=60, grid_size=8, encoding_mode='cell')
+        pattern = core.encode_hyper_secure_data("https://rahulcodes.in/cells")
+        scanner = HyperSecureScanner(grid_size=8, encoding_mode='cell', drop_policy='queue',
+                                     session_salt=core.session_salt)
+        
+        scan_stages(scanner, camera_images(np.concatenate([pattern.frames[2:], pattern.frames])))
+        self.assertEqual([data for _, data in scanner._decoded], ["https://rahulcodes.in/cells"])
+    
+    def test_rpattern_scanner_stages(self):
+        """Test the v1 scanner's stages decode a pattern from camera frames"""
+        pattern = RPattern().encode_data("https://rahulcodes.in/v1")
+        scanner = RPatternScanner(drop_policy='queue')
+        
+        scan_stages(scanner, camera_images(np.concatenate([pattern.frames[10:], pattern.frames, pattern.frames])))
+        self.assertIn("https://rahulcodes.in/v1", [data for _, data in scanner._decoded])
+    
+    def test_rpattern_scanner_reads_format_header(self):
+        """Test snapped v1 scanner colors keep the header palette: the header is read, no cell fakes a sync"""
+        pattern = RPattern().encode_data("https://rahulcodes.in/header")
+        scanner = RPatternScanner()
+        region = (40, 40, 120, 120)
+        colors = np.array([scanner.extract_grid_colors(image, region) for image in camera_images(pattern.frames)])
+        
+        np.testing.assert_array_equal(colors, pattern.frames)
+        self.assertEqual(scanner.decoder.read_header(colors).total_frames, pattern.total_frames)
+        header_centers = [scanner.color_detector.classify_color(tuple(int(c) for c in frame[1, 1]))
+                          for frame in colors[1:1 + pattern.header_frames]]
+        self.assertNotIn('sync_start', header_centers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Test suite for shared scanner vision helpers: region tracking, the detection pyramid and grid sampling
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scanner_vision import RegionTracker, single_region, detect_multiscale, sample_grid
+from revolutionary_scanner import RevolutionaryScanner
+from pattern_scanner import RPatternScanner
+from hyper_secure_scanner import HyperSecureScanner
+
+
+SIZE = 160  # pattern side in camera pixels
+
+
+def camera_frame(x, y, size=SIZE, dark=False, background=30):
+    """720p BGR camera frame with a 4x4 pattern of bright cells at (x, y)."""
+    image = np.full((720, 1280, 3), background, dtype=np.uint8)
+    grid = np.array([[(0, 0, 255), (0, 255, 0)], [(255, 0, 0), (0, 255, 255)]], dtype=np.uint8)
+    cells = np.kron(np.tile(grid, (2, 2, 1)), np.ones((size // 4, size // 4, 1), dtype=np.uint8))
+    image[y:y + size, x:x + size] = 0 if dark else cells
+    return image
+
+
+class TestRegionTracker(unittest.TestCase):
+    """Test cases for lock-on tracking around a scanner's detector"""
+    
+    def setUp(self):
+        """A tracker around the Revolutionary scanner's detector, recording every image it is given"""
+        self.scanner = RevolutionaryScanner()
+        self.shapes = []
+        
+        def detect(frame):
+            self.shapes.append(frame.shape[:2])
+            return self.scanner._detect_pattern_regions(frame)
+        self.tracker = RegionTracker(detect)
+    
+    def test_follows_a_moving_pattern_in_a_window(self):
+        """Test one full-frame detection, then small windows that keep up with the motion"""
+        for step in range(20):
+            x, y = 200 + 12 * step, 100 + 5 * step
+            regions = self.tracker.update(camera_frame(x, y))
+            self.assertEqual(len(regions), 1)
+            rx, ry, _, _ = regions[0]
+            self.assertLessEqual(max(abs(rx - x), abs(ry - y)), 2)
+        
+        self.assertEqual((self.tracker.full_detections, self.tracker.tracked_frames), (1, 19))
+        self.assertEqual(self.shapes[0], (720, 1280))
+        self.assertTrue(all(h * w < 720 * 1280 / 8 for h, w in self.shapes[1:]))
+        np.testing.assert_allclose(self.tracker.velocity, (12, 5), atol=1)
+    
+    def test_coasts_through_misses_then_loses_lock(self):
+        """Test dark frames keep the predicted region until max_misses, then full detection resumes"""
+        self.tracker.update(camera_frame(300, 200))
+        for _ in range(self.tracker.max_misses):
+            self.assertEqual(self.tracker.update(camera_frame(300, 200, dark=True))[0][:2], (300, 200))
+        self.assertTrue(self.tracker.locked)
+        
+        # A region of a very different size fails the confidence check too: one miss too many
+        regions = self.tracker.update(camera_frame(300, 200, size=240))
+        self.assertEqual(self.tracker.full_detections, 2)
+        self.assertEqual(regions[0][2:], (240, 240))  # found again by the full-frame detection
+        
+        self.tracker.reset()
+        self.assertEqual(self.tracker.update(camera_frame(300, 200, dark=True)), [])
+        self.assertFalse(self.tracker.locked)
+    
+    def test_single_region_detectors(self):
+        """Test detectors returning one region or None work with the tracker"""
+        tracker = RegionTracker(single_region(self.scanner._detect_pattern_region))
+        self.assertEqual(len(tracker.update(camera_frame(100, 100))), 1)
+        self.assertTrue(tracker.locked)
+        self.assertEqual(RegionTracker(single_region(lambda frame: None)).update(camera_frame(0, 0)), [])
+
+
+
+class TestDetectionPyramid(unittest.TestCase):
+    """Test cases for full-frame searches on a downscaled pyramid level"""
+    
+    def test_matches_full_resolution_detection(self):
+        """Test every scanner's detector finds the same corners through the pyramid"""
+        revolutionary, rpattern, hyper = RevolutionaryScanner(), RPatternScanner(), HyperSecureScanner()
+        detectors = [
+            (revolutionary._detect_pattern_regions, camera_frame(301, 203)),
+            (single_region(rpattern.detect_pattern_region), camera_frame(301, 203, background=200)),
+            (single_region(hyper.detect_pattern_region_advanced), camera_frame(301, 203)),
+        ]
+        for detect, frame in detectors:
+            expected = detect(frame)
+            self.assertEqual(len(expected), 1)
+            self.assertEqual(detect_multiscale(frame, detect, 0.5), expected)
+            self.assertEqual(detect_multiscale(frame, detect, 1.0), expected)
+        
+        self.assertEqual(revolutionary._locate_patterns(camera_frame(301, 203)), [(301, 203, SIZE, SIZE)])
+        self.assertEqual(rpattern.locate_pattern(camera_frame(301, 203, background=200)),
+                         [rpattern.detect_pattern_region(camera_frame(301, 203, background=200))])
+        self.assertEqual(hyper.locate_pattern(camera_frame(301, 203)), [(301, 203, SIZE, SIZE)])
+    
+    def test_cost_falls_with_the_scale(self):
+        """Test the full frame is only seen downscaled, the full resolution only around the candidate"""
+        scanner = RevolutionaryScanner()
+        frame = camera_frame(301, 203)
+        for scale in (0.5, 0.25):
+            shapes = []
+            
+            def detect(image, image_scale=1.0):
+                shapes.append(image.shape[:2])
+                return scanner._detect_pattern_regions(image, image_scale)
+            
+            self.assertEqual(detect_multiscale(frame, detect, scale), [(301, 203, SIZE, SIZE)])
+            self.assertEqual(shapes[0], (int(720 * scale), int(1280 * scale)))
+            self.assertTrue(all(h * w < 2 * SIZE * SIZE for h, w in shapes[1:]))
+            self.assertLess(sum(h * w for h, w in shapes), (scale ** 2 + 0.1) * 720 * 1280)
+        
+        # The tracker's full-frame searches go through the pyramid, its windows do not
+        shapes = []
+        tracker = RegionTracker(detect, full_detect=lambda image: detect_multiscale(image, detect, 0.5))
+        tracker.update(frame)
+        tracker.update(frame)
+        self.assertEqual(shapes[0], (360, 640))
+        self.assertEqual(len(shapes), 3)  # level, refinement, search window
+    
+    def test_size_limits_follow_the_scale(self):
+        """Test the pixel size limits apply at camera resolution, whatever the level searched"""
+        scanner = RevolutionaryScanner()
+        small = camera_frame(301, 203, size=80)  # below min_pattern_size
+        self.assertEqual(scanner._detect_pattern_regions(small), [])
+        self.assertEqual(detect_multiscale(small, scanner._detect_pattern_regions, 0.5), [])
+        level = camera_frame(301, 203)[::2, ::2]  # the pattern is 80 pixels wide at this level
+        self.assertEqual(scanner._detect_pattern_regions(level), [])
+        self.assertEqual(scanner._detect_pattern_regions(level, 0.5), [(151, 102, SIZE // 2, SIZE // 2)])
+        for scale in (0, 1.5):
+            with self.assertRaises(ValueError):
+                detect_multiscale(small, scanner._detect_pattern_regions, scale)
+
+
+
+class TestSampleGrid(unittest.TestCase):
+    """Test cases for sampling every cell of a pattern in one array operation"""
+    
+    def test_matches_per_cell_means(self):
+        """Test the vectorized means equal a per-cell loop, leftover rows and columns ignored"""
+        roi = np.random.default_rng(7).integers(0, 256, (203, 197, 3), dtype=np.uint8)
+        colors = sample_grid(roi, 4, margin=0.2, samples=0)
+        self.assertEqual((colors.shape, colors.dtype), ((4, 4, 3), np.uint8))
+        
+        cell_height, cell_width = 203 // 4, 197 // 4
+        inset_y, inset_x = int(cell_height * 0.2), int(cell_width * 0.2)
+        for row in range(4):
+            for col in range(4):
+                cell = roi[row * cell_height + inset_y:(row + 1) * cell_height - inset_y,
+                           col * cell_width + inset_x:(col + 1) * cell_width - inset_x]
+                expected = np.mean(cell, axis=(0, 1)).astype(np.uint8)[::-1]  # BGR -> RGB
+                np.testing.assert_array_equal(colors[row, col], expected)
+        self.assertIsNone(sample_grid(roi[:3], 4))
+    
+    def test_margin_and_sub_sampling(self):
+        """Test the inset keeps cell borders out, and sub-sampled means stay close to the full ones"""
+        rng = np.random.default_rng(3)
+        grid = rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)
+        roi = np.kron(grid, np.ones((50, 50, 1), dtype=np.uint8))
+        roi[::50], roi[:, ::50] = 255, 255  # grid lines the inset must leave out
+        np.testing.assert_array_equal(sample_grid(roi, 8), grid[..., ::-1])
+        
+        noisy = np.clip(roi.astype(int) + rng.normal(0, 10, roi.shape), 0, 255).astype(np.uint8)
+        full, sampled = sample_grid(noisy, 8, samples=0), sample_grid(noisy, 8, samples=8)
+        self.assertLessEqual(np.abs(full.astype(int) - sampled.astype(int)).max(), 4)
+    
+    def test_scanners_share_it(self):
+        """Test every scanner's extraction returns a (grid, grid, 3) array of colors"""
+        frame = camera_frame(301, 203)
+        region = (301, 203, SIZE, SIZE)
+        expected = np.tile(np.array([[(255, 0, 0), (0, 255, 0)], [(0, 0, 255), (255, 255, 0)]]), (2, 2, 1))
+        
+        revolutionary, hyper = RevolutionaryScanner(), HyperSecureScanner()
+        np.testing.assert_array_equal(revolutionary._extract_pattern_colors(frame, region), expected)
+        np.testing.assert_array_equal(hyper.extract_grid_colors_advanced(frame, region), expected)
+        
+        rpattern = RPatternScanner()
+        colors = rpattern.extract_grid_colors(frame, (301, 203, 120, 120))
+        self.assertEqual(colors.shape, (3, 3, 3))
+        self.assertTrue(all(tuple(color) in rpattern.color_detector.RGB_COLORS for color in colors.reshape(-1, 3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
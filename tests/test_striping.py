@@ -0,0 +1,101 @@
+"""
+Test suite for striping one payload across several displays or tiles
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from format_header import FormatHeader, read_format_header, FORMAT_REVOLUTIONARY
+from revolutionary_scanner import RevolutionaryScanner
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+
+
+CELL = 30  # camera pixels per pattern cell
+GAP = 20  # dark border between tiles
+
+
+def camera_frame(grids):
+    """BGR camera frame of tiles side by side, one (grid, grid, 3) RGB frame per tile."""
+    size = grids[0].shape[0] * CELL
+    image = np.zeros((size + 2 * GAP, len(grids) * (size + GAP) + GAP, 3), dtype=np.uint8)
+    for index, grid in enumerate(grids):
+        x = GAP + index * (size + GAP)
+        image[GAP:GAP + size, x:x + size] = np.kron(grid, np.ones((CELL, CELL, 1), dtype=np.uint8))[..., ::-1]
+    return image
+
+
+def tile_frames(playlist):
+    """Endless frames of one tile: its sub-patterns in turn."""
+    while True:
+        for pattern in playlist:
+            yield from pattern.frames
+
+
+class TestStriping(unittest.TestCase):
+    """Test cases for striped encoding, tile detection and merging"""
+    
+    def setUp(self):
+        """A long message striped across three tiles"""
+        self.core = RPatternCore(RPatternConfig(chunk_size=48, expiry_seconds=120))
+        self.text = "https://rahulcodes.in/gate?" + "ticket=0123456789&" * 12
+        self.playlists = self.core.encode_striped_patterns(self.text, 3)
+    
+    def test_chunks_dealt_round_robin(self):
+        """Test every tile names its place and the tiles share the chunks evenly"""
+        self.assertEqual(len(self.playlists), 3)
+        for tile, playlist in enumerate(self.playlists):
+            for pattern in playlist:
+                header = read_format_header(pattern.frames)[1]
+                self.assertEqual((header.tile_index, header.tiles, header.chunked), (tile, 3, True))
+        self.assertEqual(self.playlists[0][0]['chunk_index'], None)  # manifest first
+        self.assertEqual([p['chunk_index'] for p in self.playlists[1]], [0, 3])
+        
+        single = sum(p.total_frames for p in self.core.encode_chunked_patterns(self.text))
+        loops = [sum(p.total_frames for p in playlist) for playlist in self.playlists]
+        self.assertLess(max(loops), single / 2)
+        
+        with self.assertRaises(ValueError):
+            self.core.encode_striped_patterns(self.text, 17)
+    
+    def test_scanner_merges_tiles(self):
+        """Test the scanner finds every tile in one camera frame and decodes in about a third of the time"""
+        # A decoder of its own: only the generator's keys are shared
+        scanner = RevolutionaryScanner(config=self.core.config, auth_key=self.core.auth_key,
+                                       chunk_secret=self.core.chunk_secret)
+        self.assertIsNot(scanner.decoder, self.core)
+        
+        tiles = [tile_frames(playlist) for playlist in self.playlists]
+        longest = max(sum(p.total_frames for p in playlist) for playlist in self.playlists)
+        decoded, steps = None, 0
+        while decoded is None and steps < 2 * longest:
+            image = camera_frame([next(tile) for tile in tiles])
+            if steps == 60:  # a data frame on every tile: bright enough for region detection
+                regions = scanner._detect_pattern_regions(image)
+                self.assertEqual([x for x, _, _, _ in regions], sorted(x for x, _, _, _ in regions))
+                self.assertEqual(len(regions), 3)
+            size = 4 * CELL
+            fixed = [(GAP + i * (size + GAP), GAP, size, size) for i in range(3)]
+            decoded = scanner._scan_tiles(image, fixed)
+            steps += 1
+        
+        self.assertEqual(decoded, self.text)
+        self.assertLess(steps, longest + 100)
+    
+    def test_tile_header_fields(self):
+        """Test the stripe byte round trips and out of range tiles are refused"""
+        header = FormatHeader(FORMAT_REVOLUTIONARY, 4, 2, 3, 100, tile_index=5, tiles=16, chunked=True)
+        self.assertEqual(FormatHeader.unpack(header.pack()), header)
+        for tile_index, tiles in ((3, 3), (0, 17), (0, 0)):
+            with self.assertRaises(ValueError):
+                FormatHeader(FORMAT_REVOLUTIONARY, 4, 2, 3, 100, tile_index=tile_index, tiles=tiles).pack()
+
+
+if __name__ == '__main__':
+    unittest.main()
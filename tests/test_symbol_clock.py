@@ -0,0 +1,95 @@
+"""
+Test suite for clock cells and symbol boundary detection
+Author: Rahul Chaube
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pattern_codec import Pattern, CLOCK_PALETTE
+from format_header import read_format_header
+from rpattern_revolutionary import RPatternCore, RPatternConfig
+from symbol_clock import SymbolClock
+
+
+def oversample(frames, views=4):
+    """Camera-like capture: several views per symbol, the first blended with the previous symbol."""
+    captured = []
+    for index, frame in enumerate(frames):
+        previous = frames[index - 1].astype(np.int32) if index else frame.astype(np.int32)
+        captured.append(((previous + frame.astype(np.int32)) // 2).astype(np.uint8))
+        captured.extend([frame] * (views - 1))
+    return captured
+
+
+class TestClockCells(unittest.TestCase):
+    """Test cases for the clock cells laid out by the codec"""
+    
+    def test_clock_counts_frames(self):
+        """Test the clock cells show the low bits of the frame index"""
+        palette = np.array([(255, 0, 0), (0, 0, 255)], dtype=np.uint8)
+        pattern = Pattern.build(np.arange(40) % 2, palette, 3, 0.05, encoding_mode='cell',
+                                leading=[(255, 255, 255)], clock_cells=2)
+        self.assertEqual(pattern.clock_cells, 2)
+        
+        clock = pattern.frames.reshape(len(pattern), -1, 3)[:, 7:]
+        bits = (clock == CLOCK_PALETTE[1]).all(axis=2).astype(int)
+        np.testing.assert_array_equal(bits @ [1, 2], np.arange(len(pattern)) % 4)
+        
+        with self.assertRaises(ValueError):
+            Pattern.build([0], palette, 2, 0.05, sequence_cells=2, clock_cells=1)
+    
+    def test_header_records_clock(self):
+        """Test the format header tells scanners how many clock cells to skip"""
+        core = RPatternCore(RPatternConfig(clock_cells=2))
+        pattern = core.encode_revolutionary_pattern("https://rahulcodes.in/clock")
+        _, header = read_format_header(pattern.frames)
+        self.assertEqual((header.clock_cells, header.sequence_cells), (2, 5))
+        self.assertEqual(header.total_frames, pattern.total_frames)
+        
+        with self.assertRaises(ValueError):
+            RPatternCore(RPatternConfig(clock_cells=1, transmission='fountain'))
+
+
+class TestSymbolClock(unittest.TestCase):
+    """Test cases for collapsing oversampled captures"""
+    
+    def test_dedupes_oversampled_capture(self):
+        """Test a 4x oversampled stream with blended transitions decodes symbol for symbol"""
+        config = RPatternConfig(clock_cells=1, sequence_cells=0, frame_duration=0.066)
+        core = RPatternCore(config)
+        pattern = core.encode_revolutionary_pattern("https://rahulcodes.in/fast")
+        
+        clock = SymbolClock(1)
+        symbols = [clock.feed(view) for view in oversample(pattern.frames)]
+        symbols = [grid for grid in symbols + [clock.flush()] if grid is not None]
+        
+        self.assertEqual(len(symbols), len(pattern))
+        self.assertEqual(clock.blended, len(pattern) - 1)
+        np.testing.assert_array_equal(np.stack(symbols), pattern.frames)
+        self.assertEqual(core.decode_revolutionary_pattern(np.stack(symbols)), "https://rahulcodes.in/fast")
+    
+    def test_counts_dropped_symbols(self):
+        """Test clock jumps count the symbols the camera never saw"""
+        core = RPatternCore(RPatternConfig(clock_cells=2))
+        frames = core.encode_revolutionary_pattern("https://rahulcodes.in/drop").frames
+        capture = np.delete(frames, [20, 30, 31], axis=0)
+        
+        clock = SymbolClock(2, sequence_cells=5)
+        kept = [grid for grid in map(clock.feed, np.repeat(capture, 3, axis=0)) if grid is not None]
+        kept.append(clock.flush())
+        self.assertEqual(len(kept), len(capture))
+        self.assertEqual(clock.dropped, 3)
+        
+        with self.assertRaises(ValueError):
+            SymbolClock(0)
+
+
+if __name__ == '__main__':
+    unittest.main()